@@ -0,0 +1,191 @@
+# async_client.py
+import asyncio
+import json
+from urllib.parse import urlsplit
+import aiohttp
+from coinbase_client import API_HOST, API_BASE_URL, USER_AGENT, CONNECT_TIMEOUT, READ_TIMEOUT, sign_request
+from order_state import order_state_table
+from rate_limiter import PRIVATE, RequestShed, get_rate_limiter, request_priority, retry_after
+from logging_config import app_logger, info_logger, error_logger
+
+# Open connections shared by every coroutine; further requests wait for a free connection
+CONNECTION_LIMIT = 32
+
+# Orders per list page
+ORDERS_PER_PAGE = 1000
+
+# Order placements of one batch in flight at a time
+ORDER_BATCH_WINDOW = 20
+
+# Errors treated as a failed request (network errors, timeouts, malformed responses and requests
+# shed by the rate limiter)
+REQUEST_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError, TypeError, RequestShed)
+
+class AsyncCoinbaseClient:
+    # Asyncio counterpart of coinbase_client for the cycle scheduler: one aiohttp session with
+    # a bounded connection pool, requests signed by coinbase_client.sign_request
+
+    def __init__(self, key=None, secret=None, base_url=API_BASE_URL, connection_limit=CONNECTION_LIMIT):
+        self.key = key
+        self.secret = secret
+        self.base_url = base_url
+        self.host = API_HOST if base_url == API_BASE_URL else urlsplit(base_url).netloc  # Named in JWT request claims
+        self.connection_limit = connection_limit
+        self._session = None
+
+    def _get_session(self):
+        # Created on first use so that it belongs to the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.connection_limit)
+            timeout = aiohttp.ClientTimeout(sock_connect=CONNECT_TIMEOUT, sock_read=READ_TIMEOUT)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers={
+                'User-Agent': USER_AGENT,
+                'accept': "application/json",
+            })
+            info_logger.info("Async Coinbase HTTP session created (limit=%s)", self.connection_limit)
+
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def request(self, method, endpoint, params=None, payload=None, priority=None):
+        # Returns (status code, decoded JSON body or None) once the shared rate limiter lets the
+        # request through (see coinbase_client.send_request)
+        limiter = get_rate_limiter()
+        await limiter.acquire_async(PRIVATE, request_priority(method, endpoint) if priority is None else priority)
+
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b''
+
+        headers = sign_request(method, endpoint, body, self.key, self.secret, self.host)
+        if headers is None:
+            raise aiohttp.ClientError("Unable to sign request: API key and/or API secret is missing")
+
+        # aiohttp takes repeated query keys as a list of pairs
+        query = []
+        for name, value in (params or {}).items():
+            for item in (value if isinstance(value, (list, tuple)) else [value]):
+                query.append((name, str(item)))
+
+        async with self._get_session().request(method, f"{self.base_url}{endpoint}", params=query, data=body or None, headers=headers) as response:
+            content = await response.read()
+            if response.status == 429:
+                limiter.pause(PRIVATE, retry_after(response.headers))
+            return response.status, json.loads(content) if content else None
+
+    async def post_order(self, payload, description):
+        # Place an order and return the order ID (or None on failure)
+        try:
+            status, data = await self.request("POST", "/api/v3/brokerage/orders", payload=payload)
+        except REQUEST_ERRORS as e:
+            error_logger.error(f"An error occurred while placing {description}: {e}")
+            return None
+
+        if status == 200 and data is not None:
+            order_id = data.get("order_id")
+            if order_id is not None and data.get("success") == True:
+                # Track the new order so that the fill feed and bulk poller keep it up to date
+                order_state_table.track(order_id, payload.get("product_id"))
+                app_logger.info("%s placed. Order ID: %s", description.capitalize(), order_id)
+                return order_id
+
+        error_logger.error(f"Error placing {description} - Status Code: {status}")
+        return None
+
+    async def post_orders(self, payloads, description, window=ORDER_BATCH_WINDOW):
+        # Place a batch of orders concurrently, at most `window` requests in flight; returns their
+        # order IDs in payload order. All or nothing: if any placement fails, the orders that were
+        # placed are cancelled in one batch_cancel request and None is returned.
+        in_flight = asyncio.Semaphore(window)
+
+        async def place(index, payload):
+            async with in_flight:
+                return await self.post_order(payload, f"{description} {index + 1}/{len(payloads)}")
+
+        order_ids = await asyncio.gather(*(place(index, payload) for index, payload in enumerate(payloads)))
+        if all(order_ids):
+            return list(order_ids)
+
+        placed = [order_id for order_id in order_ids if order_id is not None]
+        error_logger.error(f"{len(payloads) - len(placed)} of {len(payloads)} {description}s not placed; cancelling the rest")
+        if placed and await self.cancel_orders(placed) is None:
+            error_logger.error(f"Failed to cancel orders {placed}. Check the exchange and handle them manually.")
+        return None
+
+    async def get_order(self, order_id):
+        # Order details ({"order": {...}}) or None
+        try:
+            status, data = await self.request("GET", f"/api/v3/brokerage/orders/historical/{order_id}")
+        except REQUEST_ERRORS as e:
+            error_logger.error(f"An error occurred while fetching order {order_id}: {e}")
+            return None
+
+        if status == 200 and data is not None and "order" in data:
+            return data
+
+        error_logger.error(f"Error fetching order {order_id} - Status Code: {status}")
+        return None
+
+    async def list_orders(self, params):
+        # Every page of /orders/historical/batch for the given filters
+        orders = []
+        cursor = None
+
+        while True:
+            page_params = dict(params)
+            page_params.setdefault("limit", ORDERS_PER_PAGE)
+            if cursor:
+                page_params["cursor"] = cursor
+
+            status, data = await self.request("GET", "/api/v3/brokerage/orders/historical/batch", params=page_params)
+            if status != 200 or data is None:
+                raise aiohttp.ClientError(f"Order list request failed - Status Code: {status}")
+
+            orders.extend(data.get("orders", []))
+
+            cursor = data.get("cursor")
+            if not data.get("has_next") or not cursor:
+                return orders
+
+    async def cancel_orders(self, order_ids):
+        try:
+            status, data = await self.request("POST", "/api/v3/brokerage/orders/batch_cancel", payload={"order_ids": order_ids})
+        except REQUEST_ERRORS as e:
+            error_logger.error(f"Error cancelling orders: {e}")
+            return None
+
+        if status == 200 and data is not None:
+            return data.get("results", [])
+        return None
+
+    async def get_current_price(self, product_id):
+        try:
+            status, data = await self.request("GET", f"/api/v3/brokerage/products/{product_id}")
+            if status == 200 and data is not None:
+                return float(data["price"])
+        except REQUEST_ERRORS as e:
+            error_logger.error(f"Error fetching current price for {product_id}: {e}")
+            return None
+
+        error_logger.error(f"Error fetching current price for {product_id} - Status Code: {status}")
+        return None
+
+    async def get_best_bid_ask(self, product_id):
+        # (best bid, best ask) or None
+        try:
+            status, data = await self.request("GET", "/api/v3/brokerage/best_bid_ask", params={"product_ids": product_id})
+            if status == 200 and data is not None:
+                for book in data.get("pricebooks", []):
+                    if book.get("product_id") == product_id and book.get("bids") and book.get("asks"):
+                        return float(book["bids"][0]["price"]), float(book["asks"][0]["price"])
+        except REQUEST_ERRORS as e:
+            error_logger.error(f"An error occurred in get_best_bid_ask for {product_id}: {e}")
+            return None
+
+        error_logger.error(f"No bids or asks found for {product_id}")
+        return None
+
+# Indicate that async_client.py module loaded successfully
+info_logger.info("async_client module loaded successfully")
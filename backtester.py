@@ -0,0 +1,458 @@
+# backtester.py
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+import numpy as np
+
+# Logs of backtests go to a temporary directory instead of the bot's log files (unless PORTALX_LOG_DIR is set)
+os.environ.setdefault("PORTALX_LOG_DIR", tempfile.mkdtemp(prefix="portalx-logs-"))
+
+from logging_config import app_logger, info_logger, error_logger
+from starting_input import user_config
+from indicator_kernels import candle_columns, bollinger_bands_series, rsi_series, mean24_series
+from quantizer import tick, get_quantizer, FLOOR
+from price_rules import next_open_sell_price, next_open_buy_price, starting_sell_price, starting_buy_price, close_buy_price, close_sell_price, sell_price_favorable, buy_price_favorable, quote_to_base_size
+from compounding_utils import calculate_close_limit_buy_compounding_amt_Q, calculate_close_limit_sell_compounding_amt_B, determine_next_close_size_Q_limit, determine_next_close_size_B_limit, determine_next_open_size_B_limit, determine_next_open_size_Q_limit, calculate_open_limit_sell_compounding_amt_B, calculate_open_limit_buy_compounding_amt_Q
+from order_processing_utils import open_limit_sell_order_processing, open_limit_buy_order_processing, close_limit_buy_order_processing, close_limit_sell_order_processing
+from product_stats_cache import get_product_stats_cache
+from market_context import RSI_LENGTH
+from cycle_metrics import CycleSetMetrics
+from trade_ledger import TradeLedger
+
+# Replays stored candles through the cycle set rules offline. The indicators are computed
+# once per history as arrays; a simulated cycle set then jumps from one event (opening
+# conditions met, order filled) to the next on a virtual clock instead of sleeping.
+
+# Candle granularity replayed (one-minute candles)
+GRANULARITY = 60
+
+# Candles per hour and per day of the hourly indicators (long term moving average, 24 hour mean)
+HOUR = 3600
+LONG_TERM_MA_WINDOW = 24
+MEAN24_WINDOW = 24
+
+# Simulated order book: the best bid is the candle close and the best ask this many quote
+# increments above it
+SPREAD_TICKS = 1
+
+# Candles compared with a resting order's price per step of the fill search (doubling up to
+# the maximum), so a quick fill costs little and a long wait few steps
+FILL_SCAN_START = 256
+FILL_SCAN_MAX = 65536
+
+# Candidate opening candles confirmed with the price rules per step
+OPENING_SCAN = 64
+
+# Arrays of a candle history that never change once computed (shared with sweep workers)
+HISTORY_ARRAYS = ("times", "lows", "highs", "opens", "closes", "volumes", "rsi", "long_term_ma24", "mean24")
+
+# Cycle set states (as in the cycle scheduler)
+OPENING = "OPENING"
+WAITING_OPEN_FILL = "WAITING_OPEN_FILL"
+WAITING_CLOSE_FILL = "WAITING_CLOSE_FILL"
+FAILED = "FAILED"
+
+def contiguous_columns(columns, granularity):
+    # contiguous_candles for candle columns: one row per interval (later duplicates win),
+    # intervals without trades filled with a flat, zero-volume candle at the previous close
+    times, lows, highs, opens, closes, volumes = columns
+    last = np.append(times[1:] != times[:-1], True)
+    times, lows, highs, opens, closes, volumes = (column[last] for column in (times, lows, highs, opens, closes, volumes))
+
+    grid = np.arange(times[0], times[-1] + granularity, granularity)
+    index = np.searchsorted(times, grid, side="right") - 1
+    present = times[index] == grid
+    close = closes[index]
+
+    return (
+        grid,
+        np.where(present, lows[index], close),
+        np.where(present, highs[index], close),
+        np.where(present, opens[index], close),
+        close,
+        np.where(present, volumes[index], 0.0),
+    )
+
+def synthetic_candles(count, start_time=None, granularity=GRANULARITY, seed=42):
+    # Random walk around 0.12 (an XLM-USD like price) as Coinbase candle rows, oldest first
+    rng = np.random.default_rng(seed)
+    start_time = start_time if start_time is not None else int(time.time()) - count * granularity
+    start_time -= start_time % granularity
+
+    closes = 0.12 * np.exp(np.cumsum(rng.normal(0, 0.001, count)))
+    opens = np.concatenate(([closes[0]], closes[:-1]))
+    wicks = np.abs(rng.normal(0, 0.0004, (2, count))) * closes
+    times = start_time + granularity * np.arange(count)
+
+    return np.column_stack((times, np.minimum(opens, closes) - wicks[0], np.maximum(opens, closes) + wicks[1], opens, closes, rng.uniform(1e3, 1e5, count)))
+
+class CandleHistory:
+    # One product's candles as contiguous columns (oldest first) and the indicator arrays a
+    # cycle set reads at each candle close, computed once and shared by every run over it.
+    # At candle i the bands and RSI include close i, the long term moving average counts
+    # close i as the current hour's close, and the 24 hour mean spans the previous 24 hours.
+
+    def __init__(self, product_id, candles, granularity=GRANULARITY):
+        self.product_id = product_id
+        self.granularity = granularity
+        self.times, self.lows, self.highs, self.opens, self.closes, self.volumes = contiguous_columns(candle_columns(candles), granularity)
+        self._bands = {}  # window_size -> (upper_bb, lower_bb)
+
+        self.rsi = rsi_series(self.closes, RSI_LENGTH)
+
+        # Hourly candles: index of each candle's hour and the range of candles in every hour
+        hours = (self.times // HOUR).astype(np.int64)
+        hours -= hours[0]
+        hour_starts = np.flatnonzero(np.diff(hours, prepend=-1))
+        hour_ends = np.append(hour_starts[1:], len(hours)) - 1
+        hour = np.searchsorted(hours[hour_starts], hours)
+
+        hourly_closes = self.closes[hour_ends]
+        hourly_highs = np.maximum.reduceat(self.highs, hour_starts)
+        hourly_lows = np.minimum.reduceat(self.lows, hour_starts)
+
+        # Long term MA: the previous 23 hourly closes and the current close
+        previous = LONG_TERM_MA_WINDOW - 1
+        cumulative = np.concatenate(([0.0], np.cumsum(hourly_closes)))
+        self.long_term_ma24 = np.full(len(self.closes), np.nan)
+        ready = hour >= previous
+        self.long_term_ma24[ready] = (cumulative[hour[ready]] - cumulative[hour[ready] - previous] + self.closes[ready]) / LONG_TERM_MA_WINDOW
+
+        # 24 hour mean: midpoint of the high and low of the 24 completed hours before this one
+        hourly_mean24 = mean24_series(hourly_highs, hourly_lows, MEAN24_WINDOW)
+        self.mean24 = np.full(len(self.closes), np.nan)
+        ready = hour >= 1
+        self.mean24[ready] = hourly_mean24[hour[ready] - 1]
+
+    def __len__(self):
+        return len(self.closes)
+
+    def arrays(self):
+        # The HISTORY_ARRAYS as one (len(HISTORY_ARRAYS), candles) array
+        return np.vstack([getattr(self, name) for name in HISTORY_ARRAYS])
+
+    @classmethod
+    def from_arrays(cls, product_id, arrays, granularity=GRANULARITY):
+        # A history over arrays() computed elsewhere (e.g. views of shared memory), without copying
+        history = cls.__new__(cls)
+        history.product_id = product_id
+        history.granularity = granularity
+        history._bands = {}
+        for name, array in zip(HISTORY_ARRAYS, arrays):
+            setattr(history, name, array)
+        return history
+
+    def bollinger_bands(self, window_size):
+        if window_size not in self._bands:
+            self._bands[window_size] = bollinger_bands_series(self.closes, window_size)
+        return self._bands[window_size]
+
+    def next_fill(self, side, price, start, fill_on_touch=False):
+        # Index of the first candle from start whose range reaches past a resting limit order's
+        # price (or touches it, with fill_on_touch); None if it never fills
+        prices = self.highs if side == "SELL" else self.lows
+        step = FILL_SCAN_START
+
+        while start < len(prices):
+            window = prices[start:start + step]
+            if side == "SELL":
+                hits = window >= price if fill_on_touch else window > price
+            else:
+                hits = window <= price if fill_on_touch else window < price
+
+            if hits.any():
+                return start + int(hits.argmax())
+
+            start += step
+            step = min(step * 2, FILL_SCAN_MAX)
+
+        return None
+
+    @classmethod
+    def from_store(cls, product_id, start_time, end_time, granularity=GRANULARITY, sync=False):
+        # Candles from the local candle store (brought up to date from the exchange with sync)
+        from candle_store import get_candle_store
+
+        store = get_candle_store()
+        candles = store.get_range(product_id, granularity, start_time, end_time) if sync else store.get_candles(product_id, granularity, start_time, end_time)
+        if not candles:
+            error_logger.error(f"No stored candles for {product_id} ({granularity}s) between {start_time} and {end_time}")
+            return None
+
+        return cls(product_id, candles, granularity)
+
+class SimulatedCycleSet:
+    # One cycle set replayed over a candle history with the cycle scheduler's rules: opening
+    # prices from price_rules, order sizes from compounding_utils and fills processed by
+    # order_processing_utils (into its metrics and an in-memory trade ledger). Limit orders
+    # fill in full at their price once a later candle trades through it.
+
+    def __init__(self, history, cycle_type, starting_size, product_stats, profit_percent=None, maker_fee=None, compound_percent=None, compounding_option=None, window_size=None, num_intervals=None, spread_ticks=SPREAD_TICKS, fill_on_touch=False, ledger=None):
+        self.history = history
+        self.cycle_type = cycle_type
+        self.sell_buy = cycle_type == "sell_buy"
+        self.starting_size = starting_size
+        self.profit_percent = user_config["profit_percent"] if profit_percent is None else profit_percent
+        self.maker_fee = user_config["maker_fee"] if maker_fee is None else maker_fee
+        self.compound_percent = user_config["compound_percent"] if compound_percent is None else compound_percent
+        self.compounding_option = user_config["compounding_option"] if compounding_option is None else compounding_option
+        self.window_size = user_config["window_size"] if window_size is None else window_size
+        self.num_intervals = user_config["num_intervals"] if num_intervals is None else num_intervals  # Candles loaded before the first order
+        self.fill_on_touch = fill_on_touch
+
+        self.product_id = history.product_id
+        self.quote_increment = product_stats["quote_increment"]
+        self.base_increment = product_stats["base_increment"]
+        self.quantizer = get_quantizer(self.base_increment, self.quote_increment)
+        self.spread = tick(self.quote_increment)[0] * spread_ticks
+        get_product_stats_cache().put(self.product_id, product_stats)  # Read by order processing
+
+        self.upper_bb, self.lower_bb = history.bollinger_bands(self.window_size)
+        self.ledger = ledger if ledger is not None else TradeLedger(":memory:")
+        self.cycleset_id = uuid.uuid4().hex
+        self.metrics = CycleSetMetrics(cycle_type, starting_size)
+        self.metrics.started_at = float(history.times[0])
+
+        self.state = OPENING
+        self.starting = True
+        self.open_size = starting_size
+        self.close_results = None
+        self.cycles = []  # One dict per cycle: times, prices and sizes of its two orders
+
+    def _candidates(self, starting):
+        # Candles at which the opening price conditions may hold, found for the whole history
+        # at once; each is confirmed with the exact price rule. The array test is one quote
+        # increment looser than the rules so that float rounding never hides a candidate.
+        history = self.history
+        closes = history.closes
+        increment = tick(self.quote_increment)[0]
+
+        if starting:
+            if self.starting_size <= 0:
+                return np.array([], dtype=np.int64)
+            if self.sell_buy:
+                possible = (closes > history.mean24) & (self.upper_bb * 0.9995 > closes - increment)
+            else:
+                possible = (closes < history.mean24) & (self.lower_bb * 1.0005 < closes + self.spread + increment)
+        else:
+            upward = closes > history.long_term_ma24
+            if self.sell_buy:
+                prices = np.where(upward, np.maximum(closes * (1 + self.profit_percent), 1.001 * self.upper_bb), np.minimum(closes * (1 + self.profit_percent), 0.999 * self.upper_bb))
+                possible = (history.rsi > 50) & (prices > closes - increment)
+            else:
+                prices = np.where(upward, np.maximum(closes * (1 - self.profit_percent), 1.001 * self.lower_bb), np.minimum(closes * (1 - self.profit_percent), 0.999 * self.lower_bb))
+                possible = (history.rsi < 50) & (prices < closes + self.spread + increment)
+
+            # Not before the long term moving average has a full day of hourly closes
+            possible &= np.isfinite(history.long_term_ma24)
+
+        # Nor before the Bollinger bands have a full window (their NaN would pass the rules)
+        return np.flatnonzero(possible & np.isfinite(self.upper_bb))
+
+    def _opening_price(self, index):
+        # CycleSetRunner._opening_price on the candle's snapshot
+        history = self.history
+        current_price = float(history.closes[index])
+        best_bid, best_ask = current_price, current_price + self.spread
+
+        if self.sell_buy:
+            if self.starting:
+                price = starting_sell_price(current_price, float(history.mean24[index]), float(self.upper_bb[index]), self.open_size, self.quote_increment)
+            else:
+                price = next_open_sell_price(current_price, float(history.long_term_ma24[index]), float(self.upper_bb[index]), float(history.rsi[index]), self.profit_percent, self.quote_increment)
+            return price if price is not None and sell_price_favorable(price, best_bid) else None
+
+        if self.starting:
+            price = starting_buy_price(current_price, float(history.mean24[index]), float(self.lower_bb[index]), self.open_size, self.quote_increment)
+        else:
+            price = next_open_buy_price(current_price, float(history.long_term_ma24[index]), float(self.lower_bb[index]), float(history.rsi[index]), self.profit_percent, self.quote_increment)
+        return price if price is not None and buy_price_favorable(price, best_ask) else None
+
+    def _next_opening(self, start, candidates):
+        # (index, price) of the first candle from start meeting the opening conditions, or None
+        position = int(np.searchsorted(candidates, start))
+        while position < len(candidates):
+            for index in candidates[position:position + OPENING_SCAN].tolist():
+                price = self._opening_price(index)
+                if price is not None:
+                    return index, price
+            position += OPENING_SCAN
+        return None
+
+    def _next_open_size(self, price):
+        # CycleSetRunner._next_open_size
+        total_received, total_spent = self.close_results
+
+        if self.sell_buy:
+            compounding_amt, no_compounding_limit = calculate_open_limit_sell_compounding_amt_B(total_received, total_spent, price, self.maker_fee, self.base_increment)
+            return determine_next_open_size_B_limit(self.compounding_option, total_received, no_compounding_limit, compounding_amt, self.compound_percent)
+
+        compounding_amt, no_compounding_limit = calculate_open_limit_buy_compounding_amt_Q(total_received, total_spent, price, self.maker_fee, self.quote_increment)
+        return determine_next_open_size_Q_limit(self.compounding_option, total_received, no_compounding_limit, compounding_amt, self.compound_percent)
+
+    def _order_amount(self, amount, base):
+        # CycleSetRunner._order_amount
+        return self.quantizer.size(amount, FLOOR) if base else self.quantizer.quote(amount, FLOOR)
+
+    def _place(self, side, phase, base_size, price, index):
+        # Record a limit order placed at the candle's close; returns (order ID, fill candle or None)
+        order_id = uuid.uuid4().hex
+        self.ledger.record_order(order_id, self.cycleset_id, len(self.cycles), self.product_id, side, phase, price, base_size)
+        return order_id, self.history.next_fill(side, price, index + 1, self.fill_on_touch)
+
+    def _order_details(self, order_id, side, base_size, price):
+        # Order details of a complete maker fill at the limit price, as returned by the exchange
+        filled_value = base_size * price
+        fee = filled_value * self.maker_fee
+        return {"order": {
+            "order_id": order_id,
+            "product_id": self.product_id,
+            "side": side,
+            "status": "FILLED",
+            "completion_percentage": "100",
+            "filled_size": base_size,
+            "filled_value": filled_value,
+            "total_fees": fee,
+            "total_value_after_fees": filled_value - fee if side == "SELL" else filled_value + fee,
+        }}
+
+    def run(self):
+        # Replay the history; returns the results (see results())
+        history = self.history
+        candidates = {True: self._candidates(True), False: self._candidates(False)}
+        self.ledger.record_cycle_set(self.cycleset_id, self.product_id, self.cycle_type, self.starting_size)
+        index = self.num_intervals
+
+        while True:
+            # Opening: the first candle meeting the opening price conditions
+            opening = self._next_opening(index, candidates[self.starting])
+            if opening is None:
+                break
+            index, open_price = opening
+
+            open_size = self.open_size if self.starting else self._next_open_size(open_price)
+            if open_size is not None:
+                open_size = self._order_amount(open_size, self.sell_buy)
+            if open_size is None or open_size <= 0:
+                self.state = FAILED
+                error_logger.error(f"Backtest {self.cycle_type} cycle set: no next opening order size")
+                break
+            self.open_size = open_size
+
+            cycle = {"cycle": len(self.cycles) + 1, "open_time": int(history.times[index]), "open_price": open_price, "open_size": self.open_size}
+            self.cycles.append(cycle)
+            self.ledger.record_cycle(self.cycleset_id, cycle["cycle"], self.open_size)
+
+            open_side = "SELL" if self.sell_buy else "BUY"
+            open_base_size = self.open_size if self.sell_buy else quote_to_base_size(self.open_size, self.maker_fee, open_price, self.base_increment)
+            order_id, index = self._place(open_side, "open", open_base_size, open_price, index)
+            self.state = WAITING_OPEN_FILL
+            if index is None:
+                break
+
+            # Opening fill: process it and size the closing order
+            cycle["open_filled"] = int(history.times[index])
+            order_details = self._order_details(order_id, open_side, open_base_size, open_price)
+            if self.sell_buy:
+                params = open_limit_sell_order_processing(self.open_size, order_details, order_processing_params={}, metrics=self.metrics, ledger=self.ledger, quantizer=self.quantizer)
+                close_price = close_buy_price(open_price, self.profit_percent, self.maker_fee, self.quote_increment)
+                compounding_amt, no_compounding_limit = calculate_close_limit_buy_compounding_amt_Q(params["total_received_Q_ols"], params["total_spent_B_ols"], close_price, self.maker_fee, self.quote_increment)
+                close_size = self._order_amount(determine_next_close_size_Q_limit(self.compounding_option, params["total_received_Q_ols"], no_compounding_limit, compounding_amt, self.compound_percent), False)
+                close_base_size = quote_to_base_size(close_size, self.maker_fee, close_price, self.base_increment)
+            else:
+                params = open_limit_buy_order_processing(self.open_size, order_details, order_processing_params={}, metrics=self.metrics, ledger=self.ledger, quantizer=self.quantizer)
+                close_price = close_sell_price(open_price, self.profit_percent, self.maker_fee, self.quote_increment)
+                compounding_amt, no_compounding_limit = calculate_close_limit_sell_compounding_amt_B(params["total_received_B_olb"], params["total_spent_Q_olb"], close_price, self.maker_fee, self.base_increment)
+                close_size = self._order_amount(determine_next_close_size_B_limit(self.compounding_option, params["total_received_B_olb"], no_compounding_limit, compounding_amt, self.compound_percent), True)
+                close_base_size = close_size
+
+            # Closing order, placed at the close of the candle that filled the opening order
+            close_side = "BUY" if self.sell_buy else "SELL"
+            cycle.update(close_price=close_price, close_size=close_size)
+            order_id, index = self._place(close_side, "close", close_base_size, close_price, index)
+            self.state = WAITING_CLOSE_FILL
+            if index is None:
+                break
+
+            cycle["close_filled"] = int(history.times[index])
+            order_details = self._order_details(order_id, close_side, close_base_size, close_price)
+            if self.sell_buy:
+                params = close_limit_buy_order_processing(close_size, order_details, order_processing_params={}, metrics=self.metrics, ledger=self.ledger, quantizer=self.quantizer)
+                self.close_results = (params["total_received_B_clb"], params["total_spent_Q_clb"])
+            else:
+                params = close_limit_sell_order_processing(close_size, order_details, order_processing_params={}, metrics=self.metrics, ledger=self.ledger, quantizer=self.quantizer)
+                self.close_results = (params["total_received_Q_cls"], params["total_spent_B_cls"])
+
+            self.ledger.complete_cycle(self.cycleset_id, cycle["cycle"])
+            self.starting = False
+            self.state = OPENING
+
+        return self.results()
+
+    def results(self):
+        history = self.history
+        completed = sum(1 for cycle in self.cycles if "close_filled" in cycle)
+        end_time = float(history.times[-1]) + history.granularity
+
+        return {
+            "product_id": self.product_id,
+            "cycle_type": self.cycle_type,
+            "candles": len(history),
+            "start_time": int(history.times[0]),
+            "end_time": int(end_time),
+            "state": self.state,
+            "completed_cycles": completed,
+            "cycles": self.cycles,
+            "metrics": self.metrics.summary(price=float(history.closes[-1]), now=end_time),
+            "totals": (self.ledger.cycle_set_totals(self.cycleset_id) or [None])[0],
+        }
+
+def run_backtest(history, cycle_type, starting_size, product_stats, **parameters):
+    # Replay one cycle set over the history. The per-fill info logging of the shared sizing
+    # and processing functions is switched off for the run (errors are still logged).
+    start_time = time.perf_counter()
+    logging.disable(logging.INFO)
+    try:
+        results = SimulatedCycleSet(history, cycle_type, starting_size, product_stats, **parameters).run()
+    finally:
+        logging.disable(logging.NOTSET)
+
+    results["elapsed"] = time.perf_counter() - start_time
+    return results
+
+def main(days=365, product_id="synthetic"):
+    # Backtest both cycle types over `days` of one-minute candles: stored candles for a
+    # product (fetched where missing), or a random walk with "synthetic"
+    end_time = int(time.time())
+    start_time = end_time - days * 86400
+
+    load_start = time.perf_counter()
+    if product_id == "synthetic":
+        history = CandleHistory(product_id, synthetic_candles(days * 86400 // GRANULARITY, start_time))
+        product_stats = {"base_increment": "1", "quote_increment": "0.000001"}
+    else:
+        from coinbase_utils import fetch_product_stats
+        history = CandleHistory.from_store(product_id, start_time, end_time, sync=True)
+        product_stats = fetch_product_stats(product_id)
+        if history is None or product_stats is None:
+            print(f"Unable to load {product_id} for the backtest")
+            return
+    print(f"{len(history)} candles loaded and indicators computed in {time.perf_counter() - load_start:.2f} s")
+
+    for cycle_type, starting_size in (("sell_buy", user_config["starting_size_B"]), ("buy_sell", user_config["starting_size_Q"])):
+        results = run_backtest(history, cycle_type, starting_size, product_stats)
+        metrics = results["metrics"] or {}
+        print(f"{cycle_type}: {results['completed_cycles']} cycles completed in {results['elapsed']:.2f} s, ending {results['state']}; "
+              f"gain/loss {metrics.get('percent_gain_loss_dollar')} %, base {metrics.get('percent_gain_loss_base')} %, quote {metrics.get('percent_gain_loss_quote')} %")
+
+    app_logger.info("Backtest of %s over %s days finished", product_id, days)
+
+# Indicate that backtester.py module loaded successfully
+info_logger.info("backtester module loaded successfully")
+
+if __name__ == "__main__":
+    args = sys.argv[1:3]
+    main(*([int(args[0])] + args[1:] if args else []))
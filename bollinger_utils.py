@@ -1,14 +1,15 @@
 # bollinger_utils.py
-import json
-import http.client
 import time
-import math
 from requests.exceptions import Timeout
 from logging_config import app_logger, info_logger, error_logger
 from config import config_data
 from starting_input import user_config
-from coinbase_auth import create_signed_request, fetch_historical_data
-from coinbase_utils import fetch_product_stats, get_current_price
+from coinbase_auth import fetch_historical_data
+from coinbase_client import signed_get
+from market_context import market_context
+from market_data import get_market_data_hub
+from market_triggers import get_market_triggers
+from price_rules import starting_sell_price, starting_buy_price, sell_price_favorable, buy_price_favorable
 from statistics import mean, stdev
 
 # Define your API credentials
@@ -21,33 +22,6 @@ chart_interval = user_config["chart_interval"]
 num_intervals = user_config["num_intervals"]
 window_size = user_config["window_size"]
 
-# Define the api endpoint and payload (if applicable)
-endpoint = f'/api/v3/brokerage/products/{product_id}'  # Replace with the actual endpoint
-method = 'GET'
-body = ''  # Empty for GET requests
-
-# Create a signed request using your API credentials
-headers = create_signed_request(api_key, api_secret, method, endpoint, body)
-
-# Fetch historical data for the specified chart interval
-historical_data = fetch_historical_data(product_id, chart_interval, num_intervals)
-product_stats = fetch_product_stats(product_id, api_key, headers)
-
-# Extract the close prices from the historical data
-closing_prices = []
-
-for entry in historical_data:
-    try:
-        close_price = float(entry[4])
-        closing_prices.append(close_price)
-    except ValueError:
-        # Handle invalid data (e.g., non-numeric values) here, if needed
-        # You can print a message or take other appropriate actions
-        error_logger.error("Error extracting closing prices from historical data")
-        pass
-
-# Now you have a list of floats in closing_prices
-
 def calculate_bollinger_bands(closing_prices, window_size, num_std_dev=2):
     # Calculate moving average for the last 'window_size' closing prices
     moving_average = mean(closing_prices[-window_size:])
@@ -66,7 +40,8 @@ def calculate_bollinger_bands(closing_prices, window_size, num_std_dev=2):
     return upper_bb, lower_bb
 
 # Function to determine 24 hour mean
-def determine_mean24():
+def determine_mean24(product_id):
+    # Midpoint of the product's 24 hour high and low
     current_time = int(time.time())
     twenty_four_hours_ago = current_time - (24 * 60 * 60)
     high_24hr = float('-inf')
@@ -97,18 +72,15 @@ def determine_mean24():
     return mean24
 
 def get_best_bid_ask_prices(api_key, api_secret, product_id, max_retries=3):
-    conn = http.client.HTTPSConnection("api.coinbase.com")
     endpoint = f"/api/v3/brokerage/best_bid_ask"
-    params = f"?product_ids={product_id}"  # Use product_ids instead of product_id
-    headers = create_signed_request(api_key, api_secret, "GET", endpoint, body='')
+    params = {"product_ids": product_id}  # Use product_ids instead of product_id
 
     retries = 0
 
     while retries < max_retries:
         try:
-            conn.request("GET", endpoint + params, headers=headers)
-            res = conn.getresponse()
-            data = res.read()
+            res = signed_get(endpoint, params=params, key=api_key, secret=api_secret)
+            data = res.content
 
             info_logger.info("get_best_bid_ask_prices raw response data: %s", data.decode("utf-8"))
 
@@ -117,7 +89,7 @@ def get_best_bid_ask_prices(api_key, api_secret, product_id, max_retries=3):
                 retries += 1
                 continue  # Retry if empty response is encountered
 
-            response_json = json.loads(data.decode("utf-8"))
+            response_json = res.json()
             pricebooks = response_json.get("pricebooks", [])
 
             if not pricebooks:
@@ -184,56 +156,41 @@ def determine_starting_buy_parameters(current_price, lower_bb, starting_size_Q,
         time.sleep(5)  # Adjust the duration as needed
 
 def calculate_starting_sell_price(current_price, upper_bb, starting_size_B, mean24, product_stats, max_iterations=10, timeout=600):
+    # Wait up to timeout for the price to rise above the 24 hour mean with a starting sell price
+    # (slightly below upper_bb) above the best bid. The condition is a market trigger checked on
+    # every price update; the candle indicators and the 24 hour mean are re-read max_iterations
+    # times over the timeout. Raises Timeout if the conditions are not met in time.
     quote_increment = float(product_stats["quote_increment"])
-    start_time = time.time()
-
-    # Initialize the starting sell price
-    starting_price_sell = None
+    market_data = get_market_data_hub()
+    market_mean24 = [mean24]
 
-    iterations = 0
-    while iterations < max_iterations:
-        # Check if the timeout has been exceeded
-        if time.time() - start_time > timeout:
-            raise Timeout("Timeout occurred while waiting for market conditions to be met")
-
-        headers = create_signed_request(api_key, api_secret, method, endpoint, body= '')
-        # Recalculate current_price and mean24 inside the loop
-        current_price = get_current_price(product_id, api_key, headers)  # Replace with your function to get the current price
-        mean24 = determine_mean24()  # Replace with your function to calculate mean24
-        upper_bb, lower_bb = calculate_bollinger_bands(closing_prices, window_size, num_std_dev=2)
-        
-        # Check if criteria is met for determining starting sell price
-        if current_price > mean24 and starting_size_B > 0:
-            # Calculate the rounded price based on quote_increment
-            rounded_price = round((upper_bb * 0.9995), -int(math.floor(math.log10(quote_increment))))
+    def refresh():
+        market_context.update_indicators(max_age=timeout / max_iterations)
+        market_mean24[0] = market_data.get_mean24(product_id) or market_mean24[0]
 
-            # Ensure the rounded price is at least quote_increment
-            if rounded_price < quote_increment:
-                rounded_price = quote_increment
+    def starting_sell(snapshot):
+        current_price = snapshot["price"]
+        market_context.apply_price(current_price, snapshot["time"])
+        upper_bb, lower_bb = market_context.bollinger_bands
 
-            # Retrieve best bid and ask prices
-            best_bid, best_ask = get_best_bid_ask_prices_with_retry(api_key, api_secret, product_id, max_retries=3)
+        price = starting_sell_price(current_price, snapshot.get("mean24", market_mean24[0]), upper_bb, starting_size_B, quote_increment)
+        if price is not None and sell_price_favorable(price, snapshot.get("best_bid")):
+            return price
+        return None
 
-            # Compare with the calculated starting sell price
-            if best_bid and rounded_price > best_bid:
-                starting_price_sell = rounded_price  # Place a sell order slightly below upper_bb
-                info_logger.info("Current price: %s", current_price)
-                app_logger.info("Starting price calculated for sell order: %s", starting_price_sell)
-                return starting_price_sell  # Exit the loop if conditions are met
+    refresh()
+    print("Waiting for market conditions to place starting sell order...")
+    starting_price_sell = get_market_triggers().wait_until(product_id, starting_sell, timeout, refresh, timeout / max_iterations)
 
-            print("Starting sell order price not favorable based on best bid. Continuing to wait...")
-        else:    
-            print("Criteria for market conditions not met for placing sell order. Continuing to wait...")
+    if starting_price_sell is None:
+        raise Timeout("Timeout occurred while waiting for market conditions to be met")
 
-        iterations += 1
-        time.sleep(90)  # Adjust the sleep time as needed
-
-    print("Maximum iterations reached. Conditions for determining starting sell price not met. Resetting retries.")
-    starting_size_Q = user_config["starting_size_Q"]
-    from cycle_set_utils import determine_starting_prices
-    return determine_starting_prices(current_price, upper_bb, lower_bb, starting_size_B, starting_size_Q, mean24, quote_increment)
+    info_logger.info("Current price: %s", market_context.cached_price)
+    app_logger.info("Starting price calculated for sell order: %s", starting_price_sell)
+    return starting_price_sell
 
 def calculate_starting_sell_price_with_retry(current_price, upper_bb, starting_size_B, mean24, max_iterations=10):
+    product_stats = market_context.product_stats
     quote_increment = float(product_stats["quote_increment"])
     iterations = 0
 
@@ -244,65 +201,48 @@ def calculate_starting_sell_price_with_retry(current_price, upper_bb, starting_s
             print("Timeout occurred. Retrying...")
 
         iterations += 1
-        time.sleep(90)  # Adjust the sleep time as needed
 
     print("Maximum iterations reached. Conditions for determining starting sell price not met. Resetting retries.")
     starting_size_Q = user_config["starting_size_Q"]
-    upper_bb, lower_bb = calculate_bollinger_bands(closing_prices, window_size, num_std_dev=2)
+    market_context.update_indicators()
+    upper_bb, lower_bb = market_context.bollinger_bands
     from cycle_set_utils import determine_starting_prices
     return determine_starting_prices(current_price, upper_bb, lower_bb, starting_size_B, starting_size_Q, mean24, quote_increment)
 
 def calculate_starting_buy_price(current_price, lower_bb, starting_size_Q, mean24, product_stats, max_iterations=10, timeout=600):
+    # Wait up to timeout for the price to fall below the 24 hour mean with a starting buy price
+    # (slightly above lower_bb) below the best ask; see calculate_starting_sell_price
     quote_increment = float(product_stats["quote_increment"])
-    start_time = time.time()
-    
-    # Initialize the starting buy price
-    starting_price_buy = None
+    market_data = get_market_data_hub()
+    market_mean24 = [mean24]
 
-    iterations = 0
-    while iterations < max_iterations:
-        # Check if the timeout has been exceeded
-        if time.time() - start_time > timeout:
-            raise Timeout("Timeout occurred while waiting for market conditions to be met")
-
-        headers = create_signed_request(api_key, api_secret, method, endpoint, body= '')
-        # Recalculate current_price and mean24 inside the loop
-        current_price = get_current_price(product_id, api_key, headers)  # Replace with your function to get the current price
-        mean24 = determine_mean24()  # Replace with your function to calculate mean24
-        upper_bb, lower_bb = calculate_bollinger_bands(closing_prices, window_size, num_std_dev=2)
-
-        # Check if criteria is met for determining starting buy price
-        if current_price < mean24 and starting_size_Q > 0:
-            # Calculate the rounded price based on quote_increment
-            rounded_price = round((lower_bb * 1.0005), -int(math.floor(math.log10(quote_increment))))
-
-            # Ensure the rounded price is at least quote_increment
-            if rounded_price < quote_increment:
-                rounded_price = quote_increment
-
-            # Retrieve best bid and ask prices
-            best_bid, best_ask = get_best_bid_ask_prices_with_retry(api_key, api_secret, product_id, max_retries=3)
-
-            # Compare with the calculated starting sell price
-            if best_ask and rounded_price < best_ask:
-                starting_price_buy = rounded_price  # Place a buy order slightly above lower_bb
-                info_logger.info("Current price: %s", current_price)
-                app_logger.info("Starting price calculated for buy order: %s", starting_price_buy)
-                return starting_price_buy  # Exit the loop if conditions are met
-
-            print("Starting buy order price not favorable based on best ask. Continuing to wait...")
-        else:    
-            print("Criteria for market conditions not met for placing buy order. Continuing to wait...")
+    def refresh():
+        market_context.update_indicators(max_age=timeout / max_iterations)
+        market_mean24[0] = market_data.get_mean24(product_id) or market_mean24[0]
 
-        iterations += 1
-        time.sleep(90)  # Adjust the sleep time as needed
+    def starting_buy(snapshot):
+        current_price = snapshot["price"]
+        market_context.apply_price(current_price, snapshot["time"])
+        upper_bb, lower_bb = market_context.bollinger_bands
 
-    print("Maximum iterations reached. Conditions for determining starting buy price not met. Resetting retries.")
-    starting_size_B = user_config["starting_size_B"]
-    from cycle_set_utils import determine_starting_prices
-    return determine_starting_prices(current_price, upper_bb, lower_bb, starting_size_B, starting_size_Q, mean24, quote_increment)
+        price = starting_buy_price(current_price, snapshot.get("mean24", market_mean24[0]), lower_bb, starting_size_Q, quote_increment)
+        if price is not None and buy_price_favorable(price, snapshot.get("best_ask")):
+            return price
+        return None
+
+    refresh()
+    print("Waiting for market conditions to place starting buy order...")
+    starting_price_buy = get_market_triggers().wait_until(product_id, starting_buy, timeout, refresh, timeout / max_iterations)
+
+    if starting_price_buy is None:
+        raise Timeout("Timeout occurred while waiting for market conditions to be met")
+
+    info_logger.info("Current price: %s", market_context.cached_price)
+    app_logger.info("Starting price calculated for buy order: %s", starting_price_buy)
+    return starting_price_buy
 
 def calculate_starting_buy_price_with_retry(current_price, lower_bb, starting_size_Q, mean24, max_iterations=10):
+    product_stats = market_context.product_stats
     quote_increment = float(product_stats["quote_increment"])
     iterations = 0
 
@@ -313,11 +253,11 @@ def calculate_starting_buy_price_with_retry(current_price, lower_bb, starting_si
             print("Timeout occurred. Retrying...")
 
         iterations += 1
-        time.sleep(5)  # Adjust the sleep time as needed
 
     print("Maximum iterations reached. Conditions for determining starting buy price not met. Resetting retries.")
     starting_size_B = user_config["starting_size_B"]
-    upper_bb, lower_bb = calculate_bollinger_bands(closing_prices, window_size, num_std_dev=2)
+    market_context.update_indicators()
+    upper_bb, lower_bb = market_context.bollinger_bands
     from cycle_set_utils import determine_starting_prices
     return determine_starting_prices(current_price, upper_bb, lower_bb, starting_size_B, starting_size_Q, mean24, quote_increment)
 
@@ -0,0 +1,265 @@
+# candle_store.py
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging_config import info_logger, error_logger
+from rate_limiter import BACKFILL, MARKET_DATA
+
+# Location of the local candle database (override with PORTALX_CANDLE_DB)
+CANDLE_DB_PATH = os.environ.get("PORTALX_CANDLE_DB", "candles.db")
+
+# Maximum candles returned by a single Coinbase candles request
+CANDLES_PER_REQUEST = 300
+
+# Backfill worker pool size (requests are paced by the shared rate limiter's public bucket)
+BACKFILL_WORKERS = 5
+
+# Requests made for a candle page before the range is given up (a page fails when the request
+# errors, or when the rate limiter sheds it under load), and seconds between them
+PAGE_ATTEMPTS = 3
+PAGE_RETRY_DELAY = 2
+
+# Minimum seconds between refreshes of the newest (still forming) candle of a series
+MAX_TAIL_REFRESH_SECONDS = 60
+
+class CandleStore:
+    # Append-only local copy of Coinbase candles keyed by product and granularity.
+    # A coverage table records which time range has already been fetched for each
+    # series so that only missing (older) or newer candles are requested again, even
+    # when the exchange returns no candle for quiet intervals.
+
+    def __init__(self, db_path=CANDLE_DB_PATH):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn_lock = threading.Lock()
+        self._series_locks = {}
+        self._series_locks_lock = threading.Lock()
+        self._last_tail_refresh = {}
+
+        with self._conn_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS candles (
+                    product_id TEXT NOT NULL,
+                    granularity INTEGER NOT NULL,
+                    time INTEGER NOT NULL,
+                    low REAL,
+                    high REAL,
+                    open REAL,
+                    close REAL,
+                    volume REAL,
+                    PRIMARY KEY (product_id, granularity, time)
+                ) WITHOUT ROWID
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS candle_coverage (
+                    product_id TEXT NOT NULL,
+                    granularity INTEGER NOT NULL,
+                    covered_start INTEGER NOT NULL,
+                    covered_end INTEGER NOT NULL,
+                    PRIMARY KEY (product_id, granularity)
+                )
+            """)
+            self._conn.commit()
+
+        info_logger.info("Candle store opened at %s", db_path)
+
+    def _series_lock(self, product_id, granularity):
+        with self._series_locks_lock:
+            key = (product_id, granularity)
+            if key not in self._series_locks:
+                self._series_locks[key] = threading.Lock()
+            return self._series_locks[key]
+
+    def get_coverage(self, product_id, granularity):
+        with self._conn_lock:
+            row = self._conn.execute(
+                "SELECT covered_start, covered_end FROM candle_coverage WHERE product_id = ? AND granularity = ?",
+                (product_id, granularity),
+            ).fetchone()
+        return row
+
+    def latest_timestamp(self, product_id, granularity):
+        with self._conn_lock:
+            row = self._conn.execute(
+                "SELECT MAX(time) FROM candles WHERE product_id = ? AND granularity = ?",
+                (product_id, granularity),
+            ).fetchone()
+        return row[0]
+
+    def insert_candles(self, product_id, granularity, candles, covered_start=None, covered_end=None):
+        # Candles use the Coinbase layout: [time, low, high, open, close, volume]
+        rows = [
+            (product_id, granularity, int(candle[0]), candle[1], candle[2], candle[3], candle[4], candle[5])
+            for candle in candles
+        ]
+
+        with self._conn_lock:
+            with self._conn:
+                # Replace so that the newest (still forming) candle is updated in place
+                self._conn.executemany("INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+                if covered_start is not None and covered_end is not None:
+                    self._conn.execute("""
+                        INSERT INTO candle_coverage VALUES (?, ?, ?, ?)
+                        ON CONFLICT (product_id, granularity) DO UPDATE SET
+                            covered_start = MIN(covered_start, excluded.covered_start),
+                            covered_end = MAX(covered_end, excluded.covered_end)
+                    """, (product_id, granularity, covered_start, covered_end))
+
+        return len(rows)
+
+    def get_candles(self, product_id, granularity, start_time, end_time):
+        # Return candles newest first, in the same layout as the Coinbase candles endpoint
+        with self._conn_lock:
+            rows = self._conn.execute("""
+                SELECT time, low, high, open, close, volume FROM candles
+                WHERE product_id = ? AND granularity = ? AND time BETWEEN ? AND ?
+                ORDER BY time DESC
+            """, (product_id, granularity, start_time, end_time)).fetchall()
+
+        return [list(row) for row in rows]
+
+    def _fetch_page(self, product_id, granularity, page_start, page_end, lane):
+        from coinbase_auth import fetch_candles
+
+        for attempt in range(PAGE_ATTEMPTS):
+            if attempt:
+                time.sleep(PAGE_RETRY_DELAY)
+            candles = fetch_candles(product_id, granularity, page_start, page_end, priority=lane)
+            if candles is not None:
+                return candles
+        return None
+
+    def fetch_range(self, product_id, granularity, start_time, end_time, newest_first=True, lane=BACKFILL):
+        # Fetch [start_time, end_time] from the exchange in 300-candle pages, several pages
+        # at a time, and store it. Pages are ordered moving away from the already covered
+        # range and coverage only grows up to the first failed page, so a failure never
+        # leaves a hole inside the recorded coverage. Backfill pages go through the rate
+        # limiter's backfill lane, which waits for spare tokens instead of shedding them.
+        page_span = granularity * CANDLES_PER_REQUEST
+        pages = []
+
+        if newest_first:
+            page_end = end_time
+            while page_end > start_time:
+                pages.append((max(start_time, page_end - page_span), page_end))
+                page_end -= page_span
+        else:
+            page_start = start_time
+            while page_start < end_time:
+                pages.append((page_start, min(end_time, page_start + page_span)))
+                page_start += page_span
+
+        if not pages:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=min(BACKFILL_WORKERS, len(pages))) as executor:
+            results = list(executor.map(lambda page: self._fetch_page(product_id, granularity, *page, lane), pages))
+
+        fetched = 0
+        complete = True
+
+        for (page_start, page_end), candles in zip(pages, results):
+            if candles is None:
+                error_logger.error(f"Candle fetch failed for {product_id} ({granularity}s) between {page_start} and {page_end}")
+                complete = False
+                continue
+
+            if complete:
+                fetched += self.insert_candles(product_id, granularity, candles, covered_start=page_start, covered_end=page_end)
+            else:
+                fetched += self.insert_candles(product_id, granularity, candles)
+
+        return fetched if complete else None
+
+    def sync(self, product_id, granularity, start_time, end_time):
+        # Bring the local copy up to date for [start_time, end_time], fetching only what is missing
+        with self._series_lock(product_id, granularity):
+            coverage = self.get_coverage(product_id, granularity)
+
+            if coverage is None:
+                info_logger.info("Backfilling %s candles (%ss) from %s to %s", product_id, granularity, start_time, end_time)
+                return self.fetch_range(product_id, granularity, start_time, end_time)
+
+            covered_start, covered_end = coverage
+            fetched = 0
+
+            # Older candles than anything fetched so far
+            if start_time < covered_start:
+                older = self.fetch_range(product_id, granularity, start_time, covered_start)
+                fetched += older or 0
+
+            # Newer candles, starting from the newest stored candle so it is refreshed too
+            series = (product_id, granularity)
+            tail_refresh_interval = min(granularity, MAX_TAIL_REFRESH_SECONDS)
+            if end_time > covered_end and end_time - self._last_tail_refresh.get(series, 0) >= tail_refresh_interval:
+                latest = self.latest_timestamp(product_id, granularity)
+                newer_start = min(covered_end, latest) if latest is not None else covered_end
+                # The newest candles are live market data rather than backfill
+                newer = self.fetch_range(product_id, granularity, newer_start, end_time, newest_first=False, lane=MARKET_DATA)
+                if newer is not None:
+                    self._last_tail_refresh[series] = end_time
+                    fetched += newer
+
+            return fetched
+
+    def get_range(self, product_id, granularity, start_time, end_time):
+        # Candles for [start_time, end_time], newest first, fetching only what is missing
+        fetched = self.sync(product_id, granularity, start_time, end_time)
+        candles = self.get_candles(product_id, granularity, start_time, end_time)
+
+        if fetched is None and not candles:
+            return None
+
+        return candles
+
+    def get_historical_data(self, product_id, granularity, num_intervals):
+        # Local replacement for a full-window candles request ending now
+        end_time = int(time.time())
+        start_time = end_time - (granularity * num_intervals)
+
+        return self.get_range(product_id, granularity, start_time, end_time)
+
+    def close(self):
+        with self._conn_lock:
+            self._conn.close()
+
+def contiguous_candles(candles, granularity):
+    # Order candles oldest first, drop duplicates and fill intervals without trades with a
+    # flat, zero-volume candle at the previous close so that there is one row per interval
+    by_time = {}
+    for candle in candles:
+        by_time[int(candle[0])] = candle
+
+    contiguous = []
+    for timestamp in sorted(by_time):
+        if contiguous:
+            previous_close = contiguous[-1][4]
+            missing_time = contiguous[-1][0] + granularity
+            while missing_time < timestamp:
+                contiguous.append([missing_time, previous_close, previous_close, previous_close, previous_close, 0.0])
+                missing_time += granularity
+        contiguous.append([timestamp] + list(by_time[timestamp][1:]))
+
+    return contiguous
+
+# Process-wide candle store, opened on first use
+_candle_store = None
+_candle_store_lock = threading.Lock()
+
+def get_candle_store():
+    global _candle_store
+
+    if _candle_store is None:
+        with _candle_store_lock:
+            if _candle_store is None:
+                _candle_store = CandleStore()
+
+    return _candle_store
+
+# Indicate that candle_store.py module loaded successfully
+info_logger.info("candle_store module loaded successfully")
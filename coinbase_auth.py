@@ -1,9 +1,7 @@
 #coinbase_auth.py
-import http.client
-import hmac
-import hashlib
 import time
 import json
+import sqlite3
 import requests
 from config import config_data
 from logging_config import app_logger, info_logger, error_logger
@@ -20,53 +18,63 @@ CLIENT_SECRET = 'your-client-secret'  # Replace with your actual client secret
 REDIRECT_URI = 'http://localhost:8080/callback'  # Replace with your actual redirect URI
 
 def create_signed_request(api_key, api_secret, method, endpoint, body= ''):
-    if api_key is None or api_secret is None:
-        error_logger.error("Error: API key and/or API secret is missing.")
+    from request_signer import get_signer
+
+    signer = get_signer(api_key, api_secret)
+    if signer is None:
         return None
-    
-    timestamp = str(int(time.time()))
-    payload = timestamp + method + endpoint + body
-    signature = hmac.new(api_secret.encode('utf-8'), payload.encode('utf-8'), digestmod=hashlib.sha256).hexdigest()
 
     headers = {
         'Content-Type': 'application/json',
-        'CB-ACCESS-KEY': api_key,
-        'CB-ACCESS-SIGN': signature,
-        'CB-ACCESS-TIMESTAMP': timestamp,
         'User-Agent': 'PortalX_Trading_Bot',
     }
-    
+    headers.update(signer.headers(method, endpoint, body))
+
     return headers
 
-# Function to fetch historical data
-def fetch_historical_data(product_id, chart_interval, num_intervals):
-    
-    conn = http.client.HTTPSConnection("api.exchange.coinbase.com")
-    
-    # Create headers with the User-Agent header
-    headers = {
-        'User-Agent': 'PortalX_Trading_Bot',  # Replace with your application's name
-    }
-    
-    # Calculate start and end times
-    end_time = int(time.time())
-    start_time = end_time - (chart_interval * num_intervals)
-    
-    # Construct the URL with query parameters
-    url = f"/products/{product_id}/candles?granularity={chart_interval}&start={start_time}&end={end_time}"
-    
-    # Fetch historical data
-    conn.request("GET", url, headers=headers)
-    res = conn.getresponse()
-    data = res.read()
-    
-    if res.status == 200:
-        historical_data = json.loads(data.decode("utf-8"))
-        return historical_data
+# Function to fetch one page of candles (at most 300) from the exchange
+def fetch_candles(product_id, chart_interval, start_time, end_time, priority=None):
+    from coinbase_client import public_get
+
+    try:
+        res = public_get(f"/products/{product_id}/candles", params={"granularity": chart_interval, "start": start_time, "end": end_time}, priority=priority)
+    except requests.exceptions.RequestException as e:
+        error_logger.error(f"Error fetching historical data: {e}")
+        return None
+
+    if res.status_code == 200:
+        return res.json()
     else:
-        error_logger.error(f"Error fetching historical data: {res.status} {res.reason}")
+        error_logger.error(f"Error fetching historical data: {res.status_code} {res.reason}")
+        return None
+
+# Function to fetch historical data (served from the local candle store, which only
+# requests candles it does not already have)
+def fetch_historical_data(product_id, chart_interval, num_intervals):
+    from candle_store import get_candle_store
+
+    try:
+        return get_candle_store().get_historical_data(product_id, chart_interval, num_intervals)
+    except sqlite3.Error as e:
+        error_logger.error(f"Error reading historical data from the candle store: {e}")
         return None
 
+# Function to fetch every candle between start_time and end_time, oldest first with one row per
+# interval (missing pages are backfilled concurrently by the candle store)
+def fetch_candle_range(product_id, chart_interval, start_time, end_time):
+    from candle_store import get_candle_store, contiguous_candles
+
+    try:
+        candles = get_candle_store().get_range(product_id, chart_interval, start_time, end_time)
+    except sqlite3.Error as e:
+        error_logger.error(f"Error reading candle range from the candle store: {e}")
+        return None
+
+    if candles is None:
+        return None
+
+    return contiguous_candles(candles, chart_interval)
+
 # Function to generate the OAuth2 authorization URL
 def generate_oauth_authorization_url():
     params = {
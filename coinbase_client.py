@@ -0,0 +1,147 @@
+# coinbase_client.py
+import json
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from config import config_data
+from logging_config import info_logger, error_logger
+from order_state import order_state_table
+from rate_limiter import PRIVATE, PUBLIC, get_rate_limiter, request_priority, retry_after
+from request_signer import get_signer
+
+# Define API credentials
+api_key = config_data["api_key"]
+api_secret = config_data["api_secret"]
+
+# Hosts used by the bot
+API_HOST = "api.coinbase.com"  # Advanced Trade (brokerage) API
+EXCHANGE_HOST = "api.exchange.coinbase.com"  # Public exchange API (candles)
+
+# Where requests for each host are sent (override with PORTALX_API_URL and PORTALX_EXCHANGE_URL,
+# e.g. http://127.0.0.1:<port> for the stand-in exchange in mock_exchange.py); signed requests
+# still name the hosts above
+API_BASE_URL = os.environ.get("PORTALX_API_URL", f"https://{API_HOST}").rstrip("/")
+EXCHANGE_BASE_URL = os.environ.get("PORTALX_EXCHANGE_URL", f"https://{EXCHANGE_HOST}").rstrip("/")
+BASE_URLS = {API_HOST: API_BASE_URL, EXCHANGE_HOST: EXCHANGE_BASE_URL}
+
+# Connection pool and timeout settings
+POOL_CONNECTIONS = 4  # Number of per-host pools kept alive
+POOL_MAXSIZE = 32  # Maximum open connections per host
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+USER_AGENT = "PortalX_Trading_Bot"
+
+# Process-wide session shared by every Coinbase call
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+
+                # Keep connections alive and cap them per host; callers wait for a free
+                # connection instead of opening (and handshaking) new ones
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=True)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)  # A local stand-in exchange
+                session.headers.update({
+                    'User-Agent': USER_AGENT,
+                    'accept': "application/json",
+                })
+
+                _session = session
+                info_logger.info("Coinbase HTTP session created (pool_maxsize=%s)", POOL_MAXSIZE)
+
+    return _session
+
+def close_session():
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+# Function to build signed headers for a request (the single place where signing happens)
+def sign_request(method, endpoint, body=b'', key=None, secret=None, host=API_HOST):
+    signer = get_signer(key or api_key, secret or api_secret)
+    if signer is None:
+        return None
+
+    return signer.headers(method, endpoint, body, host)
+
+# Function to send a request through the shared session
+def send_request(method, endpoint, params=None, payload=None, signed=True, host=API_HOST, timeout=DEFAULT_TIMEOUT, key=None, secret=None, priority=None):
+    # Waits for the shared rate limiter first (priority: a rate_limiter lane, by default worked
+    # out from the endpoint); raises RequestShed if the request is dropped under load
+    bucket = PRIVATE if signed else PUBLIC
+    limiter = get_rate_limiter()
+    limiter.acquire(bucket, request_priority(method, endpoint) if priority is None else priority)
+
+    # Serialise the body once so that the signed bytes are exactly the bytes sent
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b''
+
+    if signed:
+        headers = sign_request(method, endpoint, body, key, secret, host)
+        if headers is None:
+            raise requests.exceptions.RequestException("Unable to sign request: API key and/or API secret is missing")
+    else:
+        headers = {}
+
+    if body:
+        headers['Content-Type'] = 'application/json'
+
+    url = f"{BASE_URLS.get(host, f'https://{host}')}{endpoint}"
+
+    response = get_session().request(method, url, params=params, data=body or None, headers=headers, timeout=timeout)
+    if response.status_code == 429:
+        limiter.pause(bucket, retry_after(response.headers))
+    return response
+
+# Function to send a signed GET request to the Advanced Trade API
+def signed_get(endpoint, params=None, timeout=DEFAULT_TIMEOUT, key=None, secret=None):
+    return send_request("GET", endpoint, params=params, timeout=timeout, key=key, secret=secret)
+
+# Function to send a signed POST request to the Advanced Trade API
+def signed_post(endpoint, payload, timeout=DEFAULT_TIMEOUT, key=None, secret=None):
+    return send_request("POST", endpoint, payload=payload, timeout=timeout, key=key, secret=secret)
+
+# Function to send an unsigned GET request to the public exchange API
+def public_get(endpoint, params=None, host=EXCHANGE_HOST, timeout=DEFAULT_TIMEOUT, priority=None):
+    return send_request("GET", endpoint, params=params, signed=False, host=host, timeout=timeout, priority=priority)
+
+# Function to place a limit order and return the order ID (or None on failure)
+def post_order(payload, description, key=None, secret=None):
+    try:
+        r = signed_post('/api/v3/brokerage/orders', payload, key=key, secret=secret)
+        info_logger.info(r)
+        info_logger.info(r.status_code)
+        info_logger.info(r.content)
+
+        if r.status_code == 200:
+            order_details = r.json()
+            order_id = order_details.get("order_id")
+            if order_id is not None and order_details.get("success") == True:
+                # Track the new order so that the bulk status poller keeps it up to date
+                order_state_table.track(order_id, payload.get("product_id"))
+                return order_id
+
+        error_logger.error(f"Error placing {description} - Status Code: {r.status_code}")
+        return None
+
+    except requests.exceptions.RequestException as e:
+        error_logger.error(f"An error occurred while placing {description}: {e}")
+        return None
+    except json.JSONDecodeError as e:
+        error_logger.error(f"Error decoding JSON response while placing {description}: {e}")
+        return None
+
+# Indicate that coinbase_client.py module loaded successfully
+info_logger.info("coinbase_client module loaded successfully")
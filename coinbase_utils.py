@@ -1,26 +1,19 @@
 # coinbase_utils.py
 import requests
-import hmac
-import hashlib  # Import hashlib
 from config import config_data
 from logging_config import app_logger, info_logger, error_logger
+from coinbase_client import signed_get, signed_post
+from quantizer import decimal_places
 
 # Define your Coinbase API key
 api_key = config_data["api_key"]
 
-def fetch_product_stats(product_id, api_key, headers):
+def fetch_product_stats(product_id):
 
-    url = f"https://api.coinbase.com/api/v3/brokerage/products/{product_id}"
+    endpoint = f"/api/v3/brokerage/products/{product_id}"
     
     try:
-        # Create headers with the API key
-        headers = {
-            'CB-ACCESS-KEY': api_key,
-            'Content-Type': 'application/json',
-            **headers  # Include other headers passed to the function
-        }
-        
-        response = requests.get(url, headers=headers)
+        response = signed_get(endpoint)
         response.raise_for_status()  # Raise an exception if the request was not successful
         data = response.json()
         
@@ -63,19 +56,12 @@ def fetch_product_stats(product_id, api_key, headers):
         error_logger.error(f"Error fetching product stats: {e}")
         return None
     
-def fetch_asset_stats(asset, api_key, headers):
+def fetch_asset_stats(asset):
 
-    url = f"https://api.coinbase.com/api/v3/brokerage/products/{asset}-USD"
+    endpoint = f"/api/v3/brokerage/products/{asset}-USD"
     
     try:
-        # Create headers with the API key
-        headers = {
-            'CB-ACCESS-KEY': api_key,
-            'Content-Type': 'application/json',
-            **headers  # Include other headers passed to the function
-        }
-        
-        response = requests.get(url, headers=headers)
+        response = signed_get(endpoint)
         response.raise_for_status()  # Raise an exception if the request was not successful
         data = response.json()
         
@@ -119,18 +105,11 @@ def fetch_asset_stats(asset, api_key, headers):
         error_logger.error(f"Error fetching asset stats: {e}")
         return None
     
-def get_current_price(product_id, api_key, headers):
-    url = f"https://api.coinbase.com/api/v3/brokerage/products/{product_id}"
+def get_current_price(product_id):
+    endpoint = f"/api/v3/brokerage/products/{product_id}"
     
     try:
-        # Create headers with the API key
-        headers = {
-            'CB-ACCESS-KEY': api_key,
-            'Content-Type': 'application/json',
-            **headers  # Include other headers passed to the function
-        }
-        
-        response = requests.get(url, headers=headers)
+        response = signed_get(endpoint)
         response.raise_for_status()  # Raise an exception if the request was not successful
         data = response.json()
 
@@ -142,18 +121,11 @@ def get_current_price(product_id, api_key, headers):
     except requests.exceptions.RequestException as e:
         error_logger.error(f"Error fetching product stats: {e}")
         return None
-def get_current_asset_price(asset, api_key, headers):
-    url = f"https://api.coinbase.com/api/v3/brokerage/products/{asset}-USD"
+def get_current_asset_price(asset):
+    endpoint = f"/api/v3/brokerage/products/{asset}-USD"
     
     try:
-        # Create headers with the API key
-        headers = {
-            'CB-ACCESS-KEY': api_key,
-            'Content-Type': 'application/json',
-            **headers  # Include other headers passed to the function
-        }
-        
-        response = requests.get(url, headers=headers)
+        response = signed_get(endpoint)
         response.raise_for_status()  # Raise an exception if the request was not successful
         data = response.json()
 
@@ -167,8 +139,13 @@ def get_current_asset_price(asset, api_key, headers):
         return None
 
 def get_order_status(order_id):
-    url = f"https://api.coinbase.com/api/v3/brokerage/orders/historical/{order_id}"
-    response = requests.get(url)
+    endpoint = f"/api/v3/brokerage/orders/historical/{order_id}"
+
+    try:
+        response = signed_get(endpoint)
+    except requests.exceptions.RequestException as e:
+        error_logger.error(f"Error fetching order status: {e}")
+        return None
 
     if response.status_code == 200:
         order_data = response.json()
@@ -178,15 +155,16 @@ def get_order_status(order_id):
         return None
     
 def cancel_orders(order_ids):
-    url = "https://api.coinbase.com/api/v3/brokerage/orders/batch_cancel"
+    endpoint = "/api/v3/brokerage/orders/batch_cancel"
     payload = {
         "order_ids": order_ids
     }
-    headers = {
-        "Content-Type": "application/json"
-    }
 
-    response = requests.post(url, json=payload, headers=headers)
+    try:
+        response = signed_post(endpoint, payload)
+    except requests.exceptions.RequestException as e:
+        error_logger.error(f"Error cancelling orders: {e}")
+        return None
 
     if response.status_code == 200:
         cancel_results = response.json().get("results", [])
@@ -196,29 +174,17 @@ def cancel_orders(order_ids):
         return None
     
 def generate_signature(secret, headers, product_id):
+    from request_signer import HmacSigner
+
     timestamp = headers['CB-ACCESS-TIMESTAMP']
     method = "GET"  # Adjust if using other HTTP methods
     request_path = f"/products/{product_id}/stats"  # Use headers['product_id']
-    body = ""
-    message = f"{timestamp}{method}{request_path}{body}"
-    signature = hmac.new(secret.encode('utf-8'), message.encode('utf-8'), digestmod=hashlib.sha256).digest()
-    
-    return signature.hex()
-
-def get_decimal_places(number):
-    # Convert the number to a string
-    num_str = str(number)
 
-    # Check if there is a decimal point in the string
-    if '.' in num_str:
-        # Split the string at the decimal point
-        decimal_part = num_str.split('.')[1]
+    return HmacSigner(None, secret).signature(timestamp, method, request_path)
 
-        # Return the number of digits in the decimal part
-        return len(decimal_part)
-    else:
-        # If there is no decimal point, return 0
-        return 0
+def get_decimal_places(number):
+    # Digits after the decimal point, parsed once per distinct number (handles 1e-05 as well)
+    return decimal_places(number)
 
 # Indicate that coinbase_utils.py module loaded successfully
 info_logger.info("coinbase_utils module loaded successfully")
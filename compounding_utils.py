@@ -2,8 +2,7 @@
 from logging_config import app_logger, info_logger
 from config import config_data
 from starting_input import user_config
-from coinbase_auth import create_signed_request, fetch_historical_data 
-from coinbase_utils import fetch_product_stats, get_decimal_places
+from quantizer import quantize, FLOOR
 from order_processing_utils import open_limit_sell_order_processing, open_limit_buy_order_processing, close_limit_buy_order_processing, close_limit_sell_order_processing, open_market_sell_order_processing, open_market_buy_order_processing, close_market_buy_order_processing, close_market_sell_order_processing
 
 # Print a message when the module is loaded
@@ -13,26 +12,6 @@ print("Compounding Utils module loading...")
 product_id = user_config["product_id"]
 api_key = config_data["api_key"]
 api_secret = config_data["api_secret"]
-endpoint = endpoint = f'/api/v3/brokerage/products/{product_id}'
-method = 'GET'
-body = '' # Empty for GET requests
-headers = create_signed_request(api_key, api_secret, method, endpoint, body)
-product_stats = fetch_product_stats(product_id, api_key, headers)
-chart_interval = user_config["chart_interval"]
-num_intervals = user_config["num_intervals"]
-historical_data = fetch_historical_data(product_id, chart_interval, num_intervals)
-closing_prices = []
-
-for entry in historical_data:
-    try:
-        close_price = float(entry[4])
-        closing_prices.append(close_price)
-    except ValueError:
-        # Handle invalid data (e.g., non-numeric values) here, if needed
-        # You can print a message or take other appropriate actions
-        pass
-
-current_price = closing_prices[-1]
 starting_size_B = user_config["starting_size_B"]
 starting_size_Q = user_config["starting_size_Q"]
 profit_percent = user_config["profit_percent"]
@@ -46,11 +25,8 @@ print("Setup for compounding calculations complete.")
 
 # Function to calculate close limit buy order compounding quote currency amounts
 def calculate_close_limit_buy_compounding_amt_Q(total_received_Q, total_spent_B, close_price_buy, maker_fee, quote_increment):
-    # Determine number decimal places of quote_increment (an integer)
-    decimal_places = get_decimal_places(quote_increment)
-    
     # Calculate the amount of quote currency used if no compounding and amount available for compounding for close limit buy order
-    no_compounding_Q_limit_clb = round(((total_spent_B * close_price_buy) * (1 - maker_fee)), decimal_places)
+    no_compounding_Q_limit_clb = quantize(((total_spent_B * close_price_buy) * (1 - maker_fee)), quote_increment, FLOOR)
     compounding_amt_Q_clb = total_received_Q - no_compounding_Q_limit_clb
 
     app_logger.info("Amount of quote currency compounded for close cycle limit buy order: %s", compounding_amt_Q_clb)
@@ -60,11 +36,8 @@ def calculate_close_limit_buy_compounding_amt_Q(total_received_Q, total_spent_B,
 
 # Function to calculate close market buy order compounding quote currency amounts
 def calculate_close_market_buy_compounding_amt_Q(total_received_Q, total_spent_B, close_price_buy, taker_fee, quote_increment):
-    # Determine number decimal places of quote_increment (an integer)
-    decimal_places = get_decimal_places(quote_increment)
-    
     # Calculate the amount of quote currency used if no compounding and amount available for compounding for close market buy order
-    no_compounding_Q_market_cmb = round(((total_spent_B * close_price_buy) * (1 - taker_fee)), decimal_places)
+    no_compounding_Q_market_cmb = quantize(((total_spent_B * close_price_buy) * (1 - taker_fee)), quote_increment, FLOOR)
     compounding_amt_Q_cmb = total_received_Q - no_compounding_Q_market_cmb
 
     app_logger.info("Amount of quote currency compounded for close cycle market buy order: %s", compounding_amt_Q_cmb)
@@ -74,11 +47,8 @@ def calculate_close_market_buy_compounding_amt_Q(total_received_Q, total_spent_B
 
 # Function to calculate close limit sell order compounding base currency amounts
 def calculate_close_limit_sell_compounding_amt_B(total_received_B, total_spent_Q, close_price_sell, maker_fee, base_increment):
-    # Determine number decimal places of bas_increment (an integer)
-    decimal_places = get_decimal_places(base_increment)
-    
     # Calculate the amount of base currency used if no compounding and amount available for compounding for close limit sell order
-    no_compounding_B_limit_cls = round((total_spent_Q / close_price_sell) * (1 - maker_fee), decimal_places)
+    no_compounding_B_limit_cls = quantize((total_spent_Q / close_price_sell) * (1 - maker_fee), base_increment, FLOOR)
     compounding_amt_B_cls = total_received_B - no_compounding_B_limit_cls
 
     app_logger.info("Amount of base currency compounded for close cycle limit sell order: %s", compounding_amt_B_cls)
@@ -88,11 +58,8 @@ def calculate_close_limit_sell_compounding_amt_B(total_received_B, total_spent_Q
 
 # Function to calculate close market sell order compounding base currency amounts
 def calculate_close_market_sell_compounding_amt_B(total_received_B, total_spent_Q, close_price_sell, taker_fee, base_increment):
-    # Determine number decimal places of bas_increment (an integer)
-    decimal_places = get_decimal_places(base_increment)
-    
     # Calculate the amount of base currency used if no compounding and amount available for compounding for close market sell order
-    no_compounding_B_market_cms = round((total_spent_Q / close_price_sell) * (1 - taker_fee), decimal_places)
+    no_compounding_B_market_cms = quantize((total_spent_Q / close_price_sell) * (1 - taker_fee), base_increment, FLOOR)
     compounding_amt_B_cms = total_received_B - no_compounding_B_market_cms
 
     app_logger.info("Amount of base currency compounded for close cycle market sell order: %s", compounding_amt_B_cms)
@@ -158,11 +125,8 @@ def determine_next_close_size_B_market(compounding_option, total_received_B, no_
 
 # Function to calculate open limit sell order compounding base currency amounts
 def calculate_open_limit_sell_compounding_amt_B(total_received_B, total_spent_Q, open_price_sell, maker_fee, base_increment):
-    # Determine number decimal places of bas_increment (an integer)
-    decimal_places = get_decimal_places(base_increment)
-    
     # Calculate the amount of base currency used if no compounding and amount available for compounding for open limit sell order
-    no_compounding_B_limit_ols = round((total_spent_Q / open_price_sell) * (1 - maker_fee), decimal_places)
+    no_compounding_B_limit_ols = quantize((total_spent_Q / open_price_sell) * (1 - maker_fee), base_increment, FLOOR)
     compounding_amt_B_ols = total_received_B - no_compounding_B_limit_ols
 
     app_logger.info("Amount of base currency compounded for open cycle limit sell order: %s", compounding_amt_B_ols)
@@ -172,11 +136,8 @@ def calculate_open_limit_sell_compounding_amt_B(total_received_B, total_spent_Q,
 
 # Function to calculate open market sell order compounding base currency amounts
 def calculate_open_market_sell_compounding_amt_B(total_received_B, total_spent_Q, open_price_sell, taker_fee, base_increment):
-    # Determine number decimal places of bas_increment (an integer)
-    decimal_places = get_decimal_places(base_increment)
-    
     # Calculate the amount of base currency used if no compounding and amount available for compounding for open market sell order
-    no_compounding_B_market_oms = round((total_spent_Q / open_price_sell) * (1 - taker_fee), decimal_places)
+    no_compounding_B_market_oms = quantize((total_spent_Q / open_price_sell) * (1 - taker_fee), base_increment, FLOOR)
     compounding_amt_B_oms = total_received_B - no_compounding_B_market_oms
 
     app_logger.info("Amount of base currency compounded for open cycle market sell order: %s", compounding_amt_B_oms)
@@ -186,11 +147,8 @@ def calculate_open_market_sell_compounding_amt_B(total_received_B, total_spent_Q
 
 # Function to calculate open limit buy order compounding quote currency amounts
 def calculate_open_limit_buy_compounding_amt_Q(total_received_Q, total_spent_B, open_price_buy, maker_fee, quote_increment):
-    # Determine number decimal places of quote_increment (an integer)
-    decimal_places = get_decimal_places(quote_increment)
-    
     # Calculate the amount of quote currency used if no compounding and amount available for compounding for open limit buy order
-    no_compounding_Q_limit_olb = round(((total_spent_B * open_price_buy) * (1 - maker_fee)), decimal_places)
+    no_compounding_Q_limit_olb = quantize(((total_spent_B * open_price_buy) * (1 - maker_fee)), quote_increment, FLOOR)
     compounding_amt_Q_olb = total_received_Q - no_compounding_Q_limit_olb
 
     app_logger.info("Amount of quote currency compounded for open cycle limit buy order: %s", compounding_amt_Q_olb)
@@ -200,11 +158,8 @@ def calculate_open_limit_buy_compounding_amt_Q(total_received_Q, total_spent_B,
 
 # Function to calculate open market buy order compounding quote currency amounts
 def calculate_open_market_buy_compounding_amt_Q(total_received_Q, total_spent_B, open_price_buy, taker_fee, quote_increment):
-    # Determine number decimal places of quote_increment (an integer)
-    decimal_places = get_decimal_places(quote_increment)
-    
     # Calculate the amount of quote currency used if no compounding and amount available for compounding for open market buy order
-    no_compounding_Q_market_omb = round(((total_spent_B * open_price_buy) * (1 - taker_fee)), decimal_places)
+    no_compounding_Q_market_omb = quantize(((total_spent_B * open_price_buy) * (1 - taker_fee)), quote_increment, FLOOR)
     compounding_amt_Q_omb = total_received_Q - no_compounding_Q_market_omb
 
     app_logger.info("Amount of quote currency compounded for open cycle market buy order: %s", compounding_amt_Q_omb)
@@ -1,5 +1,6 @@
 #config.py
 import json
+import os
 from logging_config import info_logger, error_logger
 
 def load_config(file_path):
@@ -7,9 +8,10 @@ def load_config(file_path):
         config_data = json.load(json_file)
     return config_data
 
-# Load the configuration settings from the JSON file
+# Load the configuration settings from the JSON file (the path can be overridden with PORTALX_API_CONFIG)
 print("Loading API credentials...")
-config_data = load_config("D:\\APIs\\CBAT_api_3.json")
+config_path = os.environ.get("PORTALX_API_CONFIG", "D:\\APIs\\CBAT_api_3.json")
+config_data = load_config(config_path)
 # Check API credentials sent successfully
 if config_data is not None:
     info_logger.info("API credentials fetched successfully")
@@ -0,0 +1,187 @@
+# cycle_journal.py
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+from logging_config import app_logger, info_logger, error_logger
+
+# Location of the cycle set journal (override with PORTALX_JOURNAL); the compacted snapshot
+# is written next to it with a .snapshot suffix
+JOURNAL_PATH = os.environ.get("PORTALX_JOURNAL", "cycle_journal.jsonl")
+
+# Records appended to the journal before it is compacted into a new snapshot
+SNAPSHOT_INTERVAL = 1000
+
+# CycleSet constructor arguments recorded when a cycle set is created, so that it can be
+# rebuilt without asking for user input again
+CYCLE_SET_FIELDS = (
+    "product_id", "starting_size", "profit_percent", "taker_fee", "maker_fee", "compound_percent",
+    "compounding_option", "wait_period_unit", "first_order_wait_period", "chart_interval",
+    "num_intervals", "window_size", "stacking", "step_price", "cycle_type",
+)
+
+class CycleJournal:
+    # Append-only write-ahead log of cycle set state. Every record is the full state of one
+    # cycle set after a transition (or before an order is sent), written and fsynced before
+    # the cycle set moves on. Records are written by a background thread, which commits every
+    # record queued since its last write with one fsync, so cycle sets recording at the same
+    # time share a disk flush and the scheduler's event loop never waits on the disk.
+    # Replaying the snapshot and then the journal gives the latest state of every cycle set
+    # that has not ended; replaying a record twice changes nothing, so a crash during
+    # compaction is harmless.
+
+    def __init__(self, path=JOURNAL_PATH, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.path = path
+        self.snapshot_path = f"{path}.snapshot"
+        self.snapshot_interval = snapshot_interval
+        self._states = {}  # journal_id -> latest state of a cycle set that has not ended
+        self._records = 0  # Records appended since the last snapshot
+        self._lock = threading.Lock()
+        self._queue = []  # (line, Future) waiting for the writer thread, in the order recorded
+        self._queued = threading.Condition()
+        self._writer = None
+        self._closing = False
+
+        start_time = time.perf_counter()
+        self._replay()
+        self._file = open(self.path, "a", encoding="utf-8")
+        info_logger.info("Cycle journal %s replayed in %.3f s (%s cycle sets)", self.path, time.perf_counter() - start_time, len(self._states))
+
+    def _apply(self, record):
+        journal_id = record.pop("journal_id")
+
+        if record.pop("ended", False):
+            self._states.pop(journal_id, None)
+        else:
+            self._states.setdefault(journal_id, {}).update(record)
+
+    def _replay(self):
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as snapshot_file:
+                self._states = json.load(snapshot_file)["cycle_sets"]
+
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, encoding="utf-8") as journal_file:
+            lines = journal_file.readlines()
+
+        for line_number, line in enumerate(lines, 1):
+            try:
+                self._apply(json.loads(line))
+                self._records += 1
+            except (ValueError, KeyError) as e:
+                # The last line is cut short when the process died while writing it
+                if line_number == len(lines):
+                    app_logger.info("Ignoring incomplete last journal record")
+                else:
+                    error_logger.error(f"Skipping unreadable journal record {line_number}: {e}")
+
+    def append(self, journal_id, state, ended=False):
+        # Queue the state of one cycle set (ended=True forgets the cycle set); returns a Future
+        # resolved once the record is on disk. The state is serialised here, so the caller may
+        # change it straight away.
+        record = dict(state, journal_id=journal_id, time=time.time())
+        if ended:
+            record["ended"] = True
+        future = Future()
+
+        with self._queued:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="cycle-journal-writer", daemon=True)
+                self._writer.start()
+            self._queue.append((json.dumps(record), future))
+            self._queued.notify()
+
+        return future
+
+    def record(self, journal_id, state, ended=False):
+        # Append the state of one cycle set and wait until it is on disk
+        self.append(journal_id, state, ended).result()
+
+    def _run(self):
+        while True:
+            with self._queued:
+                while not self._queue and not self._closing:
+                    self._queued.wait()
+                if not self._queue:
+                    return
+                batch, self._queue = self._queue, []
+
+            try:
+                self._write([line for line, _ in batch])
+            except (OSError, ValueError) as e:
+                error_logger.error(f"Unable to write {len(batch)} records to the cycle journal: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for _, future in batch:
+                future.set_result(None)
+
+    def _write(self, lines):
+        with self._lock:
+            self._file.write("".join(line + "\n" for line in lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+            for line in lines:
+                self._apply(json.loads(line))
+            self._records += len(lines)
+
+            if self._records >= self.snapshot_interval:
+                self._compact()
+
+    def _compact(self):
+        # Write the current states to a new snapshot, then start an empty journal
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as snapshot_file:
+            json.dump({"time": time.time(), "cycle_sets": self._states}, snapshot_file)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+        self._file.close()
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._records = 0
+        info_logger.info("Cycle journal compacted (%s cycle sets)", len(self._states))
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def cycle_sets(self):
+        # {journal_id: state} of every cycle set that has not ended, oldest first
+        with self._lock:
+            states = sorted(self._states.items(), key=lambda item: item[1].get("created", 0))
+            return {journal_id: dict(state) for journal_id, state in states}
+
+    def close(self):
+        # Write the records still queued, then close the journal
+        with self._queued:
+            self._closing = True
+            self._queued.notify()
+            writer = self._writer
+        if writer is not None:
+            writer.join()
+
+        with self._lock:
+            self._file.close()
+
+# Process-wide journal, opened (and replayed) on first use
+_cycle_journal = None
+_cycle_journal_lock = threading.Lock()
+
+def get_cycle_journal():
+    global _cycle_journal
+
+    if _cycle_journal is None:
+        with _cycle_journal_lock:
+            if _cycle_journal is None:
+                _cycle_journal = CycleJournal()
+
+    return _cycle_journal
+
+# Indicate that cycle_journal.py module loaded successfully
+info_logger.info("cycle_journal module loaded successfully")
@@ -0,0 +1,82 @@
+# cycle_metrics.py
+import time
+from logging_config import info_logger
+
+class CycleSetMetrics:
+    # Running profit and loss of one cycle set. Each processed fill adjusts the net base and
+    # quote amounts in constant time; values in "dollars" are in the product's quote currency.
+    # A sell-buy cycle set starts holding its starting size in base currency, a buy-sell
+    # cycle set in quote currency.
+
+    def __init__(self, cycle_type, starting_size):
+        self.starting_base = starting_size if cycle_type == "sell_buy" else 0.0
+        self.starting_quote = starting_size if cycle_type == "buy_sell" else 0.0
+        self.started_at = time.time()
+        self.fills = 0
+        self.fees = 0.0
+        self.net_base = 0.0  # Base currency received minus spent, over every fill
+        self.net_quote = 0.0  # Quote currency received minus spent, over every fill
+        self.realized_base = 0.0  # net_base as of the last closing fill (completed cycles only)
+        self.realized_quote = 0.0
+        self.starting_price = None  # First price the holdings were valued at
+        self.last_price = None
+
+    def state(self):
+        # Plain values for the cycle journal
+        return dict(vars(self))
+
+    def restore(self, state):
+        vars(self).update(state)
+
+    def apply_fill(self, side, phase, spent, received, fee, price=None):
+        # A sell spends base and receives quote, a buy the reverse
+        if side == "SELL":
+            self.net_base -= spent
+            self.net_quote += received
+        else:
+            self.net_quote -= spent
+            self.net_base += received
+
+        self.fills += 1
+        self.fees += fee
+
+        if phase == "close":
+            self.realized_base = self.net_base
+            self.realized_quote = self.net_quote
+
+        if price:
+            self.mark(price)
+
+    def mark(self, price):
+        if self.starting_price is None:
+            self.starting_price = price
+        self.last_price = price
+
+    def value(self, price):
+        return (self.starting_base + self.net_base) * price + self.starting_quote + self.net_quote
+
+    def summary(self, price=None, now=None):
+        # Metrics at the given price (default: the last price seen) and time (default: now; a
+        # backtest passes its virtual clock); None until a price is known
+        if price is not None:
+            self.mark(price)
+        if self.last_price is None:
+            return None
+
+        starting_value = self.starting_base * self.starting_price + self.starting_quote
+        current_value = self.value(self.last_price)
+        percent_gain_loss = (current_value - starting_value) / starting_value * 100 if starting_value else None
+        hours = max((time.time() if now is None else now) - self.started_at, 1) / 3600
+
+        return {
+            "starting_dollar_value": starting_value,
+            "current_dollar_value": current_value,
+            "percent_gain_loss_dollar": percent_gain_loss,
+            "percent_gain_loss_base": self.realized_base / self.starting_base * 100 if self.starting_base else None,
+            "percent_gain_loss_quote": self.realized_quote / self.starting_quote * 100 if self.starting_quote else None,
+            "average_profit_percent_per_hour": percent_gain_loss / hours if percent_gain_loss is not None else None,
+            "average_profit_percent_per_day": percent_gain_loss / hours * 24 if percent_gain_loss is not None else None,
+        }
+
+# Indicate that cycle_metrics.py module loaded successfully
+info_logger.info("cycle_metrics module loaded successfully")
@@ -0,0 +1,968 @@
+# cycle_scheduler.py
+import asyncio
+import threading
+import time
+import uuid
+from config import config_data
+from logging_config import app_logger, info_logger, error_logger
+from async_client import AsyncCoinbaseClient, REQUEST_ERRORS
+from order_state import order_state_table, TERMINAL_STATUSES, ORDER_IDS_PER_REQUEST
+from cycle_journal import CYCLE_SET_FIELDS, get_cycle_journal
+from trade_ledger import get_trade_ledger
+from market_context import get_market_context
+from market_data import get_market_data_hub
+from market_triggers import MarketTriggers, get_market_triggers
+from quantizer import get_quantizer, FLOOR
+from order_locks import KeyedLocks, balance_key
+from price_rules import next_open_sell_price, next_open_buy_price, starting_sell_price, starting_buy_price, close_buy_price, close_sell_price, sell_price_favorable, buy_price_favorable, quote_to_base_size, ladder_prices, ladder_sizes
+from order_processing_utils import open_limit_sell_order_processing, open_limit_buy_order_processing, close_limit_buy_order_processing, close_limit_sell_order_processing
+from compounding_utils import calculate_close_limit_buy_compounding_amt_Q, calculate_close_limit_sell_compounding_amt_B, determine_next_close_size_Q_limit, determine_next_close_size_B_limit, determine_next_open_size_B_limit, determine_next_open_size_Q_limit, calculate_open_limit_sell_compounding_amt_B, calculate_open_limit_buy_compounding_amt_Q
+
+# Runs every cycle set as a coroutine on one event loop instead of one blocked thread per
+# cycle set. Market data is refreshed once per product and shared by all of its cycle sets;
+# fills arrive through the order state table (user channel feed or bulk poller).
+
+# Define API credentials
+api_key = config_data["api_key"]
+api_secret = config_data["api_secret"]
+
+# Seconds between market data refreshes (indicators; with a market data hub, opening conditions
+# are also checked on every ticker update)
+MARKET_REFRESH_INTERVAL = 90
+
+# Seconds between order detail requests while a filled order is not yet 100% complete (or its
+# details could not be fetched), and the requests made before the cycle set fails
+FILL_DETAILS_RETRY_DELAY = 1
+FILL_DETAILS_ATTEMPTS = 120
+
+# Seconds to wait for a stopped cycle set to cancel its resting order
+STOP_TIMEOUT = 30
+
+# Rungs of a stacked opening order (cycle sets created with stacking enabled)
+LADDER_RUNGS = 5
+
+# Seconds the other rungs of a ladder may take to fill once one rung has filled; rungs still
+# resting after that are cancelled and the cycle closes against the size that filled
+LADDER_FILL_TIMEOUT = 600
+
+# Seconds to wait for cancelled ladder rungs to report their final status
+LADDER_CANCEL_TIMEOUT = 30
+
+# Seconds before an interrupted placement from which the product's orders are searched for its
+# client_order_id when resuming from the journal
+PLACEMENT_LOOKBACK = 300
+
+# Cycle set states
+OPENING = "OPENING"
+WAITING_OPEN_FILL = "WAITING_OPEN_FILL"
+CLOSING = "CLOSING"
+WAITING_CLOSE_FILL = "WAITING_CLOSE_FILL"
+FAILED = "FAILED"
+STOPPED = "STOPPED"
+
+def limit_order_payload(side, product_id, base_size, limit_price):
+    # Post-only GTC limit order
+    return {
+        "side": side,
+        "order_configuration": {
+            "limit_limit_gtc": {
+                "base_size": str(base_size),
+                "limit_price": str(limit_price),
+                "post_only": True
+            },
+        },
+        "product_id": product_id,
+        "client_order_id": str(uuid.uuid4())
+    }
+
+class ProductMarketFeed:
+    # Market snapshot for one product, refreshed on a timer. Indicator updates use the
+    # blocking candle store and run in a worker thread; prices come from the market data hub
+    # (shared with the other modules), or from the async client when there is none. Cycle sets
+    # waiting for a price condition register a market trigger on the hub, so that they wake on
+    # the ticker update that meets it rather than on the next refresh.
+
+    def __init__(self, context, client, refresh_interval=MARKET_REFRESH_INTERVAL, market_data=None, triggers=None):
+        self.context = context
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.market_data = market_data
+        self.triggers = triggers  # Market triggers on the hub (None: conditions checked on refreshes)
+        self.snapshot = None
+        self.version = 0
+        self._updated = asyncio.Condition()
+        self._waiting = set()  # Registered triggers, re-evaluated when the indicators change
+
+    def _read_indicators(self):
+        context = self.context
+        context.update_indicators()
+        upper_bb, lower_bb = context.bollinger_bands
+
+        if self.market_data is not None:
+            mean24 = self.market_data.get_mean24(context.product_id)
+        else:
+            context.refresh("mean24")
+            mean24 = context.mean24
+
+        return {
+            "upper_bb": upper_bb,
+            "lower_bb": lower_bb,
+            "mean24": mean24,
+            "long_term_ma24": context.long_term_ma24,
+            "current_rsi": context.current_rsi,
+            "quote_increment": context.quote_increment,
+            "base_increment": context.base_increment,
+        }
+
+    async def refresh(self):
+        snapshot = await asyncio.to_thread(self._read_indicators)
+
+        if self.market_data is not None:
+            market = await asyncio.to_thread(self.market_data.get_snapshot, self.context.product_id)
+            market = market or {}
+            snapshot["current_price"] = market.get("price")
+            snapshot["best_bid"], snapshot["best_ask"] = market.get("best_bid"), market.get("best_ask")
+        else:
+            snapshot["current_price"] = await self.client.get_current_price(self.context.product_id)
+            best_bid_ask = await self.client.get_best_bid_ask(self.context.product_id)
+            snapshot["best_bid"], snapshot["best_ask"] = best_bid_ask if best_bid_ask is not None else (None, None)
+
+        if snapshot["current_price"] is None:
+            error_logger.error(f"Market snapshot for {self.context.product_id} skipped: no current price")
+            return
+        self.context.set_last_price(snapshot["current_price"])
+
+        async with self._updated:
+            self.snapshot = snapshot
+            self.version += 1
+            self._updated.notify_all()
+
+        for trigger in list(self._waiting):
+            self.triggers.evaluate(trigger)
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error_logger.error(f"Error refreshing market data for {self.context.product_id}: {e}")
+
+            await asyncio.sleep(self.refresh_interval)
+
+    async def wait_for_update(self, seen_version=0):
+        # Wait for a snapshot newer than seen_version; returns (version, snapshot)
+        async with self._updated:
+            await self._updated.wait_for(lambda: self.version > seen_version)
+            return self.version, self.snapshot
+
+    def _with_market(self, market):
+        # The latest snapshot with the price and book of a market data hub snapshot
+        snapshot = dict(self.snapshot)
+        snapshot["current_price"] = market["price"]
+        snapshot["best_bid"] = market.get("best_bid", snapshot["best_bid"])
+        snapshot["best_ask"] = market.get("best_ask", snapshot["best_ask"])
+        return snapshot
+
+    async def wait_until(self, predicate):
+        # Wait until predicate(snapshot) returns a value; returns (value, snapshot). Without
+        # market triggers the predicate is checked on every refreshed snapshot.
+        if self.triggers is None:
+            version = 0
+            while True:
+                version, snapshot = await self.wait_for_update(version)
+                value = predicate(snapshot)
+                if value is not None:
+                    return value, snapshot
+
+        if self.snapshot is None:
+            await self.wait_for_update()
+
+        # Evaluated on the hub's thread for every ticker update of the product
+        def condition(market):
+            snapshot = self._with_market(market)
+            value = predicate(snapshot)
+            return (value, snapshot) if value is not None else None
+
+        loop = asyncio.get_running_loop()
+        fired = asyncio.Event()
+
+        def on_fire(result):
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(fired.set)
+
+        trigger = self.triggers.register(self.context.product_id, condition, on_fire)
+        self._waiting.add(trigger)
+        try:
+            await fired.wait()
+            return trigger.result
+        finally:
+            self._waiting.discard(trigger)
+            self.triggers.cancel(trigger)
+
+class FillWaiter:
+    # Resolves futures when the order state table reports a final status. Table listeners
+    # run on the feed/poller threads, so results are handed to the loop thread-safely.
+
+    def __init__(self, loop, table=order_state_table):
+        self.loop = loop
+        self.table = table
+        self._waiting = {}  # order_id -> futures
+        table.add_listener(self._on_status)
+
+    def close(self):
+        # Stop listening to the table (the loop is about to close)
+        self.table.remove_listener(self._on_status)
+
+    def _on_status(self, order_id, status):
+        if status in TERMINAL_STATUSES and order_id in self._waiting:
+            self.loop.call_soon_threadsafe(self._resolve, order_id, status)
+
+    def _resolve(self, order_id, status):
+        for future in self._waiting.pop(order_id, []):
+            if not future.done():
+                future.set_result(status)
+
+    async def wait(self, order_id):
+        # Register first so that a status arriving in between is not missed
+        future = self.loop.create_future()
+        self._waiting.setdefault(order_id, []).append(future)
+
+        status = self.table.get_status(order_id)
+        if status in TERMINAL_STATUSES:
+            self._resolve(order_id, status)
+
+        try:
+            return await future
+        finally:
+            futures = self._waiting.get(order_id)
+            if futures is not None and future in futures:
+                futures.remove(future)
+                if not futures:
+                    del self._waiting[order_id]
+
+class CycleSetRunner:
+    # State machine for one cycle set:
+    # OPENING -> WAITING_OPEN_FILL -> CLOSING -> WAITING_CLOSE_FILL -> OPENING ...
+    # ending in FAILED, or STOPPED when the task is cancelled
+
+    def __init__(self, cycle_set, client, feed, fills, journal=None, ledger=None, placement_locks=None):
+        self.cycle_set = cycle_set
+        self.client = client
+        self.feed = feed
+        self.fills = fills
+        self.journal = journal
+        self.ledger = ledger
+        self.placement_locks = placement_locks or KeyedLocks(asyncio.Lock)  # Shared by the scheduler's cycle sets
+        self.state = OPENING
+        self.sell_buy = cycle_set.cycle_type == "sell_buy"
+        self.stacked = str(cycle_set.stacking).strip().lower() == "true"  # Opening orders are placed as a ladder
+        self.starting = True  # The first cycle uses the starting price rules
+        self.open_size = cycle_set.starting_size
+        self.close_results = None  # Closing order totals used to size the next opening order
+        self.cycle = None
+        self.order_id = None
+        self.snapshot_version = 0
+        self.open_price = None
+        self.close_price = None
+        self.close_size = None
+        self.pending_order = None  # Order payload journalled but not yet acknowledged by the exchange
+        self.pending_orders = []  # Ladder rungs journalled but not yet placed: {"payload", "size"}
+        self.ladder = []  # Placed ladder rungs of the opening order: {"order_id", "size", "price"}
+
+    def _journal_state(self):
+        cycle_set = self.cycle_set
+        return {
+            "state": self.state,
+            "starting": self.starting,
+            "open_size": self.open_size,
+            "close_results": self.close_results,
+            "open_price": self.open_price,
+            "close_price": self.close_price,
+            "close_size": self.close_size,
+            "order_id": self.order_id,
+            "pending_order": self.pending_order,
+            "pending_orders": self.pending_orders,
+            "ladder": self.ladder,
+            "cycle_number": cycle_set.cycle_number,
+            "completed_cycles": cycle_set.completed_cycles,
+            "metrics": cycle_set.metrics.state(),
+        }
+
+    async def _record(self, created=False):
+        # Journal the current state before acting on it. The journal's writer thread writes and
+        # fsyncs the record; only this cycle set waits for it, the event loop runs on.
+        if self.journal is None:
+            return
+
+        cycle_set = self.cycle_set
+        if created:
+            config = {name: getattr(cycle_set, name) for name in CYCLE_SET_FIELDS}
+            written = self.journal.append(cycle_set.journal_id, dict(self._journal_state(), config=config, created=time.time()))
+        else:
+            written = self.journal.append(cycle_set.journal_id, self._journal_state(), ended=self.state in (FAILED, STOPPED))
+        await asyncio.wrap_future(written)
+
+    async def _created(self):
+        # A new cycle set gets the ID it is known by in the journal and the trade ledger
+        cycle_set = self.cycle_set
+        cycle_set.journal_id = uuid.uuid4().hex
+        await self._record(created=True)
+        if self.ledger is not None:
+            self.ledger.record_cycle_set(cycle_set.journal_id, cycle_set.product_id, cycle_set.cycle_type, cycle_set.starting_size)
+
+    def _record_order(self, side, phase, order_id=None, payload=None):
+        if self.ledger is not None:
+            cycle_set = self.cycle_set
+            configuration = (payload or self.pending_order)["order_configuration"]["limit_limit_gtc"]
+            self.ledger.record_order(order_id or self.order_id, cycle_set.journal_id, cycle_set.cycle_number, cycle_set.product_id, side, phase, float(configuration["limit_price"]), float(configuration["base_size"]))
+
+    def restore(self, state, placed_orders):
+        # Continue from a journalled state. placed_orders maps the client_order_id of orders found
+        # on the exchange to their order ID, so an interrupted placement is adopted, not repeated.
+        cycle_set = self.cycle_set
+        self.state = state["state"]
+        self.starting = state["starting"]
+        self.open_size = state["open_size"]
+        self.close_results = tuple(state["close_results"]) if state["close_results"] is not None else None
+        self.open_price = state["open_price"]
+        self.close_price = state["close_price"]
+        self.close_size = state["close_size"]
+        self.order_id = state["order_id"]
+        self.pending_order = state["pending_order"]
+        self.pending_orders = state.get("pending_orders", [])
+        self.ladder = state.get("ladder", [])
+        cycle_set.completed_cycles = state["completed_cycles"]
+        if "metrics" in state:
+            cycle_set.metrics.restore(state["metrics"])
+
+        if self.pending_order is not None:
+            order_id = placed_orders.get(self.pending_order["client_order_id"])
+            if order_id is not None:
+                self.order_id = order_id
+                self.pending_order = None
+                self.state = WAITING_OPEN_FILL if self.state == OPENING else WAITING_CLOSE_FILL
+
+        # Ladder rungs found on the exchange are adopted; the rest are placed when the cycle set runs
+        pending_orders, self.pending_orders = self.pending_orders, []
+        for rung in pending_orders:
+            order_id = placed_orders.get(rung["payload"]["client_order_id"])
+            if order_id is None:
+                self.pending_orders.append(rung)
+            else:
+                self.ladder.append({"order_id": order_id, "size": rung["size"], "price": float(rung["payload"]["order_configuration"]["limit_limit_gtc"]["limit_price"])})
+        if pending_orders and not self.pending_orders:
+            self.state = WAITING_OPEN_FILL
+
+        # A cycle is in progress unless the next opening order has not been worked out yet
+        if self.state != OPENING or self.pending_order is not None or self.pending_orders or self.ladder:
+            self.cycle, _ = cycle_set.add_cycle(self.open_size, cycle_set.cycle_type)
+        cycle_set.cycle_number = state["cycle_number"]
+
+        for order_id in [self.order_id] + [rung["order_id"] for rung in self.ladder]:
+            if order_id is not None:
+                order_state_table.track(order_id, cycle_set.product_id)
+                cycle_set.orders.append(order_id)
+                self.cycle.orders.append(order_id)
+                self.cycle.cycle_running = True
+
+        app_logger.info(f"{cycle_set.cycleset_instance_id} resumed in state {self.state}")
+
+    def _set_status(self, status):
+        cycle_set = self.cycle_set
+        cycle_set.cycle_status = f"CyclSet {cycle_set.cycleset_number} ({cycle_set.cycle_type}) Cycle {cycle_set.cycle_number}: {status}"
+        info_logger.info(cycle_set.cycle_status)
+
+    def _fail(self, message, status):
+        cycle_set = self.cycle_set
+        error_logger.error(f"{message} for CycleSet {cycle_set.cycleset_number} ({cycle_set.cycle_type}). Stopping the current cycle set.")
+        cycle_set.cycleset_status = f"CyclSet {cycle_set.cycleset_number} ({cycle_set.cycle_type}) Failed"
+        self._set_status(f"Failed-{status}")
+        return FAILED
+
+    async def run(self):
+        cycle_set = self.cycle_set
+        handlers = {
+            OPENING: self._open,
+            WAITING_OPEN_FILL: self._wait_open_fill,
+            CLOSING: self._close,
+            WAITING_CLOSE_FILL: self._wait_close_fill,
+        }
+        cycle_set.cycleset_running = True
+
+        try:
+            if cycle_set.journal_id is None:
+                await self._created()
+
+            while self.state in handlers:
+                self.state = await handlers[self.state]()
+                await self._record()
+
+        except asyncio.CancelledError:
+            self.state = STOPPED
+            cycle_set.cycleset_status = f"CyclSet {cycle_set.cycleset_number} ({cycle_set.cycle_type}) Stopped"
+            await self._cancel_resting_order()
+            await self._record()
+            raise
+
+        except Exception as e:
+            error_logger.exception(f"Unexpected error in CycleSet {cycle_set.cycleset_number} ({cycle_set.cycle_type}): {e}")
+            self.state = FAILED
+            cycle_set.cycleset_status = f"CyclSet {cycle_set.cycleset_number} ({cycle_set.cycle_type}) Failed"
+            await self._record()
+
+        finally:
+            cycle_set.cycleset_running = False
+            if self.cycle is not None:
+                self.cycle.cycle_running = False
+
+        return self.state
+
+    async def _cancel_resting_order(self):
+        order_ids = [self.order_id] + [rung["order_id"] for rung in self.ladder]
+        order_ids = [order_id for order_id in order_ids if order_id is not None and order_state_table.get_status(order_id) not in TERMINAL_STATUSES]
+        if not order_ids:
+            return
+
+        results = await self.client.cancel_orders(order_ids)
+        if results:
+            app_logger.info("Cancel request sent for orders %s", order_ids)
+        else:
+            error_logger.error(f"Failed to cancel orders {order_ids}. Check the exchange and handle them manually.")
+
+    def _opening_price(self, snapshot):
+        cycle_set = self.cycle_set
+        quote_increment = snapshot["quote_increment"]
+
+        if self.sell_buy:
+            if self.starting:
+                price = starting_sell_price(snapshot["current_price"], snapshot["mean24"], snapshot["upper_bb"], self.open_size, quote_increment)
+            else:
+                price = next_open_sell_price(snapshot["current_price"], snapshot["long_term_ma24"], snapshot["upper_bb"], snapshot["current_rsi"], cycle_set.profit_percent, quote_increment)
+            return price if price is not None and sell_price_favorable(price, snapshot["best_bid"]) else None
+
+        if self.starting:
+            price = starting_buy_price(snapshot["current_price"], snapshot["mean24"], snapshot["lower_bb"], self.open_size, quote_increment)
+        else:
+            price = next_open_buy_price(snapshot["current_price"], snapshot["long_term_ma24"], snapshot["lower_bb"], snapshot["current_rsi"], cycle_set.profit_percent, quote_increment)
+        return price if price is not None and buy_price_favorable(price, snapshot["best_ask"]) else None
+
+    def _next_open_size(self, price, snapshot):
+        # Compound the previous closing order into the next opening order
+        cycle_set = self.cycle_set
+        total_received, total_spent = self.close_results
+
+        if self.sell_buy:
+            compounding_amt, no_compounding_limit = calculate_open_limit_sell_compounding_amt_B(total_received, total_spent, price, cycle_set.maker_fee, snapshot["base_increment"])
+            return determine_next_open_size_B_limit(cycle_set.compounding_option, total_received, no_compounding_limit, compounding_amt, cycle_set.compound_percent)
+
+        compounding_amt, no_compounding_limit = calculate_open_limit_buy_compounding_amt_Q(total_received, total_spent, price, cycle_set.maker_fee, snapshot["quote_increment"])
+        return determine_next_open_size_Q_limit(cycle_set.compounding_option, total_received, no_compounding_limit, compounding_amt, cycle_set.compound_percent)
+
+    def _quantizer(self, snapshot):
+        # Quantizer of the increments in the market snapshot; fills are processed with it too, so
+        # that processing never depends on another product stats fetch after money has moved
+        return get_quantizer(snapshot["base_increment"], snapshot["quote_increment"])
+
+    def _order_amount(self, amount, base, snapshot):
+        # Order amounts round down to the increment of their currency (base sizes to the base
+        # increment, quote funds to the quote increment) so an order never exceeds its funds
+        quantizer = self._quantizer(snapshot)
+        return quantizer.size(amount, FLOOR) if base else quantizer.quote(amount, FLOOR)
+
+    def _ladder_orders(self, price, snapshot):
+        # Rungs of a stacked opening order, sized in the opening currency
+        cycle_set = self.cycle_set
+        side = "SELL" if self.sell_buy else "BUY"
+        prices = ladder_prices(side, price, snapshot["upper_bb"], snapshot["lower_bb"], LADDER_RUNGS, snapshot["quote_increment"])
+        sizes = ladder_sizes(self.open_size, len(prices), snapshot["base_increment"] if self.sell_buy else snapshot["quote_increment"])
+
+        rungs = []
+        for rung_price, size in zip(prices, sizes):
+            base_size = size if self.sell_buy else quote_to_base_size(size, cycle_set.maker_fee, rung_price, snapshot["base_increment"])
+            rungs.append({"payload": limit_order_payload(side, cycle_set.product_id, base_size, rung_price), "size": size})
+        return rungs
+
+    async def _open(self):
+        cycle_set = self.cycle_set
+        side_name = "Sell" if self.sell_buy else "Buy"
+        phase = "Starting Opening" if self.starting else "Opening"
+
+        # A placement resumed from the journal is sent again with its original client_order_id
+        if self.pending_order is None and not self.pending_orders:
+            # Wait on shared market data until the opening price conditions are met
+            price, snapshot = await self.feed.wait_until(self._opening_price)
+
+            open_size = self.open_size if self.starting else self._next_open_size(price, snapshot)
+            if open_size is None:
+                return self._fail(f"Unable to determine next opening cycle {side_name.lower()} order size", f"{phase} {side_name} Order")
+            self.open_size = self._order_amount(open_size, self.sell_buy, snapshot)
+            if not self.starting:
+                (cycle_set.open_size_B_history if self.sell_buy else cycle_set.open_size_Q_history).append(self.open_size)
+
+            self.cycle, cycle_set.cycle_number = cycle_set.add_cycle(self.open_size, cycle_set.cycle_type)
+            self.open_price = price
+            if self.ledger is not None:
+                self.ledger.record_cycle(cycle_set.journal_id, cycle_set.cycle_number, self.open_size)
+
+            if self.stacked:
+                self.pending_orders = self._ladder_orders(price, snapshot)
+            elif self.sell_buy:
+                self.pending_order = limit_order_payload("SELL", cycle_set.product_id, self.open_size, price)
+            else:
+                self.pending_order = limit_order_payload("BUY", cycle_set.product_id, quote_to_base_size(self.open_size, cycle_set.maker_fee, price, snapshot["base_increment"]), price)
+            await self._record()
+
+        # Orders drawing on the same balance are placed one at a time
+        stacked = bool(self.pending_orders)
+        async with self.placement_locks.get(balance_key(cycle_set.product_id, side_name.upper())):
+            if stacked:
+                placed = await self._place_ladder(phase, side_name)
+            else:
+                self.order_id = await self.client.post_order(self.pending_order, f"{phase.lower()} cycle {side_name.lower()} order")
+                placed = self.order_id is not None
+
+        if not placed:
+            return self._fail(f"{phase} {side_name.lower()} {'ladder' if stacked else 'order'} not placed", f"{phase} {side_name} Order")
+        if not stacked:
+            self._record_order(side_name.upper(), "open")
+            self.pending_order = None
+
+            cycle_set.orders.append(self.order_id)
+            self.cycle.orders.append(self.order_id)
+
+        self.cycle.cycle_running = True
+        cycle_set.cycleset_status = f"CyclSet {cycle_set.cycleset_number} ({cycle_set.cycle_type}) Active"
+        self._set_status(f"Active-{phase} {side_name} Order")
+        return WAITING_OPEN_FILL
+
+    async def _place_ladder(self, phase, side_name):
+        # Place every journalled rung in one concurrent batch. If any rung fails, the batch is
+        # cancelled together with rungs adopted after a restart, and the cycle set fails.
+        cycle_set = self.cycle_set
+        order_ids = await self.client.post_orders([rung["payload"] for rung in self.pending_orders], f"{phase.lower()} cycle {side_name.lower()} ladder order")
+
+        if order_ids is None:
+            adopted = [rung["order_id"] for rung in self.ladder]
+            if adopted and await self.client.cancel_orders(adopted) is None:
+                error_logger.error(f"Failed to cancel orders {adopted}. Check the exchange and handle them manually.")
+            self.pending_orders = []
+            self.ladder = []
+            return False
+
+        for rung, order_id in zip(self.pending_orders, order_ids):
+            self._record_order(side_name.upper(), "open", order_id, rung["payload"])
+            self.ladder.append({"order_id": order_id, "size": rung["size"], "price": float(rung["payload"]["order_configuration"]["limit_limit_gtc"]["limit_price"])})
+            cycle_set.orders.append(order_id)
+            self.cycle.orders.append(order_id)
+        self.pending_orders = []
+        return True
+
+    async def _snapshot(self):
+        # Latest market snapshot; a cycle set resumed from the journal may get here before the
+        # feed's first refresh
+        if self.feed.snapshot is None:
+            self.snapshot_version, _ = await self.feed.wait_for_update(self.snapshot_version)
+        return self.feed.snapshot
+
+    async def _filled_order_details(self, order_id=None):
+        # Wait for a final status, then fetch the details once the fill is complete
+        order_id = order_id or self.order_id
+        status = await self.fills.wait(order_id)
+        if status != "FILLED":
+            error_logger.error(f"Order {order_id} ended with status {status}")
+            return None
+
+        return await self._final_order_details(order_id, status)
+
+    async def _final_order_details(self, order_id, status):
+        # Details of an order with a final status; a filled order's once its fill is complete.
+        # None if they are still not available after FILL_DETAILS_ATTEMPTS requests.
+        for attempt in range(FILL_DETAILS_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(FILL_DETAILS_RETRY_DELAY)
+            order_details = await self.client.get_order(order_id)
+            if order_details is not None and (status != "FILLED" or float(order_details["order"].get("completion_percentage", 0)) == 100):
+                app_logger.info("Order %s %s", order_id, status.lower())
+                return order_details
+
+        error_logger.error(f"Details of order {order_id} ({status}) not available after {FILL_DETAILS_ATTEMPTS} requests. Check the exchange and handle it manually.")
+        return None
+
+    async def _opening_fills(self):
+        # (size, order details) of the opening order, or of every ladder rung that filled at least
+        # in part; None if nothing was filled
+        if not self.ladder:
+            order_details = await self._filled_order_details()
+            return [(self.open_size, order_details)] if order_details is not None else None
+
+        fills = []
+        for rung, status in await self._ladder_statuses():
+            if status == "FAILED":
+                continue
+            order_details = await self._final_order_details(rung["order_id"], status)
+            if order_details is None:
+                return None
+            if float(order_details["order"].get("filled_size", 0)) > 0:
+                fills.append((rung["size"], order_details))
+        if not fills:
+            return None
+
+        # The closing order is priced from the ladder's average fill price
+        filled_value = sum(float(order_details["order"]["filled_value"]) for _, order_details in fills)
+        filled_size = sum(float(order_details["order"]["filled_size"]) for _, order_details in fills)
+        self.open_price = filled_value / filled_size
+        return fills
+
+    async def _ladder_statuses(self):
+        # Wait until a rung fills, give the others LADDER_FILL_TIMEOUT to follow, then cancel the
+        # rungs still resting. Returns (rung, final status) of every rung that ended; a cancelled
+        # rung may still have filled in part.
+        waits = {asyncio.ensure_future(self.fills.wait(rung["order_id"])): rung for rung in self.ladder}
+        pending = set(waits)
+
+        try:
+            while pending and not any(wait.done() and wait.result() == "FILLED" for wait in waits):
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            if pending:
+                _, pending = await asyncio.wait(pending, timeout=LADDER_FILL_TIMEOUT)
+
+            if pending:
+                resting = [rung["order_id"] for wait, rung in waits.items() if wait in pending]
+                app_logger.info("Cancelling unfilled ladder rungs %s", resting)
+                if await self.client.cancel_orders(resting) is None:
+                    error_logger.error(f"Failed to cancel orders {resting}. Check the exchange and handle them manually.")
+                _, pending = await asyncio.wait(pending, timeout=LADDER_CANCEL_TIMEOUT)
+
+            if pending:
+                unknown = [rung["order_id"] for wait, rung in waits.items() if wait in pending]
+                error_logger.error(f"Ladder rungs {unknown} did not report a final status after cancelling; closing without them. Check the exchange and handle them manually.")
+        finally:
+            for wait in pending:
+                wait.cancel()
+
+        return [(rung, wait.result()) for wait, rung in waits.items() if wait.done() and not wait.cancelled()]
+
+    def _process_fills(self, processing, fills, snapshot):
+        # Process each fill and add up the results (a single order gives its own results)
+        totals = {}
+        for size, order_details in fills:
+            params = processing(size, order_details, order_processing_params={}, metrics=self.cycle_set.metrics, quantizer=self._quantizer(snapshot))
+            if params is None:
+                return None
+            for name, value in params.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+    async def _wait_open_fill(self):
+        cycle_set = self.cycle_set
+        side_name = "Sell" if self.sell_buy else "Buy"
+        phase = "Starting Opening" if self.starting else "Opening"
+
+        fills = await self._opening_fills()
+        if fills is None:
+            return self._fail(f"{phase} {side_name.lower()} order not filled or its fill details not available", f"{phase} {side_name} Order")
+
+        snapshot = await self._snapshot()
+
+        if self.sell_buy:
+            params = self._process_fills(open_limit_sell_order_processing, fills, snapshot)
+            if params is None:
+                return self._fail("Order processing parameters not found for opening cycle sell order", f"{phase} Sell Order")
+            cycle_set.residual_amt_B_list.append(params["residual_amt_B_ols"])
+
+            self.close_price = close_buy_price(self.open_price, cycle_set.profit_percent, cycle_set.maker_fee, snapshot["quote_increment"])
+            compounding_amt, no_compounding_limit = calculate_close_limit_buy_compounding_amt_Q(params["total_received_Q_ols"], params["total_spent_B_ols"], self.close_price, cycle_set.maker_fee, snapshot["quote_increment"])
+            self.close_size = determine_next_close_size_Q_limit(cycle_set.compounding_option, params["total_received_Q_ols"], no_compounding_limit, compounding_amt, cycle_set.compound_percent)
+        else:
+            params = self._process_fills(open_limit_buy_order_processing, fills, snapshot)
+            if params is None:
+                return self._fail("Order processing parameters not found for opening cycle buy order", f"{phase} Buy Order")
+            cycle_set.residual_amt_Q_list.append(params["residual_amt_Q_olb"])
+
+            self.close_price = close_sell_price(self.open_price, cycle_set.profit_percent, cycle_set.maker_fee, snapshot["quote_increment"])
+            compounding_amt, no_compounding_limit = calculate_close_limit_sell_compounding_amt_B(params["total_received_B_olb"], params["total_spent_Q_olb"], self.close_price, cycle_set.maker_fee, snapshot["base_increment"])
+            self.close_size = determine_next_close_size_B_limit(cycle_set.compounding_option, params["total_received_B_olb"], no_compounding_limit, compounding_amt, cycle_set.compound_percent)
+
+        if self.close_size is None:
+            return self._fail("Closing cycle size could not be determined", f"{phase} {side_name} Order")
+        self.close_size = self._order_amount(self.close_size, not self.sell_buy, snapshot)
+        self.ladder = []
+
+        self._set_status(f"Pending-Closing {'Buy' if self.sell_buy else 'Sell'} Order")
+        return CLOSING
+
+    async def _close(self):
+        cycle_set = self.cycle_set
+        side_name = "Buy" if self.sell_buy else "Sell"
+
+        if self.pending_order is None:
+            if self.sell_buy:
+                snapshot = await self._snapshot()
+                base_size = quote_to_base_size(self.close_size, cycle_set.maker_fee, self.close_price, snapshot["base_increment"])
+                self.pending_order = limit_order_payload("BUY", cycle_set.product_id, base_size, self.close_price)
+            else:
+                self.pending_order = limit_order_payload("SELL", cycle_set.product_id, self.close_size, self.close_price)
+            await self._record()
+
+        async with self.placement_locks.get(balance_key(cycle_set.product_id, side_name.upper())):
+            self.order_id = await self.client.post_order(self.pending_order, f"closing cycle {side_name.lower()} order")
+        if self.order_id is None:
+            return self._fail(f"Closing {side_name.lower()} order not placed", f"Closing {side_name} Order")
+        self._record_order(side_name.upper(), "close")
+        self.pending_order = None
+
+        cycle_set.orders.append(self.order_id)
+        self.cycle.orders.append(self.order_id)
+        self._set_status(f"Active-Closing {side_name} Order")
+        return WAITING_CLOSE_FILL
+
+    async def _wait_close_fill(self):
+        cycle_set = self.cycle_set
+        side_name = "Buy" if self.sell_buy else "Sell"
+
+        order_details = await self._filled_order_details()
+        if order_details is None:
+            return self._fail(f"Closing {side_name.lower()} order not filled or its fill details not available", f"Closing {side_name} Order")
+
+        quantizer = self._quantizer(await self._snapshot())
+        if self.sell_buy:
+            params = close_limit_buy_order_processing(self.close_size, order_details, order_processing_params={}, metrics=cycle_set.metrics, quantizer=quantizer)
+            if params is None:
+                return self._fail("Order processing parameters not found for closing cycle buy order", "Closing Buy Order")
+            cycle_set.residual_amt_Q_list.append(params["residual_amt_Q_clb"])
+            self.close_results = (params["total_received_B_clb"], params["total_spent_Q_clb"])
+        else:
+            params = close_limit_sell_order_processing(self.close_size, order_details, order_processing_params={}, metrics=cycle_set.metrics, quantizer=quantizer)
+            if params is None:
+                return self._fail("Order processing parameters not found for closing cycle sell order", "Closing Sell Order")
+            cycle_set.residual_amt_B_list.append(params["residual_amt_B_cls"])
+            self.close_results = (params["total_received_Q_cls"], params["total_spent_B_cls"])
+
+        cycle_set.completed_cycles += 1
+        self.cycle.cycle_running = False
+        if self.ledger is not None:
+            self.ledger.complete_cycle(cycle_set.journal_id, cycle_set.cycle_number)
+        self.order_id = None
+        self.starting = False
+        app_logger.info(f"CyclSet {cycle_set.cycleset_number} ({cycle_set.cycle_type}) Cycle {cycle_set.cycle_number} completed.")
+        self._set_status(f"Completed-Pending Next Opening {'Sell' if self.sell_buy else 'Buy'} Order")
+        return OPENING
+
+class CycleScheduler:
+    # Event loop on a dedicated thread running every cycle set as a task. Memory per cycle
+    # set is one task and its runner; HTTP connections are capped by the async client.
+
+    def __init__(self, client=None, refresh_interval=MARKET_REFRESH_INTERVAL, journal=None, ledger=None, market_data=None, placement_locks=None, triggers=None):
+        self.client = client or AsyncCoinbaseClient(api_key, api_secret)
+        self.refresh_interval = refresh_interval
+        self.market_data = market_data  # Market data hub shared by every product feed (None: the client's REST calls)
+        if triggers is None and market_data is not None:
+            triggers = MarketTriggers(market_data)
+        self.triggers = triggers  # Opening conditions of waiting cycle sets on the hub's ticker updates
+        self.journal = journal  # Cycle journal recording every transition (None: not journalled)
+        self.ledger = ledger  # Trade ledger recording cycle sets, cycles and orders (None: not recorded)
+        self.placement_locks = placement_locks or KeyedLocks(asyncio.Lock)  # One per product balance, see order_locks.balance_key
+        self.loop = None
+        self.fills = None
+        self._feeds = {}  # product_id -> (feed, refresh task)
+        self._tasks = {}  # cycle set -> task
+        self._thread = None
+        self._started = threading.Event()
+        self._idle = threading.Event()  # Set while no cycle set is running
+        self._idle.set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return self
+
+            self._started.clear()
+            self._thread = threading.Thread(target=self._run_loop, name="cycle-scheduler", daemon=True)
+            self._thread.start()
+
+        self._started.wait()
+        return self
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.fills = FillWaiter(self.loop)
+        self._started.set()
+
+        try:
+            self.loop.run_forever()
+        finally:
+            self.fills.close()
+            self.loop.close()
+
+    def _get_feed(self, cycle_set):
+        # One market feed (and refresh task) per product, shared by its cycle sets
+        entry = self._feeds.get(cycle_set.product_id)
+
+        if entry is None:
+            context = get_market_context(cycle_set.product_id, cycle_set.chart_interval, cycle_set.num_intervals, cycle_set.window_size)
+            feed = ProductMarketFeed(context, self.client, self.refresh_interval, self.market_data, self.triggers)
+            entry = (feed, self.loop.create_task(feed.run(), name=f"market-feed-{cycle_set.product_id}"))
+            self._feeds[cycle_set.product_id] = entry
+
+        return entry[0]
+
+    async def run_cycle_set(self, cycle_set, state=None, placed_orders=None):
+        runner = CycleSetRunner(cycle_set, self.client, self._get_feed(cycle_set), self.fills, self.journal, self.ledger, self.placement_locks)
+        if state is not None:
+            runner.restore(state, placed_orders or {})
+
+        try:
+            return await runner.run()
+        finally:
+            self._tasks.pop(cycle_set, None)
+            if not self._tasks:
+                self._idle.set()
+
+    async def _start_task(self, cycle_set, state=None, placed_orders=None):
+        self._idle.clear()
+        task = self.loop.create_task(self.run_cycle_set(cycle_set, state, placed_orders), name=cycle_set.cycleset_instance_id)
+        self._tasks[cycle_set] = task
+        return task
+
+    def submit(self, cycle_set):
+        # Start a cycle set from any thread; fills and market data are watched from then on.
+        # Returns its task on the scheduler's loop.
+        from order_events import get_order_event_hub
+
+        get_order_event_hub()
+        self.start()
+        task = asyncio.run_coroutine_threadsafe(self._start_task(cycle_set), self.loop).result()
+        app_logger.info(f"{cycle_set.cycleset_instance_id} submitted to the cycle scheduler")
+        return task
+
+    async def _wait_task(self, task):
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            return STOPPED
+
+    def run(self, cycle_set, timeout=None):
+        # Start a cycle set and block the calling thread until it stops or fails; returns its
+        # final state (FAILED or STOPPED)
+        task = self.submit(cycle_set)
+        return asyncio.run_coroutine_threadsafe(self._wait_task(task), self.loop).result(timeout)
+
+    async def _reconcile(self, states):
+        # Bring the order state table up to date for journalled cycle sets: one bulk lookup of
+        # every known order ID, and for placements interrupted before the exchange answered, one
+        # search per product for their client_order_id. Returns {client_order_id: order_id}.
+        order_ids = set()
+        pending = {}  # product_id -> (client_order_ids, earliest journal time)
+        for state in states:
+            order_ids.update(rung["order_id"] for rung in state.get("ladder", []))
+            if state["order_id"] is not None:
+                order_ids.add(state["order_id"])
+
+            payloads = [rung["payload"] for rung in state.get("pending_orders", [])]
+            if state["pending_order"] is not None:
+                payloads.append(state["pending_order"])
+            for payload in payloads:
+                client_order_ids, since = pending.get(payload["product_id"], (set(), state["time"]))
+                client_order_ids.add(payload["client_order_id"])
+                pending[payload["product_id"]] = (client_order_ids, min(since, state["time"]))
+        order_ids = sorted(order_ids)
+
+        placed_orders = {}
+        try:
+            for start in range(0, len(order_ids), ORDER_IDS_PER_REQUEST):
+                order_state_table.update(await self.client.list_orders({"order_ids": order_ids[start:start + ORDER_IDS_PER_REQUEST]}))
+
+            for product_id, (client_order_ids, since) in pending.items():
+                start_date = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(since - PLACEMENT_LOOKBACK))
+                orders = await self.client.list_orders({"product_id": product_id, "start_date": start_date})
+                found = [order for order in orders if order.get("client_order_id") in client_order_ids]
+                order_state_table.update(found)
+                placed_orders.update((order["client_order_id"], order["order_id"]) for order in found)
+
+        except REQUEST_ERRORS as e:
+            # The fill feed and poller catch up on the order IDs later; resent placements reuse
+            # their client_order_id, which the exchange does not accept twice
+            error_logger.error(f"Order reconciliation failed: {e}")
+
+        return placed_orders
+
+    async def _resume_tasks(self, entries):
+        placed_orders = await self._reconcile([state for cycle_set, state in entries])
+        for cycle_set, state in entries:
+            await self._start_task(cycle_set, state, placed_orders)
+
+    def resume(self, entries):
+        # Restart cycle sets rebuilt from the journal: entries are (cycle set, journalled state)
+        from order_events import get_order_event_hub
+
+        get_order_event_hub()
+        self.start()
+        asyncio.run_coroutine_threadsafe(self._resume_tasks(entries), self.loop).result()
+        app_logger.info(f"{len(entries)} cycle set(s) resumed on the cycle scheduler")
+
+    async def _stop_task(self, cycle_set):
+        task = self._tasks.get(cycle_set)
+        if task is None:
+            return False
+
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return True
+
+    def stop_cycle_set(self, cycle_set, timeout=STOP_TIMEOUT):
+        # Cancel a cycle set (its resting order is cancelled on the exchange); returns True if
+        # it was running
+        if self.loop is None:
+            return False
+
+        return asyncio.run_coroutine_threadsafe(self._stop_task(cycle_set), self.loop).result(timeout)
+
+    def running_count(self):
+        return len(self._tasks)
+
+    def wait_idle(self, timeout=None):
+        # Block until no cycle set is running; returns False if the timeout expired
+        return self._idle.wait(timeout)
+
+    async def _shutdown(self):
+        tasks = list(self._tasks.values()) + [task for feed, task in self._feeds.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._feeds.clear()
+        await self.client.close()
+
+    def shutdown(self, timeout=STOP_TIMEOUT):
+        # Stop every cycle set and the event loop
+        with self._lock:
+            thread, self._thread = self._thread, None
+
+        if thread is None:
+            return
+
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        thread.join(timeout)
+
+# Process-wide cycle scheduler, started on first use
+_cycle_scheduler = None
+_cycle_scheduler_lock = threading.Lock()
+
+def get_cycle_scheduler():
+    global _cycle_scheduler
+
+    if _cycle_scheduler is None:
+        with _cycle_scheduler_lock:
+            if _cycle_scheduler is None:
+                _cycle_scheduler = CycleScheduler(journal=get_cycle_journal(), ledger=get_trade_ledger(), market_data=get_market_data_hub(), triggers=get_market_triggers()).start()
+                app_logger.info("Cycle scheduler started")
+
+    return _cycle_scheduler
+
+# Indicate that cycle_scheduler.py module loaded successfully
+info_logger.info("cycle_scheduler module loaded successfully")
@@ -1,31 +1,25 @@
 # cycle_set_utils.py
-import sys
 import threading
-import time
 from logging_config import app_logger, info_logger, error_logger
-import math
-import json
-import requests
+from collections import deque
 from coinbase_auth import config_data
-from coinbase_utils import get_order_status, cancel_orders, get_decimal_places
+from coinbase_utils import cancel_orders
+from order_state import order_state_table, get_order_status_poller
 from starting_input import user_config
-from bollinger_utils import historical_data, determine_starting_sell_parameters, determine_starting_buy_parameters, determine_mean24
-from order_utils import place_starting_open_sell_order, place_starting_open_buy_order, wait_for_order
-from order_processing_utils import open_limit_sell_order_processing, open_limit_buy_order_processing, close_limit_buy_order_processing, close_limit_sell_order_processing
-from compounding_utils import calculate_close_limit_buy_compounding_amt_Q, calculate_close_limit_sell_compounding_amt_B, determine_next_close_size_Q_limit, determine_next_close_size_B_limit, determine_next_open_size_B_limit, determine_next_open_size_Q_limit, calculate_open_limit_sell_compounding_amt_B, calculate_open_limit_buy_compounding_amt_Q
-from repeating_cycle_utils import upper_bb, lower_bb, long_term_ma24, current_rsi, calculate_rsi, determine_next_open_sell_order_price_with_retry, place_next_opening_cycle_sell_order, determine_next_open_buy_order_price_with_retry, place_next_opening_cycle_buy_order, place_next_closing_cycle_buy_order, place_next_closing_cycle_sell_order
+from bollinger_utils import determine_starting_sell_parameters, determine_starting_buy_parameters
+from market_context import get_market_context
+from cycle_metrics import CycleSetMetrics
+from price_rules import round_price
 
-# Define the recursion limit (adjust this value as needed)
-RECURSION_LIMIT = 1000000
+# Cycle sets hold the configuration, history and metrics of a trading strategy; their orders
+# are placed and chained by the cycle scheduler (cycle_scheduler.CycleSetRunner)
 
-# Set the recursion limit
-sys.setrecursionlimit(RECURSION_LIMIT)
+# Cycles (and their orders and sizes) kept per cycle set for monitoring; older ones are dropped
+CYCLE_HISTORY = 100
 
 # Define locks
-sell_buy_cycle_start_lock = threading.Lock()
-buy_sell_cycle_start_lock = threading.Lock()
 print_lock = threading.Lock()
-thread_lock = threading.Lock()
+thread_lock = threading.Lock()  # Guards cycle bookkeeping only
 
 # Define necessary parameters
 api_key = config_data["api_key"]
@@ -46,68 +40,6 @@ compounding_option = user_config["compounding_option"]
 stacking = user_config["stacking"]
 step_price = user_config["step_price"]
 
-# Extract the close prices from the historical data
-closing_prices = []
-
-for entry in historical_data:
-    try:
-        close_price = float(entry[4])
-        closing_prices.append(close_price)
-    except ValueError:
-        # Handle invalid data (e.g., non-numeric values) here, if needed
-        # You can print a message or take other appropriate actions
-        pass
-
-# Now you have a list of floats in closing_prices
-print("Fetching initial indicator stats...")
-
-
-# Get the latest close price ("last") from the historical data
-current_price = closing_prices[0]
-app_logger.info("Current Price: %s", current_price)
-
-# Determine 24 hour mean
-print("Determining 24 hour mean...")
-mean24 = determine_mean24()
-
-# Retrieve Bollinger bands and long term 24 hr moving average calculations
-print("Retrieving bollinger bands and long-term 24 hr moving average...")
-app_logger.info("Upper Bollinger Band: %s", upper_bb)
-app_logger.info("Lower Bollinger Band: %s", lower_bb)
-app_logger.info("Long Term 24 hr Moving Average: %s", long_term_ma24)
-
-# Print statement to indicate import of RSI calculation
-print("Retrieving current RSI...")
-app_logger.info("Current RSI: %s", current_rsi)
-
-# Define order processing parameters dictionary with initialized values
-order_processing_params = {
-    "total_received_Q_ols": None,
-    "total_spent_B_ols": None,
-    "residual_amt_B_ols": None,
-    "total_received_B_olb": None,
-    "total_spent_Q_olb": None,
-    "residual_amt_Q_olb": None,
-    "total_received_B_clb": None,
-    "total_spent_Q_clb": None,
-    "residual_amt_Q_clb": None,
-    "total_received_Q_cls": None,
-    "total_spent_B_cls": None,
-    "residual_amt_B_cls": None,
-    "total_received_Q_oms": None,
-    "total_spent_B_oms": None,
-    "residual_amt_B_oms": None,
-    "total_received_B_omb": None,
-    "total_spent_Q_omb": None,
-    "residual_amt_Q_omb": None,
-    "total_received_B_cmb": None,
-    "total_spent_Q_cmb": None,
-    "residual_amt_Q_cmb": None,
-    "total_received_Q_cms": None,
-    "total_spent_B_cms": None,
-    "residual_amt_B_cms": None
-}
-
 class CycleSet:
 
     # Class attribute to store the count of instances
@@ -116,9 +48,6 @@ class CycleSet:
     sell_buy_cycle_count = 0
     buy_sell_cycle_count = 0
 
-    # Initialize recursion_depth
-    recursion_depth = 0
-
     # Class attribute to store all created cycle set instances
     cycleset_instances = []
     
@@ -190,17 +119,18 @@ class CycleSet:
         self.window_size = window_size
         self.stacking = stacking
         self.step_price = step_price
-        self.orders = []  # List to store cycle set order IDs
-        self.cycle_instances = []  # Initialize an empty list to store cycle instances within a cycle set
+        self.orders = deque(maxlen=2 * CYCLE_HISTORY)  # Order IDs of the most recent cycles (opening and closing order per cycle)
+        self.cycle_instances = deque(maxlen=CYCLE_HISTORY)  # Most recent cycle instances within a cycle set
         self.cycleset_running = False # States whether a cycle set is running or not
+        self.journal_id = None # Key of the cycle set in the cycle journal, assigned by the cycle scheduler
         self.cycleset_status = "Pending" # Describes the status as either: "Pending", "Active", "Failed", or "Stopped"
         self.completed_cycles = completed_cycles
         self.open_size_B = 0
-        self.open_size_B_history = []  # Dictionary to store opening cycle sizes of base currency for each cycle
+        self.open_size_B_history = deque(maxlen=CYCLE_HISTORY)  # Dictionary to store opening cycle sizes of base currency for each cycle
         self.open_size_Q = 0
-        self.open_size_Q_history = []  # Dictionary to store opening cycle sizes of quote currency for each cycle
-        self.residual_amt_B_list = [] # Dictionary to store residual amounts of base currency not used in sell orders
-        self.residual_amt_Q_list = [] # Dictionary to store residual amounts of quote currency not used in buy orders
+        self.open_size_Q_history = deque(maxlen=CYCLE_HISTORY)  # Dictionary to store opening cycle sizes of quote currency for each cycle
+        self.residual_amt_B_list = deque(maxlen=CYCLE_HISTORY) # Dictionary to store residual amounts of base currency not used in sell orders
+        self.residual_amt_Q_list = deque(maxlen=CYCLE_HISTORY) # Dictionary to store residual amounts of quote currency not used in buy orders
         self.sell_buy_cycleset_lock = threading.Lock()
         self.buy_sell_cycleset_lock = threading.Lock()
         self.starting_dollar_value = starting_dollar_value
@@ -210,6 +140,7 @@ class CycleSet:
         self.percent_gain_loss_quote = percent_gain_loss_quote
         self.average_profit_percent_per_hour = average_profit_percent_per_hour
         self.average_profit_percent_per_day = average_profit_percent_per_day
+        self.metrics = CycleSetMetrics(cycle_type, starting_size) # Running P&L, updated as each fill is processed
  
     # Other methods...
         
@@ -229,1075 +160,25 @@ class CycleSet:
 
         return cycle_instance, self.cycle_number
 
-    def place_next_sell_buy_cycle_orders(self, open_size_B, open_price_sell, sell_buy_cycle_instance):
-        try:
-            from repeating_cycle_utils import closing_prices, product_stats, upper_bb, long_term_ma24, current_rsi
-
-            # Update 'cycle_number' in the CycleSet class
-            self.cycle_number = sell_buy_cycle_instance.cycle_number
-            app_logger.info("Self: %s", self)
-
-            with thread_lock:
-                print("'sell_buy' thread acquired lock")
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Acquired lock")
-                with self.sell_buy_cycleset_lock:
-                    # Place next opening cycle sell order
-                    print("Placing the next opening cycle sell order...")
-                    open_order_id_sell = place_next_opening_cycle_sell_order(api_key, api_secret, product_id, open_size_B, open_price_sell)
-                    
-                    if open_order_id_sell is not None:
-                        self.orders.append(open_order_id_sell)
-                        app_logger.info("Opening cycle sell order placed successfully: %s", open_order_id_sell)
-                        self.cycle_running = True  # Set the cycle running status to True
-                        self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {sell_buy_cycle_instance.cycle_number}: Active-Opening Cycle Sell Order"
-                        app_logger.info(self.cycle_status)
-
-                    if open_order_id_sell is None:
-                        error_logger.error(f"Opening cycle sell order not found for CycleSet {self.cycleset_number} {self.cycle_type}. Stopping the current cycle set.")
-                        return
-                    
-                    print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Released lock")
-                    print("'sell_buy' thread releasing lock")
-
-            with self.sell_buy_cycleset_lock:
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Before important step")        
-                
-                # Call wait_for_order function
-                order_details = wait_for_order(api_key, api_secret, open_order_id_sell, max_retries=3)
-           
-                # Check if the order_details is None
-                if order_details is None:
-                    # Handle the case where wait_for_order did not complete successfully
-                    error_logger.error(f"Opening sell order status not found for CycleSet {self.cycleset_number} ({self.cycle_type}) Cycle {sell_buy_cycle_instance.cycle_number}. Stopping the current cycle set.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycleset_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {sell_buy_cycle_instance.cycle_number}: Failed-Opening Cycle Sell Order"
-                    info_logger.info(self.cycle_status)
-                    print("Opening sell order failed. Cycle failed. Cycle set stopped.")
-                    return
-            
-                # Process opening cycle sell order amount spent, fees, and amount to be received
-                print("Processing opening cycle sell order assets...")
-                order_processing_params = open_limit_sell_order_processing(open_size_B, order_details, order_processing_params = {})
-                total_received_Q_ols = order_processing_params["total_received_Q_ols"] 
-                total_spent_B_ols = order_processing_params["total_spent_B_ols"]
-                residual_amt_B_ols = order_processing_params["residual_amt_B_ols"]
-                self.residual_amt_B_list.append(residual_amt_B_ols)
-
-                try:
-                    app_logger.info("Value of order_processing_params: %s", order_processing_params)
-                    if order_processing_params is not None:
-                        # Determine number decimal places of quote_increment (an integer)
-                        decimal_places = get_decimal_places(product_stats['quote_increment'])
-                        # Calculate closing cycle buy price
-                        print("Calculating closing cycle buy price...")
-                        close_price_buy = round(open_price_sell * (1 - profit_percent - (2 * maker_fee)), decimal_places)
-                        app_logger.info("Closing cycle buy price calculated: %s", close_price_buy)
-                        self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {sell_buy_cycle_instance.cycle_number}: Pending-Closing Buy Order"
-                        info_logger.info(self.cycle_status)
-
-                except Exception as e:
-                        error_logger.error(f"Error in order processing: {e}")
-
-                if order_processing_params is None:
-                    # Handle the case where open_limit_sell_order_processing did not complete successfully
-                    error_logger.error(f"Order processing parameters not found for opening cycle sell order for CycleSet {self.cycleset_number}({self.cycle_type}) Cycle {sell_buy_cycle_instance.cycle_number}. Stopping the current cycle set.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycleset_status = "Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {sell_buy_cycle_instance.cycle_number}: Failed-Opening Sell Order"
-                    info_logger.info(self.cycle_status)
-                    print("Order processing failed. Cycle not completed. Cycle set stopped. Check for any open orders related to this request on exchange and handle manually.")       
-                    return
-                
-                # Calculate starting (cycle 1) close cycle compounding amount and next starting close cycle size
-                compounding_amt_Q_clb, no_compounding_Q_limit_clb = calculate_close_limit_buy_compounding_amt_Q(total_received_Q_ols, total_spent_B_ols, close_price_buy, maker_fee, product_stats["quote_increment"])
-                close_size_Q = determine_next_close_size_Q_limit(compounding_option, total_received_Q_ols, no_compounding_Q_limit_clb, compounding_amt_Q_clb, compound_percent)
-
-                if close_size_Q is not None:
-                    print("Closing cycle compounding and next size calculated successfully")
-
-                if close_size_Q is None:
-                    error_logger.error(f"Closing cycle size could not be determined for closing buy order for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - After important step")
-
-            with thread_lock:
-                print("'sell_buy' thread acquired lock")
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Acquired lock")
-                # Place closing cycle buy order
-                print("Placing the closing cycle buy order...")
-                close_order_id_buy = place_next_closing_cycle_buy_order(api_key, api_secret, product_id, close_size_Q, maker_fee, close_price_buy, product_stats)
-
-                if close_order_id_buy is not None:
-                    self.orders.append(close_order_id_buy)    
-                    app_logger.info("Closing cycle buy order placed successfully: %s", close_order_id_buy)
-                    self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {sell_buy_cycle_instance.cycle_number}: Active-Closing Buy Order"
-                    info_logger.info(self.cycle_status)
-
-                if close_order_id_buy is None:
-                    error_logger.error(f"Closing buy order not found for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Released lock")
-                print("'sell_buy' thread releasing lock")
-
-            with self.sell_buy_cycleset_lock:
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Before important step")  
-
-                # Call wait_for_order function
-                order_details = wait_for_order(api_key, api_secret, close_order_id_buy, max_retries=3)
-
-                # Check if the order_details is None
-                if order_details is None:
-                    # Handle the case where wait_for_order did not complete successfully
-                    error_logger.error(f"Closing buy order status not found for CycleSet {self.cycleset_number} ({self.cycle_type}) Cycle {sell_buy_cycle_instance.cycle_number}. Stopping the current cycle set.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycle_running = False
-                    self.cycleset_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {sell_buy_cycle_instance.cycle_number}: Failed-Closing Buy Order"
-                    info_logger.info(self.cycle_status)
-                    print("Closing buy order failed. Cycle not completed and has been stopped. Cycle set stopped.")
-                    return
-
-                if order_details is not None:
-                    print("Closing cycle buy order completed successfully")           
-        
-                # Process closing cycle buy order amount spent, fees, and amount to be received
-                print("Processing closing cycle buy order assets...")
-                order_processing_params = close_limit_buy_order_processing(close_size_Q, order_details, order_processing_params = {})
-                total_received_B_clb = order_processing_params["total_received_B_clb"]
-                total_spent_Q_clb = order_processing_params["total_spent_Q_clb"]
-                residual_amt_Q_clb = order_processing_params["residual_amt_Q_clb"]
-                self.residual_amt_Q_list.append(residual_amt_Q_clb)
-
-                if order_processing_params is not None:
-                    app_logger.info(f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle{sell_buy_cycle_instance.cycle_number} completed.")
-                    self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {sell_buy_cycle_instance.cycle_number}: Completed-Pending Next Opening Sell Order"
-                    info_logger.info(self.cycle_status)
-
-                if order_processing_params is None:
-                    # Handle the case where close_limit_buy_order_processing did not complete successfully
-                    error_logger.error(f"Order processing parameters not found for closing cycle buy order for CycleSet {self.cycleset_number} ({self.cycle_type}) Cycle {sell_buy_cycle_instance.cycle_number}. Stopping the current cycle set. Check for any open orders related to this request on exchange and handle manually.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycle_running = False  # Set the cycle running status to False
-                    self.cycleset_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {sell_buy_cycle_instance.cycle_number}: Failed-Closing Buy Order"
-                    info_logger.info(self.cycle_status)
-                    print("Order processing failed. Cycle not completed. Cycle set stopped. Check for any open orders related to this request on exchange and handle manually.")
-                    return
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - After important step")
-
-                # Gather data for logic to determine price for next opening cycle sell order for repeating cycle
-
-            with self.sell_buy_cycleset_lock:
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Before important step")
-                # Print statement to indicate current RSI calculation
-                print("Calculating current RSI...")
-
-                # Calculate current RSI
-                rsi = calculate_rsi(product_id, chart_interval, length=21600)  # 15 days worth of 1-minute data
-                current_rsi = rsi
-                app_logger.info("Current RSI: %s", current_rsi)
-                
-                # Determine next opening cycle sell price
-                print("Determining next opening cycle sell order price...")
-                open_price_sell = determine_next_open_sell_order_price_with_retry(profit_percent, current_rsi, product_stats["quote_increment"], iterations=0, depth=0, max_iterations=10, max_depth=1000000)
-                app_logger.info("Opening cycle sell order price determined: %s", open_price_sell)
-
-                if open_price_sell is not None:
-                    # Calculate compounding amount and size for next opening cycle sell order
-                    print("Calculating compounding amount and next opening cycle sell order size...")
-                    compounding_amount_B_ols, no_compounding_B_limit_ols = calculate_open_limit_sell_compounding_amt_B(total_received_B_clb, total_spent_Q_clb, open_price_sell, maker_fee, product_stats["base_increment"])
-                    open_size_B = determine_next_open_size_B_limit(compounding_option, total_received_B_clb, no_compounding_B_limit_ols, compounding_amount_B_ols, compound_percent)
-                
-                if open_price_sell is None:
-                    error_logger.error(f"Failed to determine next opening cycle price for next sell order for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-                
-                if open_size_B is not None:
-                    # Append the base currency size value to the history list of the current instance
-                    self.open_size_B_history.append(open_size_B)
-
-                if open_size_B is None:
-                    error_logger.error(f"Opening cycle size could not be determined for openining sell order for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - After important step")
-
-            with thread_lock:
-                print("'sell_buy' thread acquired lock")
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Acquired lock")
-                # Create a new Cycle instance
-                sell_buy_cycle_instance, self.cycle_number = self.add_cycle(open_size_B, "sell_buy")
-
-                sell_buy_cycle_instance.cycle_number = self.cycle_number
-                
-                # Add the cycle instance to the list in the CycleSet and Cycle
-                self.cycle_instances.append(sell_buy_cycle_instance)
-                sell_buy_cycle_instance.cycle_instances.append(sell_buy_cycle_instance)
-
-                print("Sell_buy cycle completed.")
-                app_logger.info("Opening sell order ID: %s, Closing buy order ID: %s", open_order_id_sell, close_order_id_buy)
-
-                # Call methods on the Cycle instance
-                app_logger.info(f"Starting next sell_buy cycle, Cycle {sell_buy_cycle_instance.cycle_number} of CycleSet {self.cycleset_number} ({self.cycle_type})")
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Released lock")
-                print("'sell_buy' thread releasing lock")
-
-            # Increment the recursion depth counter
-            self.recursion_depth += 1
-
-            # Check if the recursion depth exceeds the limit
-            if self.recursion_depth >= RECURSION_LIMIT:
-                print("Recursion limit reached. Stopping recursion.")
-                return open_order_id_sell, close_order_id_buy, None  # Return None for the recursive call
-
-            # Call the next function without handling recursion here
-            next_order_ids = self.place_next_sell_buy_cycle_orders(open_size_B, open_price_sell, sell_buy_cycle_instance)
-            return open_order_id_sell, close_order_id_buy, next_order_ids
-            
-        except requests.exceptions.RequestException as e:
-            # Handle request exceptions
-            error_logger.error(f"An error occurred in place_next_sell_buy_cycle_orders: {e}")
-            error_logger.error(f"Status code: {e.response.status_code}" if hasattr(e, 'response') and e.response is not None else "")
-            # Add additional logging to capture specific details
-            error_logger.exception("RequestException details:", exc_info=True)
-            return None, None, None
-
-        except json.JSONDecodeError as e:
-            # Handle JSON decoding errors
-            error_logger.error(f"Error decoding JSON response in place_next_sell_buy_cycle_orders: {e}")
-            # Add additional logging to capture specific details
-            error_logger.exception("JSONDecodeError details:", exc_info=True)
-            return None, None, None
-
-        except Exception as e:
-            # Handle other unexpected errors
-            error_logger.error(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - An unexpected error occurred in place_next_sell_buy_cycle_orders: {e}")
-            # Add additional logging to capture specific details
-            error_logger.exception("Unexpected error details:", exc_info=True)
-            return None, None, None
- 
-        
-    def place_next_buy_sell_cycle_orders(self, open_size_Q, open_price_buy, buy_sell_cycle_instance):
-        try:
-            from repeating_cycle_utils import closing_prices, product_stats, lower_bb, long_term_ma24, current_rsi
-
-            # Update 'cycle_number' in the CycleSet class
-            self.cycle_number = buy_sell_cycle_instance.cycle_number
-
-            with thread_lock:
-                print("'buy_sell' thread acquired lock")
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Acquired lock")
-                with self.buy_sell_cycleset_lock:
-                    # Place next opening cycle buy order
-                    print("Placing the next opening cycle buy order...")
-                    open_order_id_buy = place_next_opening_cycle_buy_order(api_key, api_secret, product_id, open_size_Q, maker_fee, open_price_buy, product_stats)
-                    
-                    if open_order_id_buy is not None:
-                        self.orders.append(open_order_id_buy)
-                        app_logger.info("Opening cycle buy order placed successfully: %s", open_order_id_buy)
-                        self.cycle_running = True  # Set the cycle running status to True
-                        self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {buy_sell_cycle_instance.cycle_number}: Active-Opening Cycle Buy Order"
-                        app_logger.info(self.cycle_status)
-
-                    if open_order_id_buy is None:
-                        error_logger.error(f"Opening buy order not found for CycleSet {self.cycleset_number} {self.cycle_type}. Stopping the current cycle set.")
-                        return
-                    
-                    print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Released lock")
-                    print("'buy_sell' thread releasing lock")
-
-            with self.buy_sell_cycleset_lock:
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Before important step")        
-                
-                # Call wait_for_order function
-                order_details = wait_for_order(api_key, api_secret, open_order_id_buy,max_retries=3)
-
-                # Check if the order_details is None
-                if order_details is None:
-                    # Handle the case where wait_for_order did not complete successfully
-                    error_logger.error(f"Opening buy order status not found for CycleSet {self.cycleset_number}({self.cycle_type}) Cycle {buy_sell_cycle_instance.cycle_number}. Stopping the current cycle set.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycleset_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {buy_sell_cycle_instance.cycle_number}: Failed-Opening Cycle Buy Order"
-                    info_logger.info(self.cycle_status)
-                    print("Opening buy order failed. Cycle failed. Cycle set stopped.")
-                    return
-                         
-                # Process opening cycle buy order amount spent, fees, and amount to be received
-                print("Processing opening cycle buy order assets...")
-                order_processing_params = open_limit_buy_order_processing(open_size_Q, order_details, order_processing_params = {})
-                total_received_B_olb = order_processing_params["total_received_B_olb"] 
-                total_spent_Q_olb = order_processing_params["total_spent_Q_olb"]
-                residual_amt_Q_olb = order_processing_params["residual_amt_Q_olb"]
-                self.residual_amt_Q_list.append(residual_amt_Q_olb)
-
-                try:
-                    app_logger.info("Value of order_processing_params: %s", order_processing_params)
-                    if order_processing_params is not None:
-                        # Determine number decimal places of quote_increment (an integer)
-                        decimal_places = get_decimal_places(product_stats['quote_increment'])
-                        # Calculate closing cycle buy price
-                        print("Calculating closing cycle sell price...")
-                        close_price_sell = round(open_price_buy * (1 + profit_percent + (2 * maker_fee)), decimal_places)
-                        app_logger.info("Closing cycle sell price calculated: %s", close_price_sell)
-                        self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {buy_sell_cycle_instance.cycle_number}: Pending-Closing Sell Order"
-                        info_logger.info(self.cycle_status)
-
-                except Exception as e:
-                        error_logger.error(f"Error in order processing: {e}")
-
-                if order_processing_params is None:
-                    # Handle the case where open_limit_buy_order_processing did not complete successfully
-                    error_logger.error(f"Order processing parameters not found for opening cycle buy order for CycleSet {self.cycleset_number}({self.cycle_type}) Cycle {buy_sell_cycle_instance.cycle_number}. Stopping the current cycle set.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycleset_status = "Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {buy_sell_cycle_instance.cycle_number}: Failed-Opening Buy Order"
-                    info_logger.info(self.cycle_status)
-                    print("Order processing failed. Cycle not completed. Cycle set stopped. Check for any open orders related to this request on exchange and handle manually.")       
-                    return
-                
-                # Calculate closing cycle compounding amount and closing cycle size
-                compounding_amt_B_cls, no_compounding_B_limit_cls = calculate_close_limit_sell_compounding_amt_B(total_received_B_olb, total_spent_Q_olb, close_price_sell, maker_fee, product_stats["base_increment"])
-                close_size_B = determine_next_close_size_B_limit(compounding_option, total_received_B_olb, no_compounding_B_limit_cls, compounding_amt_B_cls, compound_percent)
-
-                if close_size_B is not None:
-                    print("Closing cycle compounding and next size calculated successfully")
-
-                if close_size_B is None:
-                    error_logger.error(f"Closing cycle size could not be determined for closing sell order for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - After important step")
-
-            with thread_lock:
-                print("'buy_sell' thread acquired lock")
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Acquired lock")
-                # Place closing cycle sell order
-                print("Placing the closing cycle sell order...")
-                close_order_id_sell = place_next_closing_cycle_sell_order(api_key, api_secret, product_id, close_size_B, close_price_sell)
-
-                if close_order_id_sell is not None:
-                    self.orders.append(close_order_id_sell)    
-                    app_logger.info("Closing cycle sell order placed successfully: %s", close_order_id_sell)
-                    self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {buy_sell_cycle_instance.cycle_number}: Active-Closing Sell Order"
-                    info_logger.info(self.cycle_status)
-
-                if close_order_id_sell is None:
-                    error_logger.error(f"Closing sell order not found for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Released lock")
-                print("'buy_sell' thread releasing lock")
-                
-            with self.buy_sell_cycleset_lock:
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Before important step")
-                
-                # Call wait_for_order function
-                order_details = wait_for_order(api_key, api_secret, close_order_id_sell, max_retries=3)
-
-                # Check if the order_details is None
-                if order_details is None:
-                    # Handle the case where wait_for_order did not complete successfully
-                    error_logger.error(f"Closing sell order status not found for CycleSet {self.cycleset_number} ({self.cycle_type}) Cycle {buy_sell_cycle_instance.cycle_number}. Stopping the current cycle set.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycle_running = False
-                    self.cycleset_status = f"CyclSet {self.cycleset_number} ({self.cycle_type})Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {buy_sell_cycle_instance.cycle_number}: Failed-Closing Sell Order"
-                    info_logger.info(self.cycle_status)
-                    print("Closing sell order failed. Cycle not completed and has been stopped. Cycle set stopped.")
-                    return
-
-                if order_details is not None:
-                    print("Closing cycle sell order completed successfully")     
-                
-            
-                # Process closing cycle sell order amount spent, fees, and amount to be received
-
-                print("Processing closing cycle sell order assets...")
-                order_processing_params = close_limit_sell_order_processing(close_size_B, order_details, order_processing_params = {})
-                total_received_Q_cls = order_processing_params["total_received_Q_cls"]
-                total_spent_B_cls = order_processing_params["total_spent_B_cls"]
-                residual_amt_B_cls = order_processing_params["residual_amt_B_cls"]
-                self.residual_amt_B_list.append(residual_amt_B_cls)
-
-                if order_processing_params is not None:
-                    app_logger.info(f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle{buy_sell_cycle_instance.cycle_number} completed.")
-                    self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {buy_sell_cycle_instance.cycle_number}: Completed-Pending Next Opening Buy Order"
-                    info_logger.info(self.cycle_status)
-
-                if order_processing_params is None:
-                    # Handle the case where close_limit_sell_order_processing did not complete successfully
-                    error_logger.error(f"Order processing parameters not found for closing cycle sell order for CycleSet {self.cycleset_number} ({self.cycle_type}) Cycle {buy_sell_cycle_instance.cycle_number}. Stopping the current cycle set. Check for any open orders related to this request on exchange and handle manually.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycle_running = False  # Set the cycle running status to False
-                    self.cycleset_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {buy_sell_cycle_instance.cycle_number}: Failed-Closing Sell Order"
-                    info_logger.info(self.cycle_status)
-                    print("Order processing failed. Cycle not completed. Cycle set stopped. Check for any open orders related to this request on exchange and handle manually.")
-                    return
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - After important step")
-            
-                # Gather data for logic to determine price for next opening cycle buy order for repeating cycle
-
-            with self.buy_sell_cycleset_lock:
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Before important step")
-                # Print statement to indicate current RSI calculation
-                print("Calculating current RSI...")
-
-                # Calculate current RSI
-                rsi = calculate_rsi(product_id, chart_interval, length=21600)  # 15 days worth of 1-minute data
-                current_rsi = rsi
-                app_logger.info("Current RSI: %s", current_rsi)
-
-                
-                # Determine next opening cycle buy price
-                print("Determining next opening cycle buy order price...")
-                open_price_buy = determine_next_open_buy_order_price_with_retry(profit_percent, current_rsi, product_stats["quote_increment"], iterations=0, depth=0, max_iterations=10, max_depth=1000000)
-                app_logger.info("Opening cycle buy order price determined: %s", open_price_buy)
-
-                if open_price_buy is not None:
-                    # Calculate compounding amount and size for next opening cycle buy order
-                    print("Calculating compounding amount and next opening cycle buy order size...")
-                    compounding_amount_Q_olb, no_compounding_Q_limit_olb = calculate_open_limit_buy_compounding_amt_Q(total_received_Q_cls, total_spent_B_cls, open_price_buy, maker_fee, product_stats["quote_increment"])
-                    open_size_Q = determine_next_open_size_Q_limit(compounding_option, total_received_Q_cls, no_compounding_Q_limit_olb, compounding_amount_Q_olb, compound_percent)
-                
-                if open_price_buy is None:
-                    error_logger.error(f"Failed to determine opening cycle price for next buy order for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-            
-                if open_size_Q is not None:
-                    # Append the quote currency size value to the history list of the current instance
-                    self.open_size_Q_history.append(open_size_Q)
-
-                if open_size_Q is None:
-                    error_logger.error(f"Opening cycle size could not be determined for opening buy order for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - After important step")
-
-            with thread_lock:
-                print("'buy_sell' thread acquired lock")
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Acquired lock")        
-                # Create a new Cycle instance
-                buy_sell_cycle_instance, self.cycle_number = self.add_cycle(open_size_Q, "buy_sell")
-
-                buy_sell_cycle_instance.cycle_number = self.cycle_number
-
-                # Add the cycle instance to the list in the CycleSet and Cycle
-                self.cycle_instances.append(buy_sell_cycle_instance)
-                buy_sell_cycle_instance.cycle_instances.append(buy_sell_cycle_instance)
-               
-                print("Buy_sell cycle completed.")
-                app_logger.info("Opening buy order ID: %s, Closing sell order ID: %s", open_order_id_buy, close_order_id_sell)
-                
-                # Call methods on the Cycle instance
-                app_logger.info(f"Starting next buy_sell cycle, Cycle {buy_sell_cycle_instance.cycle_number} of CycleSet {self.cycleset_number}")
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Released lock")
-                print("'buy_sell' thread releasing lock")
-                
-            # Increment the recursion depth counter
-            self.recursion_depth += 1
-
-            # Check if the recursion depth exceeds the limit
-            if self.recursion_depth >= RECURSION_LIMIT:
-                print("Recursion limit reached. Stopping recursion.")
-                return open_order_id_buy, close_order_id_sell, None  # Return None for the recursive call
-
-            # Call the next function without handling recursion here
-            next_order_ids = self.place_next_buy_sell_cycle_orders(open_size_Q, open_price_buy, buy_sell_cycle_instance)
-            return open_order_id_buy, close_order_id_sell, next_order_ids
-            
-        except requests.exceptions.RequestException as e:
-            # Handle request exceptions
-            error_logger.error(f"An error occurred in place_next_buy_sell_cycle_orders: {e}")
-            error_logger.error(f"Status code: {e.response.status_code}" if hasattr(e, 'response') and e.response is not None else "")
-            # Add additional logging to capture specific details
-            error_logger.exception("RequestException details:", exc_info=True)
-            return None, None, None
-
-        except json.JSONDecodeError as e:
-            # Handle JSON decoding errors
-            error_logger.error(f"Error decoding JSON response in place_next_buy_sell_cycle_orders: {e}")
-            # Add additional logging to capture specific details
-            error_logger.exception("JSONDecodeError details:", exc_info=True)
-            return None, None, None
-
-        except Exception as e:
-            # Handle other unexpected errors
-            error_logger.error(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - An unexpected error occurred in place_next_buy_sell_cycle_orders: {e}")
-            # Add additional logging to capture specific details
-            error_logger.exception("Unexpected error details:", exc_info=True)
-            return None, None, None
-
-    def place_starting_sell_buy_cycle_orders(self, starting_size_B, sell_buy_cycle_instance):
+    def start_sell_buy_starting_cycle(self, user_config=None, sell_buy_cycle_set_counter=None):
+        # Run the cycle set on the cycle scheduler, blocking until it stops or fails
+        return self.run_on_scheduler()
 
-        try:
-            from repeating_cycle_utils import product_stats, upper_bb, lower_bb, long_term_ma24, current_rsi
+    def start_buy_sell_starting_cycle(self, user_config=None, buy_sell_cycle_set_counter=None):
+        # Buy-sell counterpart of start_sell_buy_starting_cycle
+        return self.run_on_scheduler()
 
-            starting_size_B = user_config["starting_size_B"]
-            starting_size_Q = user_config["starting_size_Q"]
-            
-            self.cycleset_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Started"
-            self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Pending-Starting Opening Sell Order"
-            app_logger.info(self.cycle_status)
-
-            with thread_lock:
-                print("'sell_buy' thread acquired lock")
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Acquired lock")
-                with self.sell_buy_cycleset_lock:
-                    # Determine both starting prices
-                    app_logger.info("Determining starting price for sell order...")
-                    starting_price_sell, starting_price_buy = determine_starting_prices(current_price, upper_bb, lower_bb, starting_size_B, starting_size_Q, mean24, product_stats['quote_increment'])
-
-                    # Use the starting_price_sell for the sell side
-                    # starting_price_buy can be ignored or set to None
-                        
-                with self.sell_buy_cycleset_lock:   
-                    # Place starting (cycle 1) opening cycle sell order
-                    print("Placing the starting opening cycle sell order...")
-                    open_order_id_sell = place_starting_open_sell_order(product_id, starting_size_B, starting_price_sell)
-                    
-                    if open_order_id_sell is not None:
-                        self.orders.append(open_order_id_sell)
-                        app_logger.info("Starting opening cycle sell order placed successfully: %s", open_order_id_sell)
-                        self.cycle_running = True  # Set the cycle running status to True
-                        self.cycleset_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Active"
-                        self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Active-Starting Opening Sell Order"
-                        info_logger.info(self.cycle_status)
-
-                    if open_order_id_sell is None:
-                        error_logger.error(f"Starting opening sell order not found for CycleSet {self.cycleset_number} {self.cycle_type}. Stopping the current cycle set.")
-                        return
-                    
-                    print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Released lock")
-                    print("'sell_buy' thread releasing lock")
-
-            with self.sell_buy_cycleset_lock:
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Before important step")  
-
-                # Call wait_for_order function
-                order_details = wait_for_order(api_key, api_secret, open_order_id_sell, max_retries=3)
-
-                # Check if the order_details is None
-                if order_details is None:
-                    # Handle the case where wait_for_order did not complete successfully
-                    error_logger.error(f"Starting opening sell order status not found for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycleset_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type} Cycle {self.cycle_number}: Failed-Starting Opening Sell Order"
-                    info_logger.info(self.cycle_status)
-                    print("Starting opening sell order failed. Cycle failed. Cycle set stopped.")
-                    return
-                
-                # Process starting opening cycle sell order amount spent, fees, and amount to be received
-                print("Processing starting opening cycle sell order assets...")
-                order_processing_params = open_limit_sell_order_processing(starting_size_B, order_details, order_processing_params = {})
-                total_received_Q_ols = order_processing_params["total_received_Q_ols"] 
-                total_spent_B_ols = order_processing_params["total_spent_B_ols"]
-                residual_amt_B_ols = order_processing_params["residual_amt_B_ols"]
-                self.residual_amt_B_list.append(residual_amt_B_ols)
-
-                try:
-                    app_logger.info("Value of order_processing_params: %s", order_processing_params)
-                    if order_processing_params is not None:
-                        # Determine number decimal places of quote_increment (an integer)
-                        decimal_places = get_decimal_places(product_stats['quote_increment'])
-                        # Calculate starting (cycle 1) closing cycle buy price
-                        print("Calculating starting closing cycle buy price...")
-                        close_price_buy = round(starting_price_sell * (1 - profit_percent - (2 * maker_fee)), decimal_places)
-                        app_logger.info("Closing cycle buy price calculated: %s", close_price_buy)
-                        self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {self.cycle_number}: Pending-Starting Closing Buy Order"
-                        info_logger.info(self.cycle_status)
-
-                except Exception as e:
-                    error_logger.error(f"Error in order processing: {e}")
-
-                if order_processing_params is None:
-                    # Handle the case where open_limit_sell_order_processing did not complete successfully
-                    error_logger.error(f"Order processing parameters not found for opening cycle sell order for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycleset_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Cycle {self.cycle_number}: Failed-Starting Opening Sell Order"
-                    info_logger.info(self.cycle_status)
-                    print("Order processing failed. Cycle not completed. Cycle set stopped. Check for any open orders related to this request on exchange and handle manually.")       
-                    return
-                
-                # Calculate starting (cycle 1) close cycle compounding amount and next starting close cycle size
-                compounding_amt_Q_clb, no_compounding_Q_limit_clb = calculate_close_limit_buy_compounding_amt_Q(total_received_Q_ols, total_spent_B_ols, close_price_buy, maker_fee, product_stats["quote_increment"])
-                next_size_Q = determine_next_close_size_Q_limit(compounding_option, total_received_Q_ols, no_compounding_Q_limit_clb, compounding_amt_Q_clb, compound_percent)
-
-                if next_size_Q is not None:
-                    print("Starting closing cycle compounding and next size calculated successfully")
-
-                if next_size_Q is None:
-                    error_logger.error(f"Next size could not be determined for closing buy order for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - After important step")
-
-            with thread_lock:
-                print("'sell_buy' thread acquired lock")
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Acquired lock")
-                # Place starting closing cycle buy order
-                print("Placing the starting closing cycle buy order...")
-                close_order_id_buy = place_next_closing_cycle_buy_order(api_key, api_secret, product_id, next_size_Q, maker_fee, close_price_buy, product_stats)
-
-                if close_order_id_buy is not None:
-                    self.orders.append(close_order_id_buy)    
-                    app_logger.info("Starting closing cycle buy order placed successfully: %s", close_order_id_buy)
-                    self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Active-Starting Closing Buy Order"
-                    info_logger.info(self.cycle_status)
-
-                if close_order_id_buy is None:
-                    error_logger.error(f"Starting closing buy order not found for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Released lock")
-                print("'sell_buy' thread releasing lock")
-
-            with self.sell_buy_cycleset_lock: 
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Before important step")
-
-                # Call wait_for_order function
-                order_details = wait_for_order(api_key, api_secret, close_order_id_buy, max_retries=3)
-
-                # Check if the order_details is None
-                if order_details is None:
-                    # Handle the case where wait_for_order did not complete successfully
-                    error_logger.error(f"Starting closing buy order status not found for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycle_running = False
-                    self.cycleset_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Failed-Starting Closing Buy Order"
-                    info_logger.info(self.cycle_status)
-                    print("Starting closing buy order failed. Cycle not completed and has been stopped. Cycle set stopped.")
-                    return
-                
-                if order_details is not None:
-                    print("Starting closing cycle buy order completed successfully")               
-        
-                # Process starting closing cycle buy order amount spent, fees, and amount to be received
-                print("Processing starting closing cycle buy order assets...")
-                close_size_Q = next_size_Q
-                order_processing_params = close_limit_buy_order_processing(close_size_Q, order_details, order_processing_params = {})
-                total_received_B_clb = order_processing_params["total_received_B_clb"]
-                total_spent_Q_clb = order_processing_params["total_spent_Q_clb"]
-                residual_amt_Q_clb = order_processing_params["residual_amt_Q_clb"]
-                self.residual_amt_Q_list.append(residual_amt_Q_clb)
-
-                if order_processing_params is not None:
-                    print("Starting sell_buy cycle completed.")
-                    self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Pending-Next Opening Sell Order"
-                    info_logger.info(self.cycle_status)
-
-                if order_processing_params is None:
-                    # Handle the case where open_limit_sell_order_processing did not complete successfully
-                    error_logger.error(f"Order processing parameters not found for closing cycle buy order for CycleSet {self.cycleset_number}. Stopping the current cycle set. Check for any open orders related to this request on exchange and handle manually.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycle_running = False  # Set the cycle running status to False
-                    self.cycleset_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Failed-Starting Closing Buy Order"
-                    info_logger.info(self.cycle_status)
-                    print("Order processing failed. Cycle not completed. Cycle set stopped. Check for any open orders related to this request on exchange and handle manually.")
-                    return
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - After important step")
-                                       
-                # Gather data for logic to determine price for next opening cycle sell order for repeating cycle
-
-            with self.sell_buy_cycleset_lock:
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Before important step")
-                # Print statement to indicate current RSI calculation
-                print("Calculating current RSI...")
-
-                # Calculate current RSI
-                rsi = calculate_rsi(product_id, chart_interval, length=21600)  # 15 days worth of 1-minute data
-                current_rsi = rsi
-                app_logger.info("Current RSI: %s", current_rsi)
-
-                # Determine next opening cycle sell price
-                print("Determining next opening cycle sell order price...")
-                open_price_sell = determine_next_open_sell_order_price_with_retry(profit_percent, current_rsi, product_stats["quote_increment"], iterations=0, depth=0, max_iterations=10, max_depth=1000000)
-                app_logger.info("Opening cycle sell order price determined: %s", open_price_sell)
-
-                if open_price_sell is not None:
-                    # Calculate compounding amount and size for next opening cycle sell order
-                    print("Calculating compounding amount and next opening cycle sell order size...")
-                    compounding_amount_B_ols, no_compounding_B_limit_ols = calculate_open_limit_sell_compounding_amt_B(total_received_B_clb, total_spent_Q_clb, open_price_sell, maker_fee, product_stats["base_increment"])
-                    open_size_B = determine_next_open_size_B_limit(compounding_option, total_received_B_clb, no_compounding_B_limit_ols, compounding_amount_B_ols, compound_percent)
-                    app_logger.info("open_size_B: %s", open_size_B)
-
-                if open_price_sell is None:
-                    error_logger.error(f"Failed to determine next opening cycle price for next sell order for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-                
-                if open_size_B is not None:
-                    # Append the base currency size value to the history list of the current instance
-                    self.open_size_B_history.append(open_size_B)
-
-                if open_size_B is None:
-                    error_logger.error(f"Unable to determine next opening cycle sell order size for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - After important step")
-
-            with thread_lock:
-                print("'sell_buy' thread acquired lock")
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Acquired lock")
-                # Create a Cycle instance
-                sell_buy_cycle_instance, self.cycle_number = self.add_cycle(open_size_B, "sell_buy")
-                app_logger.info("sell_buy_cycle_instance: %s", sell_buy_cycle_instance )
-
-                sell_buy_cycle_instance.cycle_number = self.cycle_number
-            
-                # Add the cycle instance to the list in the CycleSet and Cycle
-                self.cycle_instances.append(sell_buy_cycle_instance)
-                sell_buy_cycle_instance.cycle_instances.append(sell_buy_cycle_instance)
-
-                print("Starting sell_buy cycle completed.")
-                app_logger.info("Opening sell order ID: %s, Closing buy order ID: %s", open_order_id_sell, close_order_id_buy)
-
-                # Pass the new cycle instance to the next iteration of cycle order creation
-                app_logger.info(f"Starting next sell_buy cycle, Cycle {sell_buy_cycle_instance.cycle_number} of CycleSet {self.cycleset_number} {self.cycle_type}")
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Released lock")
-                print("'sell_buy' thread releasing lock")
-
-            # Increment the recursion depth counter
-            self.recursion_depth += 1
-
-            # Call the next function without handling recursion here
-            next_order_ids = self.place_next_sell_buy_cycle_orders(open_size_B, open_price_sell, sell_buy_cycle_instance)
-            return open_order_id_sell, close_order_id_buy, next_order_ids
-        
-        except requests.exceptions.RequestException as e:
-            # Handle request exceptions
-            error_logger.error(f"An error occurred in place_starting_sell_buy_cycle_orders: {e}")
-            error_logger.error(f"Status code: {e.response.status_code}" if hasattr(e, 'response') and e.response is not None else "")
-            # Add additional logging to capture specific details
-            error_logger.exception("RequestException details:", exc_info=True)
-            return None, None, None
-
-        except json.JSONDecodeError as e:
-            # Handle JSON decoding errors
-            error_logger.error(f"Error decoding JSON response in place_starting_sell_buy_cycle_orders: {e}")
-            # Add additional logging to capture specific details
-            error_logger.exception("JSONDecodeError details:", exc_info=True)
-            return None, None, None
-
-        except Exception as e:
-            # Handle other unexpected errors
-            error_logger.error(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - An unexpected error occurred in place_starting_sell_buy_cycle_orders: {e}")
-            # Add additional logging to capture specific details
-            error_logger.exception("Unexpected error details:", exc_info=True)
-            return None, None, None
-
-    def place_starting_buy_sell_cycle_orders(self, starting_size_Q, buy_sell_cycle_instance):
-        try:
-            from repeating_cycle_utils import product_stats, upper_bb, lower_bb, long_term_ma24, current_rsi
-
-            starting_size_B = user_config["starting_size_B"]
-            starting_size_Q = user_config["starting_size_Q"]
-
-            self.cycleset_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Started"
-            self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Pending-Starting Opening Buy Order"
-            app_logger.info(self.cycle_status)
-
-            with thread_lock:
-                print("'buy_sell' thread acquired lock")
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Acquired lock")
-                with self.buy_sell_cycleset_lock:
-                        # Determine both starting prices
-                        app_logger.info("Determining starting price for buy order...")
-                        starting_price_sell, starting_price_buy = determine_starting_prices(current_price, upper_bb, lower_bb, starting_size_B, starting_size_Q, mean24, product_stats['quote_increment'])
-
-                    # Use the starting_price_buy for the buy side
-                    # starting_price_sell can be ignored or set to None
-                        
-                with self.buy_sell_cycleset_lock:
-                    # Place starting (cycle 1) opening cycle buy order
-                    print("Placing the starting opening cycle buy order...")
-                    open_order_id_buy = place_starting_open_buy_order(product_id, product_stats, starting_size_Q, starting_price_buy, maker_fee)
-                    
-                    if open_order_id_buy is not None:
-                        self.orders.append(open_order_id_buy)
-                        app_logger.info("Starting opening cycle buy order placed successfully: %s", open_order_id_buy)
-                        self.cycle_running = True  # Set the cycle running status to True
-                        self.cycleset_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Active"
-                        self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Active-Starting Opening Buy Order"
-                        info_logger.info(self.cycle_status)
-
-                    if open_order_id_buy is None:
-                        error_logger.error(f"Starting opening buy order not found for CycleSet {self.cycleset_number} {self.cycle_type}. Stopping the current cycle set.")
-                        return
-                    
-                    print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Released lock")
-                    print("'buy_sell' thread releasing lock")
-
-            with self.buy_sell_cycleset_lock:
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Before important step")
-
-                # Call wait_for_order function
-                order_details = wait_for_order(api_key, api_secret, open_order_id_buy, max_retries=3)
+    def run_on_scheduler(self):
+        # The cycle scheduler is the only cycle engine; returns the cycle set's final state
+        from cycle_scheduler import get_cycle_scheduler
 
-                # Check if the order_details is None
-                if order_details is None:
-                    # Handle the case where wait_for_order did not complete successfully
-                    error_logger.error(f"Starting opening buy order status not found for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycleset_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Failed-Starting Opening Buy Order"
-                    info_logger.info(self.cycle_status)
-                    print("Starting opening buy order failed. Cycle failed. Cycle set stopped.")
-                    return                          
-
-                # Process starting opening cycle buy order amount spent, fees, and amount to be received
-                print("Processing starting opening cycle buy order assets...")
-                order_processing_params = open_limit_buy_order_processing(starting_size_Q, order_details, order_processing_params = {})
-                total_received_B_olb = order_processing_params["total_received_B_olb"] 
-                total_spent_Q_olb = order_processing_params["total_spent_Q_olb"]
-                residual_amt_Q_olb = order_processing_params["residual_amt_Q_olb"]
-                self.residual_amt_Q_list.append(residual_amt_Q_olb)
-
-                try:
-                    app_logger.info("Value of order_processing_params: %s", order_processing_params)
-                    if order_processing_params is not None:
-                        # Determine number decimal places of quote_increment (an integer)
-                        decimal_places = get_decimal_places(product_stats['quote_increment'])
-                        # Calculate starting (cycle 1) closing cycle buy price
-                        print("Calculating starting closing cycle sell price...")
-                        close_price_sell = round(starting_price_buy * (1 + profit_percent + (2 * maker_fee)), decimal_places)
-                        app_logger.info("Closing cycle sell price calculated: %s", close_price_sell)
-                        self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Pending-Starting Closing Sell Order"
-                        info_logger.info(self.cycle_status)
-
-                except Exception as e:
-                    error_logger.error(f"Error in order processing: {e}")
-                    return
-
-                if order_processing_params is None:
-                    # Handle the case where open_limit_buy_order_processing did not complete successfully
-                    error_logger.error(f"Order processing parameters not found for cycle set {self.cycleset_number}. Stopping the current cycle set.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycleset_status = f"CyclSet {self.cycleset_number} ({self.cycle_type}) Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Failed-Starting Opening Buy Order"
-                    info_logger.info(self.cycle_status)
-                    print("Order processing failed. Cycle not completed. Cycle set stopped. Check for any open orders related to this request on exchange and handle manually.")
-                    return 
-                
-                # Calculate starting (cycle 1) closing cycle compounding amount and next starting closing cycle size
-                compounding_amt_B_cls, no_compounding_B_limit_cls = calculate_close_limit_sell_compounding_amt_B(total_received_B_olb, total_spent_Q_olb, close_price_sell, maker_fee, product_stats["base_increment"])
-                next_size_B = determine_next_close_size_B_limit(compounding_option, total_received_B_olb, no_compounding_B_limit_cls, compounding_amt_B_cls, compound_percent)
-
-                if next_size_B is not None:
-                    print("Starting closing cycle compounding and next size calculated successfully")
-
-                if next_size_B is None:
-                    error_logger.error(f"Next size could not be determined for closing sell order for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - After important step")
-                
-            with thread_lock:
-                print("'buy_sell' thread acquired lock")
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Acquired lock")
-                # Place starting closing cycle sell order
-                print("Placing the starting closing cycle sell order...")
-                close_order_id_sell = place_next_closing_cycle_sell_order(api_key, api_secret, product_id, next_size_B, close_price_sell)
-                    
-                if close_order_id_sell is not None:
-                    self.orders.append(close_order_id_sell)    
-                    app_logger.info("Starting closing cycle sell order placed successfully: %s", close_order_id_sell)
-                    self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Active-Starting Closing Sell Order"
-                    info_logger.info(self.cycle_status)
-
-                if close_order_id_sell is None:
-                    error_logger.error(f"Starting closing sell order not found for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Released lock")
-                print("'buy_sell' thread releasing lock")
-                
-            with self.buy_sell_cycleset_lock:
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Before important step")
-
-                # Call wait_for_order function
-                order_details = wait_for_order(api_key, api_secret, close_order_id_sell, max_retries=3)
-
-                # Check if the order_details is None
-                if order_details is None:
-                    # Handle the case where wait_for_order did not complete successfully
-                    error_logger.error(f"Starting closing sell order status not found for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycle_running = False
-                    self.cycleset_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Failed-Starting Closing Sell Order"
-                    info_logger.info(self.cycle_status)
-                    print("Starting closing sell order failed. Cycle not completed and has been stopped. Cycle set stopped.")
-                    return
-                
-                if order_details is not None:
-                    print("Starting closing cycle sell order completed successfully")            
-                    
-                # Process starting closing cycle sell order amount spent, fees, and amount to be received
-                print("Processing starting closing cycle sell order assets...")
-                close_size_B = next_size_B
-                order_processing_params = close_limit_sell_order_processing(close_size_B, order_details, order_processing_params = {})
-                total_received_Q_cls = order_processing_params["total_received_Q_cls"]
-                total_spent_B_cls = order_processing_params["total_spent_B_cls"]
-                residual_amt_B_cls = order_processing_params["residual_amt_B_cls"]
-                self.residual_amt_B_list.append(residual_amt_B_cls)
-
-                if order_processing_params is not None:
-                    print("Starting buy_sell cycle completed.")
-                    self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Completed-Pending-Next Opening Buy Order"
-                    info_logger.info(self.cycle_status)
-
-                if order_processing_params is None:
-                    # Handle the case where open_limit_buy_order_processing did not complete successfully
-                    error_logger.error(f"Order processing parameters not found for closing cycle sell order for CycleSet {self.cycleset_number}. Stopping the current cycle set. Check for any open orders related to this request on exchange and handle manually.")
-                    self.cycleset_running = False # Set cycle set attribute to not running
-                    self.cycle_running = False  # Set the cycle running status to False
-                    self.cycleset_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Failed"
-                    self.cycle_status = f"CyclSet {self.cycleset_number} {self.cycle_type} Cycle {self.cycle_number}: Failed-Starting Closing Sell Order"
-                    info_logger.info(self.cycle_status)
-                    print("Order processing failed. Cycle not completed. Cycle set stopped. Check for any open orders related to this request on exchange and handle manually.")
-                    return
-
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - After important step")
-
-                # Gather data for logic to determine price for next opening cycle sell order for repeating cycle
-                    
-            with self.buy_sell_cycleset_lock:
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Before important step")
-                # Print statement to indicate current RSI calculation
-                print("Calculating current RSI...")
-
-                # Calculate current RSI
-                rsi = calculate_rsi(product_id, chart_interval, length=21600)  # 15 days worth of 1-minute data
-                current_rsi = rsi
-                app_logger.info("Current RSI: %s", current_rsi)
-
-                # Determine next opening cycle sell price
-                print("Determining next opening cycle buy order price...")
-                open_price_buy = determine_next_open_buy_order_price_with_retry(profit_percent, current_rsi, product_stats["quote_increment"], iterations=0, depth=0, max_iterations=10, max_depth=1000000)
-                app_logger.info("Opening cycle buy order price determined: %s", open_price_buy)
-
-                if open_price_buy is not None:
-                    # Calculate compounding amount and size for next opening cycle buy order
-                    print("Calculating compounding amount and next opening cycle buy order size...")
-                    compounding_amount_Q_olb, no_compounding_Q_limit_olb = calculate_open_limit_buy_compounding_amt_Q(total_received_Q_cls, total_spent_B_cls, open_price_buy, maker_fee, product_stats["quote_increment"])
-                    open_size_Q = determine_next_open_size_Q_limit(compounding_option, total_received_Q_cls, no_compounding_Q_limit_olb, compounding_amount_Q_olb, compound_percent)
-                    app_logger.info("open_size_Q: %s", open_size_Q)
-
-                if open_price_buy is None:
-                    error_logger.error(f"Failed to determine opening cycle price for next buy order for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-                
-                if open_size_Q is not None:
-                    # Append the quote currency size value to the history list of the current instance
-                    self.open_size_Q_history.append(open_size_Q)
-
-                if open_size_Q is None:
-                    error_logger.error(f"Unable to determine next opening cycle buy order size for CycleSet {self.cycleset_number}. Stopping the current cycle set.")
-                    return
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - After important step")
-
-            with thread_lock:
-                print("'buy_sell' thread acquired lock")
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Acquired lock")
-                # Create a Cycle instance
-                buy_sell_cycle_instance, self.cycle_number = self.add_cycle(open_size_Q, "buy_sell")
-                app_logger.info("buy_sell_cycle_instance: %s", buy_sell_cycle_instance)
-
-                buy_sell_cycle_instance.cycle_number = self.cycle_number
-               
-                # Add the cycle instance to the list in the CycleSet and Cycle
-                self.cycle_instances.append(buy_sell_cycle_instance)
-                buy_sell_cycle_instance.cycle_instances.append(buy_sell_cycle_instance)
-
-                print("Starting buy_sell cycle completed.")
-                app_logger.info("Opening buy order ID: %s, Closing sell order ID: %s", open_order_id_buy, close_order_id_sell)
-
-                # Pass the new cycle instance to the next iteraation of cycle order creation
-                app_logger.info(f"Starting next buy_sell cycle, Cycle {buy_sell_cycle_instance.cycle_number} of CycleSet {self.cycleset_number} {self.cycle_type}")
-                
-                print(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - Released lock")
-                print("'buy_sell' thread releasing lock")
-
-            # Increment the recursion depth counter
-            self.recursion_depth += 1
-            
-            # Call the next function without handling recursion here
-            next_order_ids = self.place_next_buy_sell_cycle_orders(open_size_Q, open_price_buy, buy_sell_cycle_instance)
-            return open_order_id_buy, close_order_id_sell, next_order_ids
-        
-        except requests.exceptions.RequestException as e:
-            # Handle request exceptions
-            error_logger.error(f"An error occurred in place_starting_buy_sell_cycle_orders: {e}")
-            error_logger.error(f"Status code: {e.response.status_code}" if hasattr(e, 'response') and e.response is not None else "")
-            # Add additional logging to capture specific details
-            error_logger.exception("RequestException details:", exc_info=True)
-            return None, None, None
-
-        except json.JSONDecodeError as e:
-            # Handle JSON decoding errors
-            error_logger.error(f"Error decoding JSON response in place_starting_buy_sell_cycle_orders: {e}")
-            # Add additional logging to capture specific details
-            error_logger.exception("JSONDecodeError details:", exc_info=True)
-            return None, None, None
-
-        except Exception as e:
-            # Handle other unexpected errors
-            error_logger.error(f"Thread ID: {threading.get_ident()} - Timestamp: {time.time()} - An unexpected error occurred in place_starting_buy_sell_cycle_orders: {e}")
-            # Add additional logging to capture specific details
-            error_logger.exception("Unexpected error details:", exc_info=True)
-            return None, None, None  
-    
-    def start_sell_buy_starting_cycle(self, user_config, sell_buy_cycle_set_counter):
-        with sell_buy_cycle_start_lock:
-            # Check if there is new user input
-            if user_config:
-                with print_lock:
-                    app_logger.info(f"Cycle Set {sell_buy_cycle_set_counter} (sell_buy) starting cycle initiated...")
-
-                # Call the add_cycle() function to create the Cycle instance
-                sell_buy_cycle_instance, self.cycle_number = self.add_cycle(open_size=user_config["starting_size_B"], cycle_type="sell_buy")
-            
-                # Place starting orders for 'sell-buy' cycle and get order IDs
-                sell_buy_order_ids = self.place_starting_sell_buy_cycle_orders(user_config["starting_size_B"], sell_buy_cycle_instance)
-
-                return sell_buy_cycle_instance, sell_buy_order_ids
-            else:
-                error_logger.error("Invalid user configuration. CycleSet and Cycle not started.")
-
-    def start_buy_sell_starting_cycle(self, user_config, buy_sell_cycle_set_counter):
-        with buy_sell_cycle_start_lock:
-            # Check if there is new user input
-            if user_config:
-                with print_lock:
-                    app_logger.info(f"Cycle Set {buy_sell_cycle_set_counter} (buy_sell) starting cycle initiated...")
-
-                # Call the add_cycle() function to create the Cycle instance
-                buy_sell_cycle_instance, self.cycle_number = self.add_cycle(open_size=user_config["starting_size_Q"], cycle_type="buy_sell")
-
-                # Place starting orders for 'sell-buy' cycle and get order IDs
-                buy_sell_order_ids = self.place_starting_buy_sell_cycle_orders(user_config["starting_size_Q"], buy_sell_cycle_instance)
-
-                return buy_sell_cycle_instance, buy_sell_order_ids
-            else:
-                error_logger.error("Invalid user configuration. CycleSet and Cycle not started.")
+        return get_cycle_scheduler().run(self)
 
     def get_open_orders(self):
-        open_orders = [order for order in self.orders if get_order_status(order) == 'OPEN']
+        # Read from the shared order state table (refreshed in bulk for every cycle set)
+        get_order_status_poller().ensure_fresh(self.orders)
+        statuses = order_state_table.get_statuses(self.orders)
+        open_orders = [order_id for order_id in self.orders if statuses[order_id] == 'OPEN']
         return open_orders
     
     def cancel_open_orders(self, orders_to_cancel):
@@ -1305,23 +186,10 @@ class CycleSet:
         return cancel_results
     
     def stop(self):
-        with print_lock:
-            # Access the last cycle in the set
-            if self.cycle_instances:
-                last_cycle = self.cycle_instances[-1]
-            
-                # Get the open orders in the last cycle
-                open_orders = last_cycle.get_open_orders()
+        # Stop the cycle set on the cycle scheduler, which cancels its resting orders
+        from cycle_scheduler import get_cycle_scheduler
 
-                if open_orders:
-                    # Initiate cancel requests for open orders
-                    cancel_results = self.cancel_open_orders(open_orders)  # Use your cancel_orders function
-                    if cancel_results:
-                        print("Cancel requests initiated successfully.")
-                    else:
-                        print("Failed to initiate cancel requests.")
-            
-            self.running = False  # This flag prevents further cycling
+        get_cycle_scheduler().stop_cycle_set(self)
 
     def cycleset_is_running(self):
         return self.cycleset_running
@@ -1355,8 +223,22 @@ class CycleSet:
             
             info_logger.info("Status message: %s", status_message)
 
+    def update_metrics(self, price=None):
+        # Value the cycle set at the given price, else the cached market price (never a fresh
+        # price request), and refresh the P&L attributes; constant time per call
+        if price is None:
+            price = get_market_context(self.product_id).cached_price
+
+        summary = self.metrics.summary(price)
+        if summary is not None:
+            for name, value in summary.items():
+                setattr(self, name, value)
+
+        return summary
+
     def get_cycleset_data(self):
         # Calculate and return a dictionary of relevant data
+        self.update_metrics()
     
         cycleset_data = {
             'cycle_set_number': self.cycleset_number,
@@ -1429,15 +311,18 @@ class Cycle:
     # Other methods...
 
     def check_order_status(self, order_id):
-        order_data = get_order_status(order_id)
-        if order_data:
-            order_status = order_data.get("status")
+        get_order_status_poller().ensure_fresh([order_id])
+        order_status = order_state_table.get_status(order_id)
+        if order_status:
             return order_status
         else:
             # Handle the case when the API request fails
             return "API request failed"
+
     def get_open_orders(self):
-        open_orders = [order_id for order_id in self.orders if get_order_status(order_id) == 'OPEN']
+        get_order_status_poller().ensure_fresh(self.orders)
+        statuses = order_state_table.get_statuses(self.orders)
+        open_orders = [order_id for order_id in self.orders if statuses[order_id] == 'OPEN']
         return open_orders
     
     def cancel_open_orders(self, open_orders):
@@ -1446,8 +331,10 @@ class Cycle:
 
     def cycle_is_running(self):
         # Check if a cycle is running
+        get_order_status_poller().ensure_fresh(self.orders)
+        statuses = order_state_table.get_statuses(self.orders)
         for order_id in self.orders:
-            order_status = get_order_status(order_id)  # Implement this function to get order status
+            order_status = statuses[order_id]
             if order_status != "CANCELLED":
                 self.cycle_running = True
             else:
@@ -1473,7 +360,7 @@ def determine_starting_prices(current_price, upper_bb, lower_bb, starting_size_B
 
                 # We still calculate a buy price if quote assets are available
                 if starting_price_sell is not None and starting_size_Q > 0:
-                    rounded_buy_estimate = round((starting_price_sell * 0.995), -int(math.floor(math.log10(quote_increment))))
+                    rounded_buy_estimate = round_price(starting_price_sell * 0.995, quote_increment)
 
                     # Ensure the rounded price is at least quote_increment
                     if rounded_buy_estimate < quote_increment:
@@ -1496,7 +383,7 @@ def determine_starting_prices(current_price, upper_bb, lower_bb, starting_size_B
 
                     # Will still calculate a sell price because base assets available
                     if starting_price_buy is not None:
-                        rounded_sell_estimate = round((starting_price_buy * 1.005), -int(math.floor(math.log10(quote_increment))))
+                        rounded_sell_estimate = round_price(starting_price_buy * 1.005, quote_increment)
 
                         # Ensure the rounded price is at least quote_increment
                         if rounded_sell_estimate < quote_increment:
@@ -0,0 +1,123 @@
+# indicator_benchmark.py
+import os
+import sys
+import tempfile
+import time
+from statistics import mean, stdev
+import numpy as np
+
+# Logs of benchmark runs go to a temporary directory instead of the bot's log files (unless PORTALX_LOG_DIR is set)
+os.environ.setdefault("PORTALX_LOG_DIR", tempfile.mkdtemp(prefix="portalx-logs-"))
+
+from indicator_utils import IndicatorEngine, RSI_PERIOD
+from indicator_kernels import bollinger_bands_series, rsi_series, long_term_ma24_series
+
+# Candle counts to benchmark
+BENCHMARK_SIZES = [1_000, 100_000, 1_000_000]
+
+# Indicator parameters (matching the defaults in the user config)
+WINDOW_SIZE = 20
+LONG_TERM_WINDOW = 24
+
+# The per-candle reference implementations are timed on at most this many candles and the
+# result scaled up linearly, so the 1M run does not take hours
+LEGACY_SAMPLE = 5_000
+
+def generate_closing_prices(count, seed=42):
+    # Random walk around 0.12 (an XLM-USD like price)
+    rng = np.random.default_rng(seed)
+    return 0.12 * np.exp(np.cumsum(rng.normal(0, 0.001, count)))
+
+def legacy_bollinger_bands(closing_prices, window_size, num_std_dev=2):
+    # Same computation as bollinger_utils.calculate_bollinger_bands, without the logging
+    moving_average = mean(closing_prices[-window_size:])
+    std_dev = stdev(closing_prices[-window_size:])
+    return moving_average + (num_std_dev * std_dev), moving_average - (num_std_dev * std_dev)
+
+def legacy_pandas_rsi(closing_prices, period=RSI_PERIOD):
+    # The pandas implementation new_calculate_rsi used before the streaming engine
+    import pandas as pd
+
+    delta = pd.Series(closing_prices).diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.rolling(window=period, min_periods=1).mean()
+    avg_loss = loss.rolling(window=period, min_periods=1).mean()
+    rs = avg_gain / avg_loss
+    return (100 - (100 / (1 + rs))).iloc[-1]
+
+def time_call(function):
+    start_time = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start_time, result
+
+def time_per_candle(function, closing_prices, lookback):
+    # Recompute the scalar indicator at every candle from its trailing window, as the bot
+    # does today, and scale the sampled time up to the full series
+    closing_prices = closing_prices.tolist()
+    positions = range(lookback, len(closing_prices) + 1)
+    sample = positions[:LEGACY_SAMPLE]
+
+    start_time = time.perf_counter()
+    for position in sample:
+        function(closing_prices[position - lookback:position])
+    elapsed = time.perf_counter() - start_time
+
+    return elapsed * len(positions) / max(len(sample), 1), len(sample) < len(positions)
+
+def run_streaming_engine(closing_prices):
+    engine = IndicatorEngine(60, WINDOW_SIZE)
+    upper_bb = np.full(len(closing_prices), np.nan)
+    rsi = np.full(len(closing_prices), np.nan)
+
+    for index, close in enumerate(closing_prices.tolist()):
+        engine.update((index * 60, close, close, close, close, 0.0))
+        upper_bb[index] = engine.bollinger_bands()[0] if engine.window.is_full else np.nan
+        rsi[index] = engine.current_rsi if engine.current_rsi is not None else np.nan
+
+    return upper_bb, rsi
+
+def max_difference(first, second):
+    mask = ~np.isnan(first) & ~np.isnan(second)
+    return float(np.max(np.abs(first[mask] - second[mask]))) if mask.any() else 0.0
+
+def benchmark_size(count):
+    closing_prices = generate_closing_prices(count)
+    results = {}
+
+    results["bollinger numpy"] = time_call(lambda: bollinger_bands_series(closing_prices, WINDOW_SIZE))[0]
+    results["rsi numpy"] = time_call(lambda: rsi_series(closing_prices))[0]
+    results["ma24 numpy"] = time_call(lambda: long_term_ma24_series(closing_prices, LONG_TERM_WINDOW))[0]
+
+    results["bollinger statistics"], bollinger_scaled = time_per_candle(lambda window: legacy_bollinger_bands(window, WINDOW_SIZE), closing_prices, WINDOW_SIZE)
+    try:
+        results["rsi pandas"], rsi_scaled = time_per_candle(legacy_pandas_rsi, closing_prices, RSI_PERIOD + 1)
+    except ImportError:
+        rsi_scaled = False
+
+    streaming_time, (streaming_upper_bb, streaming_rsi) = time_call(lambda: run_streaming_engine(closing_prices))
+    results["bollinger + rsi streaming"] = streaming_time
+
+    # Check the kernels against the streaming engine
+    upper_bb, lower_bb = bollinger_bands_series(closing_prices, WINDOW_SIZE)
+    differences = {
+        "bollinger": max_difference(upper_bb, streaming_upper_bb),
+        "rsi": max_difference(rsi_series(closing_prices), streaming_rsi),
+    }
+
+    return results, differences, bollinger_scaled or rsi_scaled
+
+def main(sizes=BENCHMARK_SIZES):
+    for count in sizes:
+        results, differences, scaled = benchmark_size(count)
+
+        print(f"{count:,} candles:")
+        for name, seconds in results.items():
+            print(f"  {name:<28} {seconds * 1000:>12.2f} ms")
+        print(f"  max difference vs streaming engine: bollinger {differences['bollinger']:.3g}, rsi {differences['rsi']:.3g}")
+        if scaled:
+            print(f"  (per-candle statistics/pandas timings extrapolated from {LEGACY_SAMPLE:,} candles)")
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or BENCHMARK_SIZES
+    main(sizes)
@@ -0,0 +1,135 @@
+# indicator_kernels.py
+import math
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from indicator_utils import RSI_PERIOD
+from logging_config import info_logger
+
+# Batch (full series) versions of the indicators in bollinger_utils/repeating_cycle_utils.
+# Every function takes prices oldest first and returns an array of the same length, with
+# NaN where there is not yet enough data. Values match the streaming IndicatorEngine.
+
+# Rows of strided windows reduced at a time by rolling_stdev
+STDEV_CHUNK = 65536
+
+# Largest growth factor allowed inside one block of the exponential smoothing kernel
+MAX_BLOCK_GROWTH = 1e3
+
+def candle_columns(candles):
+    # Convert Coinbase candle rows ([time, low, high, open, close, volume]) to an array of
+    # columns ordered oldest first
+    array = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+    return array[np.argsort(array[:, 0], kind="stable")].T
+
+def rolling_mean(values, window):
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+
+    if len(values) < window:
+        return result
+
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    result[window - 1:] = (cumulative[window:] - cumulative[:-window]) / window
+    return result
+
+def rolling_stdev(values, window):
+    # Sample standard deviation (as statistics.stdev) over strided window views, in chunks so
+    # the temporaries stay small; exact, unlike differencing cumulative sums of squares
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(values), np.nan)
+
+    if len(values) < window or window < 2:
+        return result
+
+    windows = sliding_window_view(values, window)
+    for start in range(0, len(windows), STDEV_CHUNK):
+        chunk = windows[start:start + STDEV_CHUNK]
+        result[window - 1 + start:window - 1 + start + len(chunk)] = chunk.std(axis=1, ddof=1)
+
+    return result
+
+def bollinger_bands_series(closing_prices, window_size, num_std_dev=2):
+    # Series version of bollinger_utils.calculate_bollinger_bands
+    moving_average = rolling_mean(closing_prices, window_size)
+    std_dev = rolling_stdev(closing_prices, window_size)
+
+    upper_bb = moving_average + (num_std_dev * std_dev)
+    lower_bb = moving_average - (num_std_dev * std_dev)
+
+    return upper_bb, lower_bb
+
+def long_term_ma24_series(hourly_closing_prices, window=24):
+    # Series version of repeating_cycle_utils.calculate_long_term_ma24
+    return rolling_mean(hourly_closing_prices, window)
+
+def mean24_series(highs, lows, window=24):
+    # Midpoint of the rolling high and low (bollinger_utils.determine_mean24 over hourly candles)
+    highs = np.asarray(highs, dtype=np.float64)
+    lows = np.asarray(lows, dtype=np.float64)
+    result = np.full(len(highs), np.nan)
+
+    if len(highs) < window:
+        return result
+
+    result[window - 1:] = (sliding_window_view(highs, window).max(axis=1) + sliding_window_view(lows, window).min(axis=1)) / 2
+    return result
+
+def exponential_smoothing(values, alpha, initial):
+    # y[k] = (1 - alpha) * y[k - 1] + alpha * values[k], with y[-1] = initial.
+    # Values are split into blocks short enough that decay ** -block stays small; within a
+    # block the recursion is a scaled cumulative sum, and only the carry between blocks is
+    # propagated sequentially.
+    values = np.asarray(values, dtype=np.float64)
+    count = len(values)
+
+    if count == 0:
+        return values.copy()
+
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        return values.copy()
+
+    block = max(1, min(count, int(math.log(MAX_BLOCK_GROWTH) / -math.log(decay)))) if decay < 1.0 else count
+    padding = (-count) % block
+    blocks = np.concatenate((values, np.zeros(padding))).reshape(-1, block)
+
+    steps = np.arange(block)
+    local = np.cumsum(blocks * decay ** -steps, axis=1) * (decay ** steps) * alpha
+
+    block_decay = decay ** block
+    carries = np.empty(len(blocks))
+    carry = initial
+    for index, block_end in enumerate(local[:, -1].tolist()):
+        carries[index] = carry
+        carry = carry * block_decay + block_end
+
+    result = local + carries[:, None] * decay ** (steps + 1)
+    return result.ravel()[:count]
+
+def rsi_series(closing_prices, period=RSI_PERIOD):
+    # Wilder RSI for every candle (series version of calculate_rsi/new_calculate_rsi)
+    closing_prices = np.asarray(closing_prices, dtype=np.float64)
+    result = np.full(len(closing_prices), np.nan)
+
+    if len(closing_prices) <= period:
+        return result
+
+    delta = np.diff(closing_prices)
+    gains = np.where(delta > 0, delta, 0.0)
+    losses = np.where(delta < 0, -delta, 0.0)
+
+    # Seed with the simple average of the first period changes, then smooth
+    seed_gain = gains[:period].mean()
+    seed_loss = losses[:period].mean()
+    avg_gain = np.concatenate(([seed_gain], exponential_smoothing(gains[period:], 1.0 / period, seed_gain)))
+    avg_loss = np.concatenate(([seed_loss], exponential_smoothing(losses[period:], 1.0 / period, seed_loss)))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+    rsi = np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, 50.0), rsi)
+
+    result[period:] = rsi
+    return result
+
+# Indicate that indicator_kernels.py module loaded successfully
+info_logger.info("indicator_kernels module loaded successfully")
@@ -0,0 +1,180 @@
+# indicator_utils.py
+import math
+from collections import deque
+from logging_config import info_logger
+
+# Default Wilder RSI period
+RSI_PERIOD = 14
+
+# Recompute rolling sums from the window after this many updates to shed floating point drift
+RESYNC_INTERVAL = 10000
+
+class RollingWindow:
+    # Fixed-size window of values with running sum and sum of squares, so the mean and
+    # standard deviation are available in O(1) after each update
+
+    def __init__(self, window_size):
+        self.window_size = window_size
+        self.values = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._updates = 0
+
+    def update(self, value):
+        self.values.append(value)
+        self.total += value
+        self.total_sq += value * value
+
+        if len(self.values) > self.window_size:
+            dropped = self.values.popleft()
+            self.total -= dropped
+            self.total_sq -= dropped * dropped
+
+        self._count_update()
+
+    def replace_last(self, value):
+        # Revise the newest value (e.g. when the still-forming candle changes)
+        previous = self.values[-1]
+        self.values[-1] = value
+        self.total += value - previous
+        self.total_sq += value * value - previous * previous
+        self._count_update()
+
+    def _count_update(self):
+        self._updates += 1
+        if self._updates >= RESYNC_INTERVAL:
+            self.total = math.fsum(self.values)
+            self.total_sq = math.fsum(value * value for value in self.values)
+            self._updates = 0
+
+    @property
+    def is_full(self):
+        return len(self.values) == self.window_size
+
+    @property
+    def mean(self):
+        if not self.values:
+            return None
+        return self.total / len(self.values)
+
+    @property
+    def stdev(self):
+        # Sample standard deviation, matching statistics.stdev
+        count = len(self.values)
+        if count < 2:
+            return None
+        variance = (self.total_sq - (self.total * self.total) / count) / (count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def bollinger_bands(self, num_std_dev=2):
+        moving_average = self.mean
+        std_dev = self.stdev
+        if moving_average is None or std_dev is None:
+            return None, None
+        return moving_average + (num_std_dev * std_dev), moving_average - (num_std_dev * std_dev)
+
+class WilderRSI:
+    # Relative Strength Index with Wilder-smoothed average gain and loss, updated in O(1)
+
+    def __init__(self, period=RSI_PERIOD):
+        self.period = period
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.prev_close = None
+        self.count = 0  # Number of price changes seen
+        self._previous_state = None
+
+    def _state(self):
+        return self.avg_gain, self.avg_loss, self.prev_close, self.count
+
+    def update(self, close):
+        self._previous_state = self._state()
+
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            gain = change if change > 0 else 0.0
+            loss = -change if change < 0 else 0.0
+            self.count += 1
+
+            if self.count <= self.period:
+                # Seed with a simple average over the first period
+                self.avg_gain += (gain - self.avg_gain) / self.count
+                self.avg_loss += (loss - self.avg_loss) / self.count
+            else:
+                self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        self.prev_close = close
+
+    def replace_last(self, close):
+        # Undo the newest close and apply the revised one
+        if self._previous_state is None:
+            return self.update(close)
+        self.avg_gain, self.avg_loss, self.prev_close, self.count = self._previous_state
+        self.update(close)
+
+    @property
+    def value(self):
+        if self.count < self.period:
+            return None
+        if self.avg_loss == 0:
+            return 100.0 if self.avg_gain > 0 else 50.0
+        rs = self.avg_gain / self.avg_loss
+        return 100 - (100 / (1 + rs))
+
+class IndicatorEngine:
+    # Streaming Bollinger bands, moving average and RSI for one product and granularity.
+    # Candles (Coinbase layout: [time, low, high, open, close, volume]) are fed oldest first;
+    # a candle with the same time as the newest one revises it instead of adding a new one.
+
+    def __init__(self, granularity, window_size, rsi_period=RSI_PERIOD):
+        self.granularity = granularity
+        self.window = RollingWindow(window_size)
+        self.rsi = WilderRSI(rsi_period)
+        self.last_time = None
+        self.last_close = None
+
+    def _push(self, close):
+        self.window.update(close)
+        self.rsi.update(close)
+        self.last_close = close
+
+    def update(self, candle):
+        candle_time = int(candle[0])
+        close = float(candle[4])
+
+        if self.last_time is not None:
+            if candle_time < self.last_time:
+                return
+            if candle_time == self.last_time:
+                self.window.replace_last(close)
+                self.rsi.replace_last(close)
+                self.last_close = close
+                return
+
+            # Intervals without trades keep the previous close
+            missing_time = self.last_time + self.granularity
+            while missing_time < candle_time:
+                self._push(self.last_close)
+                missing_time += self.granularity
+
+        self._push(close)
+        self.last_time = candle_time
+
+    def update_candles(self, candles):
+        for candle in candles:
+            self.update(candle)
+
+    @property
+    def moving_average(self):
+        return self.window.mean
+
+    def bollinger_bands(self, num_std_dev=2):
+        return self.window.bollinger_bands(num_std_dev)
+
+    @property
+    def current_rsi(self):
+        return self.rsi.value
+
+# Indicate that indicator_utils.py module loaded successfully
+info_logger.info("indicator_utils module loaded successfully")
@@ -0,0 +1,75 @@
+# ledger_benchmark.py
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Logs of benchmark runs go to a temporary directory instead of the bot's log files (unless PORTALX_LOG_DIR is set)
+os.environ.setdefault("PORTALX_LOG_DIR", tempfile.mkdtemp(prefix="portalx-logs-"))
+
+from trade_ledger import TradeLedger
+
+# Simulated history: cycle sets, days, and completed cycles per cycle set per day
+CYCLE_SETS = 100
+DAYS = 180
+CYCLES_PER_DAY = 20
+
+# Timed repetitions of each monitoring query
+QUERY_REPEATS = 100
+
+def populate(ledger, cycle_sets, days, cycles_per_day):
+    # Record every cycle of every cycle set (two orders and two fills per cycle) through the
+    # ledger's batched writes; returns (fills written, seconds)
+    start_time = time.perf_counter()
+    fills = 0
+
+    for index in range(cycle_sets):
+        cycleset_id = f"benchmark-{index}"
+        ledger.record_cycle_set(cycleset_id, "XLM-USD", "sell_buy", 100.0)
+
+        for cycle_number in range(1, days * cycles_per_day + 1):
+            ledger.record_cycle(cycleset_id, cycle_number, 100.0)
+            for phase, side in (("open", "SELL"), ("close", "BUY")):
+                order_id = f"{cycleset_id}-{cycle_number}-{phase}"
+                price = 0.12 + random.uniform(-0.01, 0.01)
+                ledger.record_order(order_id, cycleset_id, cycle_number, "XLM-USD", side, phase, price, 100.0)
+                spent, received = (100.0, 100.0 * price * 0.996) if side == "SELL" else (100.0 * price * 1.004, 100.3)
+                ledger.record_fill(order_id, "XLM-USD", side, phase, "limit", 100.0, 100.0 * price, 100.0 * price * 0.004, spent, received, 0.0)
+                fills += 1
+            ledger.complete_cycle(cycleset_id, cycle_number)
+
+        ledger.flush()
+
+    return fills, time.perf_counter() - start_time
+
+def time_query(query):
+    start_time = time.perf_counter()
+    for _ in range(QUERY_REPEATS):
+        query()
+    return (time.perf_counter() - start_time) / QUERY_REPEATS * 1000
+
+def main(cycle_sets=CYCLE_SETS, days=DAYS, cycles_per_day=CYCLES_PER_DAY):
+    with tempfile.TemporaryDirectory() as directory:
+        ledger = TradeLedger(os.path.join(directory, "ledger.db"))
+        fills, seconds = populate(ledger, cycle_sets, days, cycles_per_day)
+        print(f"Wrote {fills} fills ({days} days, {cycle_sets} cycle sets) in {seconds:.1f} s ({fills / seconds:.0f} fills/s)")
+
+        month_ago = time.time() - 30 * 86400
+        cycleset_id = f"benchmark-{cycle_sets // 2}"
+        queries = {
+            "totals, all cycle sets": lambda: ledger.cycle_set_totals(),
+            "totals, one cycle set": lambda: ledger.cycle_set_totals(cycleset_id),
+            "P&L, one cycle set, last 30 days": lambda: ledger.profit_and_loss(cycleset_id, month_ago),
+            "recent orders, one cycle set": lambda: ledger.cycle_set_orders(cycleset_id, limit=20),
+            "one order": lambda: ledger.order(f"{cycleset_id}-1-open"),
+        }
+
+        for name, query in queries.items():
+            print(f"{name:>34}: {time_query(query):8.3f} ms")
+
+        ledger.close()
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    main(*args)
@@ -1,13 +1,18 @@
 # logging_config.py
 
 import logging
+import os
+
+# Directory of the log files (the working directory unless PORTALX_LOG_DIR is set; benchmarks and
+# tests point it at a temporary directory so that their runs stay out of the bot's logs)
+LOG_DIR = os.environ.get("PORTALX_LOG_DIR", "")
 
 # Create a logger for errors
 error_logger = logging.getLogger('errors')
 error_logger.setLevel(logging.ERROR)
 
 # Create a file handler for error messages
-error_handler = logging.FileHandler('error.log')
+error_handler = logging.FileHandler(os.path.join(LOG_DIR, 'error.log'))
 error_handler.setLevel(logging.ERROR)
 error_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 error_handler.setFormatter(error_formatter)
@@ -21,7 +26,7 @@ info_logger = logging.getLogger('info')
 info_logger.setLevel(logging.INFO)
 
 # Create a file handler for info messages
-info_handler = logging.FileHandler('info.log')
+info_handler = logging.FileHandler(os.path.join(LOG_DIR, 'info.log'))
 info_handler.setLevel(logging.INFO)
 info_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 info_handler.setFormatter(info_formatter)
@@ -35,7 +40,7 @@ app_logger = logging.getLogger('app')
 app_logger.setLevel(logging.INFO)
 
 # Create a file handler for "app.log"
-app_handler = logging.FileHandler('app.log')
+app_handler = logging.FileHandler(os.path.join(LOG_DIR, 'app.log'))
 
 # Create a formatter for the messages in "app.log"
 app_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -64,7 +69,7 @@ def setup_cycleset_logger(cycle_set_counter, cycle_type):
     logger.setLevel(logging.INFO)
 
     # Create a file handler
-    file_handler = logging.FileHandler(f"cycleset_{cycle_set_counter}_{cycle_type_label}_log.txt")
+    file_handler = logging.FileHandler(os.path.join(LOG_DIR, f"cycleset_{cycle_set_counter}_{cycle_type_label}_log.txt"))
     file_handler.setLevel(logging.INFO)
 
     # Create a formatter and set it for the handler
@@ -5,7 +5,8 @@ import math
 from config import config_data
 from user_input2 import user_config
 from coinbase_auth import create_signed_request, fetch_historical_data
-from coinbase_utils import fetch_product_stats, generate_signature
+from coinbase_utils import generate_signature
+from product_stats_cache import get_product_stats
 from bollinger_utils import calculate_bollinger_bands, determine_starting_sell_parameters, determine_starting_buy_parameters, determine_mean24
 from order_utils import place_starting_open_sell_order, place_starting_open_buy_order, waiting_period_conditions, wait_for_order
 from order_processing_utils import open_limit_sell_order_processing, open_limit_buy_order_processing, close_limit_buy_order_processing, close_limit_sell_order_processing, open_market_sell_order_processing, open_market_buy_order_processing, close_market_buy_order_processing, close_market_sell_order_processing
@@ -71,7 +72,7 @@ try:
 
     # Fetch the latest product stats from Coinbase API with error handling
     print("Fetching product stats...")
-    product_stats = fetch_product_stats(product_id, api_key, headers)
+    product_stats = get_product_stats(product_id)
 
     if product_stats is not None:
         print("Product stats fetched successfully")
@@ -134,7 +135,7 @@ try:
 
         # Determine 24 hour mean
         print("Determining 24 hour mean...")
-        mean24 = determine_mean24()
+        mean24 = determine_mean24(product_id)
 
         # Calculate Bollinger bands
         print("Calculating Bollinger bands...")
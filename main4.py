@@ -1,14 +1,35 @@
 # main.py
 from logging_config import app_logger, error_logger
 from starting_input import user_config
-from trading_record_manager import create_and_start_cycle_sets
+from trading_record_manager import create_and_start_cycle_sets, restore_cycle_sets, handle_options_menu
+from cycle_scheduler import get_cycle_scheduler
+
+# Seconds between offers of the options menu while cycle sets are running
+MENU_INTERVAL = 600
 
 if __name__ == "__main__":
     try:
 
-        # Create a new instance of the CycleSet class and start first cycle
-        app_logger.info("Creating and starting cycle set(s)...")
-        create_and_start_cycle_sets(user_config)
+        # Resume the cycle sets of a previous run from the cycle journal; start new ones only
+        # when there is nothing to resume
+        restored = restore_cycle_sets()
+        if restored:
+            app_logger.info(f"Resumed {len(restored)} cycle set(s) from the cycle journal")
+        else:
+            # Create a new instance of the CycleSet class and start first cycle
+            app_logger.info("Creating and starting cycle set(s)...")
+            create_and_start_cycle_sets(user_config)
+
+        # The cycle sets run on the scheduler's event loop; keep the main thread for the
+        # options menu until they have all finished
+        scheduler = get_cycle_scheduler()
+        while scheduler.running_count():
+            handle_options_menu()
+            scheduler.wait_idle(MENU_INTERVAL)
+
+    except KeyboardInterrupt:
+        app_logger.info("Stopping cycle set(s)...")
+        get_cycle_scheduler().shutdown()
 
     except Exception as e:
         # Handle exceptions or errors
@@ -0,0 +1,277 @@
+# market_context.py
+import threading
+import time
+from indicator_utils import IndicatorEngine, RSI_PERIOD
+from product_stats_cache import get_product_stats_cache
+from logging_config import app_logger, info_logger, error_logger
+from starting_input import user_config
+
+# RSI length of the entry rules, in candles at the chart interval: 15 days of 1-minute candles as
+# in the original calculate_rsi(..., length=21600); "rsi_length" in the user config overrides it
+RSI_LENGTH = int(user_config.get("rsi_length", 21600))
+
+# Candles used to warm up the chart interval indicators: one more than the RSI length so that the
+# RSI is ready once seeded (the Bollinger band window is much shorter)
+INDICATOR_HISTORY = RSI_LENGTH + 1
+
+# The long term moving average runs over 24 hourly candles
+LONG_TERM_MA_INTERVAL = 3600
+LONG_TERM_MA_WINDOW = 24
+
+class MarketContext:
+    # Market data shared by every module for one product. Nothing is fetched when the
+    # context is created; each value is computed on first use and then cached until
+    # refresh() is called. Bollinger bands, RSI and the long term moving average come
+    # from streaming indicator engines that advance with update_indicators().
+
+    def __init__(self, product_id, chart_interval, num_intervals, window_size):
+        self.product_id = product_id
+        self.chart_interval = chart_interval
+        self.num_intervals = num_intervals
+        self.window_size = window_size
+        self._values = {}
+        self._lock = threading.RLock()
+        self._indicator_lock = threading.Lock()  # Held only while candles or prices are applied to the engines
+        self._indicators_time = 0
+
+    def _get(self, name, compute):
+        # Double-checked so that concurrent first callers share a single fetch
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if name not in self._values:
+                info_logger.info("Computing %s for %s", name, self.product_id)
+                self._values[name] = compute()
+            return self._values[name]
+
+    def refresh(self, *names):
+        # Drop cached values so they are recomputed on next use (all values if no names given)
+        with self._lock:
+            if names:
+                for name in names:
+                    self._values.pop(name, None)
+            else:
+                self._values.clear()
+
+    def _fetch_historical_data(self):
+        from coinbase_auth import fetch_historical_data
+
+        app_logger.info("Fetching historical data for %s", self.product_id)
+        historical_data = fetch_historical_data(self.product_id, self.chart_interval, self.num_intervals)
+
+        if historical_data is None:
+            error_logger.error(f"Unable to fetch historical data for {self.product_id}")
+            return []
+
+        return historical_data
+
+    def _extract_closing_prices(self):
+        # Extract the close prices from the historical data
+        closing_prices = []
+
+        for entry in self.historical_data:
+            try:
+                close_price = float(entry[4])
+                closing_prices.append(close_price)
+            except ValueError:
+                # Handle invalid data (e.g., non-numeric values) here, if needed
+                error_logger.error("Invalid data entry in historical_data: %s", entry)
+
+        return closing_prices
+
+    def _determine_mean24(self):
+        from bollinger_utils import determine_mean24
+
+        return determine_mean24(self.product_id)
+
+    def _seed_indicator_engine(self, granularity, window_size, history, rsi_period=RSI_PERIOD):
+        from coinbase_auth import fetch_candle_range
+
+        engine = IndicatorEngine(granularity, window_size, rsi_period)
+        end_time = int(time.time())
+        candles = fetch_candle_range(self.product_id, granularity, end_time - (granularity * history), end_time)
+
+        if candles is None:
+            error_logger.error(f"Unable to fetch candles to seed indicators for {self.product_id} ({granularity}s)")
+        else:
+            engine.update_candles(candles)
+
+        return engine
+
+    def _create_indicators(self):
+        return self._seed_indicator_engine(self.chart_interval, self.window_size, max(INDICATOR_HISTORY, self.window_size), RSI_LENGTH)
+
+    def _create_long_term_indicators(self):
+        return self._seed_indicator_engine(LONG_TERM_MA_INTERVAL, LONG_TERM_MA_WINDOW, LONG_TERM_MA_WINDOW)
+
+    def _create_rsi_indicators(self, period):
+        # One candle more than the period so that the RSI is ready once seeded
+        return self._seed_indicator_engine(self.chart_interval, self.window_size, period + 1, period)
+
+    def _engines(self):
+        # Every streaming engine in use, including those created by rsi()
+        engines = [self.indicators, self.long_term_indicators]
+        engines.extend(engine for name, engine in list(self._values.items()) if name.startswith("rsi_indicators_"))
+        return engines
+
+    def _seeded_engines(self):
+        # The engines already created and seeded (never fetches)
+        engines = [engine for name, engine in list(self._values.items()) if name in ("indicators", "long_term_indicators") or name.startswith("rsi_indicators_")]
+        return [engine for engine in engines if engine.last_time is not None]
+
+    def update_indicators(self, max_age=0):
+        # Feed candles newer than the last one seen into the streaming indicators (the
+        # newest candle is re-read so that its in-progress close is revised). Skipped when the
+        # candles were read less than max_age seconds ago.
+        from coinbase_auth import fetch_candle_range
+
+        if time.time() - self._indicators_time < max_age:
+            return
+
+        with self._lock:
+            end_time = int(time.time())
+
+            for engine in self._engines():
+                start_time = engine.last_time if engine.last_time is not None else end_time - engine.granularity * engine.window.window_size
+                candles = fetch_candle_range(self.product_id, engine.granularity, start_time, end_time)
+
+                if candles is None:
+                    error_logger.error(f"Unable to update indicators for {self.product_id} ({engine.granularity}s)")
+                    continue
+
+                with self._indicator_lock:
+                    engine.update_candles(candles)
+
+            self._indicators_time = time.time()
+
+    def apply_price(self, price, at=None):
+        # Revise the newest candle of each seeded indicator engine with a live price, so Bollinger
+        # bands, RSI and the long term moving average follow the market between candle reads
+        # without a request. The price is provisional: update_indicators() re-reads the newest
+        # candle and replaces it with the real close. A price from a later interval than the
+        # newest candle is not applied, so that no made-up candle enters the history and the
+        # real candles of the intervals in between are still read.
+        at = time.time() if at is None else at
+        self._values["last_price"] = price
+
+        with self._indicator_lock:
+            for engine in self._seeded_engines():
+                if int(at) - int(at) % engine.granularity == engine.last_time:
+                    engine.update([engine.last_time, price, price, price, price, 0])
+
+    @property
+    def historical_data(self):
+        return self._get("historical_data", self._fetch_historical_data)
+
+    @property
+    def closing_prices(self):
+        return self._get("closing_prices", self._extract_closing_prices)
+
+    @property
+    def current_price(self):
+        # Get the latest close price ("last") from the historical data
+        return self.closing_prices[0]
+
+    def set_last_price(self, price):
+        # Latest traded price from a price feed (the cycle scheduler's market refresh)
+        self._values["last_price"] = price
+
+    @property
+    def cached_price(self):
+        # Latest known price without a request: the price feed's last price, else the newest
+        # close already fetched; None if neither is available yet
+        price = self._values.get("last_price")
+        if price is None and self._values.get("closing_prices"):
+            price = self._values["closing_prices"][0]
+        return price
+
+    @property
+    def product_stats(self):
+        # From the process-wide product stats cache (refreshed when its TTL expires)
+        return get_product_stats_cache().get(self.product_id)
+
+    @property
+    def increments(self):
+        # (base_increment, quote_increment) as Decimal
+        return get_product_stats_cache().increments(self.product_id)
+
+    @property
+    def quantizer(self):
+        # Price and size quantizer built from the product's increments
+        return get_product_stats_cache().quantizer(self.product_id)
+
+    @property
+    def base_increment(self):
+        return self.product_stats["base_increment"]
+
+    @property
+    def quote_increment(self):
+        return self.product_stats["quote_increment"]
+
+    @property
+    def indicators(self):
+        return self._get("indicators", self._create_indicators)
+
+    @property
+    def long_term_indicators(self):
+        return self._get("long_term_indicators", self._create_long_term_indicators)
+
+    @property
+    def bollinger_bands(self):
+        return self.indicators.bollinger_bands(num_std_dev=2)
+
+    @property
+    def upper_bb(self):
+        return self.bollinger_bands[0]
+
+    @property
+    def lower_bb(self):
+        return self.bollinger_bands[1]
+
+    @property
+    def mean24(self):
+        return self._get("mean24", self._determine_mean24)
+
+    @property
+    def long_term_ma24(self):
+        return self.long_term_indicators.moving_average
+
+    @property
+    def current_rsi(self):
+        # RSI of the entry rules: RSI_LENGTH candles at the chart interval
+        return self.indicators.current_rsi
+
+    def rsi(self, period):
+        # RSI over the given number of candles, None until enough candles were seen
+        if period == RSI_LENGTH:
+            return self.current_rsi
+        return self._get(f"rsi_indicators_{period}", lambda: self._create_rsi_indicators(period)).current_rsi
+
+# Registry of market contexts, one per product
+market_contexts = {}
+market_contexts_lock = threading.Lock()
+
+def get_market_context(product_id=None, chart_interval=None, num_intervals=None, window_size=None):
+    product_id = product_id or user_config["product_id"]
+
+    with market_contexts_lock:
+        context = market_contexts.get(product_id)
+        if context is None:
+            context = MarketContext(
+                product_id,
+                chart_interval or user_config["chart_interval"],
+                num_intervals or user_config["num_intervals"],
+                window_size or user_config["window_size"],
+            )
+            market_contexts[product_id] = context
+
+    return context
+
+# Define the market context for the configured product (no network calls are made here)
+market_context = get_market_context()
+
+# Indicate that market_context.py module loaded successfully
+info_logger.info("market_context module loaded successfully")
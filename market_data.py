@@ -0,0 +1,363 @@
+# market_data.py
+import json
+import os
+import threading
+import time
+from requests.exceptions import RequestException
+from logging_config import app_logger, info_logger, error_logger
+
+try:
+    import websocket  # websocket-client
+except ImportError:  # Fall back to polling only
+    websocket = None
+
+# Advanced Trade market data channel (override with PORTALX_MARKET_WS_URL, e.g. for a local stand-in server)
+MARKET_CHANNEL_URL = os.environ.get("PORTALX_MARKET_WS_URL", "wss://advanced-trade-ws.coinbase.com")
+
+# Seconds after which a product's snapshot is refreshed by REST polling (while the ticker feed
+# is down, or for a product without trades in that time)
+POLL_INTERVAL = 10
+
+# Default age limit (seconds) of a snapshot handed to consumers, and how long a consumer
+# waits for a fresher one before the hub fetches it directly
+MAX_STALENESS = 30
+SNAPSHOT_TIMEOUT = 5
+
+# Seconds a 24 hour mean fetched by REST is reused (the ticker feed updates it continuously)
+MEAN24_MAX_AGE = 900
+
+# Seconds without any message (heartbeats arrive every second) before the feed is considered dropped
+FEED_TIMEOUT = 30
+
+# Reconnect backoff after the feed drops (seconds)
+RECONNECT_DELAY = 1
+MAX_RECONNECT_DELAY = 60
+
+def mean_of_range(high, low):
+    if high is None or low is None:
+        return None
+    return (float(high) + float(low)) / 2
+
+class MarketDataHub:
+    # Latest price and best bid/ask per product, shared by every cycle set. One ticker
+    # subscription covers all products; a poller refreshes stale products with one bulk REST
+    # request for prices and one for the order books. Consumers read the latest snapshot
+    # (or wait briefly for a fresh one) instead of requesting the price themselves.
+
+    def __init__(self, url=MARKET_CHANNEL_URL, poll_interval=POLL_INTERVAL, max_staleness=MAX_STALENESS, connect=True):
+        self.url = url
+        self.poll_interval = poll_interval
+        self.max_staleness = max_staleness
+        self.connect = connect  # False: no feed or poller threads, snapshots come from publish() (stand-in)
+        self.feed_connected = False
+
+        self._products = set()
+        self._snapshots = {}  # product_id -> {"price", "best_bid", "best_ask", "mean24", "time"}
+        self._mean24 = {}  # product_id -> (mean24, fetch time) from REST
+        self._listeners = []
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        self._ws = None
+        self._ws_lock = threading.Lock()
+
+    def start(self):
+        if self._threads or not self.connect:
+            return self
+
+        self._stop.clear()
+
+        poller = threading.Thread(target=self._run_poller, name="market-data-poller", daemon=True)
+        self._threads.append(poller)
+        poller.start()
+
+        if websocket is None:
+            error_logger.error("websocket-client is not installed; market data will be polled")
+            return self
+
+        feed = threading.Thread(target=self._run_feed, name="market-data-feed", daemon=True)
+        self._threads.append(feed)
+        feed.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+        with self._condition:
+            self.feed_connected = False
+            self._condition.notify_all()
+
+    def subscribe(self, product_id):
+        # Start following a product (idempotent)
+        with self._condition:
+            if product_id in self._products:
+                return
+            self._products.add(product_id)
+
+        self._send_subscribe([product_id])
+
+    def add_listener(self, callback):
+        # callback(product_id, snapshot) is called after every update
+        with self._condition:
+            self._listeners.append(callback)
+
+    def publish(self, product_id, **fields):
+        # Merge new values (price, best_bid, best_ask, high_24h, low_24h) into the product's snapshot
+        fields = {name: float(value) for name, value in fields.items() if value not in (None, "")}
+
+        with self._condition:
+            snapshot = dict(self._snapshots.get(product_id, {}))
+            snapshot.update(fields)
+            mean24 = mean_of_range(snapshot.get("high_24h"), snapshot.get("low_24h"))
+            if mean24 is not None:
+                snapshot["mean24"] = mean24
+            snapshot["product_id"] = product_id
+            snapshot["time"] = time.time()
+            self._snapshots[product_id] = snapshot
+            self._condition.notify_all()
+            listeners = list(self._listeners)
+
+        for callback in listeners:
+            try:
+                callback(product_id, snapshot)
+            except Exception as e:
+                error_logger.error(f"Market data listener failed for {product_id}: {e}")
+
+    def latest(self, product_id):
+        # Latest snapshot regardless of age (None before the first update)
+        with self._condition:
+            snapshot = self._snapshots.get(product_id)
+            return dict(snapshot) if snapshot is not None else None
+
+    def get_snapshot(self, product_id, max_age=None, timeout=SNAPSHOT_TIMEOUT):
+        # A snapshot no older than max_age (default: the hub's staleness bound). Waits up to
+        # timeout for the feed or poller, then fetches the product directly; None if that fails.
+        max_age = self.max_staleness if max_age is None else max_age
+        self.subscribe(product_id)
+        deadline = time.monotonic() + timeout
+
+        with self._condition:
+            while True:
+                snapshot = self._snapshots.get(product_id)
+                if snapshot is not None and "price" in snapshot and time.time() - snapshot["time"] <= max_age:
+                    return dict(snapshot)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set() or not self.connect:
+                    break
+                self._condition.wait(remaining)
+
+        # Fetch directly while the feed is down, or when the product has had no ticker update for
+        # a poll interval (otherwise the feed is live and the snapshot is simply stale)
+        snapshot = self.latest(product_id)
+        if self.connect and (not self.feed_connected or snapshot is None or time.time() - snapshot["time"] > self.poll_interval):
+            self.poll([product_id])
+
+        snapshot = self.latest(product_id)
+        if snapshot is None or "price" not in snapshot or time.time() - snapshot["time"] > max_age:
+            error_logger.error(f"No market data for {product_id} within {max_age} s")
+            return None
+        return snapshot
+
+    def wait_for_update(self, product_id, since, timeout=SNAPSHOT_TIMEOUT):
+        # Block until the product's snapshot is newer than `since` (a time.time() value);
+        # returns it, or None on timeout
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                snapshot = self._snapshots.get(product_id)
+                if snapshot is not None and snapshot["time"] > since:
+                    return dict(snapshot)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def get_price(self, product_id, max_age=None):
+        snapshot = self.get_snapshot(product_id, max_age)
+        return snapshot["price"] if snapshot is not None else None
+
+    def get_best_bid_ask(self, product_id, max_age=None):
+        # (best bid, best ask) or None
+        snapshot = self.get_snapshot(product_id, max_age)
+        if snapshot is None or "best_bid" not in snapshot or "best_ask" not in snapshot:
+            return None
+        return snapshot["best_bid"], snapshot["best_ask"]
+
+    def get_mean24(self, product_id, max_age=MEAN24_MAX_AGE):
+        # Mean of the 24 hour high and low: from the ticker feed when it has one, otherwise from
+        # the product's 24 hour stats, fetched at most once per max_age for every consumer
+        snapshot = self.latest(product_id)
+        if snapshot is not None and "mean24" in snapshot and time.time() - snapshot["time"] <= max_age:
+            return snapshot["mean24"]
+
+        with self._condition:
+            cached = self._mean24.get(product_id)
+        if cached is not None and time.time() - cached[1] <= max_age:
+            return cached[0]
+        if not self.connect:
+            return cached[0] if cached is not None else None
+
+        from coinbase_client import public_get
+
+        try:
+            res = public_get(f"/products/{product_id}/stats")
+            res.raise_for_status()
+            data = res.json()
+            mean24 = mean_of_range(data["high"], data["low"])
+        except (RequestException, ValueError, KeyError) as e:
+            error_logger.error(f"Error fetching 24 hour stats for {product_id}: {e}")
+            return cached[0] if cached is not None else None
+
+        with self._condition:
+            self._mean24[product_id] = (mean24, time.time())
+        info_logger.info("24 hr mean for %s: %s", product_id, mean24)
+        return mean24
+
+    def poll(self, product_ids=None):
+        # Refresh the given products (default: every product whose snapshot is older than the
+        # poll interval) with one products request and one best bid/ask request
+        from coinbase_client import signed_get
+
+        now = time.time()
+        with self._condition:
+            if product_ids is None:
+                product_ids = [product_id for product_id in self._products
+                               if now - self._snapshots.get(product_id, {}).get("time", 0) > self.poll_interval]
+        product_ids = sorted(product_ids)
+        if not product_ids:
+            return 0
+
+        try:
+            res = signed_get("/api/v3/brokerage/products", params={"product_ids": product_ids})
+            res.raise_for_status()
+            prices = {product["product_id"]: product.get("price") for product in res.json().get("products", [])}
+
+            res = signed_get("/api/v3/brokerage/best_bid_ask", params={"product_ids": product_ids})
+            res.raise_for_status()
+            books = {book["product_id"]: book for book in res.json().get("pricebooks", [])}
+        except (RequestException, ValueError, KeyError) as e:
+            error_logger.error(f"An error occurred while polling market data: {e}")
+            return 0
+
+        for product_id in product_ids:
+            book = books.get(product_id, {})
+            self.publish(
+                product_id,
+                price=prices.get(product_id),
+                best_bid=book["bids"][0]["price"] if book.get("bids") else None,
+                best_ask=book["asks"][0]["price"] if book.get("asks") else None,
+            )
+
+        return len(product_ids)
+
+    def _run_poller(self):
+        while not self._stop.wait(self.poll_interval / 2):
+            self.poll()
+
+    def _send_subscribe(self, product_ids):
+        with self._ws_lock:
+            if self._ws is None:
+                return
+            try:
+                self._ws.send(json.dumps({"type": "subscribe", "channel": "ticker", "product_ids": product_ids}))
+            except Exception as e:
+                error_logger.error(f"Unable to subscribe to market data for {product_ids}: {e}")
+
+    def _handle_message(self, message):
+        data = json.loads(message)
+
+        if data.get("type") == "error":
+            error_logger.error(f"Market data channel error: {data.get('message')}")
+            return
+
+        if data.get("channel") != "ticker":
+            return
+
+        for event in data.get("events", []):
+            for ticker in event.get("tickers", []):
+                product_id = ticker.get("product_id")
+                if product_id in self._products:
+                    self.publish(
+                        product_id,
+                        price=ticker.get("price"),
+                        best_bid=ticker.get("best_bid"),
+                        best_ask=ticker.get("best_ask"),
+                        high_24h=ticker.get("high_24_h"),
+                        low_24h=ticker.get("low_24_h"),
+                    )
+
+    def _run_feed(self):
+        delay = RECONNECT_DELAY
+
+        while not self._stop.is_set():
+            try:
+                ws = websocket.create_connection(self.url, timeout=FEED_TIMEOUT)
+                with self._ws_lock:
+                    self._ws = ws
+                ws.send(json.dumps({"type": "subscribe", "channel": "heartbeats"}))
+
+                with self._condition:
+                    products = sorted(self._products)
+                if products:
+                    self._send_subscribe(products)
+
+                with self._condition:
+                    self.feed_connected = True
+                info_logger.info("Connected to market data channel at %s", self.url)
+                delay = RECONNECT_DELAY
+
+                while not self._stop.is_set():
+                    message = ws.recv()
+                    if not message:
+                        raise ConnectionError("Market data channel closed")
+                    self._handle_message(message)
+
+            except Exception as e:
+                if not self._stop.is_set():
+                    error_logger.error(f"Market data channel disconnected: {e}")
+
+            finally:
+                with self._condition:
+                    self.feed_connected = False
+                with self._ws_lock:
+                    if self._ws is not None:
+                        try:
+                            self._ws.close()
+                        except Exception:
+                            pass
+                        self._ws = None
+
+            # Reconnect with exponential backoff (the poller covers every product meanwhile)
+            if self._stop.wait(delay):
+                break
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+# Process-wide market data hub, started on first use
+_market_data_hub = None
+_market_data_hub_lock = threading.Lock()
+
+def get_market_data_hub():
+    global _market_data_hub
+
+    if _market_data_hub is None:
+        with _market_data_hub_lock:
+            if _market_data_hub is None:
+                _market_data_hub = MarketDataHub().start()
+                app_logger.info("Market data hub started")
+
+    return _market_data_hub
+
+# Indicate that market_data.py module loaded successfully
+info_logger.info("market_data module loaded successfully")
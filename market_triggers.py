@@ -0,0 +1,141 @@
+# market_triggers.py
+import threading
+import time
+from logging_config import app_logger, info_logger, error_logger
+from market_data import get_market_data_hub
+
+# Seconds between refreshes of the values a waiting cycle reads besides the market data
+# snapshot (candle based indicators, the REST 24 hour mean) when no trigger has fired
+TRIGGER_REFRESH_INTERVAL = 60
+
+class MarketTrigger:
+    # One waiting cycle's condition on a product. predicate(snapshot) returns None while the
+    # condition is not met, and otherwise the value the cycle waits for (e.g. an order price).
+    # on_fire(result), if given, is called once when the trigger fires (on the evaluating thread).
+
+    def __init__(self, product_id, predicate, on_fire=None):
+        self.product_id = product_id
+        self.predicate = predicate
+        self.on_fire = on_fire
+        self.result = None
+        self._fired = threading.Event()
+        self._lock = threading.Lock()  # The hub's thread and the waiting thread may both evaluate
+
+    @property
+    def fired(self):
+        return self._fired.is_set()
+
+    def evaluate(self, snapshot):
+        # True once the predicate has returned a value (later snapshots are ignored)
+        if snapshot is None or "price" not in snapshot:
+            return self._fired.is_set()
+
+        with self._lock:
+            if self._fired.is_set():
+                return True
+
+            try:
+                result = self.predicate(snapshot)
+            except Exception as e:
+                error_logger.error(f"Market trigger for {self.product_id} failed: {e}")
+                return False
+
+            if result is None:
+                return False
+
+            self.result = result
+            self._fired.set()
+
+        if self.on_fire is not None:
+            try:
+                self.on_fire(result)
+            except Exception as e:
+                error_logger.error(f"Market trigger callback for {self.product_id} failed: {e}")
+        return True
+
+    def wait(self, timeout=None):
+        return self._fired.wait(timeout)
+
+class MarketTriggers:
+    # Conditions registered by waiting cycles, evaluated on the market data hub's thread each
+    # time a product's snapshot changes. A cycle blocks on its trigger and wakes as soon as
+    # the condition holds, instead of sleeping and re-requesting market data on a timer. The
+    # cycle scheduler's opening orders and the legacy cycle loops share the process-wide instance.
+
+    def __init__(self, market_data):
+        self.market_data = market_data
+        self._triggers = {}  # product_id -> [MarketTrigger]
+        self._lock = threading.Lock()
+        market_data.add_listener(self._on_update)
+
+    def register(self, product_id, predicate, on_fire=None):
+        # The trigger is evaluated against the latest snapshot straight away
+        trigger = MarketTrigger(product_id, predicate, on_fire)
+        self.market_data.subscribe(product_id)
+
+        with self._lock:
+            self._triggers.setdefault(product_id, []).append(trigger)
+
+        self.evaluate(trigger)
+        return trigger
+
+    def cancel(self, trigger):
+        with self._lock:
+            triggers = self._triggers.get(trigger.product_id, [])
+            if trigger in triggers:
+                triggers.remove(trigger)
+
+    def evaluate(self, trigger):
+        # Evaluate a trigger against the product's latest snapshot
+        if trigger.evaluate(self.market_data.latest(trigger.product_id)):
+            self.cancel(trigger)
+        return trigger.fired
+
+    def wait_until(self, product_id, predicate, timeout, refresh=None, refresh_interval=TRIGGER_REFRESH_INTERVAL):
+        # Block until predicate(snapshot) returns a value and return it; None on timeout. While
+        # nothing fires, refresh() is called on the waiting thread every refresh_interval seconds
+        # (for values that need requests) and the trigger is re-evaluated.
+        deadline = time.monotonic() + timeout
+        trigger = self.register(product_id, predicate)
+
+        try:
+            while not trigger.fired:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                if trigger.wait(min(remaining, refresh_interval)):
+                    break
+
+                if refresh is not None:
+                    refresh()
+                self.evaluate(trigger)
+
+            app_logger.info("Market trigger for %s fired: %s", product_id, trigger.result)
+            return trigger.result
+        finally:
+            self.cancel(trigger)
+
+    def _on_update(self, product_id, snapshot):
+        with self._lock:
+            triggers = list(self._triggers.get(product_id, ()))
+
+        for trigger in triggers:
+            if trigger.evaluate(snapshot):
+                self.cancel(trigger)
+
+# Process-wide triggers on the shared market data hub, created on first use
+_market_triggers = None
+_market_triggers_lock = threading.Lock()
+
+def get_market_triggers():
+    global _market_triggers
+
+    if _market_triggers is None:
+        with _market_triggers_lock:
+            if _market_triggers is None:
+                _market_triggers = MarketTriggers(get_market_data_hub())
+
+    return _market_triggers
+
+# Indicate that market_triggers.py module loaded successfully
+info_logger.info("market_triggers module loaded successfully")
@@ -0,0 +1,624 @@
+# mock_exchange.py
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# Local stand-in for the Advanced Trade REST API and the public exchange API: products, candles,
+# best bid/ask, order placement, order lookup (single and batch) and batch_cancel, with a simple
+# matching engine over a deterministic price path, configurable latency and 429/5xx injection.
+# Point the bot at it with PORTALX_API_URL=http://127.0.0.1:<port> and
+# PORTALX_EXCHANGE_URL=http://127.0.0.1:<port> (one server answers both).
+
+# Products served by default: product ID -> (starting price, base increment, quote increment)
+DEFAULT_PRODUCTS = {
+    "XLM-USD": (0.12, "1", "0.000001"),
+    "BTC-USD": (60000.0, "0.00000001", "0.01"),
+}
+
+# Relative amplitude and period (seconds) of the slow price oscillation, with noise at a tenth
+# of the amplitude on top of it
+PRICE_AMPLITUDE = 0.01
+PRICE_PERIOD = 1800
+
+# Relative amplitude and period (seconds) of a fast swing that is back at zero at every whole
+# period: candle closes at multiples of the period never see it, so the live price crosses the
+# Bollinger bands computed from closes and resting orders fill
+PRICE_SWING = 0.005
+SWING_PERIOD = 30
+
+# Quote increments between the best bid and the best ask
+SPREAD_TICKS = 1
+
+# Seconds between matching engine passes (and ticker messages, with a market channel attached)
+TICK_INTERVAL = 0.1
+
+# Fee charged on every fill (all orders are post-only makers)
+MAKER_FEE = 0.004
+
+# Most candles returned by one candles request, as on the exchange
+CANDLES_PER_REQUEST = 300
+
+# Orders per list page when the request does not set a limit
+ORDERS_PER_PAGE = 100
+
+def iso_time(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+def parse_time(value):
+    # Unix seconds or an ISO 8601 timestamp
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+class MockProduct:
+    # One product's deterministic price path: the price at any time is the same across requests,
+    # candles and the matching engine, so the bot's indicators and its fills agree
+
+    def __init__(self, product_id, price, base_increment, quote_increment, amplitude=PRICE_AMPLITUDE, period=PRICE_PERIOD, swing=PRICE_SWING, swing_period=SWING_PERIOD, seed=0):
+        self.product_id = product_id
+        self.base_price = price
+        self.base_increment = base_increment
+        self.quote_increment = quote_increment
+        self.tick = float(quote_increment)
+        self.amplitude = amplitude
+        self.period = period
+        self.swing = swing
+        self.swing_period = swing_period
+        self.seed = seed
+        self.phase = random.Random(f"{product_id}-{seed}").uniform(0, 2 * math.pi)
+
+    def price_at(self, timestamp):
+        second = int(timestamp)
+        noise = random.Random(second * 1000003 + self.seed).uniform(-1, 1)
+        angle = 2 * math.pi * timestamp / self.period + self.phase
+        change = self.amplitude * (math.sin(angle) + noise / 10) + self.swing * math.sin(2 * math.pi * timestamp / self.swing_period)
+        return max(round(self.base_price * (1 + change) / self.tick) * self.tick, self.tick)
+
+    def book_at(self, timestamp):
+        # (best bid, best ask) around the price
+        bid = self.price_at(timestamp)
+        return bid, bid + SPREAD_TICKS * self.tick
+
+    def candle(self, start, granularity):
+        # [time, low, high, open, close, volume] of the interval starting at start
+        samples = [self.price_at(start + granularity * step / 8) for step in range(9)]
+        return [int(start), min(samples), max(samples), samples[0], samples[-1], round(granularity * 1000 / self.base_price, 2)]
+
+    def candles(self, granularity, start, end, now):
+        # Completed and in-progress candles between start and end, newest first
+        first = int(math.ceil(start / granularity)) * granularity
+        last = min(int(end), int(now)) // granularity * granularity
+        return [self.candle(timestamp, granularity) for timestamp in range(last, first - 1, -granularity)]
+
+    def stats(self, now, step=300):
+        # 24 hour open, high, low and last price (sampled every `step` seconds)
+        samples = [self.price_at(now - offset) for offset in range(86400, -1, -step)]
+        return {"open": samples[0], "high": max(samples), "low": min(samples), "last": samples[-1]}
+
+    def details(self, now):
+        # The product as /api/v3/brokerage/products returns it
+        stats = self.stats(now)
+        base, quote = self.product_id.split("-")
+        return {
+            "product_id": self.product_id,
+            "price": f"{stats['last']:.10g}",
+            "price_percentage_change_24h": f"{(stats['last'] / stats['open'] - 1) * 100:.4f}",
+            "volume_24h": "1000000",
+            "volume_percentage_change_24h": "0",
+            "base_increment": self.base_increment,
+            "quote_increment": self.quote_increment,
+            "quote_min_size": "1",
+            "quote_max_size": "10000000",
+            "base_min_size": self.base_increment,
+            "base_max_size": "100000000",
+            "base_name": base,
+            "quote_name": quote,
+            "watched": False,
+            "is_disabled": False,
+            "new": False,
+            "status": "online",
+            "cancel_only": False,
+            "limit_only": False,
+            "post_only": False,
+            "trading_disabled": False,
+            "auction_mode": False,
+            "product_type": "SPOT",
+            "quote_currency_id": quote,
+            "base_currency_id": base,
+            "base_display_symbol": base,
+            "quote_display_symbol": quote,
+            "view_only": False,
+            "price_increment": self.quote_increment,
+        }
+
+class MockExchange:
+    # Order book of the bot's own resting orders. Each pass of the matching engine fills every
+    # sell at or below the best bid and every buy at or above the best ask, in full at the
+    # limit price with the maker fee. Optional user and market channel stand-ins receive the
+    # order updates and tickers.
+
+    def __init__(self, products=None, maker_fee=MAKER_FEE, latency=0.0, jitter=0.0, error_rates=None,
+                 tick_interval=TICK_INTERVAL, user_channel=None, market_channel=None, host="127.0.0.1", port=0, seed=0):
+        products = products or DEFAULT_PRODUCTS
+        self.products = {
+            product_id: product if isinstance(product, MockProduct) else MockProduct(product_id, *product, seed=seed)
+            for product_id, product in products.items()
+        }
+        self.maker_fee = maker_fee
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rates = dict(error_rates or {})  # status code -> share of requests answered with it
+        self.tick_interval = tick_interval
+        self.user_channel = user_channel
+        self.market_channel = market_channel
+
+        self.orders = {}  # order_id -> order (as order lookups return it)
+        self.request_counts = Counter()  # "METHOD route" -> requests answered
+        self.errors_injected = Counter()  # status code -> injected responses
+        self._client_orders = {}  # client_order_id -> order_id
+        self._sells = {product_id: [] for product_id in self.products}  # heaps of (price, sequence, order_id)
+        self._buys = {product_id: [] for product_id in self.products}  # heaps of (-price, sequence, order_id)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._stop = threading.Event()
+
+        self._server = ThreadingHTTPServer((host, port), MockExchangeHandler)
+        self._server.daemon_threads = True
+        self._server.exchange = self
+        self.host, self.port = self._server.server_address[:2]
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="mock-exchange", daemon=True).start()
+        threading.Thread(target=self._run_matching, name="mock-exchange-matching", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._server.shutdown()
+        self._server.server_close()
+
+    # Request handling (called on the server's threads)
+
+    def delay(self):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self._random.uniform(0, self.jitter))
+
+    def injected_error(self):
+        # Status code to answer with instead of handling the request, or None
+        draw = self._random.random()
+        for status, rate in self.error_rates.items():
+            if draw < rate:
+                self.errors_injected[status] += 1
+                return status
+            draw -= rate
+        return None
+
+    def product(self, product_id):
+        product = self.products.get(product_id)
+        if product is None:
+            raise LookupError(f"Unknown product {product_id}")
+        return product
+
+    def place_order(self, payload):
+        # (status code, response) of an order placement
+        now = time.time()
+        product_id = payload.get("product_id")
+        side = payload.get("side")
+        client_order_id = payload.get("client_order_id") or str(uuid.uuid4())
+
+        try:
+            product = self.product(product_id)
+            configuration = payload["order_configuration"]["limit_limit_gtc"]
+            base_size = float(configuration["base_size"])
+            limit_price = float(configuration["limit_price"])
+            if side not in ("BUY", "SELL") or base_size <= 0 or limit_price <= 0:
+                raise ValueError(f"Invalid order {payload}")
+        except (LookupError, KeyError, TypeError, ValueError) as e:
+            return 400, {"error": "INVALID_ARGUMENT", "message": str(e)}
+
+        with self._lock:
+            # Placements are idempotent on client_order_id
+            order_id = self._client_orders.get(client_order_id)
+            if order_id is not None:
+                return 200, self._placement_response(self.orders[order_id])
+
+            bid, ask = product.book_at(now)
+            if configuration.get("post_only") and (limit_price <= bid if side == "SELL" else limit_price >= ask):
+                return 200, {
+                    "success": False,
+                    "failure_reason": "UNKNOWN_FAILURE_REASON",
+                    "order_id": "",
+                    "error_response": {"error": "INVALID_LIMIT_PRICE_POST_ONLY", "message": "Post-only order would cross the book"},
+                }
+
+            order_id = str(uuid.uuid4())
+            order = {
+                "order_id": order_id,
+                "product_id": product_id,
+                "user_id": "stand-in",
+                "order_configuration": payload["order_configuration"],
+                "side": side,
+                "client_order_id": client_order_id,
+                "status": "OPEN",
+                "time_in_force": "GOOD_UNTIL_CANCELLED",
+                "created_time": iso_time(now),
+                "completion_percentage": "0",
+                "filled_size": "0",
+                "average_filled_price": "0",
+                "fee": "",
+                "number_of_fills": "0",
+                "filled_value": "0",
+                "pending_cancel": False,
+                "size_in_quote": False,
+                "total_fees": "0",
+                "size_inclusive_of_fees": False,
+                "total_value_after_fees": "0",
+                "trigger_status": "INVALID_ORDER_TYPE",
+                "order_type": "LIMIT",
+                "reject_reason": "REJECT_REASON_UNSPECIFIED",
+                "settled": False,
+                "product_type": "SPOT",
+                "outstanding_hold_amount": f"{base_size if side == 'SELL' else base_size * limit_price:.10g}",
+                "_created": now,
+            }
+            self.orders[order_id] = order
+            self._client_orders[client_order_id] = order_id
+
+            if side == "SELL":
+                heapq.heappush(self._sells[product_id], (limit_price, next(self._sequence), order_id))
+            else:
+                heapq.heappush(self._buys[product_id], (-limit_price, next(self._sequence), order_id))
+
+        if self.user_channel is not None:
+            self.user_channel.send_order_update(order_id, "OPEN", product_id=product_id, client_order_id=client_order_id)
+        return 200, self._placement_response(order)
+
+    def _placement_response(self, order):
+        return {
+            "success": True,
+            "failure_reason": "UNKNOWN_FAILURE_REASON",
+            "order_id": order["order_id"],
+            "success_response": {
+                "order_id": order["order_id"],
+                "product_id": order["product_id"],
+                "side": order["side"],
+                "client_order_id": order["client_order_id"],
+            },
+            "order_configuration": order["order_configuration"],
+        }
+
+    def public_order(self, order):
+        return {name: value for name, value in order.items() if not name.startswith("_")}
+
+    def get_order(self, order_id):
+        with self._lock:
+            order = self.orders.get(order_id)
+            return None if order is None else self.public_order(order)
+
+    def list_orders(self, query):
+        # (orders, next cursor or None) for the order_ids, product_id, order_status and
+        # start_date filters; the cursor is an offset into the matching orders
+        order_ids = query.get("order_ids")
+        product_ids = set(query.get("product_id", []))
+        statuses = set(query.get("order_status", []))
+        start_date = parse_time(query["start_date"][0]) if "start_date" in query else None
+        limit = int(query.get("limit", [ORDERS_PER_PAGE])[0]) or ORDERS_PER_PAGE
+        offset = int(query.get("cursor", ["0"])[0] or 0)
+
+        with self._lock:
+            candidates = [self.orders[order_id] for order_id in order_ids if order_id in self.orders] if order_ids else list(self.orders.values())
+            matching = [
+                order for order in candidates
+                if (not product_ids or order["product_id"] in product_ids)
+                and (not statuses or order["status"] in statuses)
+                and (start_date is None or order["_created"] >= start_date)
+            ]
+            page = [self.public_order(order) for order in matching[offset:offset + limit]]
+
+        cursor = str(offset + limit) if offset + limit < len(matching) else None
+        return page, cursor
+
+    def cancel_orders(self, order_ids):
+        results = []
+        cancelled = []
+
+        with self._lock:
+            for order_id in order_ids:
+                order = self.orders.get(order_id)
+                if order is None or order["status"] != "OPEN":
+                    results.append({"success": False, "failure_reason": "UNKNOWN_CANCEL_ORDER", "order_id": order_id})
+                    continue
+                order["status"] = "CANCELLED"
+                cancelled.append(order)
+                results.append({"success": True, "failure_reason": "UNKNOWN_CANCEL_FAILURE_REASON", "order_id": order_id})
+        # Cancelled orders stay in the heaps and are skipped when they reach the top
+
+        if self.user_channel is not None:
+            for order in cancelled:
+                self.user_channel.send_order_update(order["order_id"], "CANCELLED", product_id=order["product_id"])
+        return results
+
+    # Matching engine
+
+    def match(self, now=None):
+        # Fill every resting order the book has crossed; returns the orders filled
+        now = time.time() if now is None else now
+        filled = []
+
+        with self._lock:
+            for product_id, product in self.products.items():
+                bid, ask = product.book_at(now)
+
+                sells = self._sells[product_id]
+                while sells and sells[0][0] <= bid:
+                    filled.append(self._fill(heapq.heappop(sells)[2], now))
+
+                buys = self._buys[product_id]
+                while buys and -buys[0][0] >= ask:
+                    filled.append(self._fill(heapq.heappop(buys)[2], now))
+
+        filled = [order for order in filled if order is not None]
+        if self.user_channel is not None:
+            for order in filled:
+                self.user_channel.send_order_update(
+                    order["order_id"], "FILLED", product_id=order["product_id"], client_order_id=order["client_order_id"],
+                    cumulative_quantity=order["filled_size"], avg_price=order["average_filled_price"],
+                    total_fees=order["total_fees"], leaves_quantity="0",
+                )
+        return filled
+
+    def _fill(self, order_id, now):
+        order = self.orders[order_id]
+        if order["status"] != "OPEN":
+            return None
+
+        configuration = order["order_configuration"]["limit_limit_gtc"]
+        size = float(configuration["base_size"])
+        price = float(configuration["limit_price"])
+        value = size * price
+        fees = value * self.maker_fee
+
+        order.update(
+            status="FILLED",
+            completion_percentage="100",
+            filled_size=f"{size:.10g}",
+            average_filled_price=f"{price:.10g}",
+            number_of_fills="1",
+            filled_value=f"{value:.10g}",
+            total_fees=f"{fees:.10g}",
+            total_value_after_fees=f"{value - fees if order['side'] == 'SELL' else value + fees:.10g}",
+            outstanding_hold_amount="0",
+            settled=True,
+            last_fill_time=iso_time(now),
+        )
+        return dict(order)
+
+    def _run_matching(self):
+        while not self._stop.wait(self.tick_interval):
+            now = time.time()
+            self.match(now)
+
+            if self.market_channel is not None:
+                for product_id, product in self.products.items():
+                    bid, ask = product.book_at(now)
+                    stats = product.stats(now)
+                    self.market_channel.send_ticker(product_id, bid, bid, ask, stats["high"], stats["low"])
+
+# Routes: (method, path template, handler method name, private)
+ROUTES = [
+    ("GET", "/api/v3/brokerage/products", "products", True),
+    ("GET", "/api/v3/brokerage/products/{product_id}", "product", True),
+    ("GET", "/api/v3/brokerage/best_bid_ask", "best_bid_ask", True),
+    ("POST", "/api/v3/brokerage/orders", "create_order", True),
+    ("GET", "/api/v3/brokerage/orders/historical/batch", "orders", True),
+    ("GET", "/api/v3/brokerage/orders/historical/{order_id}", "order", True),
+    ("POST", "/api/v3/brokerage/orders/batch_cancel", "batch_cancel", True),
+    ("GET", "/products/{product_id}/candles", "candles", False),
+    ("GET", "/products/{product_id}/stats", "stats", False),
+]
+
+# Route templates compiled to patterns with a named group per path parameter
+ROUTE_PATTERNS = [(method, template, re.compile(re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", template)), name, private) for method, template, name, private in ROUTES]
+
+class MockExchangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, as the bot's pooled sessions expect
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        exchange = self.server.exchange
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        for route_method, template, pattern, name, private in ROUTE_PATTERNS:
+            match = pattern.fullmatch(url.path)
+            if route_method == method and match:
+                break
+        else:
+            self.respond(404, {"error": "NOT_FOUND", "message": f"No route for {method} {url.path}"})
+            return
+
+        exchange.request_counts[f"{method} {template}"] += 1
+        exchange.delay()
+
+        if private and not (self.headers.get("Authorization") or self.headers.get("CB-ACCESS-KEY")):
+            self.respond(401, {"error": "UNAUTHENTICATED", "message": "Missing credentials"})
+            return
+
+        status = exchange.injected_error()
+        if status is not None:
+            self.respond(status, {"error": "INJECTED", "message": f"Injected {status} response"}, {"Retry-After": "1"} if status == 429 else None)
+            return
+
+        try:
+            payload = json.loads(body) if body else {}
+            self.respond(*getattr(self, f"handle_{name}")(exchange, query, payload, **match.groupdict()))
+        except LookupError as e:
+            self.respond(404, {"error": "NOT_FOUND", "message": str(e)})
+        except (ValueError, TypeError) as e:
+            self.respond(400, {"error": "INVALID_ARGUMENT", "message": str(e)})
+
+    def respond(self, status, data, headers=None):
+        content = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def handle_products(self, exchange, query, payload):
+        now = time.time()
+        product_ids = query.get("product_ids") or list(exchange.products)
+        products = [exchange.product(product_id).details(now) for product_id in product_ids if product_id in exchange.products]
+        return 200, {"products": products, "num_products": len(products)}
+
+    def handle_product(self, exchange, query, payload, product_id):
+        return 200, exchange.product(product_id).details(time.time())
+
+    def handle_best_bid_ask(self, exchange, query, payload):
+        now = time.time()
+        pricebooks = []
+        for product_id in query.get("product_ids") or list(exchange.products):
+            if product_id in exchange.products:
+                bid, ask = exchange.products[product_id].book_at(now)
+                pricebooks.append({
+                    "product_id": product_id,
+                    "bids": [{"price": f"{bid:.10g}", "size": "1000"}],
+                    "asks": [{"price": f"{ask:.10g}", "size": "1000"}],
+                    "time": iso_time(now),
+                })
+        return 200, {"pricebooks": pricebooks}
+
+    def handle_create_order(self, exchange, query, payload):
+        return exchange.place_order(payload)
+
+    def handle_orders(self, exchange, query, payload):
+        orders, cursor = exchange.list_orders(query)
+        return 200, {"orders": orders, "sequence": "0", "has_next": cursor is not None, "cursor": cursor or ""}
+
+    def handle_order(self, exchange, query, payload, order_id):
+        order = exchange.get_order(order_id)
+        if order is None:
+            raise LookupError(f"Unknown order {order_id}")
+        return 200, {"order": order}
+
+    def handle_batch_cancel(self, exchange, query, payload):
+        return 200, {"results": exchange.cancel_orders(payload.get("order_ids", []))}
+
+    def handle_candles(self, exchange, query, payload, product_id):
+        now = time.time()
+        granularity = int(query.get("granularity", ["60"])[0])
+        end = parse_time(query["end"][0]) if "end" in query else now
+        start = parse_time(query["start"][0]) if "start" in query else end - granularity * CANDLES_PER_REQUEST
+        if (end - start) / granularity > CANDLES_PER_REQUEST:
+            raise ValueError("granularity too small for the requested time range. Count of aggregations requested exceeds 300")
+        return 200, exchange.product(product_id).candles(granularity, start, end, now)
+
+    def handle_stats(self, exchange, query, payload, product_id):
+        stats = exchange.product(product_id).stats(time.time())
+        return 200, {name: f"{value:.10g}" for name, value in stats.items()} | {"volume": "1000000"}
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+def main(orders=1000):
+    # Place `orders` resting orders concurrently through the async client, measure placement
+    # throughput and latency, check that the matching engine fills some of them as the price
+    # moves, then cancel the rest in batches. The stand-in has no request limit of its own, so the
+    # bot's rate limiter is lifted to measure the stand-in rather than the limiter. The bot's logs
+    # go to a temporary directory.
+    os.environ.setdefault("PORTALX_PRIVATE_RATE", "1000")
+    os.environ.setdefault("PORTALX_LOG_DIR", tempfile.mkdtemp(prefix="portalx-logs-"))
+    from async_client import AsyncCoinbaseClient
+
+    exchange = MockExchange(products={"XLM-USD": MockProduct("XLM-USD", 0.12, "1", "0.000001", swing=0.005, swing_period=10)}, latency=0.002, error_rates={429: 0.01}).start()
+    client = AsyncCoinbaseClient("stand-in-key", "stand-in-secret", base_url=exchange.url)
+
+    async def place(index, bid, ask):
+        # Sells and buys a few ticks to a few percent away from the book
+        offset = 0.000001 * (100 + index % 2000)
+        side = "SELL" if index % 2 else "BUY"
+        price = ask + offset if side == "SELL" else bid - offset
+        payload = {
+            "side": side,
+            "order_configuration": {"limit_limit_gtc": {"base_size": "10", "limit_price": f"{price:.6f}", "post_only": True}},
+            "product_id": "XLM-USD",
+            "client_order_id": str(uuid.uuid4()),
+        }
+        start = time.perf_counter()
+        order_id = await client.post_order(payload, "stand-in order")
+        return order_id, time.perf_counter() - start
+
+    async def run():
+        try:
+            bid, ask = await client.get_best_bid_ask("XLM-USD")
+            start = time.perf_counter()
+            results = await asyncio.gather(*(place(index, bid, ask) for index in range(orders)))
+            elapsed = time.perf_counter() - start
+
+            placed = [order_id for order_id, _ in results if order_id is not None]
+            latencies = [latency for _, latency in results]
+            print(f"{len(placed)} of {orders} orders placed in {elapsed:.2f} s ({len(placed) / elapsed:.0f} orders/s), "
+                  f"{exchange.errors_injected[429]} rate limited")
+            print(f"Placement latency: p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+
+            await asyncio.sleep(3)  # Let the price swing through some of the orders
+            listed = await client.list_orders({"order_ids": placed[:250]})
+            filled = [order for order in listed if order["status"] == "FILLED"]
+            sample = await client.get_order(filled[0]["order_id"]) if filled else None
+
+            open_orders = [order_id for order_id in placed if exchange.orders[order_id]["status"] == "OPEN"]
+            cancelled = []
+            for start in range(0, len(open_orders), 100):
+                cancelled += await client.cancel_orders(open_orders[start:start + 100]) or []
+
+            fills_ok = sample is not None and sample["order"]["completion_percentage"] == "100"
+            cancels_ok = len(cancelled) == len(open_orders) and all(result["success"] for result in cancelled)
+            print(f"Filled after 3 s: {sum(order['status'] == 'FILLED' for order in exchange.orders.values())}, "
+                  f"cancelled {len(cancelled)}; requests {sum(exchange.request_counts.values())}")
+            return len(placed) > 0 and fills_ok and cancels_ok
+        finally:
+            await client.close()
+
+    try:
+        passed = asyncio.run(run())
+    finally:
+        exchange.stop()
+
+    print("PASS" if passed else "FAIL")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main(*[int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,87 @@
+# mock_market_channel.py
+import sys
+import threading
+import time
+from mock_user_channel import MockUserChannelServer
+
+# Local stand-in for the Advanced Trade market data (ticker) channel, built on the user channel
+# stand-in: it accepts subscriptions, sends heartbeats and lets a test push ticker updates.
+# Point the bot at it with PORTALX_MARKET_WS_URL=ws://127.0.0.1:<port>
+
+class MockMarketChannelServer(MockUserChannelServer):
+
+    def send_ticker(self, product_id, price, best_bid=None, best_ask=None, high_24h=None, low_24h=None):
+        ticker = {
+            "type": "ticker",
+            "product_id": product_id,
+            "price": str(price),
+            "best_bid": str(best_bid if best_bid is not None else price),
+            "best_ask": str(best_ask if best_ask is not None else price),
+        }
+        if high_24h is not None and low_24h is not None:
+            ticker["high_24_h"] = str(high_24h)
+            ticker["low_24_h"] = str(low_24h)
+        self.broadcast("ticker", [{"type": "update", "tickers": [ticker]}])
+
+def main(consumers=200):
+    # Fan one ticker feed out to many consumers through the market data hub and measure the
+    # delivery latency, then check that a stale snapshot is refused once the feed goes quiet
+    from market_data import MarketDataHub
+
+    server = MockMarketChannelServer().start()
+    hub = MarketDataHub(url=server.url, poll_interval=3600, max_staleness=1)
+    hub.subscribe("XLM-USD")
+    hub.start()
+
+    try:
+        if not server.wait_for_subscription("ticker"):
+            print("FAIL: hub did not subscribe to the ticker channel")
+            return 1
+
+        # Every consumer waits for the next update; one ticker message wakes them all
+        received = []
+        received_lock = threading.Lock()
+
+        def consume(since):
+            snapshot = hub.wait_for_update("XLM-USD", since)
+            if snapshot is not None:
+                with received_lock:
+                    received.append(time.perf_counter())
+
+        latencies = []
+        for index in range(10):
+            price = 0.1 + index / 1000
+            received.clear()
+            since = time.time()
+            threads = [threading.Thread(target=consume, args=(since,)) for _ in range(consumers)]
+            for thread in threads:
+                thread.start()
+            time.sleep(0.05)  # Let every consumer start waiting
+            sent = time.perf_counter()
+            server.send_ticker("XLM-USD", price, price - 0.0001, price + 0.0001, 0.12, 0.08)
+            for thread in threads:
+                thread.join()
+            if len(received) != consumers:
+                print(f"FAIL: {len(received)} of {consumers} consumers saw price {price}")
+                return 1
+            latencies.append(max(received) - sent)
+
+        mean24_ok = hub.get_mean24("XLM-USD") == 0.1
+        bid_ask = hub.get_best_bid_ask("XLM-USD")
+
+        # With no updates for longer than the staleness bound, consumers get None (not a stale price)
+        time.sleep(1.5)
+        stale = hub.get_snapshot("XLM-USD", timeout=0.2) is None
+
+        print(f"Fan-out to {consumers} consumers: median {sorted(latencies)[len(latencies) // 2] * 1000:.2f} ms, max {max(latencies) * 1000:.2f} ms")
+        print(f"Best bid/ask: {bid_ask}, 24 hr mean from ticker: {mean24_ok}, stale snapshot refused: {stale}")
+        passed = mean24_ok and bid_ask is not None and stale
+        print("PASS" if passed else "FAIL")
+        return 0 if passed else 1
+
+    finally:
+        hub.stop()
+        server.stop()
+
+if __name__ == "__main__":
+    sys.exit(main())
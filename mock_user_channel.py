@@ -0,0 +1,245 @@
+# mock_user_channel.py
+import base64
+import hashlib
+import json
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+# Local stand-in for the Advanced Trade user WebSocket channel. It accepts subscriptions,
+# sends heartbeats and lets a test push order updates or drop every connection.
+# Point the bot at it with PORTALX_USER_WS_URL=ws://127.0.0.1:<port>
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+def encode_frame(payload, opcode=OPCODE_TEXT):
+    # Server frames are never masked
+    header = bytes([0x80 | opcode])
+    length = len(payload)
+
+    if length < 126:
+        header += bytes([length])
+    elif length < 65536:
+        header += bytes([126]) + struct.pack("!H", length)
+    else:
+        header += bytes([127]) + struct.pack("!Q", length)
+
+    return header + payload
+
+def read_exactly(stream, count):
+    data = b""
+    while len(data) < count:
+        chunk = stream.read(count - len(data))
+        if not chunk:
+            raise ConnectionError("Client closed the connection")
+        data += chunk
+    return data
+
+def read_frame(stream):
+    first, second = read_exactly(stream, 2)
+    opcode = first & 0x0F
+    masked = second & 0x80
+    length = second & 0x7F
+
+    if length == 126:
+        length = struct.unpack("!H", read_exactly(stream, 2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", read_exactly(stream, 8))[0]
+
+    mask = read_exactly(stream, 4) if masked else b"\x00\x00\x00\x00"
+    payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(read_exactly(stream, length)))
+
+    return opcode, payload
+
+class UserChannelHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        headers = {}
+        self.rfile.readline()  # Request line
+        while True:
+            line = self.rfile.readline().decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        accept = base64.b64encode(hashlib.sha1((headers["sec-websocket-key"] + WEBSOCKET_GUID).encode()).digest()).decode()
+        self.wfile.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+
+        self.send_lock = threading.Lock()
+        self.server.channel.add_connection(self)
+
+        try:
+            while True:
+                opcode, payload = read_frame(self.rfile)
+
+                if opcode == OPCODE_CLOSE:
+                    break
+                if opcode == OPCODE_PING:
+                    self.send(payload, OPCODE_PONG)
+                elif opcode == OPCODE_TEXT:
+                    self.server.channel.handle_client_message(self, json.loads(payload))
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.server.channel.remove_connection(self)
+
+    def send(self, payload, opcode=OPCODE_TEXT):
+        with self.send_lock:
+            self.wfile.write(encode_frame(payload, opcode))
+            self.wfile.flush()
+
+class ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class MockUserChannelServer:
+
+    def __init__(self, host="127.0.0.1", port=0, heartbeat_interval=1.0):
+        self.heartbeat_interval = heartbeat_interval
+        self.subscriptions = []
+        self._connections = set()
+        self._lock = threading.Condition()
+        self._sequence = 0
+        self._stop = threading.Event()
+
+        self._server = ThreadingServer((host, port), UserChannelHandler)
+        self._server.channel = self
+        self.host, self.port = self._server.server_address[:2]
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="mock-user-channel", daemon=True).start()
+        threading.Thread(target=self._send_heartbeats, name="mock-user-channel-heartbeats", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.drop_connections()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def add_connection(self, connection):
+        with self._lock:
+            self._connections.add(connection)
+
+    def remove_connection(self, connection):
+        with self._lock:
+            self._connections.discard(connection)
+
+    def handle_client_message(self, connection, message):
+        if message.get("type") == "subscribe":
+            with self._lock:
+                self.subscriptions.append(message)
+                self._lock.notify_all()
+
+    def wait_for_subscription(self, channel="user", count=1, timeout=5):
+        # Block until `count` subscriptions to the channel have been received
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while sum(1 for message in self.subscriptions if message.get("channel") == channel) < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._lock.wait(remaining)
+        return True
+
+    def broadcast(self, channel, events):
+        with self._lock:
+            self._sequence += 1
+            message = json.dumps({
+                "channel": channel,
+                "client_id": "",
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "sequence_num": self._sequence,
+                "events": events,
+            }).encode("utf-8")
+            connections = list(self._connections)
+
+        for connection in connections:
+            try:
+                connection.send(message)
+            except OSError:
+                self.remove_connection(connection)
+
+    def send_order_update(self, order_id, status, **fields):
+        order = {"order_id": order_id, "status": status}
+        order.update(fields)
+        self.broadcast("user", [{"type": "update", "orders": [order]}])
+
+    def drop_connections(self):
+        # Simulate the feed dropping
+        with self._lock:
+            connections = list(self._connections)
+            self._connections.clear()
+
+        for connection in connections:
+            try:
+                connection.request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _send_heartbeats(self):
+        counter = 0
+        while not self._stop.wait(self.heartbeat_interval):
+            counter += 1
+            self.broadcast("heartbeats", [{"current_time": datetime.now(timezone.utc).isoformat(), "heartbeat_counter": counter}])
+
+def main():
+    # Measure fill-detection latency through the order event hub against the stand-in server
+    from order_events import OrderEventHub
+
+    server = MockUserChannelServer().start()
+    hub = OrderEventHub("stand-in-key", "stand-in-secret", url=server.url)
+    hub.start()
+
+    try:
+        if not server.wait_for_subscription():
+            print("FAIL: hub did not subscribe")
+            return 1
+
+        latencies = []
+        for index in range(20):
+            order_id = f"stand-in-order-{index}"
+            hub.track(order_id)
+            sent = time.perf_counter()
+            server.send_order_update(order_id, "FILLED")
+            status = hub.wait_for_status(order_id, timeout=5)
+            latencies.append(time.perf_counter() - sent)
+            hub.untrack(order_id)
+            if status != "FILLED":
+                print(f"FAIL: {order_id} status {status}")
+                return 1
+
+        # Drop the feed and check that the hub reconnects and resubscribes
+        server.drop_connections()
+        reconnected = server.wait_for_subscription(count=2, timeout=10)
+
+        print(f"Fill events: {len(latencies)}, median latency {sorted(latencies)[len(latencies) // 2] * 1000:.2f} ms, max {max(latencies) * 1000:.2f} ms")
+        print(f"Reconnected after drop: {reconnected}")
+        print("PASS" if reconnected else "FAIL")
+        return 0 if reconnected else 1
+
+    finally:
+        hub.stop()
+        server.stop()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+# order_events.py
+import json
+import os
+import threading
+import time
+from config import config_data
+from logging_config import app_logger, info_logger, error_logger
+from order_state import TERMINAL_STATUSES
+from request_signer import get_signer
+
+try:
+    import websocket  # websocket-client
+except ImportError:  # Fall back to polling only
+    websocket = None
+
+# Define API credentials
+api_key = config_data["api_key"]
+api_secret = config_data["api_secret"]
+
+# Advanced Trade user channel (override with PORTALX_USER_WS_URL, e.g. for a local stand-in server)
+USER_CHANNEL_URL = os.environ.get("PORTALX_USER_WS_URL", "wss://advanced-trade-ws-user.coinbase.com")
+
+# Seconds without any message (heartbeats arrive every second) before the feed is considered dropped
+FEED_TIMEOUT = 30
+
+# Reconnect backoff after the feed drops (seconds)
+RECONNECT_DELAY = 1
+MAX_RECONNECT_DELAY = 60
+
+class OrderEventHub:
+    # Tracks order status from the user WebSocket channel and wakes threads waiting on an
+    # order as soon as its status changes. Updates are shared through the order state table;
+    # its bulk status poller only runs while the feed is down (and once after a reconnect).
+
+    def __init__(self, api_key, api_secret, url=USER_CHANNEL_URL, poller=None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.url = url
+        self.poller = poller
+        self.feed_connected = False
+
+        self._statuses = {}
+        self._tracked = set()
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+        self._ws = None
+
+    def start(self):
+        if self._threads:
+            return
+
+        self._stop.clear()
+
+        if self.poller is not None:
+            self.poller.table.add_listener(self._on_order_state)
+            self.poller.feed = self
+
+        if websocket is None:
+            error_logger.error("websocket-client is not installed; order fills will be detected by polling")
+            return
+
+        thread = threading.Thread(target=self._run_feed, name="order-event-feed", daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+        with self._condition:
+            self.feed_connected = False
+            self._condition.notify_all()
+
+    def track(self, order_id):
+        with self._condition:
+            self._tracked.add(order_id)
+
+        if self.poller is not None:
+            self.poller.table.track(order_id)
+
+    def untrack(self, order_id):
+        with self._condition:
+            self._tracked.discard(order_id)
+            self._statuses.pop(order_id, None)
+
+    def get_status(self, order_id):
+        with self._condition:
+            return self._statuses.get(order_id)
+
+    def record(self, order):
+        # Record order data fetched elsewhere (e.g. a REST response)
+        if self.poller is not None:
+            self.poller.table.update([order])
+        else:
+            self.publish(order["order_id"], order["status"])
+
+    def _on_order_state(self, order_id, status):
+        # Status updates from the order state table (bulk poller)
+        with self._condition:
+            tracked = order_id in self._tracked
+        if tracked:
+            self.publish(order_id, status)
+
+    def publish(self, order_id, status):
+        # Record a status update and wake the waiting threads; a terminal status is never
+        # replaced by an older, non-terminal one (e.g. a lagging REST response)
+        with self._condition:
+            if self._statuses.get(order_id) in TERMINAL_STATUSES and status not in TERMINAL_STATUSES:
+                return
+            self._statuses[order_id] = status
+            self._condition.notify_all()
+
+    def wait_for_status(self, order_id, statuses=TERMINAL_STATUSES, timeout=None):
+        # Block until the order reaches one of the given statuses; returns the status, or
+        # None if the timeout expired or the hub was stopped
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        self.track(order_id)
+
+        with self._condition:
+            while self._statuses.get(order_id) not in statuses:
+                if self._stop.is_set():
+                    return None
+
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return None
+
+                self._condition.wait(remaining)
+
+            return self._statuses[order_id]
+
+    def _subscribe_message(self, channel):
+        # Legacy API keys sign timestamp + channel + comma separated product IDs; CDP keys send a JWT
+        message = {"type": "subscribe", "channel": channel, "product_ids": []}
+        message.update(get_signer(self.api_key, self.api_secret).websocket_fields(channel, message["product_ids"]))
+
+        return json.dumps(message)
+
+    def _handle_message(self, message):
+        data = json.loads(message)
+
+        if data.get("type") == "error":
+            error_logger.error(f"User channel error: {data.get('message')}")
+            return
+
+        if data.get("channel") != "user":
+            return
+
+        for event in data.get("events", []):
+            for order in event.get("orders", []):
+                order_id = order.get("order_id")
+                status = order.get("status")
+                if not order_id or not status:
+                    continue
+
+                # Only orders someone is waiting on are kept (the channel reports every order on the account)
+                if self.poller is not None and self.poller.table.is_tracked(order_id):
+                    self.poller.table.update([order])
+                if order_id in self._tracked:
+                    self.publish(order_id, status)
+
+    def _run_feed(self):
+        delay = RECONNECT_DELAY
+
+        while not self._stop.is_set():
+            try:
+                self._ws = websocket.create_connection(self.url, timeout=FEED_TIMEOUT)
+                self._ws.send(self._subscribe_message("user"))
+                self._ws.send(self._subscribe_message("heartbeats"))
+
+                with self._condition:
+                    self.feed_connected = True
+                info_logger.info("Connected to user channel at %s", self.url)
+
+                # Catch up on anything that changed while the feed was down
+                if self.poller is not None:
+                    self.poller.request_poll()
+                delay = RECONNECT_DELAY
+
+                while not self._stop.is_set():
+                    message = self._ws.recv()
+                    if not message:
+                        raise ConnectionError("User channel closed")
+                    self._handle_message(message)
+
+            except Exception as e:
+                if not self._stop.is_set():
+                    error_logger.error(f"User channel disconnected: {e}")
+
+            finally:
+                with self._condition:
+                    self.feed_connected = False
+                if self._ws is not None:
+                    try:
+                        self._ws.close()
+                    except Exception:
+                        pass
+                    self._ws = None
+
+            # Reconnect with exponential backoff (polling covers tracked orders meanwhile)
+            if self._stop.wait(delay):
+                break
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+# Process-wide order event hub, started on first use
+_order_event_hub = None
+_order_event_hub_lock = threading.Lock()
+
+def get_order_event_hub():
+    global _order_event_hub
+
+    if _order_event_hub is None:
+        with _order_event_hub_lock:
+            if _order_event_hub is None:
+                from order_state import get_order_status_poller
+
+                hub = OrderEventHub(api_key, api_secret, poller=get_order_status_poller())
+                hub.start()
+                _order_event_hub = hub
+                app_logger.info("Order event hub started")
+
+    return _order_event_hub
+
+# Indicate that order_events.py module loaded successfully
+info_logger.info("order_events module loaded successfully")
@@ -0,0 +1,30 @@
+# order_locks.py
+import threading
+from logging_config import info_logger
+
+class KeyedLocks:
+    # One lock per key, created on first use by factory (threading.Lock, or asyncio.Lock for
+    # locks taken on an event loop)
+
+    def __init__(self, factory=threading.Lock):
+        self.factory = factory
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        lock = self._locks.get(key)
+
+        if lock is None:
+            with self._lock:
+                lock = self._locks.setdefault(key, self.factory())
+
+        return lock
+
+def balance_key(product_id, side):
+    # Order placement is serialised per product balance: a sell spends the product's base
+    # currency and a buy its quote currency, so only orders drawing on the same balance of the
+    # same product wait for each other. Orders for other products or sides go out in parallel.
+    return product_id, side
+
+# Indicate that order_locks.py module loaded successfully
+info_logger.info("order_locks module loaded successfully")
@@ -1,12 +1,43 @@
 # order_processing_utils.py
+import sqlite3
 from logging_config import app_logger, info_logger, error_logger
-from coinbase_utils import get_decimal_places
-from repeating_cycle_utils import product_stats
+from market_context import market_context
+from product_stats_cache import get_product_stats_cache
+from trade_ledger import get_trade_ledger
+from quantizer import get_quantizer, FLOOR
+
+# Increments used to round a fill when the product's stats cannot be fetched (finer than any
+# product's), so that the fill is still processed and recorded
+FALLBACK_INCREMENT = "0.00000001"
+
+def order_quantizer(order_details, quantizer=None):
+    # Quantizer of the order's product: the one given by the caller (the cycle scheduler passes
+    # the increments its order was placed with), else the product stats cache's (the default
+    # product's when the details name none), else one at FALLBACK_INCREMENT
+    if quantizer is not None:
+        return quantizer
+
+    product_id = order_details["order"].get("product_id")
+    quantizer = market_context.quantizer if product_id is None else get_product_stats_cache().quantizer(product_id)
+    if quantizer is None:
+        error_logger.error(f"No product stats for {product_id or market_context.product_id}; rounding order {order_details['order'].get('order_id')} to {FALLBACK_INCREMENT}")
+        quantizer = get_quantizer(FALLBACK_INCREMENT, FALLBACK_INCREMENT)
+    return quantizer
+
+def record_fill(order_details, side, phase, order_type, subtotal_Q, fee_Q, spent, received, residual, metrics=None, ledger=None):
+    # Queue a processed order for the trade ledger (the process-wide one unless another is
+    # given; committed in batches by its writer thread) and add it to the cycle set's running metrics
+    order = order_details["order"]
+    filled_size = float(order["filled_size"])
+    if metrics is not None:
+        metrics.apply_fill(side, phase, spent, received, fee_Q, subtotal_Q / filled_size if filled_size else None)
 
-base_increment = product_stats["base_increment"]
-quote_increment = product_stats["quote_increment"]
+    try:
+        (ledger or get_trade_ledger()).record_fill(order.get("order_id"), order.get("product_id"), side, phase, order_type, filled_size, subtotal_Q, fee_Q, spent, received, residual)
+    except sqlite3.Error as e:
+        error_logger.error(f"Unable to record order {order.get('order_id')} in the trade ledger: {e}")
 
-def open_limit_sell_order_processing(open_size_B, order_details, order_processing_params = {}):
+def open_limit_sell_order_processing(open_size_B, order_details, order_processing_params = {}, metrics=None, ledger=None, quantizer=None):
     # Extract relevant information from order_details
     filled_value = float(order_details["order"]["filled_value"])
     total_fees = float(order_details["order"]["total_fees"])
@@ -14,8 +45,9 @@ def open_limit_sell_order_processing(open_size_B, order_details, order_processin
     filled_size = float(order_details["order"]["filled_size"])
     
     # Determine decimal places for rounding
-    quote_decimals = get_decimal_places(quote_increment)
-    base_decimals = get_decimal_places(base_increment)
+    quantizer = order_quantizer(order_details, quantizer)
+    quote_decimals = quantizer.quote_decimals
+    base_decimals = quantizer.base_decimals
     
     try:
         # Calculate the subtotal in quote currency
@@ -33,16 +65,20 @@ def open_limit_sell_order_processing(open_size_B, order_details, order_processin
         # Determine any residual base currency not spent
         residual_amt_B_ols = open_size_B - filled_size
 
-        # Round the subtotal, fee, and total received to quote_increment decimal places
+        # Round the subtotal and fee to quote_increment decimal places, and the total received down
+        # to a whole quote increment so that an order sized from it never exceeds the balance
         subtotal_Q_ols = round(subtotal_Q_ols, quote_decimals)
         fee_Q_ols = round(fee_Q_ols, quote_decimals)
-        total_received_Q_ols = round(total_received_Q_ols, quote_decimals)
+        total_received_Q_ols = quantizer.quote(total_received_Q_ols, FLOOR)
 
         # Round the total spent and residual base currency to base_increment decimal places
         total_spent_B_ols = round(total_spent_B_ols, base_decimals)  
         residual_amt_B_ols = round(residual_amt_B_ols, base_decimals)
 
 
+        # Record the fill in the trade ledger and the cycle set metrics
+        record_fill(order_details, "SELL", "open", "limit", subtotal_Q_ols, fee_Q_ols, total_spent_B_ols, total_received_Q_ols, residual_amt_B_ols, metrics=metrics, ledger=ledger)
+
         # Store results in the dictionary
         order_processing_params["total_spent_B_ols"] = total_spent_B_ols
         order_processing_params["total_received_Q_ols"] = total_received_Q_ols
@@ -62,7 +98,7 @@ def open_limit_sell_order_processing(open_size_B, order_details, order_processin
         error_logger.error(f"An error occurred in open_limit_sell_order_processing: {e}")
         return None
 
-def open_limit_buy_order_processing(open_size_Q, order_details, order_processing_params = {}):
+def open_limit_buy_order_processing(open_size_Q, order_details, order_processing_params = {}, metrics=None, ledger=None, quantizer=None):
     # Extract relevant information from order_details
     filled_value = float(order_details["order"]["filled_value"])
     total_fees = float(order_details["order"]["total_fees"])
@@ -70,8 +106,9 @@ def open_limit_buy_order_processing(open_size_Q, order_details, order_processing
     filled_size = float(order_details["order"]["filled_size"])
 
     # Determine decimal places for rounding
-    quote_decimals = get_decimal_places(quote_increment)
-    base_decimals = get_decimal_places(base_increment)
+    quantizer = order_quantizer(order_details, quantizer)
+    quote_decimals = quantizer.quote_decimals
+    base_decimals = quantizer.base_decimals
 
     try:
         # Calculate the subtotal in quote currency
@@ -94,10 +131,14 @@ def open_limit_buy_order_processing(open_size_Q, order_details, order_processing
         fee_Q_olb = round(fee_Q_olb, quote_decimals)
         total_spent_Q_olb = round(total_spent_Q_olb, quote_decimals)
 
-        # Round the total received base currency and residual quote currency to base_increment and quote_increment decimal places, respectively
-        total_received_B_olb = round(total_received_B_olb, base_decimals)  
+        # Round the total received base currency down to a whole base increment (an order sized from it
+        # never exceeds the balance) and the residual quote currency to quote_increment decimal places
+        total_received_B_olb = quantizer.size(total_received_B_olb, FLOOR)
         residual_amt_Q_olb = round(residual_amt_Q_olb, quote_decimals)
 
+        # Record the fill in the trade ledger and the cycle set metrics
+        record_fill(order_details, "BUY", "open", "limit", subtotal_Q_olb, fee_Q_olb, total_spent_Q_olb, total_received_B_olb, residual_amt_Q_olb, metrics=metrics, ledger=ledger)
+
         # Store results in the dictionary
         order_processing_params["total_spent_Q_olb"] = total_spent_Q_olb
         order_processing_params["total_received_B_olb"] = total_received_B_olb
@@ -117,7 +158,7 @@ def open_limit_buy_order_processing(open_size_Q, order_details, order_processing
             error_logger.error(f"An error occurred in open_limit_buy_order_processing: {e}")
             return None
     
-def close_limit_buy_order_processing(close_size_Q, order_details, order_processing_params = {}):
+def close_limit_buy_order_processing(close_size_Q, order_details, order_processing_params = {}, metrics=None, ledger=None, quantizer=None):
     # Extract relevant information from order_details
     filled_value = float(order_details["order"]["filled_value"])
     total_fees = float(order_details["order"]["total_fees"])
@@ -125,8 +166,9 @@ def close_limit_buy_order_processing(close_size_Q, order_details, order_processi
     filled_size = float(order_details["order"]["filled_size"])
     
     # Determine decimal places for rounding
-    quote_decimals = get_decimal_places(quote_increment)
-    base_decimals = get_decimal_places(base_increment)
+    quantizer = order_quantizer(order_details, quantizer)
+    quote_decimals = quantizer.quote_decimals
+    base_decimals = quantizer.base_decimals
 
     try:
         # Calculate the subtotal in quote currency
@@ -149,10 +191,14 @@ def close_limit_buy_order_processing(close_size_Q, order_details, order_processi
         fee_Q_clb = round(fee_Q_clb, quote_decimals)
         total_spent_Q_clb = round(total_spent_Q_clb, quote_decimals)
 
-        # Round the total received base currency and residual quote currency to base_increment and quote_increment decimal places, respectively
-        total_received_B_clb = round(total_received_B_clb, base_decimals)  
+        # Round the total received base currency down to a whole base increment (an order sized from it
+        # never exceeds the balance) and the residual quote currency to quote_increment decimal places
+        total_received_B_clb = quantizer.size(total_received_B_clb, FLOOR)
         residual_amt_Q_clb = round(residual_amt_Q_clb, quote_decimals)
 
+        # Record the fill in the trade ledger and the cycle set metrics
+        record_fill(order_details, "BUY", "close", "limit", subtotal_Q_clb, fee_Q_clb, total_spent_Q_clb, total_received_B_clb, residual_amt_Q_clb, metrics=metrics, ledger=ledger)
+
         # Store results in the dictionary
         order_processing_params["total_spent_Q_clb"] = total_spent_Q_clb
         order_processing_params["total_received_B_clb"] = total_received_B_clb
@@ -172,7 +218,7 @@ def close_limit_buy_order_processing(close_size_Q, order_details, order_processi
                 error_logger.error(f"An error occurred in close_limit_buy_order_processing: {e}")
                 return None
     
-def close_limit_sell_order_processing(close_size_B, order_details, order_processing_params = {}):
+def close_limit_sell_order_processing(close_size_B, order_details, order_processing_params = {}, metrics=None, ledger=None, quantizer=None):
     # Extract relevant information from order_details
     filled_value = float(order_details["order"]["filled_value"])
     total_fees = float(order_details["order"]["total_fees"])
@@ -180,8 +226,9 @@ def close_limit_sell_order_processing(close_size_B, order_details, order_process
     filled_size = float(order_details["order"]["filled_size"])
 
     # Determine decimal places for rounding
-    quote_decimals = get_decimal_places(quote_increment)
-    base_decimals = get_decimal_places(base_increment)
+    quantizer = order_quantizer(order_details, quantizer)
+    quote_decimals = quantizer.quote_decimals
+    base_decimals = quantizer.base_decimals
     
     try:
         # Calculate the subtotal in quote currency
@@ -199,16 +246,20 @@ def close_limit_sell_order_processing(close_size_B, order_details, order_process
         # Determine any residual base currency not spent
         residual_amt_B_cls = close_size_B - filled_size
 
-        # Round the subtotal, fee, and total received to quote_increment decimal places
+        # Round the subtotal and fee to quote_increment decimal places, and the total received down
+        # to a whole quote increment so that an order sized from it never exceeds the balance
         subtotal_Q_cls = round(subtotal_Q_cls, quote_decimals)
         fee_Q_cls = round(fee_Q_cls, quote_decimals)
-        total_received_Q_cls = round(total_received_Q_cls, quote_decimals)
+        total_received_Q_cls = quantizer.quote(total_received_Q_cls, FLOOR)
 
         # Round the total spent and residual base currency to base_increment decimal places
         total_spent_B_cls = round(total_spent_B_cls, base_decimals)  
         residual_amt_B_cls = round(residual_amt_B_cls, base_decimals)
 
 
+        # Record the fill in the trade ledger and the cycle set metrics
+        record_fill(order_details, "SELL", "close", "limit", subtotal_Q_cls, fee_Q_cls, total_spent_B_cls, total_received_Q_cls, residual_amt_B_cls, metrics=metrics, ledger=ledger)
+
         # Store results in the dictionary
         order_processing_params["total_spent_B_cls"] = total_spent_B_cls
         order_processing_params["total_received_Q_cls"] = total_received_Q_cls
@@ -228,7 +279,7 @@ def close_limit_sell_order_processing(close_size_B, order_details, order_process
         error_logger.error(f"An error occurred in close_limit_sell_order_processing: {e}")
         return None
     
-def open_market_sell_order_processing(open_size_B, order_details, order_processing_params = {}):
+def open_market_sell_order_processing(open_size_B, order_details, order_processing_params = {}, metrics=None, ledger=None, quantizer=None):
     # Extract relevant information from order_details
     filled_value = float(order_details["order"]["filled_value"])
     total_fees = float(order_details["order"]["total_fees"])
@@ -236,8 +287,9 @@ def open_market_sell_order_processing(open_size_B, order_details, order_processi
     filled_size = float(order_details["order"]["filled_size"])
     
     # Determine decimal places for rounding
-    quote_decimals = get_decimal_places(quote_increment)
-    base_decimals = get_decimal_places(base_increment)
+    quantizer = order_quantizer(order_details, quantizer)
+    quote_decimals = quantizer.quote_decimals
+    base_decimals = quantizer.base_decimals
     
     try:
         # Calculate the subtotal in quote currency
@@ -255,16 +307,20 @@ def open_market_sell_order_processing(open_size_B, order_details, order_processi
         # Determine any residual base currency not spent
         residual_amt_B_oms = open_size_B - filled_size
 
-        # Round the subtotal, fee, and total received to quote_increment decimal places
+        # Round the subtotal and fee to quote_increment decimal places, and the total received down
+        # to a whole quote increment so that an order sized from it never exceeds the balance
         subtotal_Q_oms = round(subtotal_Q_oms, quote_decimals)
         fee_Q_oms = round(fee_Q_oms, quote_decimals)
-        total_received_Q_oms = round(total_received_Q_oms, quote_decimals)
+        total_received_Q_oms = quantizer.quote(total_received_Q_oms, FLOOR)
 
         # Round the total spent and residual base currency to base_increment decimal places
         total_spent_B_oms = round(total_spent_B_oms, base_decimals)  
         residual_amt_B_oms = round(residual_amt_B_oms, base_decimals)
 
 
+        # Record the fill in the trade ledger and the cycle set metrics
+        record_fill(order_details, "SELL", "open", "market", subtotal_Q_oms, fee_Q_oms, total_spent_B_oms, total_received_Q_oms, residual_amt_B_oms, metrics=metrics, ledger=ledger)
+
         # Store results in the dictionary
         order_processing_params["total_spent_B_oms"] = total_spent_B_oms
         order_processing_params["total_received_Q_oms"] = total_received_Q_oms
@@ -285,7 +341,7 @@ def open_market_sell_order_processing(open_size_B, order_details, order_processi
         return None
 
     
-def open_market_buy_order_processing(open_size_Q, order_details, order_processing_params = {}):
+def open_market_buy_order_processing(open_size_Q, order_details, order_processing_params = {}, metrics=None, ledger=None, quantizer=None):
     # Extract relevant information from order_details
     filled_value = float(order_details["order"]["filled_value"])
     total_fees = float(order_details["order"]["total_fees"])
@@ -293,8 +349,9 @@ def open_market_buy_order_processing(open_size_Q, order_details, order_processin
     filled_size = float(order_details["order"]["filled_size"])
 
     # Determine decimal places for rounding
-    quote_decimals = get_decimal_places(quote_increment)
-    base_decimals = get_decimal_places(base_increment)
+    quantizer = order_quantizer(order_details, quantizer)
+    quote_decimals = quantizer.quote_decimals
+    base_decimals = quantizer.base_decimals
 
     try:
         # Calculate the subtotal in quote currency
@@ -317,10 +374,14 @@ def open_market_buy_order_processing(open_size_Q, order_details, order_processin
         fee_Q_omb = round(fee_Q_omb, quote_decimals)
         total_spent_Q_omb = round(total_spent_Q_omb, quote_decimals)
 
-        # Round the total received base currency and residual quote currency to base_increment and quote_increment decimal places, respectively
-        total_received_B_omb = round(total_received_B_omb, base_decimals)  
+        # Round the total received base currency down to a whole base increment (an order sized from it
+        # never exceeds the balance) and the residual quote currency to quote_increment decimal places
+        total_received_B_omb = quantizer.size(total_received_B_omb, FLOOR)
         residual_amt_Q_omb = round(residual_amt_Q_omb, base_decimals)
 
+        # Record the fill in the trade ledger and the cycle set metrics
+        record_fill(order_details, "BUY", "open", "market", subtotal_Q_omb, fee_Q_omb, total_spent_Q_omb, total_received_B_omb, residual_amt_Q_omb, metrics=metrics, ledger=ledger)
+
         # Store results in the dictionary
         order_processing_params["total_spent_Q_omb"] = total_spent_Q_omb
         order_processing_params["total_received_B_omb"] = total_received_B_omb
@@ -340,7 +401,7 @@ def open_market_buy_order_processing(open_size_Q, order_details, order_processin
             error_logger.error(f"An error occurred in open_market_buy_order_processing: {e}")
             return None
     
-def close_market_buy_order_processing(close_size_Q, order_details, order_processing_params = {}):
+def close_market_buy_order_processing(close_size_Q, order_details, order_processing_params = {}, metrics=None, ledger=None, quantizer=None):
     # Extract relevant information from order_details
     filled_value = float(order_details["order"]["filled_value"])
     total_fees = float(order_details["order"]["total_fees"])
@@ -348,8 +409,9 @@ def close_market_buy_order_processing(close_size_Q, order_details, order_process
     filled_size = float(order_details["order"]["filled_size"])
     
     # Determine decimal places for rounding
-    quote_decimals = get_decimal_places(quote_increment)
-    base_decimals = get_decimal_places(base_increment)
+    quantizer = order_quantizer(order_details, quantizer)
+    quote_decimals = quantizer.quote_decimals
+    base_decimals = quantizer.base_decimals
 
     try:
         # Calculate the subtotal in quote currency
@@ -372,10 +434,14 @@ def close_market_buy_order_processing(close_size_Q, order_details, order_process
         fee_Q_cmb = round(fee_Q_cmb, quote_decimals)
         total_spent_Q_cmb = round(total_spent_Q_cmb, quote_decimals)
 
-        # Round the total received base currency and residual quote currency to base_increment and quote-increment decimal places, respectively
-        total_received_B_cmb = round(total_received_B_cmb, base_decimals)  
+        # Round the total received base currency down to a whole base increment (an order sized from it
+        # never exceeds the balance) and the residual quote currency to quote_increment decimal places
+        total_received_B_cmb = quantizer.size(total_received_B_cmb, FLOOR)
         residual_amt_Q_cmb = round(residual_amt_Q_cmb, base_decimals)
 
+        # Record the fill in the trade ledger and the cycle set metrics
+        record_fill(order_details, "BUY", "close", "market", subtotal_Q_cmb, fee_Q_cmb, total_spent_Q_cmb, total_received_B_cmb, residual_amt_Q_cmb, metrics=metrics, ledger=ledger)
+
         # Store results in the dictionary
         order_processing_params["total_spent_Q_cmb"] = total_spent_Q_cmb
         order_processing_params["total_received_B_cmb"] = total_received_B_cmb
@@ -395,7 +461,7 @@ def close_market_buy_order_processing(close_size_Q, order_details, order_process
                 error_logger.error(f"An error occurred in close_market_buy_order_processing: {e}")
                 return None
     
-def close_market_sell_order_processing(close_size_B, order_details, order_processing_params = {}):
+def close_market_sell_order_processing(close_size_B, order_details, order_processing_params = {}, metrics=None, ledger=None, quantizer=None):
     # Extract relevant information from order_details
     filled_value = float(order_details["order"]["filled_value"])
     total_fees = float(order_details["order"]["total_fees"])
@@ -403,8 +469,9 @@ def close_market_sell_order_processing(close_size_B, order_details, order_proces
     filled_size = float(order_details["order"]["filled_size"])
 
     # Determine decimal places for rounding
-    quote_decimals = get_decimal_places(quote_increment)
-    base_decimals = get_decimal_places(base_increment)
+    quantizer = order_quantizer(order_details, quantizer)
+    quote_decimals = quantizer.quote_decimals
+    base_decimals = quantizer.base_decimals
     
     try:
         # Calculate the subtotal in quote currency
@@ -422,16 +489,20 @@ def close_market_sell_order_processing(close_size_B, order_details, order_proces
         # Determine any residual base currency not spent
         residual_amt_B_cms = close_size_B - filled_size
 
-        # Round the subtotal, fee, and total received to quote_increment decimal places
+        # Round the subtotal and fee to quote_increment decimal places, and the total received down
+        # to a whole quote increment so that an order sized from it never exceeds the balance
         subtotal_Q_cms = round(subtotal_Q_cms, quote_decimals)
         fee_Q_cms = round(fee_Q_cms, quote_decimals)
-        total_received_Q_cms = round(total_received_Q_cms, quote_decimals)
+        total_received_Q_cms = quantizer.quote(total_received_Q_cms, FLOOR)
 
         # Round the total spent and residual base currency to base_increment decimal places
         total_spent_B_cms = round(total_spent_B_cms, base_decimals)  
         residual_amt_B_cms = round(residual_amt_B_cms, base_decimals)
 
 
+        # Record the fill in the trade ledger and the cycle set metrics
+        record_fill(order_details, "SELL", "close", "market", subtotal_Q_cms, fee_Q_cms, total_spent_B_cms, total_received_Q_cms, residual_amt_B_cms, metrics=metrics, ledger=ledger)
+
         # Store results in the dictionary
         order_processing_params["total_spent_B_cms"] = total_spent_B_cms
         order_processing_params["total_received_Q_cms"] = total_received_Q_cms
@@ -0,0 +1,277 @@
+# order_state.py
+import threading
+import time
+from collections import OrderedDict, deque
+from requests.exceptions import RequestException
+from logging_config import app_logger, info_logger, error_logger
+
+# Seconds between bulk status polls of the tracked orders
+POLL_INTERVAL = 10
+
+# Maximum order IDs per bulk lookup and orders per list page
+ORDER_IDS_PER_REQUEST = 100
+ORDERS_PER_PAGE = 1000
+
+# Order statuses after which an order will not change again
+TERMINAL_STATUSES = ("FILLED", "CANCELLED", "EXPIRED", "FAILED")
+
+# Finished orders kept in the table; beyond this the oldest are dropped so that the table
+# does not grow with every cycle a long-running cycle set completes
+MAX_TERMINAL_ORDERS = 10000
+
+# Final statuses remembered for orders dropped from the table, so that looking one up again
+# (e.g. in a cycle set's order history) does not request it from the exchange
+MAX_FINAL_STATUSES = 100000
+
+class OrderStateTable:
+    # Shared, in-memory view of every tracked order. Written by the bulk status poller and
+    # the user channel feed; read by cycle sets instead of requesting each order themselves.
+
+    def __init__(self):
+        self._orders = {}  # order_id -> latest order data
+        self._products = {}  # order_id -> product_id
+        self._updated_at = {}  # order_id -> time of the last update
+        self._terminal = deque()  # order IDs in the order they reached a terminal status
+        self._final_statuses = OrderedDict()  # order_id -> terminal status of dropped orders
+        self._listeners = []
+        self._lock = threading.RLock()
+
+    def track(self, order_id, product_id=None):
+        # Orders dropped after reaching a terminal status are not tracked again
+        with self._lock:
+            if order_id in self._final_statuses:
+                return
+            if order_id not in self._products or product_id is not None:
+                self._products[order_id] = product_id
+
+    def untrack(self, order_id):
+        with self._lock:
+            self._products.pop(order_id, None)
+            self._orders.pop(order_id, None)
+            self._updated_at.pop(order_id, None)
+
+    def is_tracked(self, order_id):
+        with self._lock:
+            return order_id in self._products
+
+    def add_listener(self, callback):
+        # callback(order_id, status) is called after every status update
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def update(self, orders):
+        # Record order data (dicts with at least order_id and status)
+        updated = []
+
+        with self._lock:
+            for order in orders:
+                order_id = order.get("order_id")
+                if order_id is None or order_id in self._final_statuses:
+                    continue
+
+                previous = self._orders.get(order_id, {})
+                # A terminal status is never replaced by an older, non-terminal one
+                if previous.get("status") in TERMINAL_STATUSES and order.get("status") not in TERMINAL_STATUSES:
+                    continue
+
+                merged = dict(previous)
+                merged.update(order)
+                self._orders[order_id] = merged
+                self._updated_at[order_id] = time.time()
+                if order_id not in self._products:
+                    self._products[order_id] = merged.get("product_id")
+                if merged.get("status") in TERMINAL_STATUSES and previous.get("status") not in TERMINAL_STATUSES:
+                    self._terminal.append(order_id)
+                updated.append((order_id, merged.get("status")))
+
+            while len(self._terminal) > MAX_TERMINAL_ORDERS:
+                order_id = self._terminal.popleft()
+                self._final_statuses[order_id] = self._orders.get(order_id, {}).get("status")
+                self.untrack(order_id)
+            while len(self._final_statuses) > MAX_FINAL_STATUSES:
+                self._final_statuses.popitem(last=False)
+
+            listeners = list(self._listeners)
+
+        for order_id, status in updated:
+            for callback in listeners:
+                try:
+                    callback(order_id, status)
+                except Exception as e:
+                    error_logger.error(f"Order state listener failed for {order_id}: {e}")
+
+    def get(self, order_id):
+        with self._lock:
+            order = self._orders.get(order_id)
+            return dict(order) if order is not None else None
+
+    def _status(self, order_id):
+        order = self._orders.get(order_id)
+        if order is not None:
+            return order.get("status")
+        return self._final_statuses.get(order_id)
+
+    def get_status(self, order_id):
+        with self._lock:
+            return self._status(order_id)
+
+    def get_statuses(self, order_ids):
+        with self._lock:
+            return {order_id: self._status(order_id) for order_id in order_ids}
+
+    def pending_orders(self):
+        # Tracked orders that have not reached a final status, grouped by product
+        grouped = {}
+
+        with self._lock:
+            for order_id, product_id in self._products.items():
+                if self._orders.get(order_id, {}).get("status") not in TERMINAL_STATUSES:
+                    grouped.setdefault(product_id, []).append(order_id)
+
+        return grouped
+
+class OrderStatusPoller:
+    # Refreshes the order state table for all tracked orders with bulk requests: one paged
+    # list of open orders per product, then a bulk lookup of any order that is no longer open
+
+    def __init__(self, table, poll_interval=POLL_INTERVAL):
+        self.table = table
+        self.poll_interval = poll_interval
+        self.feed = None  # Order event hub; polling pauses while its feed is connected
+        self._stop = threading.Event()
+        self._poll_requested = threading.Event()
+        self._poll_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="order-status-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._poll_requested.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _list_orders(self, params):
+        from coinbase_client import signed_get
+
+        orders = []
+        cursor = None
+
+        while True:
+            page_params = dict(params)
+            if cursor:
+                page_params["cursor"] = cursor
+
+            res = signed_get("/api/v3/brokerage/orders/historical/batch", params=page_params)
+            if res.status_code != 200:
+                raise RequestException(f"Order list request failed - Status Code: {res.status_code}")
+
+            data = res.json()
+            orders.extend(data.get("orders", []))
+
+            cursor = data.get("cursor")
+            if not data.get("has_next") or not cursor:
+                return orders
+
+    def poll(self, order_ids=None):
+        # Refresh the given order IDs (default: every pending tracked order); returns the
+        # number of orders updated
+        with self._poll_lock:
+            if order_ids is None:
+                grouped = self.table.pending_orders()
+            else:
+                for order_id in order_ids:
+                    self.table.track(order_id)
+                grouped = {}
+                pending = self.table.pending_orders()
+                wanted = set(order_ids)
+                for product_id, product_order_ids in pending.items():
+                    selected = [order_id for order_id in product_order_ids if order_id in wanted]
+                    if selected:
+                        grouped[product_id] = selected
+
+            updated = 0
+
+            for product_id, product_order_ids in grouped.items():
+                remaining = set(product_order_ids)
+
+                # Open orders for the product in as few pages as possible
+                if product_id is not None:
+                    open_orders = self._list_orders({"product_id": product_id, "order_status": "OPEN", "limit": ORDERS_PER_PAGE})
+                    open_tracked = [order for order in open_orders if order.get("order_id") in remaining]
+                    self.table.update(open_tracked)
+                    updated += len(open_tracked)
+                    remaining -= {order["order_id"] for order in open_tracked}
+
+                # Everything else (no longer open, or unknown product) by ID
+                remaining = sorted(remaining)
+                for start in range(0, len(remaining), ORDER_IDS_PER_REQUEST):
+                    orders = self._list_orders({"order_ids": remaining[start:start + ORDER_IDS_PER_REQUEST]})
+                    self.table.update(orders)
+                    updated += len(orders)
+
+            return updated
+
+    def ensure_fresh(self, order_ids):
+        # Poll once for any of the order IDs the table has never seen
+        missing = [order_id for order_id in order_ids if self.table.get_status(order_id) is None]
+
+        if missing:
+            try:
+                self.poll(missing)
+            except (RequestException, ValueError, KeyError) as e:
+                error_logger.error(f"An error occurred while polling order statuses: {e}")
+
+    def request_poll(self):
+        # Poll on the next loop iteration even if the feed is connected
+        self._poll_requested.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            requested = self._poll_requested.wait(self.poll_interval)
+            self._poll_requested.clear()
+
+            if self._stop.is_set():
+                break
+            if self.feed is not None and self.feed.feed_connected and not requested:
+                continue
+            if not self.table.pending_orders():
+                continue
+
+            try:
+                self.poll()
+            except (RequestException, ValueError, KeyError) as e:
+                error_logger.error(f"An error occurred while polling order statuses: {e}")
+
+# Shared order state table
+order_state_table = OrderStateTable()
+
+# Process-wide status poller, started on first use
+_order_status_poller = None
+_order_status_poller_lock = threading.Lock()
+
+def get_order_status_poller():
+    global _order_status_poller
+
+    if _order_status_poller is None:
+        with _order_status_poller_lock:
+            if _order_status_poller is None:
+                poller = OrderStatusPoller(order_state_table)
+                poller.start()
+                _order_status_poller = poller
+                app_logger.info("Order status poller started")
+
+    return _order_status_poller
+
+# Indicate that order_state.py module loaded successfully
+info_logger.info("order_state module loaded successfully")
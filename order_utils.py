@@ -2,25 +2,19 @@
 from logging_config import app_logger, info_logger, error_logger
 import threading
 import uuid
-import requests
-from requests.auth import AuthBase
 from requests.exceptions import RequestException
-import hmac
-import hashlib
-import http.client
 import json
 import time
 from config import config_data
 from starting_input import user_config
-from coinbase_auth import create_signed_request, fetch_historical_data
+from coinbase_client import signed_get, post_order
+from price_rules import quote_to_base_size
+from order_events import get_order_event_hub
 from error_handling_utils import handle_error_and_return_to_main_loop
-from trading_record_manager import handle_options_menu
 
 # Define API credentials
 api_key = config_data["api_key"]
 api_secret = config_data["api_secret"]
-api_url = 'https://api.coinbase.com'
-orderep = '/api/v3/brokerage/orders'
 
 # Define other order parameters
 product_id = user_config["product_id"]
@@ -29,22 +23,6 @@ taker_fee = user_config["taker_fee"]
 chart_interval = user_config["chart_interval"]
 num_intervals = user_config["num_intervals"]
 window_size = user_config["window_size"]
-historical_data = fetch_historical_data(product_id, chart_interval, num_intervals)
-
-# Extract the close prices from the historical data
-closing_prices = []
-
-for entry in historical_data:
-    try:
-        close_price = float(entry[4])
-        closing_prices.append(close_price)
-    except ValueError:
-        # Handle invalid data (e.g., non-numeric values) here, if needed
-        # You can print a message or take other appropriate actions
-        error_logger.error("Invalid data entry in historical_data: %s", entry)
-        pass
-
-# Now you have a list of floats in closing_prices
 
 # Function for placing starting (cycle 1) opening cycle sell order(s)
 def place_starting_open_sell_order(product_id, starting_size_B, starting_price_sell):
@@ -68,56 +46,12 @@ def place_starting_open_sell_order(product_id, starting_size_B, starting_price_s
 
     info_logger.info("Payload: %s", payload)
     
-    class CBAuth(AuthBase):
-
-        def __init__(self, api_secret, api_key, orderep):
-            # setup any auth-related data here
-            self.api_secret = api_secret
-            self.api_key = api_key
-            self.api_url = orderep
-
-        def __call__(self, request):
-            timestamp = str(int(time.time()))
-            message = timestamp + request.method + self.api_url + json.dumps(payload)
-            signature = hmac.new(self.api_secret.encode(
-                'utf-8'), message.encode('utf-8'), digestmod=hashlib.sha256).digest()
-
-            request.headers.update({
-                'CB-ACCESS-SIGN': signature.hex(),
-                'CB-ACCESS-TIMESTAMP': timestamp,
-                'CB-ACCESS-KEY': api_key,
-                'accept': "application/json"
-
-            })
-
-            return request
-
-    try:
-        auth = CBAuth(api_secret, api_key, orderep)
-        r = requests.post(api_url + orderep, json=payload, auth=auth)  # .json()
-        info_logger.info(r)
-        info_logger.info(r.status_code)
-        info_logger.info(r.content)
-
-        if r.status_code == 200:
-            order_details = r.json()
-            order_id = order_details.get("order_id")
-            if order_id is not None and order_details.get("success") == True:
-                info_logger.info("Starting opening cycle sell order placed. Order ID: %s", order_id)
-
-                return order_id
-        
-            else:
-                error_logger.error(f"Error placing starting opening cycle sell order - Status Code: {r.status_code}")
-                return None
-                       
-        else:
-            error_logger.error(f"Error placing starting opening cycle sell order - Status Code: {r.status_code}")
-            return None
+    order_id = post_order(payload, "starting opening cycle sell order", key=api_key, secret=api_secret)
 
-    except Exception as e:
-        error_logger.error(f"An error occurred in place_starting_open_sell_order: {e}")
-        return None
+    if order_id is not None:
+        info_logger.info("Starting opening cycle sell order placed. Order ID: %s", order_id)
+
+    return order_id
 
 # Function for placing starting (cycle 1) opening cycle buy order(s)
 def place_starting_open_buy_order(product_id, product_stats, starting_size_Q, starting_price_buy, maker_fee):
@@ -128,7 +62,7 @@ def place_starting_open_buy_order(product_id, product_stats, starting_size_Q, st
     print("Calculating base_size_Q...")
     info_logger.info("starting_size_Q = %s, maker_fee = %s, starting_price_buy = %s", starting_size_Q, maker_fee, starting_price_buy)
     if isinstance(starting_size_Q, (int, float)) and isinstance(maker_fee, (int, float)) and isinstance(starting_price_buy, (int, float)):
-        base_size_Q = int((starting_size_Q * (1 - maker_fee) / starting_price_buy)) / float(base_increment) * float(base_increment)
+        base_size_Q = quote_to_base_size(starting_size_Q, maker_fee, starting_price_buy, base_increment)
         info_logger.info("Base size calculated successfully: %s", base_size_Q)
     else:
         error_logger.error("Invalid input types in the calculation of base_size_Q.")
@@ -152,56 +86,12 @@ def place_starting_open_buy_order(product_id, product_stats, starting_size_Q, st
 
     info_logger.info("Payload: %s", payload)
 
-    class CBAuth(AuthBase):
-
-        def __init__(self, api_secret, api_key, orderep):
-            # setup any auth-related data here
-            self.api_secret = api_secret
-            self.api_key = api_key
-            self.api_url = orderep
-
-        def __call__(self, request):
-            timestamp = str(int(time.time()))
-            message = timestamp + request.method + self.api_url + json.dumps(payload)
-            signature = hmac.new(self.api_secret.encode(
-                'utf-8'), message.encode('utf-8'), digestmod=hashlib.sha256).digest()
-
-            request.headers.update({
-                'CB-ACCESS-SIGN': signature.hex(),
-                'CB-ACCESS-TIMESTAMP': timestamp,
-                'CB-ACCESS-KEY': api_key,
-                'accept': "application/json"
-
-            })
-
-            return request
+    order_id = post_order(payload, "starting opening cycle buy order", key=api_key, secret=api_secret)
 
-    try:
-        auth = CBAuth(api_secret, api_key, orderep)
-        r = requests.post(api_url + orderep, json=payload, auth=auth)  # .json()
-        info_logger.info(r)
-        info_logger.info(r.status_code)
-        info_logger.info(r.content)
+    if order_id is not None:
+        info_logger.info("Starting opening cycle buy order placed. Order ID: %s", order_id)
 
-        if r.status_code == 200:
-            order_details = r.json()
-            order_id = order_details.get("order_id")
-            if order_id is not None and order_details.get("success") == True:
-                info_logger.info("Starting opening cycle buy order placed. Order ID: %s", order_id)
-
-                return order_id
-
-            else:
-                error_logger.error(f"Error placing starting opening cycle buy order - Status Code: {r.status_code}")
-                return None
-       
-        else:
-            error_logger.error(f"Error placing starting opening cycle buy order - Status Code: {r.status_code}")
-            return None
-
-    except Exception as e:
-        error_logger.error(f"An error occurred in place_starting_open_buy_order: {e}")
-        return None
+    return order_id
 
 def waiting_period_conditions(unit, interval):
     print("Loading waiting_period_conditions...")
@@ -215,14 +105,10 @@ def waiting_period_conditions(unit, interval):
         raise ValueError("Invalid unit. Please use 'minutes', 'hours', or 'days'.")
 
     start_time = time.time()
-    elapsed_time = 0
 
-    while elapsed_time < waiting_period:
-        # Check elapsed time
-        elapsed_time = time.time() - start_time
-
-        # Add a sleep to avoid constant checking and reduce CPU usage
-        time.sleep(1)  # Sleep for 1 second between checks
+    # Sleep once for the whole period instead of waking every second to check the time
+    time.sleep(waiting_period)
+    elapsed_time = time.time() - start_time
 
     return waiting_period, elapsed_time
 
@@ -244,27 +130,27 @@ def retry_request(func, max_retries=3, initial_delay=5):
 # Now, you can use waiting_period and elapsed_time as needed in your logic.
 # Once waiting_period is reached, you can initiate secondary logic.
 
-def get_order_details(conn, api_key, api_secret, order_id, max_retries):
-    headers = create_signed_request(str(api_key), api_secret, "GET", f"/api/v3/brokerage/orders/historical/{order_id}", body='')
+def get_order_details(api_key, api_secret, order_id, max_retries):
+    endpoint = f"/api/v3/brokerage/orders/historical/{order_id}"
 
     # Retry logic with exponential backoff
     retries = 0
     while True:
+        res = None
         try:
-            conn.request("GET", f"/api/v3/brokerage/orders/historical/{order_id}", headers=headers)
-            res = conn.getresponse()
-            data = res.read()
+            res = signed_get(endpoint, key=str(api_key), secret=api_secret)
+            data = res.content
 
             if not data:
                 error_logger.error("Empty response in get_order_details.")
-                error_logger.error(f"Status code: {res.status}")
+                error_logger.error(f"Status code: {res.status_code}")
                 raise RequestException("Empty response")
 
             return json.loads(data.decode("utf-8"))
 
         except RequestException as e:
             error_logger.error(f"An error occurred in get_order_details: {e}")
-            error_logger.error(f"Status code: {res.status}")
+            error_logger.error(f"Status code: {res.status_code if res is not None else None}")
 
             if retries >= max_retries:
                 error_logger.error("Max retries reached in get_order_details. Automation process disrupted. Orders may need manual handling.")
@@ -280,20 +166,27 @@ def handle_timeout():
     # Add any additional actions you want to take when a timeout occurs
 
 def wait_for_order(api_key, api_secret, order_id, max_retries=3, timeout=600):
-    conn = http.client.HTTPSConnection("api.coinbase.com")
+    # Start tracking before the initial request so that no fill event is missed
+    hub = get_order_event_hub()
+    hub.track(order_id)
 
     # Initial request to get order details with retry logic
-    order_details = retry_request(lambda: get_order_details(conn, api_key, api_secret, order_id, max_retries), max_retries, initial_delay=5)
+    order_details = retry_request(lambda: get_order_details(api_key, api_secret, order_id, max_retries), max_retries, initial_delay=5)
     
     if order_details is None:
+        hub.untrack(order_id)
         return None  # Exit the function if the initial order is not found
 
     # Print the order details
     app_logger.info("Initial order details: %s", order_details["order"])
+    hub.record(order_details["order"])
 
     if order_details["order"]["status"] == "OPEN":
         print("Waiting for order to fill...")
         try:
+            # Imported here to avoid a circular import with trading_record_manager
+            from trading_record_manager import handle_options_menu
+
             # Start a timer to handle the timeout
             timer = threading.Timer(timeout, handle_timeout)
             timer.start()
@@ -310,10 +203,18 @@ def wait_for_order(api_key, api_secret, order_id, max_retries=3, timeout=600):
     elif order_details["order"]["status"] == "CANCELLED":
         print("Order cancelled. Check exchange and handle orders manually or retry entering trading data.")
 
+    # Wait for the order event hub to report a final status (pushed by the user channel, or
+    # polled in a batch while the channel is down), then fetch the full details once
     while True:
+        status = hub.wait_for_status(order_id)
+
+        if status != "FILLED":
+            error_logger.error(f"Order {order_id} ended with status {status}")
+            hub.untrack(order_id)
+            return None
+
         try:
-            # Resend the request to get the latest order details
-            order_details = get_order_details(conn, api_key, api_secret, order_id, max_retries)
+            order_details = get_order_details(api_key, api_secret, order_id, max_retries)
 
             if order_details is None:
                 continue  # Retry if empty response is encountered
@@ -327,14 +228,15 @@ def wait_for_order(api_key, api_secret, order_id, max_retries=3, timeout=600):
                 ):
                     app_logger.info("Current order status: %s", order_details["order"]["status"])
                     app_logger.info("Order filled successfully. Order details: %s", order_details)
+                    hub.untrack(order_id)
                     return order_details
                 else:
-                    # If the order is not filled yet or completion percentage is not 100, wait and check again
-                    time.sleep(10)
+                    # The fill event can arrive before the REST view catches up
+                    time.sleep(1)
             else:
                 # If the "order" or "status" key is not found, log the error and retry
                 error_logger.error("Order status not found.")
-                time.sleep(10)  # Add a delay before retrying
+                time.sleep(1)  # Add a delay before retrying
 
         except Exception as e:
             error_logger.error(f"An error occurred in wait_for_order: {e}")
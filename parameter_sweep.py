@@ -0,0 +1,207 @@
+# parameter_sweep.py
+import csv
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+
+# Logs of parameter sweeps go to a temporary directory instead of the bot's log files (unless PORTALX_LOG_DIR is set)
+os.environ.setdefault("PORTALX_LOG_DIR", tempfile.mkdtemp(prefix="portalx-logs-"))
+
+from logging_config import app_logger, info_logger, error_logger
+from starting_input import user_config
+from backtester import CandleHistory, GRANULARITY, run_backtest, synthetic_candles
+
+# Strategy settings searched by default (the values collect_user_input would otherwise be guessed with)
+PARAMETER_SPACE = {
+    "profit_percent": [0.0025, 0.005, 0.0075, 0.01, 0.015],
+    "window_size": [10, 20, 30, 50],
+    "num_intervals": [100, 300, 1000],
+    "compound_percent": [0, 50, 100],
+    "compounding_option": ["partial", "100"],
+}
+
+# Cycle types evaluated for every parameter set
+CYCLE_TYPES = ("sell_buy", "buy_sell")
+
+# Result used to rank the parameter sets (percent gain or loss of the cycle set's value)
+RANK_BY = "percent_gain_loss_dollar"
+
+# Columns of the printed results table
+TABLE_COLUMNS = ("rank", "product_id", "cycle_type") + tuple(PARAMETER_SPACE) + ("completed_cycles", "state", RANK_BY, "percent_gain_loss_base", "percent_gain_loss_quote", "fees")
+
+def normalise(parameters):
+    # "100" compounding ignores compound_percent, so such sets differ only in name
+    if parameters.get("compounding_option") == "100":
+        return dict(parameters, compound_percent=100)
+    return parameters
+
+def parameter_grid(space=PARAMETER_SPACE):
+    # Every combination of the values in space (dicts, without sets that only differ in name)
+    names = list(space)
+    seen = set()
+    for values in itertools.product(*(space[name] for name in names)):
+        parameters = normalise(dict(zip(names, values)))
+        key = tuple(parameters[name] for name in names)
+        if key not in seen:
+            seen.add(key)
+            yield parameters
+
+def parameter_sample(count, space=PARAMETER_SPACE, seed=None):
+    # count distinct combinations drawn at random from the grid
+    grid = list(parameter_grid(space))
+    return random.Random(seed).sample(grid, min(count, len(grid)))
+
+class SharedHistory:
+    # A candle history's arrays copied once into a shared memory block; sweep workers map the
+    # block and read the arrays in place instead of receiving a pickled copy with every task
+
+    def __init__(self, history, product_stats):
+        arrays = history.arrays()
+        self.product_id = history.product_id
+        self.granularity = history.granularity
+        self.product_stats = product_stats
+        self.shape = arrays.shape
+        self._memory = shared_memory.SharedMemory(create=True, size=arrays.nbytes)
+        self.name = self._memory.name
+        np.ndarray(self.shape, dtype=np.float64, buffer=self._memory.buf)[:] = arrays
+
+    def __getstate__(self):
+        # Workers get the block's name and layout only
+        state = dict(vars(self))
+        state.pop("_memory", None)
+        return state
+
+    def attach(self):
+        # The history over the shared block (in a worker; the block stays mapped while it is used)
+        self._memory = shared_memory.SharedMemory(name=self.name)
+        arrays = np.ndarray(self.shape, dtype=np.float64, buffer=self._memory.buf)
+        arrays.flags.writeable = False
+        return CandleHistory.from_arrays(self.product_id, arrays, self.granularity)
+
+    def release(self):
+        # In the process that created the block, once every worker is done
+        self._memory.close()
+        self._memory.unlink()
+
+# Histories of the worker process, by product (attached by the pool initializer)
+_worker_histories = {}
+
+def _init_worker(shared_histories):
+    for shared in shared_histories:
+        _worker_histories[shared.product_id] = (shared.attach(), shared.product_stats)
+
+def _run_task(product_id, cycle_type, starting_size, parameters):
+    # One backtest in a worker; returns a results table row
+    history, product_stats = _worker_histories[product_id]
+    results = run_backtest(history, cycle_type, starting_size, product_stats, **parameters)
+    metrics = results["metrics"] or {}
+    totals = results["totals"] or {}
+
+    row = {"product_id": product_id, "cycle_type": cycle_type}
+    row.update(parameters)
+    row.update(
+        completed_cycles=results["completed_cycles"],
+        state=results["state"],
+        fees=totals.get("fees"),
+        elapsed=results["elapsed"],
+    )
+    row.update((name, metrics.get(name)) for name in (RANK_BY, "percent_gain_loss_base", "percent_gain_loss_quote"))
+    return row
+
+def load_history(product_id, days):
+    # (history, product stats) of `days` of one-minute candles; "synthetic" (with an optional
+    # seed, e.g. "synthetic-7") for a random walk, otherwise from the candle store
+    end_time = int(time.time())
+    start_time = end_time - days * 86400
+
+    if product_id.startswith("synthetic"):
+        seed = int(product_id.partition("-")[2] or 42)
+        candles = synthetic_candles(days * 86400 // GRANULARITY, start_time, seed=seed)
+        return CandleHistory(product_id, candles), {"base_increment": "1", "quote_increment": "0.000001"}
+
+    from coinbase_utils import fetch_product_stats
+    return CandleHistory.from_store(product_id, start_time, end_time, sync=True), fetch_product_stats(product_id)
+
+def run_sweep(histories, parameter_sets, cycle_types=CYCLE_TYPES, workers=None):
+    # Backtest every parameter set for every (history, product stats) pair and cycle type over
+    # a process pool; returns the result rows ranked by RANK_BY, best first
+    starting_sizes = {"sell_buy": user_config["starting_size_B"], "buy_sell": user_config["starting_size_Q"]}
+    shared_histories = [SharedHistory(history, product_stats) for history, product_stats in histories]
+    rows = []
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared_histories,)) as executor:
+            futures = [
+                executor.submit(_run_task, shared.product_id, cycle_type, starting_sizes[cycle_type], parameters)
+                for shared in shared_histories
+                for cycle_type in cycle_types
+                for parameters in parameter_sets
+            ]
+            for future in as_completed(futures):
+                try:
+                    rows.append(future.result())
+                except Exception as e:
+                    error_logger.error(f"Parameter sweep backtest failed: {e}")
+    finally:
+        for shared in shared_histories:
+            shared.release()
+
+    rows.sort(key=lambda row: row[RANK_BY] if row[RANK_BY] is not None else float("-inf"), reverse=True)
+    for rank, row in enumerate(rows, 1):
+        row["rank"] = rank
+    return rows
+
+def format_table(rows, columns=TABLE_COLUMNS):
+    def cell(value):
+        return f"{value:.4f}" if isinstance(value, float) else str(value)
+
+    cells = [[cell(row.get(column)) for column in columns] for row in rows]
+    widths = [max([len(column)] + [len(line[index]) for line in cells]) for index, column in enumerate(columns)]
+    lines = ["  ".join(column.rjust(width) for column, width in zip(columns, widths))]
+    lines += ["  ".join(value.rjust(width) for value, width in zip(line, widths)) for line in cells]
+    return "\n".join(lines)
+
+def write_csv(rows, path, columns=TABLE_COLUMNS + ("elapsed",)):
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+def main(days=90, samples=0, *product_ids, top=20):
+    # Sweep the default parameter space (the full grid, or `samples` random sets) over `days`
+    # of candles of each product (default: a synthetic random walk); prints the best `top`
+    # rows and writes every row to parameter_sweep.csv
+    product_ids = product_ids or ("synthetic",)
+    parameter_sets = parameter_sample(samples) if samples else list(parameter_grid())
+
+    start_time = time.perf_counter()
+    histories = []
+    for product_id in product_ids:
+        history, product_stats = load_history(product_id, days)
+        if history is None or product_stats is None:
+            print(f"Unable to load {product_id}; skipped")
+            continue
+        histories.append((history, product_stats))
+    print(f"{len(histories)} products loaded in {time.perf_counter() - start_time:.2f} s")
+
+    start_time = time.perf_counter()
+    rows = run_sweep(histories, parameter_sets, workers=int(os.environ.get("PORTALX_SWEEP_WORKERS", 0)) or None)
+    elapsed = time.perf_counter() - start_time
+    print(f"{len(rows)} backtests ({len(parameter_sets)} parameter sets) in {elapsed:.2f} s\n")
+
+    print(format_table(rows[:top]))
+    write_csv(rows, "parameter_sweep.csv")
+    app_logger.info("Parameter sweep of %s backtests finished in %.2f s", len(rows), elapsed)
+
+# Indicate that parameter_sweep.py module loaded successfully
+info_logger.info("parameter_sweep module loaded successfully")
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(*[int(arg) for arg in args[:2]], *args[2:])
@@ -0,0 +1,207 @@
+# placement_benchmark.py
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from startup_benchmark import BENCHMARK_USER_CONFIG, BENCHMARK_API_CONFIG
+
+# Order placement throughput of the cycle scheduler against the stand-in exchange. N cycle sets
+# are submitted at once and each places its starting opening order; the time from the first
+# placement request to the last acknowledgement gives orders per second. The bot runs in a fresh
+# interpreter (so that its logs, journal and ledger go to a temporary directory) and the
+# stand-in exchange in this process.
+
+# Numbers of concurrently placing cycle sets to benchmark
+CYCLE_SET_COUNTS = [1, 2, 4, 8, 16, 32, 64]
+
+# Stand-in exchange latency of every request (seconds)
+EXCHANGE_LATENCY = 0.05
+
+# Stand-in products (one per cycle set, so each has a balance of its own): a fixed price so that
+# the resting orders never fill while a run is measured
+PRODUCT_PRICE = 1.0
+BASE_INCREMENT = "0.01"
+QUOTE_INCREMENT = "0.0001"
+
+# Requests per second of the shared rate limiter in the bot. Lifted far above the exchange's
+# limit (25/s in production) so that the results show the placement locks rather than the limiter.
+RATE_LIMIT = 1000
+
+# Seconds a run may take before it is reported as incomplete
+RUN_TIMEOUT = 60
+
+# Rungs of the stacked (ladder) order placed one by one and as one batch
+LADDER_RUNGS = 20
+
+# Placement lock arrangements compared for every count
+MODES = [
+    "global lock",  # Every cycle set behind one lock (the old module-global cycle_set_utils.thread_lock)
+    "per balance",  # Each cycle set on its own product balance (the scheduler's placement locks)
+    "same balance",  # Every cycle set selling the same product: these still share one balance lock
+]
+
+def product_ids(count):
+    return [f"BENCH{index}-USD" for index in range(count)]
+
+def run_bot(exchange_url, counts):
+    # Runs in a fresh interpreter pointed at the stand-in exchange: measure every mode and count
+    # and print the results
+    import cycle_scheduler
+    from async_client import AsyncCoinbaseClient
+    from cycle_set_utils import CycleSet
+    from order_locks import KeyedLocks
+    from starting_input import user_config
+
+    class SingleLock(KeyedLocks):
+        # The same lock for every balance
+        def get(self, key):
+            return super().get(None)
+
+    class TimedClient(AsyncCoinbaseClient):
+        # Records when the first placement request starts and when each one is acknowledged
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.first_request = None
+            self.acknowledged = []
+
+        async def post_order(self, payload, description):
+            if self.first_request is None:
+                self.first_request = time.perf_counter()
+            order_id = await super().post_order(payload, description)
+            if order_id is not None:
+                self.acknowledged.append(time.perf_counter())
+            return order_id
+
+    # Market snapshots meeting the starting sell conditions of every product (price above the
+    # 24 hour mean, bands around the price); prices and the book come from the stand-in
+    def read_indicators(feed):
+        return {
+            "upper_bb": PRODUCT_PRICE * 1.01,
+            "lower_bb": PRODUCT_PRICE * 0.99,
+            "mean24": PRODUCT_PRICE * 0.99,
+            "long_term_ma24": PRODUCT_PRICE,
+            "current_rsi": 60,
+            "quote_increment": QUOTE_INCREMENT,
+            "base_increment": BASE_INCREMENT,
+        }
+
+    cycle_scheduler.ProductMarketFeed._read_indicators = read_indicators
+
+    def cycle_set(product_id):
+        return CycleSet(
+            product_id,
+            user_config["starting_size_B"],
+            user_config["profit_percent"],
+            user_config["taker_fee"],
+            user_config["maker_fee"],
+            user_config["compound_percent"],
+            user_config["compounding_option"],
+            user_config["wait_period_unit"],
+            user_config["first_order_wait_period"],
+            user_config["chart_interval"],
+            user_config["num_intervals"],
+            user_config["window_size"],
+            cycle_type="sell_buy",
+        )
+
+    def run(mode, count):
+        client = TimedClient(cycle_scheduler.api_key, cycle_scheduler.api_secret, base_url=exchange_url)
+        scheduler = cycle_scheduler.CycleScheduler(client=client, refresh_interval=RUN_TIMEOUT, placement_locks=SingleLock(asyncio.Lock) if mode == "global lock" else None)
+        products = product_ids(1) * count if mode == "same balance" else product_ids(count)
+
+        for product_id in products:
+            scheduler.submit(cycle_set(product_id))
+
+        deadline = time.time() + RUN_TIMEOUT
+        while len(client.acknowledged) < count and time.time() < deadline:
+            time.sleep(0.01)
+        scheduler.shutdown()
+
+        placed = len(client.acknowledged)
+        elapsed = max(client.acknowledged) - client.first_request if placed else None
+        return round(placed / elapsed, 1) if placed == count else None
+
+    def ladder():
+        # Seconds to place LADDER_RUNGS orders one after another and as one concurrent batch
+        client = AsyncCoinbaseClient(cycle_scheduler.api_key, cycle_scheduler.api_secret, base_url=exchange_url)
+
+        async def place(window):
+            payloads = [cycle_scheduler.limit_order_payload("SELL", product_ids(1)[0], 1, PRODUCT_PRICE * (1.02 + index / 100)) for index in range(LADDER_RUNGS)]
+            start_time = time.perf_counter()
+            order_ids = await client.post_orders(payloads, "ladder order", window)
+            elapsed = time.perf_counter() - start_time
+            await client.cancel_orders(order_ids or [])
+            return elapsed
+
+        async def both():
+            try:
+                return {"serial": await place(1), "batch": await place(LADDER_RUNGS)}
+            finally:
+                await client.close()
+
+        return asyncio.run(both())
+
+    results = {"runs": {mode: {count: run(mode, count) for count in counts} for mode in MODES}, "ladder": ladder()}
+    sys.stdout.write("PORTALX_BENCHMARK_RESULT " + json.dumps(results) + "\n")
+
+def main(counts=CYCLE_SET_COUNTS):
+    from mock_exchange import MockExchange, MockProduct
+
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    exchange = MockExchange(
+        products={product_id: MockProduct(product_id, PRODUCT_PRICE, BASE_INCREMENT, QUOTE_INCREMENT, amplitude=0.0, swing=0.0) for product_id in product_ids(max(counts))},
+        latency=EXCHANGE_LATENCY,
+    ).start()
+
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            user_config_path = os.path.join(work_dir, "user_config.json")
+            api_config_path = os.path.join(work_dir, "api_config.json")
+
+            with open(user_config_path, "w") as json_file:
+                json.dump(BENCHMARK_USER_CONFIG, json_file)
+            with open(api_config_path, "w") as json_file:
+                json.dump(BENCHMARK_API_CONFIG, json_file)
+
+            env = dict(os.environ)
+            env["PORTALX_USER_CONFIG"] = user_config_path
+            env["PORTALX_API_CONFIG"] = api_config_path
+            env["PORTALX_API_URL"] = env["PORTALX_EXCHANGE_URL"] = exchange.url
+            env["PORTALX_PRIVATE_RATE"] = env["PORTALX_PUBLIC_RATE"] = str(RATE_LIMIT)
+            env["PYTHONPATH"] = package_dir + os.pathsep + env.get("PYTHONPATH", "")
+
+            with open(os.path.join(work_dir, "console.log"), "w+") as console:
+                completed = subprocess.run(
+                    [sys.executable, os.path.join(package_dir, "placement_benchmark.py"), "--bot", exchange.url] + [str(count) for count in counts],
+                    cwd=work_dir, env=env, stdout=subprocess.PIPE, stderr=console, text=True,
+                )
+
+                for line in completed.stdout.splitlines():
+                    if line.startswith("PORTALX_BENCHMARK_RESULT "):
+                        results = json.loads(line[len("PORTALX_BENCHMARK_RESULT "):])
+                        break
+                else:
+                    console.seek(0)
+                    raise RuntimeError(f"Benchmark run failed:\n{console.read()[-4000:]}")
+    finally:
+        exchange.stop()
+
+    print(f"Order placement throughput of the cycle scheduler (orders/s), stand-in exchange at {EXCHANGE_LATENCY * 1000:.0f} ms per request")
+    print(f"{'cycle sets':>10} " + " ".join(f"{mode:>13}" for mode in MODES))
+    for count in counts:
+        cells = [results["runs"][mode][str(count)] for mode in MODES]
+        print(f"{count:>10} " + " ".join(f"{cell if cell is not None else 'incomplete':>13}" for cell in cells))
+
+    ladder = results["ladder"]
+    print(f"Ladder of {LADDER_RUNGS} orders: {ladder['serial']:.3f} s one by one, {ladder['batch']:.3f} s as one batch")
+    return results
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--bot"]:
+        run_bot(sys.argv[2], [int(count) for count in sys.argv[3:]])
+    else:
+        main([int(count) for count in sys.argv[1:]] or CYCLE_SET_COUNTS)
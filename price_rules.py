@@ -0,0 +1,105 @@
+# price_rules.py
+from logging_config import info_logger
+from quantizer import quantize, FLOOR, CEILING, NEAREST
+
+# Pure price and size rules for cycle orders. They take market values as arguments and
+# never fetch or sleep, so the cycle scheduler, the backtester and the legacy scripts share them.
+
+def round_price(price, quote_increment):
+    # Nearest whole number of quote increments
+    return quantize(price, quote_increment, NEAREST)
+
+def next_open_sell_price(current_price, long_term_ma24, upper_bb, current_rsi, profit_percent, quote_increment):
+    # Next opening cycle sell price, or None while RSI is not above 50
+    if current_rsi is None or current_rsi <= 50:
+        return None
+
+    if current_price > long_term_ma24:
+        # Trend is upward, RSI > 50
+        return float(round_price(max(current_price * (1 + profit_percent), 1.001 * upper_bb), quote_increment))
+
+    # Trend is downward, RSI > 50
+    return float(round_price(min(current_price * (1 + profit_percent), 0.999 * upper_bb), quote_increment))
+
+def next_open_buy_price(current_price, long_term_ma24, lower_bb, current_rsi, profit_percent, quote_increment):
+    # Next opening cycle buy price, or None while RSI is not below 50
+    if current_rsi is None or current_rsi >= 50:
+        return None
+
+    if current_price > long_term_ma24:
+        # Trend is upward, RSI < 50
+        return float(round_price(max(current_price * (1 - profit_percent), 1.001 * lower_bb), quote_increment))
+
+    # Trend is downward, RSI < 50
+    return float(round_price(min(current_price * (1 - profit_percent), 0.999 * lower_bb), quote_increment))
+
+def starting_sell_price(current_price, mean24, upper_bb, starting_size_B, quote_increment):
+    # Starting opening cycle sell price (slightly below upper_bb), or None while the price
+    # is not above the 24 hour mean
+    if not (current_price > mean24 and starting_size_B > 0):
+        return None
+
+    # Ensure the rounded price is at least quote_increment
+    return max(round_price(upper_bb * 0.9995, quote_increment), float(quote_increment))
+
+def starting_buy_price(current_price, mean24, lower_bb, starting_size_Q, quote_increment):
+    # Starting opening cycle buy price (slightly above lower_bb), or None while the price
+    # is not below the 24 hour mean
+    if not (current_price < mean24 and starting_size_Q > 0):
+        return None
+
+    # Ensure the rounded price is at least quote_increment
+    return max(round_price(lower_bb * 1.0005, quote_increment), float(quote_increment))
+
+def close_buy_price(open_price_sell, profit_percent, maker_fee, quote_increment):
+    # Closing buy price below the opening sell by the profit and both fees, rounded down so that
+    # rounding to the increment never eats into the margin
+    return quantize(open_price_sell * (1 - profit_percent - (2 * maker_fee)), quote_increment, FLOOR)
+
+def close_sell_price(open_price_buy, profit_percent, maker_fee, quote_increment):
+    # Closing sell price above the opening buy by the profit and both fees, rounded up
+    return quantize(open_price_buy * (1 + profit_percent + (2 * maker_fee)), quote_increment, CEILING)
+
+def sell_price_favorable(price, best_bid):
+    # A post-only sell must rest above the best bid
+    return bool(best_bid) and price > best_bid
+
+def buy_price_favorable(price, best_ask):
+    # A post-only buy must rest below the best ask
+    return bool(best_ask) and price < best_ask
+
+def quote_to_base_size(size_Q, maker_fee, price, base_increment):
+    # Base currency size of a buy order spending size_Q (after the maker fee) at price, rounded
+    # down to a whole number of base increments
+    return quantize(size_Q * (1 - maker_fee) / price, base_increment, FLOOR)
+
+def ladder_prices(side, first_price, upper_bb, lower_bb, rungs, quote_increment):
+    # Limit prices of a stacked (ladder) order: the first rung at first_price and each further
+    # rung stepping away from the market (up for sells, down for buys) by an equal share of
+    # half the Bollinger band width, at least one quote increment apart
+    increment = quantize(float(quote_increment), quote_increment)
+    step = max((upper_bb - lower_bb) / 2 / rungs, increment)
+    prices = [first_price]
+
+    for index in range(1, rungs):
+        if side == "SELL":
+            price = max(quantize(first_price + index * step, quote_increment, CEILING), prices[-1] + increment)
+        else:
+            price = min(quantize(first_price - index * step, quote_increment, FLOOR), prices[-1] - increment)
+            if price < increment:
+                break
+        prices.append(quantize(price, quote_increment))
+
+    return prices
+
+def ladder_sizes(size, rungs, increment):
+    # size split into `rungs` equal parts rounded down to the increment, the remainder going to
+    # the first rung; fewer rungs when the parts would be smaller than one increment
+    part = quantize(size / rungs, increment, FLOOR)
+    if part <= 0:
+        return [quantize(size, increment, FLOOR)]
+
+    return [quantize(size - part * (rungs - 1), increment, FLOOR)] + [part] * (rungs - 1)
+
+# Indicate that price_rules.py module loaded successfully
+info_logger.info("price_rules module loaded successfully")
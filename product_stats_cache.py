@@ -0,0 +1,145 @@
+# product_stats_cache.py
+import os
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from logging_config import app_logger, info_logger, error_logger
+from quantizer import get_quantizer
+
+# Seconds product stats (increments and size limits) are reused before they are fetched again
+# (override with PORTALX_PRODUCT_STATS_TTL)
+PRODUCT_STATS_TTL = float(os.environ.get("PORTALX_PRODUCT_STATS_TTL", 3600))
+
+# Seconds before a failed fetch is tried again (callers get the previous stats, or None, meanwhile)
+RETRY_DELAY = 5
+
+# Stats parsed to Decimal when they are fetched
+DECIMAL_FIELDS = ("base_increment", "quote_increment", "base_min_size", "base_max_size", "quote_min_size", "quote_max_size")
+
+def parse_decimals(stats):
+    decimals = {}
+    for name in DECIMAL_FIELDS:
+        try:
+            decimals[name] = Decimal(str(stats[name]))
+        except (KeyError, InvalidOperation):
+            pass
+    return decimals
+
+class ProductStatsCache:
+    # Product stats per product with a time to live. Only one request per product is in flight
+    # at a time. Expired stats are served while a background thread refreshes them, so callers
+    # (cycle threads, or the cycle scheduler's event loop) block only for a product with no stats
+    # yet, and then wait for the single fetch. A failed refresh keeps the previous stats.
+
+    def __init__(self, fetch=None, ttl=PRODUCT_STATS_TTL, retry_delay=RETRY_DELAY):
+        self._fetch = fetch
+        self.ttl = ttl
+        self.retry_delay = retry_delay
+        self._entries = {}  # product_id -> (stats, decimals, time to refresh)
+        self._in_flight = {}  # product_id -> Event set when the refresh finishes
+        self._lock = threading.Lock()
+
+    def _fetch_stats(self, product_id):
+        if self._fetch is not None:
+            return self._fetch(product_id)
+
+        from coinbase_utils import fetch_product_stats
+        return fetch_product_stats(product_id)
+
+    def _entry(self, product_id):
+        with self._lock:
+            entry = self._entries.get(product_id)
+            if entry is not None and time.time() < entry[2]:
+                return entry
+
+            in_flight = self._in_flight.get(product_id)
+            refresh = in_flight is None
+            if refresh:
+                in_flight = self._in_flight[product_id] = threading.Event()
+
+        if entry is not None:
+            # Expired: keep using the stats while they are refreshed in the background
+            if refresh:
+                threading.Thread(target=self._refresh, args=(product_id,), name=f"product-stats-{product_id}", daemon=True).start()
+            return entry
+
+        if refresh:
+            return self._refresh(product_id)
+
+        in_flight.wait()
+        with self._lock:
+            return self._entries.get(product_id, (None, {}, 0))
+
+    def _refresh(self, product_id):
+        # Fetch the product's stats and wake the callers waiting for them
+        try:
+            app_logger.info("Fetching product stats for %s", product_id)
+            stats = self._fetch_stats(product_id)
+        except Exception as e:
+            error_logger.error(f"Error fetching product stats for {product_id}: {e}")
+            stats = None
+
+        with self._lock:
+            if stats is not None:
+                entry = (stats, parse_decimals(stats), time.time() + self.ttl)
+            else:
+                previous = self._entries.get(product_id, (None, {}, 0))
+                entry = (previous[0], previous[1], time.time() + self.retry_delay)
+            self._entries[product_id] = entry
+            self._in_flight.pop(product_id).set()
+
+        return entry
+
+    def get(self, product_id):
+        # The product's stats as returned by fetch_product_stats (None while none were fetched successfully)
+        return self._entry(product_id)[0]
+
+    def increments(self, product_id):
+        # (base_increment, quote_increment) as Decimal; (None, None) if unknown
+        decimals = self._entry(product_id)[1]
+        return decimals.get("base_increment"), decimals.get("quote_increment")
+
+    def decimals(self, product_id):
+        # Every parsed field in DECIMAL_FIELDS as Decimal
+        return dict(self._entry(product_id)[1])
+
+    def quantizer(self, product_id):
+        # Quantizer for the product's current increments (None while no stats were fetched)
+        stats = self.get(product_id)
+        if stats is None:
+            return None
+        return get_quantizer(stats["base_increment"], stats["quote_increment"])
+
+    def put(self, product_id, stats):
+        # Use the given stats for the product until the TTL expires (e.g. recorded increments
+        # for a backtest, which must not fetch)
+        with self._lock:
+            self._entries[product_id] = (stats, parse_decimals(stats), time.time() + self.ttl)
+
+    def invalidate(self, product_id=None):
+        # Fetch again on next use (every product if none given)
+        with self._lock:
+            if product_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(product_id, None)
+
+# Process-wide product stats cache
+_product_stats_cache = None
+_product_stats_cache_lock = threading.Lock()
+
+def get_product_stats_cache():
+    global _product_stats_cache
+
+    if _product_stats_cache is None:
+        with _product_stats_cache_lock:
+            if _product_stats_cache is None:
+                _product_stats_cache = ProductStatsCache()
+
+    return _product_stats_cache
+
+def get_product_stats(product_id):
+    return get_product_stats_cache().get(product_id)
+
+# Indicate that product_stats_cache.py module loaded successfully
+info_logger.info("product_stats_cache module loaded successfully")
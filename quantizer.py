@@ -0,0 +1,76 @@
+# quantizer.py
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_EVEN
+from functools import lru_cache
+from logging_config import info_logger
+
+# Rounding modes for quantize()
+FLOOR = "floor"
+CEILING = "ceiling"
+NEAREST = "nearest"
+
+# Rounding mode of each quantize() mode
+DECIMAL_ROUNDING = {FLOOR: ROUND_FLOOR, CEILING: ROUND_CEILING, NEAREST: ROUND_HALF_EVEN}
+
+# Fraction of a tick by which a value may fall short of a tick boundary (float error, e.g.
+# 0.1 + 0.2 = 0.30000000000000004) and still count as reaching it when rounding down or up
+TICK_TOLERANCE = Decimal("1e-9")
+
+@lru_cache(maxsize=1024)
+def to_increment(increment):
+    # Increment (str, float or Decimal, as found in product stats) as a normalised Decimal
+    return Decimal(str(increment)).normalize()
+
+@lru_cache(maxsize=1024)
+def decimal_places(number):
+    # Digits after the decimal point (0.0001 -> 4, 1e-05 -> 5, 10 -> 0)
+    return max(0, -to_increment(number).as_tuple().exponent)
+
+@lru_cache(maxsize=1024)
+def tick(increment):
+    # (increment as float, decimal places), parsed once per distinct increment
+    return float(to_increment(increment)), decimal_places(increment)
+
+def quantize_ticks(value, increment, rounding=NEAREST):
+    # value rounded to a whole number of increments (increment a Decimal). The tick count is worked out
+    # in Decimal from the value's shortest decimal form, so increments that are not a power
+    # of ten (0.05, 0.25) are exact, and the result is the float nearest to the exact decimal.
+    ticks = Decimal(str(value)) / increment
+
+    if rounding == FLOOR:
+        ticks += TICK_TOLERANCE
+    elif rounding == CEILING:
+        ticks -= TICK_TOLERANCE
+
+    return float(ticks.to_integral_value(DECIMAL_ROUNDING[rounding]) * increment)
+
+def quantize(value, increment, rounding=NEAREST):
+    # Same, for an increment as found in product stats
+    return quantize_ticks(value, to_increment(increment), rounding)
+
+class Quantizer:
+    # Price and size quantisation for one product, built once from its increments
+
+    def __init__(self, base_increment, quote_increment):
+        self.base_increment = to_increment(base_increment)
+        self.quote_increment = to_increment(quote_increment)
+        self.base_decimals = decimal_places(base_increment)
+        self.quote_decimals = decimal_places(quote_increment)
+
+    def price(self, value, rounding=NEAREST):
+        return quantize_ticks(value, self.quote_increment, rounding)
+
+    def size(self, value, rounding=FLOOR):
+        # Sizes round down by default so an order never exceeds the funds it was sized from
+        return quantize_ticks(value, self.base_increment, rounding)
+
+    def quote(self, value, rounding=NEAREST):
+        # Quote currency amounts (e.g. a buy order's funds) round to the quote increment
+        return quantize_ticks(value, self.quote_increment, rounding)
+
+@lru_cache(maxsize=256)
+def get_quantizer(base_increment, quote_increment):
+    # Shared quantizer for a pair of increments
+    return Quantizer(base_increment, quote_increment)
+
+# Indicate that quantizer.py module loaded successfully
+info_logger.info("quantizer module loaded successfully")
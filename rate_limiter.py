@@ -0,0 +1,261 @@
+# rate_limiter.py
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import Counter
+from requests.exceptions import RequestException
+from logging_config import info_logger, error_logger
+
+# Process-wide token buckets for every Coinbase request, one for signed (private) and one for
+# public traffic. Waiting requests are served by priority lane, and the lower lanes keep a
+# reserve of tokens untouched and give up after a bounded wait, so under pressure market data
+# and status polling are shed before order placements are delayed. Candle backfill runs in the
+# lowest lane: it only uses tokens nobody else needs, but waits for them instead of being shed.
+
+# Requests per second (and burst size) of each bucket, under the Advanced Trade private limit
+# of 30/s and the public limit of 10/s (override with PORTALX_PRIVATE_RATE and PORTALX_PUBLIC_RATE)
+PRIVATE_REQUESTS_PER_SECOND = float(os.environ.get("PORTALX_PRIVATE_RATE", 25))
+PUBLIC_REQUESTS_PER_SECOND = float(os.environ.get("PORTALX_PUBLIC_RATE", 8))
+
+# Buckets
+PRIVATE = "private"
+PUBLIC = "public"
+
+# Priority lanes, highest first
+CANCEL = 0
+PLACE = 1
+ORDER_STATUS = 2
+MARKET_DATA = 3
+BACKFILL = 4
+
+LANE_NAMES = {CANCEL: "cancel", PLACE: "place", ORDER_STATUS: "order_status", MARKET_DATA: "market_data", BACKFILL: "backfill"}
+
+# Share of a bucket's burst each lane leaves untouched for the lanes above it
+LANE_RESERVE = {CANCEL: 0.0, PLACE: 0.0, ORDER_STATUS: 0.2, MARKET_DATA: 0.4, BACKFILL: 0.5}
+
+# Seconds a request in each lane waits for a token before it is shed (None: as long as it takes)
+LANE_MAX_WAIT = {CANCEL: None, PLACE: None, ORDER_STATUS: 10, MARKET_DATA: 5, BACKFILL: None}
+
+# Seconds a bucket pauses after a 429 response without a Retry-After header
+DEFAULT_RETRY_AFTER = 1.0
+
+class RequestShed(RequestException):
+    # A request dropped by the rate limiter instead of being sent
+    pass
+
+def request_priority(method, endpoint):
+    # Lane of a Coinbase request
+    if endpoint.endswith("/orders/batch_cancel"):
+        return CANCEL
+    if method == "POST" and endpoint.endswith("/orders"):
+        return PLACE
+    if "/orders" in endpoint:
+        return ORDER_STATUS
+    return MARKET_DATA
+
+class TokenBucket:
+
+    def __init__(self, name, rate, burst=None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst or rate
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waiters = []  # heap of (lane, sequence, waiter)
+
+    def refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def threshold(self, lane):
+        # Tokens the bucket must hold to grant a request in the lane
+        return 1 + LANE_RESERVE[lane] * self.burst
+
+    def available(self, lane, now):
+        return now >= self.paused_until and self.tokens >= self.threshold(lane)
+
+    def ready_at(self, lane, now):
+        # When a request in the lane can next be granted
+        return max(self.paused_until, now + max(0.0, self.threshold(lane) - self.tokens) / self.rate)
+
+class Waiter:
+    # One queued request; grant() wakes the thread or coroutine waiting on it
+
+    def __init__(self, lane, grant):
+        self.lane = lane
+        self.grant = grant
+        self.granted = False
+        self.cancelled = False
+
+class RateLimiter:
+
+    def __init__(self, private_rate=PRIVATE_REQUESTS_PER_SECOND, public_rate=PUBLIC_REQUESTS_PER_SECOND):
+        self.buckets = {PRIVATE: TokenBucket(PRIVATE, private_rate), PUBLIC: TokenBucket(PUBLIC, public_rate)}
+        self.granted = Counter()  # (bucket, lane name) -> requests let through
+        self.shed = Counter()  # (bucket, lane name) -> requests dropped
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def _try_take(self, bucket, lane, now):
+        # Take a token straight away if nothing of the same or a higher priority is queued
+        bucket.refill(now)
+        while bucket.waiters and bucket.waiters[0][2].cancelled:
+            heapq.heappop(bucket.waiters)
+        if bucket.waiters and bucket.waiters[0][0] <= lane:
+            return False
+        if not bucket.available(lane, now):
+            return False
+
+        bucket.tokens -= 1
+        self.granted[bucket.name, LANE_NAMES[lane]] += 1
+        return True
+
+    def _enqueue(self, bucket, lane, grant):
+        waiter = Waiter(lane, grant)
+        heapq.heappush(bucket.waiters, (lane, next(self._sequence), waiter))
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run_dispatcher, name="rate-limiter", daemon=True)
+            self._thread.start()
+        self._condition.notify_all()
+        return waiter
+
+    def _give_up(self, bucket, waiter):
+        # Called with the condition held when a waiter's wait ran out; True if it was granted
+        # in the meantime, otherwise it is shed
+        if waiter.granted:
+            return True
+
+        waiter.cancelled = True
+        self.shed[bucket.name, LANE_NAMES[waiter.lane]] += 1
+        info_logger.info("Rate limiter shed a %s request (%s bucket)", LANE_NAMES[waiter.lane], bucket.name)
+        return False
+
+    def acquire(self, bucket_name, lane):
+        # Block until the request may be sent; raises RequestShed if its lane's wait runs out
+        bucket = self.buckets[bucket_name]
+        with self._condition:
+            if self._try_take(bucket, lane, time.monotonic()):
+                return
+
+            event = threading.Event()
+            waiter = self._enqueue(bucket, lane, event.set)
+
+        if event.wait(LANE_MAX_WAIT[lane]):
+            return
+
+        with self._condition:
+            if not self._give_up(bucket, waiter):
+                raise RequestShed(f"Rate limit: {LANE_NAMES[lane]} request shed")
+
+    async def acquire_async(self, bucket_name, lane):
+        # Coroutine counterpart of acquire for the asyncio client
+        bucket = self.buckets[bucket_name]
+        with self._condition:
+            if self._try_take(bucket, lane, time.monotonic()):
+                return
+
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+
+            def grant():
+                loop.call_soon_threadsafe(lambda: future.done() or future.set_result(True))
+
+            waiter = self._enqueue(bucket, lane, grant)
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), LANE_MAX_WAIT[lane])
+            return
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # A cancelled task's request is never sent, so it must not take a token
+            with self._condition:
+                waiter.cancelled = not waiter.granted
+            raise
+
+        with self._condition:
+            if not self._give_up(bucket, waiter):
+                raise RequestShed(f"Rate limit: {LANE_NAMES[lane]} request shed")
+
+    def pause(self, bucket_name, seconds=DEFAULT_RETRY_AFTER):
+        # Hold back every request of the bucket after the exchange answered 429
+        bucket = self.buckets[bucket_name]
+        with self._condition:
+            bucket.paused_until = max(bucket.paused_until, time.monotonic() + seconds)
+            bucket.tokens = min(bucket.tokens, 0.0)
+            self._condition.notify_all()
+        error_logger.error(f"Rate limited by the exchange: {bucket_name} requests paused for {seconds} s")
+
+    def _dispatch(self, now):
+        # Grant queued requests in lane order while tokens last; returns seconds until the next
+        # grant is possible (None with nothing queued)
+        next_wait = None
+
+        for bucket in self.buckets.values():
+            bucket.refill(now)
+            waiters = bucket.waiters
+
+            while waiters:
+                lane, _, waiter = waiters[0]
+                if waiter.cancelled:
+                    heapq.heappop(waiters)
+                    continue
+                if not bucket.available(lane, now):
+                    wait = bucket.ready_at(lane, now) - now
+                    next_wait = wait if next_wait is None else min(next_wait, wait)
+                    break
+
+                heapq.heappop(waiters)
+                bucket.tokens -= 1
+                waiter.granted = True
+                self.granted[bucket.name, LANE_NAMES[lane]] += 1
+                waiter.grant()
+
+        return next_wait
+
+    def _run_dispatcher(self):
+        with self._condition:
+            while True:
+                wait = self._dispatch(time.monotonic())
+                self._condition.wait(wait if wait is None else max(wait, 0.001))
+
+    def stats(self):
+        # Requests let through and shed, by bucket and lane
+        with self._condition:
+            return {
+                "granted": {f"{bucket} {lane}": count for (bucket, lane), count in sorted(self.granted.items())},
+                "shed": {f"{bucket} {lane}": count for (bucket, lane), count in sorted(self.shed.items())},
+                "queued": {name: sum(not waiter.cancelled for _, _, waiter in bucket.waiters) for name, bucket in self.buckets.items()},
+            }
+
+def retry_after(headers):
+    # Seconds from a 429 response's Retry-After header
+    try:
+        return float(headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+# Process-wide rate limiter shared by the blocking and asyncio clients, created on first use
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    global _rate_limiter
+
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter()
+                info_logger.info("Rate limiter created (private %s/s, public %s/s)", PRIVATE_REQUESTS_PER_SECOND, PUBLIC_REQUESTS_PER_SECOND)
+
+    return _rate_limiter
+
+# Indicate that rate_limiter.py module loaded successfully
+info_logger.info("rate_limiter module loaded successfully")
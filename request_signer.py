@@ -0,0 +1,123 @@
+# request_signer.py
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+from logging_config import info_logger, error_logger
+
+try:
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+except ImportError:  # Only needed for CDP (JWT) API keys
+    serialization = None
+
+# Host named in JWT request claims when the caller gives none
+DEFAULT_HOST = "api.coinbase.com"
+
+# Seconds a JWT is valid (Coinbase accepts at most two minutes)
+JWT_LIFETIME = 120
+
+def to_bytes(body):
+    if isinstance(body, bytes):
+        return body
+    return (body or "").encode("utf-8")
+
+def base64url(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+class HmacSigner:
+    # Legacy API keys: HMAC-SHA256 of timestamp + method + path + body. The secret is keyed
+    # into an HMAC object once; each request copies it instead of re-deriving the key pads.
+
+    def __init__(self, api_key, api_secret):
+        self.api_key = api_key
+        self._keyed = hmac.new(api_secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def signature(self, timestamp, method, endpoint, body=b""):
+        mac = self._keyed.copy()
+        mac.update(f"{timestamp}{method}{endpoint}".encode("utf-8"))
+        mac.update(to_bytes(body))
+        return mac.hexdigest()
+
+    def headers(self, method, endpoint, body=b"", host=DEFAULT_HOST):
+        # Sign exactly the bytes that will be sent
+        timestamp = str(int(time.time()))
+        return {
+            'CB-ACCESS-KEY': self.api_key,
+            'CB-ACCESS-SIGN': self.signature(timestamp, method, endpoint, body),
+            'CB-ACCESS-TIMESTAMP': timestamp,
+        }
+
+    def websocket_fields(self, channel, product_ids=()):
+        # Fields added to a WebSocket subscribe message
+        timestamp = str(int(time.time()))
+        mac = self._keyed.copy()
+        mac.update((timestamp + channel + ",".join(product_ids)).encode("utf-8"))
+        return {"api_key": self.api_key, "timestamp": timestamp, "signature": mac.hexdigest()}
+
+class JwtSigner:
+    # CDP API keys: the key name ("organizations/{org}/apiKeys/{key}") and an EC private key in
+    # PEM format. Every request carries a short-lived ES256 JWT bound to its method and path.
+    # The private key is loaded once; the JWT header and claims are small JSON documents.
+
+    def __init__(self, key_name, private_key_pem):
+        if serialization is None:
+            raise ImportError("The cryptography package is required for CDP (JWT) API keys")
+
+        self.api_key = key_name
+        self._private_key = serialization.load_pem_private_key(private_key_pem.encode("utf-8"), password=None)
+
+    def token(self, uri=None):
+        now = int(time.time())
+        header = {"alg": "ES256", "kid": self.api_key, "nonce": secrets.token_hex(16), "typ": "JWT"}
+        claims = {"sub": self.api_key, "iss": "cdp", "nbf": now, "exp": now + JWT_LIFETIME}
+        if uri is not None:
+            claims["uri"] = uri
+
+        signing_input = base64url(json.dumps(header, separators=(",", ":")).encode("utf-8")) + b"." + base64url(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+
+        # JWS wants the raw 64 byte r || s signature rather than DER
+        r, s = decode_dss_signature(self._private_key.sign(signing_input, ec.ECDSA(hashes.SHA256())))
+        signature = r.to_bytes(32, "big") + s.to_bytes(32, "big")
+
+        return (signing_input + b"." + base64url(signature)).decode("ascii")
+
+    def headers(self, method, endpoint, body=b"", host=DEFAULT_HOST):
+        # The JWT covers the method, host and path (without the query string); the body is not signed
+        return {"Authorization": f"Bearer {self.token(f'{method} {host}{endpoint}')}"}
+
+    def websocket_fields(self, channel, product_ids=()):
+        return {"jwt": self.token()}
+
+def create_signer(api_key, api_secret):
+    # CDP keys come with a PEM private key; anything else is a legacy HMAC secret
+    if "PRIVATE KEY-----" in api_secret:
+        return JwtSigner(api_key, api_secret.replace("\\n", "\n"))
+    return HmacSigner(api_key, api_secret)
+
+# Signers by credentials, created on first use
+_signers = {}
+_signers_lock = threading.Lock()
+
+def get_signer(api_key, api_secret):
+    # Shared signer for the credentials; None (logged) if either is missing
+    if not api_key or not api_secret:
+        error_logger.error("Error: API key and/or API secret is missing.")
+        return None
+
+    signer = _signers.get((api_key, api_secret))
+    if signer is None:
+        with _signers_lock:
+            signer = _signers.get((api_key, api_secret))
+            if signer is None:
+                signer = _signers[(api_key, api_secret)] = create_signer(api_key, api_secret)
+                info_logger.info("%s created", type(signer).__name__)
+
+    return signer
+
+# Indicate that request_signer.py module loaded successfully
+info_logger.info("request_signer module loaded successfully")
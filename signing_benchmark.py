@@ -0,0 +1,78 @@
+# signing_benchmark.py
+import hashlib
+import hmac
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+# Logs of benchmark runs go to a temporary directory instead of the bot's log files (unless PORTALX_LOG_DIR is set)
+os.environ.setdefault("PORTALX_LOG_DIR", tempfile.mkdtemp(prefix="portalx-logs-"))
+
+from request_signer import HmacSigner, JwtSigner, serialization
+
+# Signed requests per measurement
+REQUESTS = 100000
+
+# Stand-in credentials (legacy keys are base64 secrets of this length)
+API_KEY = "benchmark-key"
+API_SECRET = "c2VjcmV0LXNlY3JldC1zZWNyZXQtc2VjcmV0LXNlY3JldC1zZWNyZXQ="
+
+ENDPOINT = "/api/v3/brokerage/orders"
+
+def order_payload():
+    return {
+        "side": "BUY",
+        "order_configuration": {"limit_limit_gtc": {"base_size": "830", "limit_price": "0.119871", "post_only": True}},
+        "product_id": "XLM-USD",
+        "client_order_id": str(uuid.uuid4()),
+    }
+
+def per_request_key(payload):
+    # The old per-order auth classes: key the HMAC for every request and serialise the body
+    # once for the signature and again for the request
+    timestamp = str(int(time.time()))
+    message = timestamp + "POST" + ENDPOINT + json.dumps(payload)
+    signature = hmac.new(API_SECRET.encode("utf-8"), message.encode("utf-8"), digestmod=hashlib.sha256).hexdigest()
+    body = json.dumps(payload)
+    return {"CB-ACCESS-SIGN": signature, "CB-ACCESS-TIMESTAMP": timestamp}, body
+
+def signer_request(signer):
+    def sign(payload):
+        # Serialise once and sign those bytes with the signer's keyed HMAC (or JWT)
+        body = json.dumps(payload).encode("utf-8")
+        return signer.headers("POST", ENDPOINT, body), body
+    return sign
+
+def time_signing(sign, requests):
+    payloads = [order_payload() for _ in range(min(requests, 1000))]
+    start_time = time.perf_counter()
+    for index in range(requests):
+        sign(payloads[index % len(payloads)])
+    return (time.perf_counter() - start_time) / requests * 1e6
+
+def main(requests=REQUESTS):
+    results = {
+        "HMAC keyed per request, body serialised twice": time_signing(per_request_key, requests),
+        "HmacSigner (keyed once, copied), body serialised once": time_signing(signer_request(HmacSigner(API_KEY, API_SECRET)), requests),
+    }
+
+    if serialization is not None:
+        from cryptography.hazmat.primitives.asymmetric import ec
+
+        pem = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL, serialization.NoEncryption()
+        ).decode("utf-8")
+        signer = JwtSigner("organizations/benchmark/apiKeys/benchmark", pem)
+        results["JwtSigner (ES256, CDP keys)"] = time_signing(signer_request(signer), max(requests // 20, 1))
+    else:
+        print("cryptography is not installed; skipping the JWT signer")
+
+    for name, microseconds in results.items():
+        print(f"{name:>54}: {microseconds:7.2f} us per signed request")
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:2]]
+    main(*args)
@@ -1,7 +1,16 @@
 # starting_input.py
+import json
+import os
 from user_input2 import collect_user_input
 
-user_config = collect_user_input()
+# Load the inputs from a JSON file when PORTALX_USER_CONFIG is set, otherwise prompt the user
+user_config_path = os.environ.get("PORTALX_USER_CONFIG")
+
+if user_config_path:
+    with open(user_config_path, "r") as json_file:
+        user_config = json.load(json_file)
+else:
+    user_config = collect_user_input()
 
 # Store the inputs in a configuration dictionary
-intitial_data = user_config
\ No newline at end of file
+intitial_data = user_config
@@ -0,0 +1,154 @@
+# startup_benchmark.py
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Modules that used to fetch candles/product stats (and RSI) at import time
+BENCHMARK_MODULES = [
+    "bollinger_utils",
+    "order_utils",
+    "repeating_cycle_utils",
+    "compounding_utils",
+    "order_processing_utils",
+    "cycle_set_utils",
+    "cycle_scheduler",
+]
+
+# Sample inputs so that the import runs without prompting
+BENCHMARK_USER_CONFIG = {
+    "base_asset": "XLM",
+    "quote_asset": "USD",
+    "product_id": "XLM-USD",
+    "starting_size_B": 100.0,
+    "starting_size_Q": 10.0,
+    "profit_percent": 0.005,
+    "taker_fee": 0.006,
+    "maker_fee": 0.004,
+    "compound_percent": 50.0,
+    "compounding_option": "partial",
+    "wait_period_unit": "minutes",
+    "first_order_wait_period": 1,
+    "chart_interval": 60,
+    "num_intervals": 300,
+    "window_size": 20,
+    "stacking": "False",
+    "step_price": "False",
+}
+
+BENCHMARK_API_CONFIG = {
+    "api_key": "benchmark-key",
+    "api_secret": "benchmark-secret",
+}
+
+# Fail the benchmark if importing everything takes longer than this (seconds)
+MAX_IMPORT_SECONDS = 5.0
+
+def run_import_probe():
+    # Runs in a fresh interpreter: block and count every outbound connection, then time each import
+    connection_attempts = []
+
+    def blocked_connect(self, address):
+        connection_attempts.append(str(address))
+        raise OSError(f"Network access attempted during import: {address}")
+
+    def blocked_create_connection(address, *args, **kwargs):
+        connection_attempts.append(str(address))
+        raise OSError(f"Network access attempted during import: {address}")
+
+    socket.socket.connect = blocked_connect
+    socket.create_connection = blocked_create_connection
+
+    timings = {}
+    errors = {}
+    start_time = time.perf_counter()
+
+    for module_name in BENCHMARK_MODULES:
+        module_start = time.perf_counter()
+        try:
+            __import__(module_name)
+        except Exception as e:
+            errors[module_name] = repr(e)
+        timings[module_name] = time.perf_counter() - module_start
+
+    result = {
+        "total_seconds": time.perf_counter() - start_time,
+        "module_seconds": timings,
+        "connection_attempts": connection_attempts,
+        "errors": errors,
+    }
+
+    sys.stdout.write("PORTALX_PROBE_RESULT " + json.dumps(result) + "\n")
+
+def benchmark_startup(runs=5):
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    results = []
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        user_config_path = os.path.join(work_dir, "user_config.json")
+        api_config_path = os.path.join(work_dir, "api_config.json")
+
+        with open(user_config_path, "w") as json_file:
+            json.dump(BENCHMARK_USER_CONFIG, json_file)
+        with open(api_config_path, "w") as json_file:
+            json.dump(BENCHMARK_API_CONFIG, json_file)
+
+        env = dict(os.environ)
+        env["PORTALX_USER_CONFIG"] = user_config_path
+        env["PORTALX_API_CONFIG"] = api_config_path
+        env["PYTHONPATH"] = package_dir + os.pathsep + env.get("PYTHONPATH", "")
+
+        for _ in range(runs):
+            # Run from the temporary directory so log files are not written into the repository
+            completed = subprocess.run(
+                [sys.executable, os.path.join(package_dir, "startup_benchmark.py"), "--probe"],
+                cwd=work_dir, env=env, capture_output=True, text=True,
+            )
+
+            for line in completed.stdout.splitlines():
+                if line.startswith("PORTALX_PROBE_RESULT "):
+                    results.append(json.loads(line[len("PORTALX_PROBE_RESULT "):]))
+                    break
+            else:
+                raise RuntimeError(f"Import probe failed:\n{completed.stderr}")
+
+    totals = [result["total_seconds"] for result in results]
+    summary = {
+        "runs": runs,
+        "median_seconds": statistics.median(totals),
+        "max_seconds": max(totals),
+        "module_seconds": {
+            module_name: statistics.median(result["module_seconds"][module_name] for result in results)
+            for module_name in BENCHMARK_MODULES
+        },
+        "connection_attempts": sum(len(result["connection_attempts"]) for result in results),
+        "errors": results[-1]["errors"],
+    }
+
+    return summary
+
+def main():
+    summary = benchmark_startup()
+
+    print(f"Import of {len(BENCHMARK_MODULES)} modules over {summary['runs']} runs:")
+    print(f"  median: {summary['median_seconds'] * 1000:.1f} ms, max: {summary['max_seconds'] * 1000:.1f} ms")
+    for module_name, seconds in summary["module_seconds"].items():
+        print(f"  {module_name}: {seconds * 1000:.1f} ms")
+    print(f"  network connection attempts: {summary['connection_attempts']}")
+
+    if summary["errors"]:
+        print(f"  import errors: {summary['errors']}")
+
+    passed = not summary["errors"] and summary["connection_attempts"] == 0 and summary["max_seconds"] <= MAX_IMPORT_SECONDS
+    print("PASS" if passed else "FAIL")
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    if "--probe" in sys.argv:
+        run_import_probe()
+    else:
+        sys.exit(main())
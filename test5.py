@@ -2,7 +2,8 @@ import requests
 from coinbase_auth import config_data, create_signed_request
 from user_input2 import user_config
 from logging_config import app_logger, info_logger, error_logger
-from repeating_cycle_utils import determine_next_open_sell_order_price_with_retry, current_rsi
+from repeating_cycle_utils import determine_next_open_sell_order_price_with_retry
+from market_context import market_context
 from coinbase_utils import fetch_product_stats
 
 # Define your Coinbase API key
@@ -78,6 +79,6 @@ product_stats = fetch_product_stats(user_config["product_id"], api_key, headers)
 
 profit_percent = user_config["profit_percent"]
 
-open_price_sell = determine_next_open_sell_order_price_with_retry(profit_percent, current_rsi, product_stats["quote_increment"], max_iterations=10)
+open_price_sell = determine_next_open_sell_order_price_with_retry(profit_percent, market_context.current_rsi, product_stats["quote_increment"], max_iterations=10)
 
 app_logger.info("Open sell order price: %s", open_price_sell)
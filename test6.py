@@ -36,5 +36,5 @@ app_logger.info("Cycle set instance: %s", cycle_set_instance)
 sell_buy_cycle_instance.cycle_number = cycle_set_instance.cycle_number
 print(f"Starting next sell_buy cycle, Cycle {sell_buy_cycle_instance.cycle_number} of CycleSet {cycle_set_instance.cycleset_number} {cycle_set_instance.cycle_type}")
 
-# Call the method on the instance
-cycle_set_instance.place_next_sell_buy_cycle_orders(open_size_B, open_price_sell, sell_buy_cycle_instance)
+# Run the cycle set on the cycle scheduler (it prices its own opening orders from the market)
+cycle_set_instance.run_on_scheduler()
@@ -1,43 +1,232 @@
 # test7.py
+import asyncio
+import itertools
+import os
+import tempfile
+import time
 import unittest
-from unittest.mock import patch, MagicMock
-from cycle_set_utils import CycleSet  # Assuming the class containing the method to be tested is named CycleSet in the cycle_set_utils module
+from unittest.mock import patch
+
+# Logs of test runs go to a temporary directory instead of the bot's log files (unless PORTALX_LOG_DIR is set)
+os.environ.setdefault("PORTALX_LOG_DIR", tempfile.mkdtemp(prefix="portalx-logs-"))
+
+from cycle_set_utils import CycleSet
+from cycle_scheduler import CycleScheduler, ProductMarketFeed
+from market_data import MarketDataHub
+from order_state import OrderStateTable, OrderStatusPoller, order_state_table
+
+# Market snapshot meeting the opening sell conditions (RSI above 50, price above the 24 hour mean)
+SNAPSHOT = {"upper_bb": 0.1215, "lower_bb": 0.1185, "mean24": 0.1190, "long_term_ma24": 0.119, "current_rsi": 60, "quote_increment": "0.000001", "base_increment": "1"}
+
+class FilledOrdersClient:
+    # Async client stand-in whose limit orders fill as soon as they are placed
+
+    def __init__(self, cycles_to_fill, prefix="order"):
+        self.prefix = prefix  # Order IDs are kept apart from other tests' in the shared order state table
+        self.order_ids = itertools.count()
+        self.orders = {}
+        self.cycles_to_fill = cycles_to_fill  # Orders beyond 2 * cycles_to_fill are left resting
+        self.cancelled = []
+
+    async def get_current_price(self, product_id):
+        return 0.12
+
+    async def get_best_bid_ask(self, product_id):
+        return 0.1199, 0.1201
+
+    async def post_order(self, payload, description):
+        order_id = f"{self.prefix}-{next(self.order_ids)}"
+        self.orders[order_id] = payload
+        order_state_table.track(order_id, payload["product_id"])
+        if len(self.orders) <= 2 * self.cycles_to_fill:
+            order_state_table.update([{"order_id": order_id, "status": "FILLED"}])
+        return order_id
+
+    async def get_order(self, order_id):
+        payload = self.orders[order_id]
+        configuration = payload["order_configuration"]["limit_limit_gtc"]
+        size, price = float(configuration["base_size"]), float(configuration["limit_price"])
+        value, fee = size * price, size * price * 0.004
+        return {"order": {"order_id": order_id, "product_id": payload["product_id"], "status": "FILLED", "completion_percentage": "100", "filled_size": size, "filled_value": value, "total_fees": fee, "total_value_after_fees": value - fee if payload["side"] == "SELL" else value + fee}}
+
+    async def cancel_orders(self, order_ids):
+        self.cancelled.extend(order_ids)
+        return [{"success": True, "order_id": order_id} for order_id in order_ids]
+
+    async def close(self):
+        pass
+
+class LadderClient(FilledOrdersClient):
+    # Async client stand-in whose orders fill by the given share as soon as they are placed (the
+    # rest of the order keeps resting until it is cancelled)
+
+    def __init__(self, filled):
+        super().__init__(cycles_to_fill=0, prefix="rung")
+        self.filled = filled  # Order number -> share filled; orders not listed are left resting
+
+    async def post_order(self, payload, description):
+        order_id = await super().post_order(payload, description)
+        if self.filled.get(len(self.orders) - 1) == 1:
+            order_state_table.update([{"order_id": order_id, "status": "FILLED"}])
+        return order_id
+
+    async def post_orders(self, payloads, description, window=None):
+        return [await self.post_order(payload, description) for payload in payloads]
+
+    async def get_order(self, order_id):
+        order_details = await super().get_order(order_id)
+        order, share = order_details["order"], self.filled.get(int(order_id.rsplit("-", 1)[1]), 0)
+        for name in ("filled_size", "filled_value", "total_fees", "total_value_after_fees"):
+            order[name] *= share
+        order["status"] = order_state_table.get_status(order_id)
+        return order_details
+
+    async def cancel_orders(self, order_ids):
+        order_state_table.update([{"order_id": order_id, "status": "CANCELLED"} for order_id in order_ids])
+        return await super().cancel_orders(order_ids)
 
 class TestPlaceNextSellBuyCycleOrders(unittest.TestCase):
 
-    @patch('cycle_set_utils.place_next_opening_cycle_sell_order')
-    @patch('cycle_set_utils.wait_for_order')
-    @patch('cycle_set_utils.place_next_closing_cycle_buy_order')
-    @patch('cycle_set_utils.calculate_rsi')
-    @patch('cycle_set_utils.determine_next_open_sell_order_price_with_retry')
-    @patch('cycle_set_utils.calculate_open_limit_sell_compounding_amt_B')
-    @patch('cycle_set_utils.determine_next_open_size_B_limit')
-    @patch('cycle_set_utils.calculate_close_limit_buy_compounding_amt_Q')
-    @patch('cycle_set_utils.determine_next_close_size_Q_limit')
-    def test_place_next_sell_buy_cycle_orders(self, mock_determine_next_close_size_Q_limit, mock_calculate_close_limit_buy_compounding_amt_Q,
-                                               mock_determine_next_open_size_B_limit, mock_calculate_open_limit_sell_compounding_amt_B,
-                                               mock_determine_next_open_sell_order_price_with_retry, mock_calculate_rsi,
-                                               mock_place_next_closing_cycle_buy_order, mock_wait_for_order, mock_place_next_opening_cycle_sell_order):
-        # Mocking external dependencies
-        mock_determine_next_close_size_Q_limit.return_value = 10.8  # Mocking return value for determine_next_close_size_Q_limit
-        mock_calculate_close_limit_buy_compounding_amt_Q.return_value = (0.08729399999999998, 10.819299)  # Mocking return value for calculate_close_limit_buy_compounding_amt_Q
-        mock_determine_next_open_size_B_limit.return_value = 100  # Mocking return value for determine_next_open_size_B_limit
-        mock_calculate_open_limit_sell_compounding_amt_B.return_value = (1.0, 90.0)  # Mocking return value for calculate_open_limit_sell_compounding_amt_B
-        mock_determine_next_open_sell_order_price_with_retry.return_value = 0.11  # Mocking return value for determine_next_open_sell_order_price_with_retry
-        mock_calculate_rsi.return_value = 50  # Mocking return value for calculate_rsi
-        mock_place_next_opening_cycle_sell_order.return_value = 'open_order_id_sell'  # Mocking return value for place_next_opening_cycle_sell_order
-        mock_place_next_closing_cycle_buy_order.return_value = 'close_order_id_buy'  # Mocking return value for place_next_closing_cycle_buy_order
-        mock_wait_for_order.return_value = {'status': 'FILLED'}  # Mocking return value for wait_for_order
-
-        # Create an instance of the class containing the method to be tested
-        cycle_set_instance = CycleSet(product_id='XLM-USD', starting_size=100, profit_percent=0.001, taker_fee=0.0055, maker_fee=0.0035, compound_percent=100, compounding_option='100', wait_period_unit='minutes', first_order_wait_period=1, chart_interval=60, num_intervals=20, window_size=20, cycle_type = 'sell_buy')
-
-
-        # Call the method to be tested
-        result = cycle_set_instance.place_next_sell_buy_cycle_orders(100, 0.11, MagicMock())
-
-        # Assertions
-        self.assertEqual(result, ('open_order_id_sell', 'close_order_id_buy'))  # Check if the expected result matches the actual result
+    @patch('order_events.get_order_event_hub')
+    @patch('product_stats_cache.ProductStatsCache._fetch_stats', lambda self, product_id: {"quote_increment": "0.000001", "base_increment": "1"})
+    @patch.object(ProductMarketFeed, '_read_indicators', lambda self: dict(SNAPSHOT))
+    def test_place_next_sell_buy_cycle_orders(self, mock_get_order_event_hub):
+        client = FilledOrdersClient(cycles_to_fill=1)
+        scheduler = CycleScheduler(client=client, refresh_interval=0.05).start()
+
+        # Create a sell-buy cycle set and run it on the scheduler until its second opening order rests
+        cycle_set_instance = CycleSet(product_id='XLM-USD', starting_size=100, profit_percent=0.001, taker_fee=0.0055, maker_fee=0.0035, compound_percent=100, compounding_option='100', wait_period_unit='minutes', first_order_wait_period=1, chart_interval=60, num_intervals=20, window_size=20, cycle_type='sell_buy')
+        scheduler.submit(cycle_set_instance)
+        for _ in range(200):
+            if len(client.orders) == 3:
+                break
+            time.sleep(0.05)
+        scheduler.stop_cycle_set(cycle_set_instance)
+        scheduler.shutdown()
+
+        # Assertions: opening sell, closing buy below it, then the next cycle's opening sell
+        payloads = list(client.orders.values())
+        self.assertEqual([payload["side"] for payload in payloads], ["SELL", "BUY", "SELL"])
+        open_price = float(payloads[0]["order_configuration"]["limit_limit_gtc"]["limit_price"])
+        close_price = float(payloads[1]["order_configuration"]["limit_limit_gtc"]["limit_price"])
+        self.assertLess(close_price, open_price)
+        self.assertEqual(cycle_set_instance.completed_cycles, 1)
+        self.assertEqual(client.cancelled, ["order-2"])  # The resting order is cancelled on stop
+
+    @patch('order_events.get_order_event_hub')
+    @patch('product_stats_cache.ProductStatsCache._fetch_stats', lambda self, product_id: {"quote_increment": "0.000001", "base_increment": "1"})
+    @patch.object(ProductMarketFeed, '_read_indicators', lambda self: dict(SNAPSHOT))
+    @patch('cycle_scheduler.LADDER_FILL_TIMEOUT', 0.1)
+    def test_partially_filled_ladder_closes_filled_size(self, mock_get_order_event_hub):
+        # Five rungs of 20: the first fills, the second fills half, the rest never fill; the
+        # closing buy (order 5) fills
+        client = LadderClient(filled={0: 1, 1: 0.5, 5: 1})
+        scheduler = CycleScheduler(client=client, refresh_interval=0.05).start()
+
+        cycle_set_instance = CycleSet(product_id='XLM-USD', starting_size=100, profit_percent=0.001, taker_fee=0.0055, maker_fee=0.0035, compound_percent=100, compounding_option='100', wait_period_unit='minutes', first_order_wait_period=1, chart_interval=60, num_intervals=20, window_size=20, stacking=True, cycle_type='sell_buy')
+        scheduler.submit(cycle_set_instance)
+        for _ in range(200):
+            if cycle_set_instance.completed_cycles == 1:
+                break
+            time.sleep(0.05)
+        scheduler.stop_cycle_set(cycle_set_instance)
+        scheduler.shutdown()
+
+        # Assertions: the unfilled rungs are cancelled and the closing buy covers the 30 sold
+        payloads = list(client.orders.values())
+        self.assertEqual([payload["side"] for payload in payloads[:6]], ["SELL"] * 5 + ["BUY"])
+        self.assertEqual(client.cancelled[:4], ["rung-1", "rung-2", "rung-3", "rung-4"])
+        close_size = float(payloads[5]["order_configuration"]["limit_limit_gtc"]["base_size"])
+        self.assertGreater(close_size, 29)
+        self.assertLess(close_size, 31)
+        self.assertEqual(cycle_set_instance.completed_cycles, 1)
+
+    @patch('order_events.get_order_event_hub')
+    @patch('product_stats_cache.ProductStatsCache._fetch_stats', lambda self, product_id: None)
+    @patch.object(ProductMarketFeed, '_read_indicators', lambda self: dict(SNAPSHOT))
+    def test_fills_processed_without_product_stats(self, mock_get_order_event_hub):
+        # Product stats cannot be fetched: fills are processed with the snapshot's increments
+        client = FilledOrdersClient(cycles_to_fill=1, prefix="nostats")
+        scheduler = CycleScheduler(client=client, refresh_interval=0.05).start()
+
+        cycle_set_instance = CycleSet(product_id='NOSTATS-USD', starting_size=100, profit_percent=0.001, taker_fee=0.0055, maker_fee=0.0035, compound_percent=100, compounding_option='100', wait_period_unit='minutes', first_order_wait_period=1, chart_interval=60, num_intervals=20, window_size=20, cycle_type='sell_buy')
+        scheduler.submit(cycle_set_instance)
+        for _ in range(200):
+            if cycle_set_instance.completed_cycles == 1:
+                break
+            time.sleep(0.05)
+        scheduler.stop_cycle_set(cycle_set_instance)
+        scheduler.shutdown()
+
+        self.assertEqual(cycle_set_instance.completed_cycles, 1)
+        self.assertNotIn("Failed", cycle_set_instance.cycleset_status)
+
+    @patch('order_events.get_order_event_hub')
+    @patch('product_stats_cache.ProductStatsCache._fetch_stats', lambda self, product_id: {"quote_increment": "0.000001", "base_increment": "1"})
+    @patch.object(ProductMarketFeed, '_read_indicators', lambda self: dict(SNAPSHOT))
+    @patch('cycle_scheduler.FILL_DETAILS_ATTEMPTS', 3)
+    @patch('cycle_scheduler.FILL_DETAILS_RETRY_DELAY', 0.01)
+    def test_missing_fill_details_fail_the_cycle_set(self, mock_get_order_event_hub):
+        # The opening order fills but its details can never be fetched
+        client = FilledOrdersClient(cycles_to_fill=1, prefix="nodetails")
+        client.get_order = lambda order_id: asyncio.sleep(0, result=None)
+        scheduler = CycleScheduler(client=client, refresh_interval=0.05).start()
+        fills = scheduler.fills
+
+        cycle_set_instance = CycleSet(product_id='XLM-USD', starting_size=100, profit_percent=0.001, taker_fee=0.0055, maker_fee=0.0035, compound_percent=100, compounding_option='100', wait_period_unit='minutes', first_order_wait_period=1, chart_interval=60, num_intervals=20, window_size=20, cycle_type='sell_buy')
+        self.assertEqual(scheduler.run(cycle_set_instance, timeout=10), "FAILED")
+        scheduler.shutdown()
+
+        self.assertIn("Failed", cycle_set_instance.cycleset_status)
+        self.assertEqual(len(client.orders), 1)
+        self.assertNotIn(fills._on_status, order_state_table._listeners)  # Removed when the scheduler stopped
+    @patch('order_events.get_order_event_hub')
+    @patch('product_stats_cache.ProductStatsCache._fetch_stats', lambda self, product_id: {"quote_increment": "0.000001", "base_increment": "1"})
+    @patch.object(ProductMarketFeed, '_read_indicators', lambda self: dict(SNAPSHOT))
+    def test_opening_order_placed_on_ticker_update(self, mock_get_order_event_hub):
+        # The price is below the 24 hour mean when the feed refreshes; the ticker update that
+        # lifts it above the mean places the opening sell long before the next refresh
+        hub = MarketDataHub(connect=False)
+        hub.publish('TICK-USD', price=0.1180, best_bid=0.1179, best_ask=0.1181)
+        client = FilledOrdersClient(cycles_to_fill=0, prefix="tick")
+        scheduler = CycleScheduler(client=client, refresh_interval=60, market_data=hub).start()
+
+        cycle_set_instance = CycleSet(product_id='TICK-USD', starting_size=100, profit_percent=0.001, taker_fee=0.0055, maker_fee=0.0035, compound_percent=100, compounding_option='100', wait_period_unit='minutes', first_order_wait_period=1, chart_interval=60, num_intervals=20, window_size=20, cycle_type='sell_buy')
+        scheduler.submit(cycle_set_instance)
+        time.sleep(0.2)
+        self.assertEqual(client.orders, {})
+
+        hub.publish('TICK-USD', price=0.1200, best_bid=0.1199, best_ask=0.1201)
+        for _ in range(100):
+            if client.orders:
+                break
+            time.sleep(0.01)
+        scheduler.stop_cycle_set(cycle_set_instance)
+        scheduler.shutdown()
+
+        self.assertEqual([payload["side"] for payload in client.orders.values()], ["SELL"])
+        self.assertEqual(scheduler.triggers._triggers['TICK-USD'], [])  # Cancelled once it fired
+
+class TestOrderStateTable(unittest.TestCase):
+
+    @patch('order_state.MAX_TERMINAL_ORDERS', 2)
+    def test_dropped_terminal_orders_are_not_polled_again(self):
+        # Three orders fill; the oldest is dropped from the table but keeps its final status
+        table = OrderStateTable()
+        for order_id in ("a", "b", "c"):
+            table.track(order_id, "XLM-USD")
+        table.update([{"order_id": order_id, "status": "FILLED"} for order_id in ("a", "b", "c")])
+
+        poller = OrderStatusPoller(table)
+        with patch.object(OrderStatusPoller, '_list_orders', side_effect=AssertionError("polled")) as list_orders:
+            poller.ensure_fresh(["a", "b", "c"])
+            poller.poll(["a"])
+
+        list_orders.assert_not_called()
+        self.assertFalse(table.is_tracked("a"))
+        self.assertIsNone(table.get("a"))
+        self.assertEqual(table.get_statuses(["a", "b", "c"]), {"a": "FILLED", "b": "FILLED", "c": "FILLED"})
+        self.assertEqual(table.pending_orders(), {})
 
 if __name__ == '__main__':
     unittest.main()
@@ -43,7 +43,7 @@ headers = create_signed_request(api_key, api_secret, method, endpoint, body)
 
 # Fetch the latest product stats from Coinbase API with error handling
 app_logger.info("Fetching product stats for %s", product_id)
-product_stats = fetch_product_stats(product_id, api_key, headers)
+product_stats = fetch_product_stats(product_id)
 
 # Extract the close prices from the historical data
 closing_prices = []
@@ -0,0 +1,274 @@
+# trade_ledger.py
+import os
+import sqlite3
+import threading
+import time
+from logging_config import app_logger, info_logger, error_logger
+
+# Location of the trade ledger database (override with PORTALX_LEDGER_DB)
+LEDGER_DB_PATH = os.environ.get("PORTALX_LEDGER_DB", "ledger.db")
+
+# Seconds between batched writes, and the number of queued writes that triggers one early
+FLUSH_INTERVAL = 1
+FLUSH_BATCH_SIZE = 500
+
+# Statements queued by the record_* methods
+INSERT_CYCLE_SET = "INSERT OR IGNORE INTO cycle_sets VALUES (?, ?, ?, ?, ?)"
+INSERT_CYCLE = "INSERT OR IGNORE INTO cycles (cycleset_id, cycle_number, open_size, started_at) VALUES (?, ?, ?, ?)"
+COMPLETE_CYCLE = "UPDATE cycles SET completed_at = ? WHERE cycleset_id = ? AND cycle_number = ?"
+INSERT_ORDER = "INSERT OR IGNORE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+# The cycle set of a fill (and its product, if the order details had none) is taken from its
+# order, when the order was placed by a cycle set
+INSERT_FILL = """
+    INSERT OR IGNORE INTO fills
+    VALUES (?, (SELECT cycleset_id FROM orders WHERE order_id = ?), COALESCE(?, (SELECT product_id FROM orders WHERE order_id = ?)), ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+class TradeLedger:
+    # Local record of cycle sets, cycles, orders and their fills. Writes are queued and
+    # committed in batches by a background thread; a running total per cycle set is kept by
+    # a trigger so that summaries do not scan the fills. Queries flush the queue first.
+
+    def __init__(self, db_path=LEDGER_DB_PATH, flush_interval=FLUSH_INTERVAL, flush_batch_size=FLUSH_BATCH_SIZE):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn_lock = threading.Lock()
+        self._queue = []  # (statement, parameters) in the order they were recorded
+        self._queue_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        with self._conn_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS cycle_sets (
+                    cycleset_id TEXT PRIMARY KEY,
+                    product_id TEXT NOT NULL,
+                    cycle_type TEXT NOT NULL,
+                    starting_size REAL,
+                    created_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS cycles (
+                    cycleset_id TEXT NOT NULL,
+                    cycle_number INTEGER NOT NULL,
+                    open_size REAL,
+                    started_at REAL NOT NULL,
+                    completed_at REAL,
+                    PRIMARY KEY (cycleset_id, cycle_number)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS orders (
+                    order_id TEXT PRIMARY KEY,
+                    cycleset_id TEXT,
+                    cycle_number INTEGER,
+                    product_id TEXT NOT NULL,
+                    side TEXT NOT NULL,
+                    phase TEXT NOT NULL,
+                    price REAL,
+                    size REAL,
+                    created_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS orders_by_cycle ON orders (cycleset_id, cycle_number);
+                CREATE TABLE IF NOT EXISTS fills (
+                    order_id TEXT PRIMARY KEY,
+                    cycleset_id TEXT,
+                    product_id TEXT,
+                    side TEXT NOT NULL,
+                    phase TEXT NOT NULL,
+                    order_type TEXT NOT NULL,
+                    filled_size REAL,
+                    filled_value REAL,
+                    fee REAL,
+                    spent REAL,
+                    received REAL,
+                    residual REAL,
+                    time REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS fills_by_cycle_set ON fills (cycleset_id, time);
+                CREATE INDEX IF NOT EXISTS fills_by_product ON fills (product_id, time);
+                CREATE TABLE IF NOT EXISTS cycle_set_totals (
+                    cycleset_id TEXT NOT NULL,
+                    product_id TEXT NOT NULL,
+                    fills INTEGER NOT NULL,
+                    closing_fills INTEGER NOT NULL,
+                    fees REAL NOT NULL,
+                    net_base REAL NOT NULL,
+                    net_quote REAL NOT NULL,
+                    last_fill REAL NOT NULL,
+                    PRIMARY KEY (cycleset_id, product_id)
+                ) WITHOUT ROWID;
+                -- A sell spends base and receives quote, a buy the reverse. Fills of orders not
+                -- placed by a cycle set are totalled under an empty cycle set ID.
+                CREATE TRIGGER IF NOT EXISTS fills_update_totals AFTER INSERT ON fills BEGIN
+                    INSERT INTO cycle_set_totals VALUES (
+                        COALESCE(NEW.cycleset_id, ''),
+                        COALESCE(NEW.product_id, ''),
+                        1,
+                        NEW.phase = 'close',
+                        COALESCE(NEW.fee, 0),
+                        CASE WHEN NEW.side = 'BUY' THEN NEW.received ELSE -NEW.spent END,
+                        CASE WHEN NEW.side = 'SELL' THEN NEW.received ELSE -NEW.spent END,
+                        NEW.time
+                    )
+                    ON CONFLICT (cycleset_id, product_id) DO UPDATE SET
+                        fills = fills + 1,
+                        closing_fills = closing_fills + excluded.closing_fills,
+                        fees = fees + excluded.fees,
+                        net_base = net_base + excluded.net_base,
+                        net_quote = net_quote + excluded.net_quote,
+                        last_fill = MAX(last_fill, excluded.last_fill);
+                END;
+            """)
+            self._conn.commit()
+
+        info_logger.info("Trade ledger opened at %s", db_path)
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="trade-ledger-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                error_logger.error(f"An error occurred while writing to the trade ledger: {e}")
+
+    def _enqueue(self, statement, parameters):
+        with self._queue_lock:
+            self._queue.append((statement, parameters))
+            queued = len(self._queue)
+
+        if queued >= self.flush_batch_size:
+            self._flush_requested.set()
+
+    def flush(self):
+        # Commit every queued write in one transaction; consecutive writes of the same kind go
+        # through a single executemany. The queue is taken under the connection lock so that
+        # batches are committed in the order they were recorded.
+        with self._conn_lock:
+            with self._queue_lock:
+                queue, self._queue = self._queue, []
+
+            if not queue:
+                return 0
+
+            with self._conn:
+                start = 0
+                while start < len(queue):
+                    statement = queue[start][0]
+                    end = start
+                    while end < len(queue) and queue[end][0] is statement:
+                        end += 1
+                    self._conn.executemany(statement, [parameters for _, parameters in queue[start:end]])
+                    start = end
+
+        return len(queue)
+
+    def close(self):
+        self._stop.set()
+        self._flush_requested.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+        with self._conn_lock:
+            self._conn.close()
+
+    # Writes
+
+    def record_cycle_set(self, cycleset_id, product_id, cycle_type, starting_size):
+        self._enqueue(INSERT_CYCLE_SET, (cycleset_id, product_id, cycle_type, starting_size, time.time()))
+
+    def record_cycle(self, cycleset_id, cycle_number, open_size):
+        self._enqueue(INSERT_CYCLE, (cycleset_id, cycle_number, open_size, time.time()))
+
+    def complete_cycle(self, cycleset_id, cycle_number):
+        self._enqueue(COMPLETE_CYCLE, (time.time(), cycleset_id, cycle_number))
+
+    def record_order(self, order_id, cycleset_id, cycle_number, product_id, side, phase, price, size):
+        self._enqueue(INSERT_ORDER, (order_id, cycleset_id, cycle_number, product_id, side, phase, price, size, time.time()))
+
+    def record_fill(self, order_id, product_id, side, phase, order_type, filled_size, filled_value, fee, spent, received, residual):
+        # A fill already recorded for the order (e.g. processed again after a restart) is ignored
+        self._enqueue(INSERT_FILL, (order_id, order_id, product_id, order_id, side, phase, order_type, filled_size, filled_value, fee, spent, received, residual, time.time()))
+
+    # Queries
+
+    def _query(self, sql, parameters=()):
+        self.flush()
+        with self._conn_lock:
+            cursor = self._conn.execute(sql, parameters)
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def cycle_set_totals(self, cycleset_id=None):
+        # Running totals per cycle set: fills, completed cycles (closing fills), fees and the net
+        # base and quote currency gained or lost
+        if cycleset_id is None:
+            return self._query("SELECT * FROM cycle_set_totals ORDER BY cycleset_id")
+        return self._query("SELECT * FROM cycle_set_totals WHERE cycleset_id = ?", (cycleset_id,))
+
+    def profit_and_loss(self, cycleset_id, start_time=0, end_time=None):
+        # Net base and quote currency and fees of one cycle set's fills in a time range
+        rows = self._query("""
+            SELECT COUNT(*) AS fills,
+                   COALESCE(SUM(fee), 0) AS fees,
+                   COALESCE(SUM(CASE WHEN side = 'BUY' THEN received ELSE -spent END), 0) AS net_base,
+                   COALESCE(SUM(CASE WHEN side = 'SELL' THEN received ELSE -spent END), 0) AS net_quote
+            FROM fills
+            WHERE cycleset_id = ? AND time BETWEEN ? AND ?
+        """, (cycleset_id, start_time, end_time if end_time is not None else time.time()))
+        return rows[0]
+
+    def cycle_set_orders(self, cycleset_id, limit=100):
+        # Most recent orders of a cycle set with their fill amounts (no fill yet: None)
+        return self._query("""
+            SELECT o.order_id, o.cycle_number, o.side, o.phase, o.price, o.size, o.created_at,
+                   f.filled_size, f.filled_value, f.fee, f.spent, f.received, f.time AS filled_at
+            FROM orders o LEFT JOIN fills f ON f.order_id = o.order_id
+            WHERE o.cycleset_id = ?
+            ORDER BY o.cycle_number DESC, o.created_at DESC
+            LIMIT ?
+        """, (cycleset_id, limit))
+
+    def order(self, order_id):
+        # The order and its fill as recorded in the ledger (None if neither was recorded)
+        orders = self._query("SELECT * FROM orders WHERE order_id = ?", (order_id,))
+        fills = self._query("SELECT * FROM fills WHERE order_id = ?", (order_id,))
+        if not orders and not fills:
+            return None
+
+        order = dict(orders[0]) if orders else {}
+        if fills:
+            fill = fills[0]
+            fill["filled_at"] = fill.pop("time")
+            order.update((key, value) for key, value in fill.items() if value is not None or key not in order)
+        return order
+
+# Process-wide trade ledger, opened on first use
+_trade_ledger = None
+_trade_ledger_lock = threading.Lock()
+
+def get_trade_ledger():
+    global _trade_ledger
+
+    if _trade_ledger is None:
+        with _trade_ledger_lock:
+            if _trade_ledger is None:
+                _trade_ledger = TradeLedger().start()
+                app_logger.info("Trade ledger started")
+
+    return _trade_ledger
+
+# Indicate that trade_ledger.py module loaded successfully
+info_logger.info("trade_ledger module loaded successfully")
@@ -0,0 +1,300 @@
+# trading_loop_benchmark.py
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from startup_benchmark import BENCHMARK_USER_CONFIG, BENCHMARK_API_CONFIG
+
+# End-to-end benchmark of the trading loop: N cycle sets (half sell_buy, half buy_sell) run on
+# the cycle scheduler in a fresh interpreter against the stand-in exchange, user channel and
+# market channel, which run in this process so that the bot's memory and threads are its own.
+
+# Numbers of cycle sets benchmarked by default
+CYCLE_SET_COUNTS = [100, 1000]
+
+# Seconds each run trades for
+DURATION = 60
+
+# Stand-in product's fast price swing (share of the price, and seconds): wide enough for closing
+# orders to fill within a swing, so the cycle sets trade every few minutes
+PRICE_SWING = 0.02
+SWING_PERIOD = 60
+
+# Stand-in exchange latency, jitter (seconds) and injected error rates
+EXCHANGE_LATENCY = 0.02
+EXCHANGE_JITTER = 0.01
+EXCHANGE_ERROR_RATES = {429: 0.0, 503: 0.0}
+
+# Seconds between the scheduler's market snapshot refreshes (90 s in production; shorter here so
+# that a run of DURATION seconds sees several decisions per cycle set)
+FEED_REFRESH_INTERVAL = 1
+
+# Seconds between samples of the bot's thread count
+SAMPLE_INTERVAL = 0.5
+
+# Percentiles reported for each latency
+PERCENTILES = (0.5, 0.9, 0.99)
+
+# Results file (one JSON document with every run)
+RESULTS_PATH = "trading_loop_benchmark.json"
+
+def latency_summary(latencies):
+    # Milliseconds at each percentile, plus the count and maximum
+    from mock_exchange import percentile
+
+    if not latencies:
+        return {"count": 0}
+
+    summary = {"count": len(latencies)}
+    for share in PERCENTILES:
+        summary[f"p{share * 100:g}_ms"] = round(percentile(latencies, share) * 1000, 2)
+    summary["max_ms"] = round(max(latencies) * 1000, 2)
+    return summary
+
+def parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+def run_bot(cycle_sets, duration):
+    # Runs in a fresh interpreter pointed at the stand-ins: trade for `duration` seconds and
+    # print the measurements
+    import cycle_scheduler
+    from async_client import AsyncCoinbaseClient
+    from cycle_journal import get_cycle_journal
+    from cycle_set_utils import CycleSet
+    from market_data import get_market_data_hub
+    from rate_limiter import get_rate_limiter
+    from starting_input import user_config
+    from trade_ledger import get_trade_ledger
+
+    decisions = {}  # client_order_id -> time the order was decided on
+    opening_sides = {}  # task name (cycle set instance ID) -> side of its opening orders
+    opening_fills = {}  # task name -> fill time of its last opening order
+    decision_to_ack = []
+    fill_to_next_order = []
+    acknowledged = []
+
+    # Stamp each order payload as it is decided on
+    limit_order_payload = cycle_scheduler.limit_order_payload
+
+    def timed_limit_order_payload(*args, **kwargs):
+        payload = limit_order_payload(*args, **kwargs)
+        decisions[payload["client_order_id"]] = time.time()
+        return payload
+
+    cycle_scheduler.limit_order_payload = timed_limit_order_payload
+
+    class BenchmarkClient(AsyncCoinbaseClient):
+        # Times each placement from decision to acknowledgement, and each closing placement from
+        # the fill of the opening order before it
+
+        async def post_order(self, payload, description):
+            order_id = await super().post_order(payload, description)
+            now = time.time()
+            decided = decisions.pop(payload["client_order_id"], None)
+            if order_id is None:
+                return None
+
+            acknowledged.append(now)
+            if decided is not None:
+                decision_to_ack.append(now - decided)
+
+            task = asyncio.current_task().get_name()
+            if payload["side"] != opening_sides.get(task):
+                filled = opening_fills.pop(task, None)
+                if filled is not None:
+                    fill_to_next_order.append(now - filled)
+            return order_id
+
+        async def get_order(self, order_id):
+            order_details = await super().get_order(order_id)
+            order = (order_details or {}).get("order", {})
+            task = asyncio.current_task().get_name()
+            if order.get("status") == "FILLED" and order.get("side") == opening_sides.get(task) and order.get("last_fill_time"):
+                opening_fills[task] = parse_time(order["last_fill_time"])
+            return order_details
+
+    scheduler = cycle_scheduler.CycleScheduler(
+        client=BenchmarkClient(cycle_scheduler.api_key, cycle_scheduler.api_secret),
+        refresh_interval=FEED_REFRESH_INTERVAL,
+        journal=get_cycle_journal(),
+        ledger=get_trade_ledger(),
+        market_data=get_market_data_hub(),
+    )
+
+    sets = []
+    start_time = time.perf_counter()
+    for index in range(cycle_sets):
+        cycle_type = "sell_buy" if index % 2 == 0 else "buy_sell"
+        cycle_set = CycleSet(
+            user_config["product_id"],
+            user_config["starting_size_B"] if cycle_type == "sell_buy" else user_config["starting_size_Q"],
+            user_config["profit_percent"],
+            user_config["taker_fee"],
+            user_config["maker_fee"],
+            user_config["compound_percent"],
+            user_config["compounding_option"],
+            user_config["wait_period_unit"],
+            user_config["first_order_wait_period"],
+            user_config["chart_interval"],
+            user_config["num_intervals"],
+            user_config["window_size"],
+            user_config["stacking"],
+            user_config["step_price"],
+            cycle_type=cycle_type,
+        )
+        opening_sides[cycle_set.cycleset_instance_id] = "SELL" if cycle_type == "sell_buy" else "BUY"
+        scheduler.submit(cycle_set)
+        sets.append(cycle_set)
+    submit_seconds = time.perf_counter() - start_time
+
+    # Trade, sampling the thread count
+    peak_threads = threading.active_count()
+    trade_start = time.time()
+    while time.time() - trade_start < duration:
+        time.sleep(SAMPLE_INTERVAL)
+        peak_threads = max(peak_threads, threading.active_count())
+    trading_seconds = time.time() - trade_start
+    placed = [ack for ack in acknowledged if ack >= trade_start]
+
+    start_time = time.perf_counter()
+    scheduler.shutdown()
+    shutdown_seconds = time.perf_counter() - start_time
+
+    result = {
+        "submit_seconds": round(submit_seconds, 3),
+        "trading_seconds": round(trading_seconds, 3),
+        "shutdown_seconds": round(shutdown_seconds, 3),
+        "orders_placed": len(acknowledged),
+        "orders_per_second": round(len(placed) / trading_seconds, 2),
+        "completed_cycles": sum(cycle_set.completed_cycles for cycle_set in sets),
+        "failed_cycle_sets": sum(cycle_set.cycleset_status.endswith("Failed") for cycle_set in sets),
+        "decision_to_ack": latency_summary(decision_to_ack),
+        "fill_to_next_order": latency_summary(fill_to_next_order),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),  # ru_maxrss is in KiB on Linux
+        "peak_threads": peak_threads,
+        "rate_limiter": get_rate_limiter().stats(),
+    }
+    sys.stdout.write("PORTALX_BENCHMARK_RESULT " + json.dumps(result) + "\n")
+
+def benchmark_run(cycle_sets, duration=DURATION):
+    # One run against fresh stand-ins; returns the bot's measurements with the exchange's counts
+    from mock_exchange import MockExchange, MockProduct
+    from mock_market_channel import MockMarketChannelServer
+    from mock_user_channel import MockUserChannelServer
+
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    product_id = BENCHMARK_USER_CONFIG["product_id"]
+    user_channel = MockUserChannelServer().start()
+    market_channel = MockMarketChannelServer().start()
+    exchange = MockExchange(
+        products={product_id: MockProduct(product_id, 0.12, "1", "0.000001", swing=PRICE_SWING, swing_period=SWING_PERIOD)},
+        latency=EXCHANGE_LATENCY,
+        jitter=EXCHANGE_JITTER,
+        error_rates=EXCHANGE_ERROR_RATES,
+        user_channel=user_channel,
+        market_channel=market_channel,
+    ).start()
+
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            user_config_path = os.path.join(work_dir, "user_config.json")
+            api_config_path = os.path.join(work_dir, "api_config.json")
+
+            with open(user_config_path, "w") as json_file:
+                json.dump(BENCHMARK_USER_CONFIG, json_file)
+            with open(api_config_path, "w") as json_file:
+                json.dump(BENCHMARK_API_CONFIG, json_file)
+
+            env = dict(os.environ)
+            env["PORTALX_USER_CONFIG"] = user_config_path
+            env["PORTALX_API_CONFIG"] = api_config_path
+            env["PORTALX_API_URL"] = env["PORTALX_EXCHANGE_URL"] = exchange.url
+            env["PORTALX_USER_WS_URL"] = user_channel.url
+            env["PORTALX_MARKET_WS_URL"] = market_channel.url
+            env["PYTHONPATH"] = package_dir + os.pathsep + env.get("PYTHONPATH", "")
+
+            # Run from the temporary directory so logs, the journal, the ledger and the candle
+            # store are not written into the repository
+            with open(os.path.join(work_dir, "console.log"), "w+") as console:
+                completed = subprocess.run(
+                    [sys.executable, os.path.join(package_dir, "trading_loop_benchmark.py"), "--bot", str(cycle_sets), str(duration)],
+                    cwd=work_dir, env=env, stdout=subprocess.PIPE, stderr=console, text=True,
+                )
+
+                for line in completed.stdout.splitlines():
+                    if line.startswith("PORTALX_BENCHMARK_RESULT "):
+                        result = json.loads(line[len("PORTALX_BENCHMARK_RESULT "):])
+                        break
+                else:
+                    console.seek(0)
+                    raise RuntimeError(f"Benchmark run failed:\n{console.read()[-4000:]}")
+    finally:
+        exchange.stop()
+        user_channel.stop()
+        market_channel.stop()
+
+    api_calls = sum(exchange.request_counts.values())
+    result = dict(
+        {"cycle_sets": cycle_sets},
+        **result,
+        api_calls=api_calls,
+        api_calls_per_completed_cycle=round(api_calls / result["completed_cycles"], 2) if result["completed_cycles"] else None,
+        api_calls_by_route=dict(exchange.request_counts.most_common()),
+        exchange_fills=sum(order["status"] == "FILLED" for order in exchange.orders.values()),
+        errors_injected=dict(exchange.errors_injected),
+    )
+    return result
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def main(duration=DURATION, *cycle_set_counts, path=RESULTS_PATH):
+    cycle_set_counts = cycle_set_counts or CYCLE_SET_COUNTS
+    results = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "settings": {
+            "duration": duration,
+            "price_swing": PRICE_SWING,
+            "swing_period": SWING_PERIOD,
+            "exchange_latency": EXCHANGE_LATENCY,
+            "exchange_jitter": EXCHANGE_JITTER,
+            "exchange_error_rates": EXCHANGE_ERROR_RATES,
+            "feed_refresh_interval": FEED_REFRESH_INTERVAL,
+        },
+        "runs": [],
+    }
+
+    for cycle_sets in cycle_set_counts:
+        print(f"Running {cycle_sets} cycle sets for {duration} s...")
+        run = benchmark_run(cycle_sets, duration)
+        results["runs"].append(run)
+
+        print(f"  orders/s {run['orders_per_second']}, completed cycles {run['completed_cycles']}, failed cycle sets {run['failed_cycle_sets']}")
+        for name in ("decision_to_ack", "fill_to_next_order"):
+            print(f"  {name}: " + ", ".join(f"{key} {value}" for key, value in run[name].items()))
+        print(f"  API calls per completed cycle {run['api_calls_per_completed_cycle']}, peak RSS {run['peak_rss_mb']} MB, peak threads {run['peak_threads']}")
+
+    with open(path, "w") as json_file:
+        json.dump(results, json_file, indent=2)
+    print(f"Results written to {path}")
+    return results
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--bot"]:
+        run_bot(int(sys.argv[2]), float(sys.argv[3]))
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
@@ -1,151 +1,79 @@
 # trading_record_manager.py
 import sys
 import threading
-import http.client
 import time
 from logging_config import app_logger, info_logger, error_logger, setup_cycleset_logger
 from user_input2 import collect_user_input, get_valid_choice
 from starting_input import user_config
 from config import config_data
 from cycle_set_utils import CycleSet, Cycle
-        
-conn = http.client.HTTPSConnection("api.coinbase.com")
+from cycle_scheduler import get_cycle_scheduler
+from trade_ledger import get_trade_ledger
 
 api_key = config_data["api_key"]
 api_secret = config_data["api_secret"]
 
-# Define a list to store cycle set instances
-cycle_sets_instances = []
-
-# Define a dictionary to store additional data about each cycle set
-cycle_sets_data = {}
-
-# Example structure for additional data
-# Each cycle set ID will map to a dictionary containing relevant information
-# This is just a placeholder structure; you can customize it based on your needs
-# For simplicity, I'm using cycle set IDs as integers, you can adjust it based on your actual IDs
-cycle_sets_data = {
-    1: {
-        'completed_cycles': 5,
-        'starting_dollar_value': 1000,
-        'current_dollar_value': 1200,
-        'percent_gain_loss_dollar_value': 20,
-        'percent_gain_loss_base_asset': 15,
-        'percent_gain_loss_quote_asset': 25,
-        'average_profit_percent_per_cycle': 2,
-        'average_profit_percent_per_day': 0.5,
-    },
-    2: {
-        # ... data for cycle set 2
-    },
-    # ... additional cycle sets
-}
-
-# Define a list to store cycle set instances
-cycle_instances = []
-
-# Define a dictionary to store additional data about each cycle set
-cycle_data = {}
-
-# Example structure for additional data
-# Each cycle set ID will map to a dictionary containing relevant information
-# This is just a placeholder structure; you can customize it based on your needs
-# For simplicity, I'm using cycle set IDs as integers, you can adjust it based on your actual IDs
-cycle_data = {
-    1: {
-        'completed_cycle_number': 1,
-        'cycleset_number': 1,
-        'starting_dollar_value': 1000,
-        'current_dollar_value': 1200,
-        'percent_gain_loss_dollar_value': 20,
-        'percent_gain_loss_base_asset': 15,
-        'percent_gain_loss_quote_asset': 25,
-        'average_profit_percent_per_cycle': 2,
-        'average_profit_percent_per_day': 0.5,
-    },
-    2: {
-        # ... data for cycle set 2
-    },
-    # ... additional cycle sets
-}
-
 class TradingRecordManager:
-    def __init__(self):
-        # Initialize attributes to store cycle set instances and data
+    # Cycle set records read from the trade ledger: totals come from its indexed tables
+    # instead of requesting every order from the API again
+
+    def __init__(self, ledger=None):
+        self.ledger = ledger or get_trade_ledger()
         self.cycle_sets_instances = []
-        self.cycle_sets_data = {}
+        self.cycle_sets_data = {}  # journal_id -> latest summary of the cycle set
 
     def add_cycle_set(self, cycle_set):
         # Add a new cycle set instance
         self.cycle_sets_instances.append(cycle_set)
+        self.update_cycle_set_data(cycle_set)
 
-        # Add initial data for the cycle set (you might want to adjust this based on your CycleSet attributes)
-        self.cycle_sets_data[cycle_set.id] = {
-            'cycle_set_number': 0,
-            'instance_id': '',
-            'product_id': '',
-            'starting_size': 0,
-            'profit_percent': 0,
-            'taker_fee': 0,
-            'maker_fee': 0,
-            'compound_percent': 0,
-            'compounding_option': '',
-            'wait_period_unit': '',
-            'first_order_wait_period': 0,
-            'chart_interval': 0,
-            'num_intervals': 0,
-            'window_Size': 0,
-            'stacking': None,
-            'step_price': None,
-            'cycle_type': '',
-            'orders': [],
-            'cycle_instances': [],
-            'cycle_set_running': None,
-            'cycleset_status': '',
-            'completed_cycles': 0,
-            'starting_dollar_value': 0,
-            'current_dollar_value': 0,
-            'percent_gain_loss_dollar': 0,
-            'percent_gain_loss_base': 0,
-            'percent_gain_loss_quote': 0,
-            'average_profit_percent_per_hour': 0,
-            'average_profit_percent_per_day': 0
-        }
-
-    def add_cycle(self, cycleset_instance_id, cycle):
+    def add_cycle(self, cycle_set, cycle):
         # Add a new cycle to a specific cycle set
-        self.cycle_sets_instances[cycleset_instance_id].append(cycle)
-
-        # Update data for the cycle set based on the completed cycle
-        self.update_cycle_set_data(cycleset_instance_id)
-
-    def update_cycle_set_data(self, cycleset_instance_id):
-        # Perform calculations to update data for the cycle set
-        # This might involve iterating through cycles in the cycle set and updating data accordingly
-        # For simplicity, let's assume you have a method in CycleSet for getting the relevant data
-        cycle_set = self.cycle_sets_instances[cycleset_instance_id]
-        data = cycle_set.get_cycle_set_data()  # You need to implement this method in your CycleSet class
-        # Update the data in the dictionary
-        self.cycle_sets_data[cycleset_instance_id].update(data)
+        cycle_set.cycle_instances.append(cycle)
+        self.update_cycle_set_data(cycle_set)
+
+    def update_cycle_set_data(self, cycle_set):
+        # Summary of a cycle set from the ledger's running totals (one indexed row per product)
+        totals = self.ledger.cycle_set_totals(cycle_set.journal_id) if cycle_set.journal_id is not None else []
+        data = {
+            'cycleset_instance_id': cycle_set.cycleset_instance_id,
+            'product_id': cycle_set.product_id,
+            'cycle_type': cycle_set.cycle_type,
+            'cycleset_status': cycle_set.cycleset_status,
+            'completed_cycles': sum(row['closing_fills'] for row in totals),
+            'fills': sum(row['fills'] for row in totals),
+            'fees': sum(row['fees'] for row in totals),
+            'net_base': sum(row['net_base'] for row in totals),
+            'net_quote': sum(row['net_quote'] for row in totals),
+            'last_fill': max((row['last_fill'] for row in totals), default=None),
+        }
+        self.cycle_sets_data[cycle_set.journal_id] = data
+        return data
 
     def display_summary_data(self):
         # Display essential information for each cycle set
-        for cycleset_instance_id, data in self.cycle_sets_data.items():
-            print(f"{cycleset_instance_id}: {data['completed_cycles']} cycles, Starting Value: ${data['starting_dollar_value']}")
-
-    def display_detailed_data(self):
-        # Display detailed information for each cycle set
-        for cycleset_instance_id, data in self.cycle_sets_data.items():
-            print(f"Cycle Set {cycleset_instance_id}:")
+        for cycle_set in self.cycle_sets_instances:
+            data = self.update_cycle_set_data(cycle_set)
+            print(f"{data['cycleset_instance_id']}: {data['completed_cycles']} cycles, Net base: {data['net_base']}, Net quote: {data['net_quote']}, Fees: {data['fees']}")
+
+    def display_detailed_data(self, orders_per_cycle_set=10):
+        # Display detailed information and the most recent orders of each cycle set
+        for cycle_set in self.cycle_sets_instances:
+            data = self.update_cycle_set_data(cycle_set)
+            print(f"{data['cycleset_instance_id']}:")
             for key, value in data.items():
                 print(f"  {key}: {value}")
+            if cycle_set.journal_id is not None:
+                for order in self.ledger.cycle_set_orders(cycle_set.journal_id, limit=orders_per_cycle_set):
+                    print(f"  Cycle {order['cycle_number']} {order['phase']} {order['side']} {order['order_id']}: size {order['size']} at {order['price']}, filled {order['filled_size']}")
 
     def display_order_details(self, order_id):
-        from order_utils import get_order_details
         # Display order details of an order from a cycle of a cycle set
-        for order_id, data in self.cycle_sets_data.orders.items():
-            order_details = get_order_details(conn, api_key, api_secret, order_id, max_retries=5)
-            app_logger.info(f"Order {order_id} details: {order_details}")
+        order = self.ledger.order(order_id)
+        if order is None:
+            app_logger.info(f"Order {order_id} is not in the trade ledger")
+        else:
+            app_logger.info(f"Order {order_id} details: {order}")
 
 # Configure the logging settings in your script
 
@@ -219,8 +147,8 @@ def create_and_start_cycle_set_sell_buy(user_config):
 
                 new_cycle_set_sell_buy.cycle_instances.append(new_cycle_sell_buy)
 
-                # Start the sell-buy cycle set
-                new_cycle_set_sell_buy.start_sell_buy_starting_cycle(user_config, sell_buy_cycle_set_counter)
+                # Start the sell-buy cycle set on the cycle scheduler
+                get_cycle_scheduler().submit(new_cycle_set_sell_buy)
                 
                 return new_cycle_set_sell_buy  # Return the newly created CycleSet
             else:
@@ -274,8 +202,8 @@ def create_and_start_cycle_set_buy_sell(user_config):
 
                 new_cycle_set_buy_sell.cycle_instances.append(new_cycle_buy_sell)
 
-                # Start the sell-buy cycle set
-                new_cycle_set_buy_sell.start_buy_sell_starting_cycle(user_config, buy_sell_cycle_set_counter)     
+                # Start the buy-sell cycle set on the cycle scheduler
+                get_cycle_scheduler().submit(new_cycle_set_buy_sell)
                 
                 return new_cycle_set_buy_sell  # Return the newly created CycleSet
 
@@ -291,26 +219,13 @@ def create_and_start_cycle_sets(user_config):
         # Acquire the lock to ensure safe access to user_config
         with user_config_lock:
             try:
-                # Create threads for each CycleSet instance
-                if user_config["starting_size_B"] > 0 and user_config["starting_size_Q"] > 0:
-                    thread_sell_buy = threading.Thread(target=create_and_start_cycle_set_sell_buy, args=(user_config,))
-                    thread_buy_sell = threading.Thread(target=create_and_start_cycle_set_buy_sell, args=(user_config,))
-
-                    # Start the threads
-                    thread_sell_buy.start()
-                    thread_buy_sell.start()
-
-                elif user_config["starting_size_B"] > 0 and user_config["starting_size_Q"] == 0:
-                    thread_sell_buy = threading.Thread(target=create_and_start_cycle_set_sell_buy, args=(user_config,))
+                # Create each CycleSet instance and submit it to the cycle scheduler (the cycle
+                # sets run as tasks on its event loop, so this returns immediately)
+                if user_config["starting_size_B"] > 0:
+                    create_and_start_cycle_set_sell_buy(user_config)
 
-                    # Start the thread
-                    thread_sell_buy.start()
-
-                elif user_config["starting_size_B"] == 0 and user_config["starting_size_Q"] > 0:
-                    thread_buy_sell = threading.Thread(target=create_and_start_cycle_set_buy_sell, args=(user_config,))
-
-                    # Start the threads
-                    thread_buy_sell.start()
+                if user_config["starting_size_Q"] > 0:
+                    create_and_start_cycle_set_buy_sell(user_config)
 
             except Exception as e:
                 # Handle exceptions or errors
@@ -319,6 +234,33 @@ def create_and_start_cycle_sets(user_config):
     else:
         error_logger.error("Unable to create cycle set(s). Invalid user input.")
 
+def restore_cycle_sets():
+    # Rebuild the cycle sets recorded in the cycle journal and resume them where they left off;
+    # returns the restored CycleSet instances (empty when there is nothing to resume)
+    global sell_buy_cycle_set_counter, buy_sell_cycle_set_counter
+
+    scheduler = get_cycle_scheduler()
+    states = scheduler.journal.cycle_sets() if scheduler.journal is not None else {}
+    entries = []
+
+    for journal_id, state in states.items():
+        config = state["config"]
+        cycle_set = CycleSet(**config)
+        cycle_set.journal_id = journal_id
+        cycle_set.cycleset_running = True
+        cycle_sets.append(cycle_set)
+        entries.append((cycle_set, state))
+
+        if config["cycle_type"] == "sell_buy":
+            sell_buy_cycle_set_counter += 1
+        else:
+            buy_sell_cycle_set_counter += 1
+
+    if entries:
+        scheduler.resume(entries)
+
+    return [cycle_set for cycle_set, state in entries]
+
 # Functions to display menu options when called
 def menu_choice(prompt, timeout=60):
     start_time = time.time()
@@ -398,6 +340,9 @@ def handle_options_menu():
                     buy_sell_cycle_sets_data = []
 
                     for i, cycle_set in enumerate(cycle_sets, start=1):
+                        # Refresh the P&L attributes from the running metrics and cached price
+                        cycle_set.update_metrics()
+
                         # Collect cycle set data
                         cycle_set_data = {
                             'cycle_set_number': cycle_set.cycleset_number,
@@ -438,6 +383,7 @@ def handle_options_menu():
                                 'orders': cycle.orders,
                                 # Include other relevant cycle attributes here
                             } for cycle in cycle_set.cycle_instances],                          
+                            'ledger_totals': get_trade_ledger().cycle_set_totals(cycle_set.journal_id) if cycle_set.journal_id is not None else [],
                         }
 
                         # Determine the target list based on cycle set type
@@ -476,7 +422,7 @@ def handle_options_menu():
                             if 1 <= choice_number <= len(running_cycle_sets):
                                 # Stop the selected CycleSet
                                 selected_cycle_set = running_cycle_sets[choice_number - 1]
-                                selected_cycle_set.stop()
+                                get_cycle_scheduler().stop_cycle_set(selected_cycle_set)
                                 app_logger.info(f"CycleSet {selected_cycle_set.cycleset_instance_id} has been stopped.")
                             else:
                                 error_logger.error("Invalid number. Please enter a valid number.")